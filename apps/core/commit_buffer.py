@@ -0,0 +1,101 @@
+"""
+Buffer de lots traités au commit de la transaction.
+
+Les écritures d'une transaction signalent des identifiants (``add``) ; ils
+sont accumulés dans un lot par alias de base et par thread, puis traités une
+seule fois au commit (``process``). Hors transaction, le lot est traité
+immédiatement ; après un rollback, il est abandonné.
+
+Un lot n'est rattaché qu'à la liste ``connection.run_on_commit`` courante :
+après un commit ou un rollback, un nouveau lot (et un nouveau callback) est
+créé. Les traitements doivent donc être idempotents (recalcul de l'état
+courant), ce qui est le cas des usages : rafraîchissement d'InventoryResult,
+événements PDA, notification des tableaux de bord.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+
+class PendingBatch:
+    """Ensembles d'identifiants accumulés pour une transaction donnée."""
+
+    def __init__(self, using: str, hooks: Optional[list], fields: Sequence[str]):
+        self.using = using
+        self.hooks = hooks
+        self.fields = tuple(fields)
+        self.flushed = False
+        for name in self.fields:
+            setattr(self, name, set())
+
+    def __bool__(self) -> bool:
+        return any(getattr(self, name) for name in self.fields)
+
+
+class OnCommitBatchBuffer:
+    """
+    Buffer thread-local vidé au commit.
+
+    Les sous-classes déclarent ``fields`` (noms des ensembles du lot) et
+    implémentent ``process`` ; ``enabled`` permet de couper la collecte par
+    un réglage. Une erreur de ``process`` est journalisée (``error_message``,
+    logger du module de la sous-classe) sans remonter : les données sont déjà
+    commitées.
+    """
+
+    fields: Sequence[str] = ()
+    error_message = "Traitement au commit impossible"
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def enabled(self) -> bool:
+        return True
+
+    def new_batch(self, using: str, hooks: Optional[list] = None) -> PendingBatch:
+        return PendingBatch(using, hooks, self.fields)
+
+    def add(self, using: Optional[str] = None, **values: Iterable[Any]) -> None:
+        """Ajoute des valeurs (``None`` ignorés) aux ensembles du lot courant."""
+        if not self.enabled():
+            return
+        using = using or DEFAULT_DB_ALIAS
+        connection = transaction.get_connection(using)
+        in_atomic = connection.in_atomic_block
+        batch = self._current(connection, using) if in_atomic else self.new_batch(using)
+
+        for name, items in values.items():
+            getattr(batch, name).update(item for item in items if item is not None)
+
+        if not in_atomic:
+            self._flush(batch)
+
+    def process(self, batch: PendingBatch) -> None:
+        raise NotImplementedError
+
+    def _current(self, connection, using: str) -> PendingBatch:
+        per_alias: Optional[Dict[str, PendingBatch]] = getattr(self._local, "pending", None)
+        if per_alias is None:
+            per_alias = self._local.pending = {}
+        batch = per_alias.get(using)
+        if batch is not None and not batch.flushed and batch.hooks is connection.run_on_commit:
+            return batch
+
+        batch = per_alias[using] = self.new_batch(using, connection.run_on_commit)
+        transaction.on_commit(lambda: self._flush(batch), using=using)
+        return batch
+
+    def _flush(self, batch: PendingBatch) -> None:
+        if batch.flushed or not batch:
+            batch.flushed = True
+            return
+        batch.flushed = True
+        try:
+            self.process(batch)
+        except Exception:
+            logging.getLogger(type(self).__module__).exception(self.error_message)
+
@@ -77,6 +77,13 @@ from .optimizations import (
     optimize_queryset          # Fonction utilitaire pour optimiser un QuerySet
 )
 
+# Data requirements - Besoins en données déclarés par les serializers
+from .requirements import (
+    DataRequirements,          # Relations / annotations nécessaires à un serializer
+    LazyQueryError,            # Requête émise pendant la sérialisation (mode strict)
+    apply_data_requirements,   # Applique les besoins d'un serializer à un QuerySet
+)
+
 # =============================================================================
 # EXPORT PUBLIC - Toutes les classes et fonctions disponibles
 # =============================================================================
@@ -113,6 +120,10 @@ __all__ = [
     'OptimizedQuerySetMixin',        # Mixin pour optimiser les QuerySets
     'PaginationCacheMixin',          # Mixin pour cache de pagination
     'optimize_queryset',             # Fonction utilitaire d'optimisation
+    # Data requirements
+    'DataRequirements',              # Besoins en données d'un serializer
+    'LazyQueryError',                # Requête paresseuse détectée (mode strict)
+    'apply_data_requirements',       # Application des besoins à un QuerySet
 ]
 
 # =============================================================================
@@ -45,6 +45,7 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from .optimizations import optimize_queryset
+from .requirements import apply_data_requirements, forbid_lazy_queries, get_data_requirements
 
 logger = logging.getLogger(__name__)
             
@@ -122,6 +123,8 @@ class QueryModelMixin:
           - prefetch_related_fields : Liste de champs pour prefetch_related()
           - only_fields : Liste de champs à charger uniquement
           - defer_fields : Liste de champs à exclure
+        - Les besoins déclarés par le serializer (``data_requirements``) sont
+          toujours appliqués, voir ``requirements.DataRequirements``.
         
         Exemple:
             class MyView(QueryModelView):
@@ -153,6 +156,9 @@ class QueryModelMixin:
             )
         # Sinon, retourner le queryset tel quel (pas d'optimisation automatique)
 
+        # Besoins déclarés par le serializer (data_requirements)
+        queryset = apply_data_requirements(queryset, self.serializer_class)
+
         return DataSourceFactory.create(queryset)
     
     def get_column_field_mapping(self) -> Dict[str, str]:
@@ -357,7 +363,13 @@ class QueryModelMixin:
         """
         serializer_class = self.get_serializer_class()
         
-        if isinstance(data, QuerySet):
+        if isinstance(data, QuerySet) and get_data_requirements(serializer_class):
+            # Évaluer le QuerySet (et ses prefetch) avant la sérialisation :
+            # en mode strict, toute requête émise ensuite est un besoin non déclaré
+            instances = list(data)
+            with forbid_lazy_queries(serializer_class):
+                return serializer_class(instances, many=True).data
+        elif isinstance(data, QuerySet):
             # QuerySet -> utiliser many=True
             serializer = serializer_class(data, many=True)
             return serializer.data
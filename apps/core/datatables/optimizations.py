@@ -11,6 +11,8 @@ from django.core.cache import cache
 import hashlib
 import logging
 
+from .requirements import apply_data_requirements, get_data_requirements
+
 logger = logging.getLogger(__name__)
 
 
@@ -62,6 +64,9 @@ class OptimizedQuerySetMixin:
         if self.defer_fields:
             queryset = queryset.defer(*self.defer_fields)
         
+        # Besoins déclarés par le serializer (data_requirements)
+        queryset = apply_data_requirements(queryset, getattr(self, 'serializer_class', None))
+        
         return queryset
 
 
@@ -244,6 +249,7 @@ def auto_detect_optimizations(
     2. Le serializer DRF pour détecter les champs utilisés
     3. Les champs lourds (TextField, BinaryField) à exclure
     4. Le column_field_mapping pour détecter les relations utilisées
+    5. Les besoins déclarés par le serializer (data_requirements)
     
     Args:
         model: Classe du modèle Django
@@ -379,6 +385,13 @@ def auto_detect_optimizations(
         if only_fields and model_meta.pk:
             only_fields.add(model_meta.pk.name)
         
+        # 8. Besoins déclarés par le serializer (data_requirements)
+        requirements = get_data_requirements(serializer_class)
+        select_related_fields.update(requirements.select_related)
+        prefetch_related_fields.update(
+            lookup for lookup in requirements.prefetch_related if isinstance(lookup, str)
+        )
+        
         # Convertir les sets en listes triées
         return {
             'select_related': sorted(list(select_related_fields)),
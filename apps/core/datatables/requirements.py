@@ -0,0 +1,139 @@
+"""
+Besoins en données déclarés par les serializers.
+
+Un serializer dont les méthodes (SerializerMethodField, helpers) lisent des
+relations déclare ce qu'il attend du QuerySet au lieu de compter sur chaque vue
+pour penser au bon ``prefetch_related`` :
+
+    class InventoryDetailSerializer(serializers.ModelSerializer):
+        data_requirements = DataRequirements(
+            prefetch_related=['awi_links__account', 'awi_links__warehouse', 'countings'],
+        )
+
+Les mixins DataTable (QueryModelMixin, OptimizedQuerySetMixin,
+auto_detect_optimizations) appliquent ces besoins automatiquement.
+
+En mode strict (``DATATABLES_STRICT_DATA_REQUIREMENTS``, par défaut ``DEBUG``),
+toute requête SQL émise pendant la sérialisation d'un serializer déclarant ses
+besoins lève ``LazyQueryError`` : un besoin oublié est détecté en dev/test au
+lieu de devenir un N+1 en production.
+"""
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import QuerySet
+
+
+class LazyQueryError(Exception):
+    """Requête SQL émise pendant la sérialisation (besoin en données non déclaré)"""
+    pass
+
+
+@dataclass(frozen=True)
+class DataRequirements:
+    """
+    Relations et annotations nécessaires à un serializer.
+
+    Attributes:
+        select_related: Relations ForeignKey / OneToOne à joindre
+        prefetch_related: Relations inverses / ManyToMany (lookups ou objets Prefetch)
+        annotations: Annotations nommées (nom -> expression)
+    """
+    select_related: List[str] = field(default_factory=list)
+    prefetch_related: List[Any] = field(default_factory=list)
+    annotations: Dict[str, Any] = field(default_factory=dict)
+
+    def __bool__(self) -> bool:
+        return bool(self.select_related or self.prefetch_related or self.annotations)
+
+    def merge(self, other: 'DataRequirements') -> 'DataRequirements':
+        """Union de deux déclarations (l'ordre des lookups est conservé)"""
+        return DataRequirements(
+            select_related=list(dict.fromkeys([*self.select_related, *other.select_related])),
+            prefetch_related=_unique_lookups([*self.prefetch_related, *other.prefetch_related]),
+            annotations={**self.annotations, **other.annotations},
+        )
+
+
+def _unique_lookups(lookups: List[Any]) -> List[Any]:
+    """Dédoublonne les lookups de prefetch (chaînes ou objets Prefetch)"""
+    seen = set()
+    unique = []
+    for lookup in lookups:
+        key = getattr(lookup, 'prefetch_to', lookup)
+        if key not in seen:
+            seen.add(key)
+            unique.append(lookup)
+    return unique
+
+
+def get_data_requirements(serializer_class: Optional[type]) -> DataRequirements:
+    """
+    Retourne les besoins déclarés par un serializer (attribut ``data_requirements``).
+
+    Les besoins des classes parentes sont fusionnés, de sorte qu'un serializer
+    dérivé n'a qu'à déclarer ce qu'il ajoute.
+    """
+    requirements = DataRequirements()
+    if serializer_class is None:
+        return requirements
+    for klass in reversed(serializer_class.__mro__):
+        declared = klass.__dict__.get('data_requirements')
+        if isinstance(declared, DataRequirements):
+            requirements = requirements.merge(declared)
+    return requirements
+
+
+def apply_data_requirements(queryset: QuerySet, serializer_class: Optional[type]) -> QuerySet:
+    """
+    Applique au QuerySet les besoins déclarés par le serializer.
+
+    Les annotations déjà présentes sur le QuerySet ne sont pas réappliquées.
+    """
+    requirements = get_data_requirements(serializer_class)
+    if not requirements or not isinstance(queryset, QuerySet):
+        return queryset
+    if requirements.select_related:
+        queryset = queryset.select_related(*requirements.select_related)
+    if requirements.prefetch_related:
+        queryset = queryset.prefetch_related(*requirements.prefetch_related)
+    annotations = {
+        name: expression
+        for name, expression in requirements.annotations.items()
+        if name not in queryset.query.annotations
+    }
+    if annotations:
+        queryset = queryset.annotate(**annotations)
+    return queryset
+
+
+def is_strict_mode() -> bool:
+    """Mode strict : requêtes interdites pendant la sérialisation (DEBUG par défaut)"""
+    return getattr(settings, 'DATATABLES_STRICT_DATA_REQUIREMENTS', settings.DEBUG)
+
+
+@contextmanager
+def forbid_lazy_queries(serializer_class: Optional[type]) -> Iterator[None]:
+    """
+    Lève LazyQueryError si une requête SQL est émise dans le bloc.
+
+    Sans effet hors mode strict ou si le serializer ne déclare aucun besoin
+    (les serializers non migrés gardent leur comportement).
+    """
+    if not is_strict_mode() or not get_data_requirements(serializer_class):
+        yield
+        return
+
+    name = serializer_class.__name__
+
+    def blocker(execute, sql, params, many, context):
+        raise LazyQueryError(
+            f"{name} a déclenché une requête pendant la sérialisation ; "
+            f"déclarez la relation dans {name}.data_requirements. SQL: {sql[:200]}"
+        )
+
+    with connection.execute_wrapper(blocker):
+        yield
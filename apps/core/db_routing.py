@@ -0,0 +1,166 @@
+"""
+Routage des lectures de reporting vers une réplique PostgreSQL (alias ``reporting``).
+
+KPI, monitoring, résultats et exports exécutent de gros agrégats ; sur la
+base principale ils concurrencent les écritures des PDA. Les services en
+lecture seule sont marqués explicitement :
+
+    @reporting_service
+    class KpisService: ...
+
+    with reporting_reads():
+        rows = list(queryset)
+
+Seules les lectures faites dans ce périmètre partent sur la réplique ; tout le
+reste (et toutes les écritures) reste sur ``default``.
+
+Lecture de ses propres écritures (stickiness) :
+- dans une transaction ouverte sur ``default``, les lectures restent sur
+  ``default`` ;
+- après une écriture, le reste de la portée ``primary_pinning`` (requête
+  HTTP, tâche d'arrière-plan, commande) lit sur ``default``. Hors portée,
+  une écriture n'épingle rien : sans jeton à restaurer, l'épinglage
+  durerait tout le contexte (thread du runner, consumer channels...) ;
+- ``ReportingStickinessMiddleware`` épingle aussi les requêtes non sûres
+  (POST, PATCH...) et pose un cookie court après une écriture : les requêtes
+  suivantes du même client lisent sur ``default`` pendant
+  REPORTING_STICKY_SECONDS (délai de réplication).
+
+Routage désactivé (REPORTING_READS_ENABLED=False, défaut sans réplique) :
+tout part sur ``default``.
+"""
+from __future__ import annotations
+
+import functools
+import inspect
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPORTING_DB_ALIAS = 'reporting'
+# Cookie posé après une écriture : lectures sur default pendant le délai de réplication
+REPORTING_PIN_COOKIE = 'reporting_pin'
+
+_reporting = ContextVar('reporting_reads', default=False)
+_pinned = ContextVar('reporting_pinned', default=False)
+_wrote = ContextVar('reporting_wrote', default=False)
+# Portée primary_pinning active : seule condition pour épingler après une écriture
+_scoped = ContextVar('reporting_scoped', default=False)
+
+
+def reporting_enabled() -> bool:
+    return getattr(settings, 'REPORTING_READS_ENABLED', False) and REPORTING_DB_ALIAS in settings.DATABASES
+
+
+@contextmanager
+def reporting_reads():
+    """Lectures du bloc routées vers la réplique (utilisable aussi en décorateur)."""
+    token = _reporting.set(True)
+    try:
+        yield
+    finally:
+        _reporting.reset(token)
+
+
+def _wrap_reporting(func):
+    if inspect.isgeneratorfunction(func):
+        @functools.wraps(func)
+        def generator_wrapper(*args, **kwargs):
+            # Le contexte ne couvre que l'exécution du générateur, pas l'appelant entre deux yields
+            generator = func(*args, **kwargs)
+            while True:
+                with reporting_reads():
+                    try:
+                        item = next(generator)
+                    except StopIteration as stop:
+                        return stop.value
+                yield item
+        return generator_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with reporting_reads():
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def reporting_service(cls):
+    """
+    Décorateur de classe : toutes les méthodes (hors dunder) lisent sur la réplique.
+
+    À réserver aux services et repositories en lecture seule ; une écriture
+    éventuelle part tout de même sur ``default`` et épingle la suite.
+    """
+    for name, attr in list(vars(cls).items()):
+        if name.startswith('__'):
+            continue
+        if isinstance(attr, staticmethod):
+            setattr(cls, name, staticmethod(_wrap_reporting(attr.__func__)))
+        elif isinstance(attr, classmethod):
+            setattr(cls, name, classmethod(_wrap_reporting(attr.__func__)))
+        elif inspect.isfunction(attr):
+            setattr(cls, name, _wrap_reporting(attr))
+    return cls
+
+
+@contextmanager
+def primary_pinning(pinned: bool = False):
+    """
+    Portée d'épinglage (requête HTTP, tâche, commande) : ``pinned`` initial,
+    remis à zéro en sortie. Utilisable aussi en décorateur.
+
+    Yields:
+        Callable renvoyant True si une écriture a eu lieu dans la portée.
+    """
+    scoped_token = _scoped.set(True)
+    pinned_token = _pinned.set(pinned)
+    wrote_token = _wrote.set(False)
+    try:
+        yield _wrote.get
+    finally:
+        _wrote.reset(wrote_token)
+        _pinned.reset(pinned_token)
+        _scoped.reset(scoped_token)
+
+
+def pin_to_primary() -> None:
+    """Lectures suivantes de la portée ``primary_pinning`` courante sur ``default`` (sans effet hors portée)."""
+    if _scoped.get():
+        _pinned.set(True)
+
+
+class ReportingRouter:
+    """
+    Router Django : lectures marquées -> ``reporting``, tout le reste -> ``default``.
+
+    La réplique ne reçoit jamais de migration (réplication physique).
+    """
+
+    def db_for_read(self, model, **hints):
+        if _pinned.get():
+            return DEFAULT_DB_ALIAS
+        if not _reporting.get() or not reporting_enabled():
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return REPORTING_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        if _scoped.get():
+            _pinned.set(True)
+            _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Mêmes données physiques : un objet lu sur la réplique peut être lié à un objet de default
+        dbs = {DEFAULT_DB_ALIAS, REPORTING_DB_ALIAS}
+        if obj1._state.db in dbs and obj2._state.db in dbs:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == REPORTING_DB_ALIAS:
+            return False
+        return None
@@ -0,0 +1,33 @@
+"""
+Sous-système d'historique (django-simple-history) avec mode d'écriture par modèle.
+
+- ``BufferedHistoricalRecords`` remplace ``HistoricalRecords`` dans les modèles
+- ``settings.HISTORY_MODES`` / ``settings.HISTORY_DEFAULT_MODE`` : ``sync`` | ``batched`` | ``off``
+- ``record_bulk_history`` : historique des chemins bulk_create / bulk_update en mode ``batched``
+"""
+from .modes import HistoryMode, get_history_mode, is_history_batched, history_mode
+from .buffer import HistoryBuffer, history_buffer
+from .records import BufferedHistoricalRecords, build_history_row
+from .bulk import (
+    HISTORY_CREATED,
+    HISTORY_CHANGED,
+    HISTORY_DELETED,
+    record_bulk_history,
+    record_queryset_update_history,
+)
+
+__all__ = [
+    'HistoryMode',
+    'get_history_mode',
+    'is_history_batched',
+    'history_mode',
+    'HistoryBuffer',
+    'history_buffer',
+    'BufferedHistoricalRecords',
+    'build_history_row',
+    'HISTORY_CREATED',
+    'HISTORY_CHANGED',
+    'HISTORY_DELETED',
+    'record_bulk_history',
+    'record_queryset_update_history',
+]
@@ -0,0 +1,155 @@
+"""
+Tampon des lignes historiques en mode ``batched``.
+
+Les lignes sont regroupées par transaction (et par niveau de savepoint) puis
+insérées via un bulk_create par modèle historique dans un callback
+``transaction.on_commit``. On s'appuie uniquement sur la sémantique de
+``on_commit`` :
+- rollback de la transaction      -> callback supprimé, lignes abandonnées
+- rollback d'un savepoint interne -> callbacks enregistrés dans ce savepoint supprimés
+
+Un lot est rattaché à la liste ``connection.run_on_commit`` au moment de sa
+création : Django remplace cette liste à chaque commit/rollback (y compris
+rollback de savepoint). Un lot dont la liste ne correspond plus est donc
+périmé et n'est plus alimenté ; s'il a survécu, son callback l'insérera quand même.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_BATCH_SIZE = 1000
+
+
+class _HistoryBatch:
+    """Lignes historiques en attente pour un niveau de transaction donné."""
+
+    __slots__ = ("using", "savepoint_key", "hooks", "rows", "flushed")
+
+    def __init__(self, using: str, savepoint_key: Tuple, hooks: list):
+        self.using = using
+        self.savepoint_key = savepoint_key
+        self.hooks = hooks
+        self.rows: Dict[type, List] = defaultdict(list)
+        self.flushed = False
+
+    def is_current(self, connection) -> bool:
+        return (
+            not self.flushed
+            and self.hooks is connection.run_on_commit
+            and self.savepoint_key == tuple(connection.savepoint_ids)
+        )
+
+    def __len__(self) -> int:
+        return sum(len(rows) for rows in self.rows.values())
+
+
+class HistoryBuffer:
+    """
+    Buffer thread-local des lignes historiques, vidé au commit.
+
+    Les connexions Django étant propres à chaque thread, l'état est conservé
+    dans un ``threading.local`` indexé par alias de base.
+    """
+
+    def __init__(self, batch_size: int = DEFAULT_FLUSH_BATCH_SIZE):
+        self.batch_size = batch_size
+        self._local = threading.local()
+
+    def _batches(self, using: str) -> Dict[Tuple, _HistoryBatch]:
+        per_alias = getattr(self._local, "batches", None)
+        if per_alias is None:
+            per_alias = {}
+            self._local.batches = per_alias
+        return per_alias.setdefault(using, {})
+
+    def add(self, history_instance, using: Optional[str] = None) -> None:
+        """Ajoute une ligne historique (non sauvegardée) au lot courant."""
+        self.extend([history_instance], using=using)
+
+    def extend(self, history_instances, using: Optional[str] = None) -> None:
+        """
+        Ajoute plusieurs lignes historiques (non sauvegardées).
+
+        Hors bloc atomique (autocommit), les lignes sont insérées immédiatement
+        en bulk : il n'y a pas de transaction à attendre.
+        """
+        history_instances = list(history_instances)
+        if not history_instances:
+            return
+
+        using = using or DEFAULT_DB_ALIAS
+        connection = transaction.get_connection(using)
+
+        if not connection.in_atomic_block:
+            self._bulk_insert(_group_by_model(history_instances), using)
+            return
+
+        batch = self._current_batch(connection, using)
+        for history_instance in history_instances:
+            batch.rows[type(history_instance)].append(history_instance)
+
+    def pending_count(self, using: Optional[str] = None) -> int:
+        """Nombre de lignes en attente dans la transaction courante."""
+        using = using or DEFAULT_DB_ALIAS
+        connection = transaction.get_connection(using)
+        return sum(
+            len(batch)
+            for batch in self._batches(using).values()
+            if batch.is_current(connection)
+        )
+
+    def _current_batch(self, connection, using: str) -> _HistoryBatch:
+        batches = self._batches(using)
+        key = tuple(connection.savepoint_ids)
+        batch = batches.get(key)
+        if batch is not None and batch.is_current(connection):
+            return batch
+
+        # Nouvelle transaction ou savepoint annulé : les lots précédents ne sont plus
+        # alimentés (ceux encore valides seront vidés par leur propre callback).
+        for stale_key in [k for k, b in batches.items() if b.hooks is not connection.run_on_commit]:
+            del batches[stale_key]
+
+        batch = _HistoryBatch(using, key, connection.run_on_commit)
+        batches[key] = batch
+        transaction.on_commit(lambda: self._flush(batch), using=using)
+        return batch
+
+    def _flush(self, batch: _HistoryBatch) -> None:
+        if batch.flushed:
+            return
+        batch.flushed = True
+        batches = self._batches(batch.using)
+        if batches.get(batch.savepoint_key) is batch:
+            del batches[batch.savepoint_key]
+        self._bulk_insert(batch.rows, batch.using)
+
+    def _bulk_insert(self, rows_by_model: Dict[type, List], using: str) -> None:
+        for history_model, rows in rows_by_model.items():
+            if not rows:
+                continue
+            history_model._default_manager.using(using).bulk_create(
+                rows, batch_size=self.batch_size
+            )
+            logger.debug(
+                "Historique : %s ligne(s) insérée(s) en bulk pour %s",
+                len(rows),
+                history_model._meta.label,
+            )
+
+
+def _group_by_model(history_instances) -> Dict[type, List]:
+    grouped: Dict[type, List] = defaultdict(list)
+    for history_instance in history_instances:
+        grouped[type(history_instance)].append(history_instance)
+    return grouped
+
+
+history_buffer = HistoryBuffer()
@@ -0,0 +1,74 @@
+"""
+Historique des chemins bulk (bulk_create, bulk_update, QuerySet.update).
+
+Ces opérations ne déclenchent pas les signaux post_save : sans appel explicite,
+aucune ligne historique n'est écrite. En mode ``batched``, les helpers ci-dessous
+ajoutent les lignes correspondantes au buffer de la transaction. En modes ``sync``
+et ``off``, ils ne font rien (comportement inchangé : pas d'historique sur les
+chemins bulk).
+"""
+from __future__ import annotations
+
+from typing import Iterable, List, Optional
+
+from django.db import router
+from django.utils import timezone
+from simple_history.utils import get_history_model_for_model
+
+from .buffer import history_buffer
+from .modes import is_history_batched
+from .records import build_history_row
+
+HISTORY_CREATED = "+"
+HISTORY_CHANGED = "~"
+HISTORY_DELETED = "-"
+
+
+def record_bulk_history(
+    objs: Iterable,
+    model=None,
+    history_type: str = HISTORY_CREATED,
+    using: Optional[str] = None,
+) -> int:
+    """
+    Bufferise les lignes historiques d'objets écrits par un chemin bulk.
+
+    Args:
+        objs: Instances déjà persistées (pk renseigné)
+        model: Modèle concerné (déduit du premier objet si absent)
+        history_type: ``+`` création, ``~`` modification, ``-`` suppression
+        using: Alias de base (routeur par défaut)
+
+    Returns:
+        int: Nombre de lignes historiques ajoutées au buffer
+    """
+    objs = [obj for obj in objs if obj.pk is not None]
+    if not objs:
+        return 0
+
+    model = model or type(objs[0])
+    if not is_history_batched(model):
+        return 0
+
+    history_model = get_history_model_for_model(model)
+    using = using or router.db_for_write(history_model)
+    history_date = timezone.now()
+    rows = [build_history_row(history_model, obj, history_type, history_date=history_date) for obj in objs]
+    history_buffer.extend(rows, using=using)
+    return len(rows)
+
+
+def record_queryset_update_history(model, ids: List[int], using: Optional[str] = None) -> int:
+    """
+    Bufferise l'historique de lignes modifiées par ``QuerySet.update()``.
+
+    Les valeurs à jour sont relues en une requête (uniquement en mode ``batched``).
+    """
+    if not ids or not is_history_batched(model):
+        return 0
+    return record_bulk_history(
+        model._base_manager.filter(pk__in=ids),
+        model=model,
+        history_type=HISTORY_CHANGED,
+        using=using,
+    )
@@ -0,0 +1,97 @@
+"""
+Résolution du mode d'écriture de l'historique (django-simple-history) par modèle.
+
+Trois modes :
+- ``sync``    : une ligne historique est insérée à chaque save()/delete() (comportement historique)
+- ``batched`` : les lignes historiques sont bufferisées par transaction et insérées
+                en un seul bulk_create au commit
+- ``off``     : aucun historique n'est écrit
+
+Le mode est lu dans ``settings.HISTORY_MODES`` (clé ``app_label.ModelName``),
+sinon ``settings.HISTORY_DEFAULT_MODE`` (``sync`` par défaut).
+"""
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Optional
+
+from django.conf import settings
+
+
+class HistoryMode:
+    SYNC = "sync"
+    BATCHED = "batched"
+    OFF = "off"
+
+    CHOICES = (SYNC, BATCHED, OFF)
+
+
+_local = threading.local()
+
+
+def _overrides() -> list:
+    stack = getattr(_local, "overrides", None)
+    if stack is None:
+        stack = []
+        _local.overrides = stack
+    return stack
+
+
+def _validate_mode(mode: str) -> str:
+    if mode not in HistoryMode.CHOICES:
+        raise ValueError(
+            f"Mode d'historique invalide : {mode!r} (attendu : {', '.join(HistoryMode.CHOICES)})"
+        )
+    return mode
+
+
+def get_history_mode(model) -> str:
+    """
+    Retourne le mode d'historique effectif pour un modèle (classe ou instance).
+    """
+    if not getattr(settings, "SIMPLE_HISTORY_ENABLED", True):
+        return HistoryMode.OFF
+
+    label = model._meta.label
+
+    for labels, mode in reversed(_overrides()):
+        if labels is None or label in labels:
+            return mode
+
+    modes = getattr(settings, "HISTORY_MODES", {}) or {}
+    mode = modes.get(label) or modes.get(label.lower())
+    if mode is None:
+        mode = getattr(settings, "HISTORY_DEFAULT_MODE", HistoryMode.SYNC)
+    return _validate_mode(mode)
+
+
+def is_history_batched(model) -> bool:
+    return get_history_mode(model) == HistoryMode.BATCHED
+
+
+@contextmanager
+def history_mode(mode: str, models: Optional[Iterable] = None) -> Iterator[None]:
+    """
+    Force temporairement un mode d'historique (thread courant uniquement).
+
+    Args:
+        mode: ``sync``, ``batched`` ou ``off``
+        models: Modèles concernés (classes ou labels ``app_label.ModelName``).
+                ``None`` = tous les modèles historisés.
+
+    Usage:
+        with history_mode(HistoryMode.OFF, [CountingDetail]):
+            ...
+    """
+    _validate_mode(mode)
+    labels = None
+    if models is not None:
+        labels = frozenset(m if isinstance(m, str) else m._meta.label for m in models)
+
+    stack = _overrides()
+    stack.append((labels, mode))
+    try:
+        yield
+    finally:
+        stack.pop()
@@ -0,0 +1,85 @@
+"""
+Champ ``HistoricalRecords`` tenant compte du mode d'historique du modèle.
+"""
+from __future__ import annotations
+
+from typing import Optional
+
+from django.db import router
+from django.utils import timezone
+from simple_history.models import HistoricalRecords
+from simple_history.signals import pre_create_historical_record
+from simple_history.utils import get_change_reason_from_object
+
+from .buffer import history_buffer
+from .modes import HistoryMode, get_history_mode
+
+
+def build_history_row(history_model, instance, history_type: str, history_date=None, history_user=None):
+    """
+    Construit (sans la sauvegarder) la ligne historique d'une instance.
+
+    Même contenu que ``HistoryManager.bulk_history_create`` de simple_history.
+    """
+    if history_user is None:
+        history_user = getattr(
+            instance,
+            "_history_user",
+            history_model.get_default_history_user(instance),
+        )
+    row = history_model(
+        history_date=getattr(instance, "_history_date", history_date or timezone.now()),
+        history_user=history_user,
+        history_change_reason=get_change_reason_from_object(instance),
+        history_type=history_type,
+        **{field.attname: getattr(instance, field.attname) for field in history_model.tracked_fields},
+    )
+    if hasattr(history_model, "history_relation"):
+        row.history_relation_id = instance.pk
+    return row
+
+
+class BufferedHistoricalRecords(HistoricalRecords):
+    """
+    ``HistoricalRecords`` avec trois modes par modèle (voir ``apps.core.history.modes``).
+
+    - ``sync``    : délègue à simple_history (une insertion par save/delete)
+    - ``batched`` : la ligne est construite puis ajoutée au buffer de la transaction
+    - ``off``     : aucune ligne n'est écrite
+
+    En mode ``batched``, le signal ``pre_create_historical_record`` est émis à la
+    construction de la ligne ; ``post_create_historical_record`` ne l'est pas
+    (comme pour ``bulk_history_create`` de simple_history).
+    """
+
+    def create_historical_record(self, instance, history_type, using=None):
+        mode = get_history_mode(instance)
+        if mode == HistoryMode.OFF:
+            return
+        if mode == HistoryMode.SYNC:
+            return super().create_historical_record(instance, history_type, using=using)
+
+        manager = getattr(instance, self.manager_name)
+        history_model = manager.model
+        using = self._resolve_using(history_model, instance, using)
+
+        history_instance = build_history_row(
+            history_model,
+            instance,
+            history_type,
+            history_user=self.get_history_user(instance),
+        )
+        pre_create_historical_record.send(
+            sender=history_model,
+            instance=instance,
+            history_date=history_instance.history_date,
+            history_user=history_instance.history_user,
+            history_change_reason=history_instance.history_change_reason,
+            history_instance=history_instance,
+            using=using,
+        )
+        history_buffer.add(history_instance, using=using)
+
+    def _resolve_using(self, history_model, instance, using: Optional[str]) -> str:
+        using = using if self.use_base_model_db else None
+        return using or router.db_for_write(history_model, instance=instance)
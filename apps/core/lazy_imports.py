@@ -0,0 +1,199 @@
+"""
+Import différé des dépendances lourdes (pandas, numpy, openpyxl, reportlab).
+
+L'URLconf importe toutes les vues, donc tous les services : un import en tête
+de module de pandas ou reportlab est payé par chaque worker au démarrage (temps
+et mémoire), même s'il ne lit jamais d'Excel ni ne génère de PDF.
+
+``lazy_import`` renvoie un proxy qui n'importe le module qu'au premier accès
+à un attribut :
+
+    from apps.core.lazy_imports import lazy_import
+
+    pd = lazy_import('pandas')
+
+    def read(path):
+        return pd.read_excel(path)   # pandas importé ici
+
+Les annotations ``pd.DataFrame`` des signatures sont évaluées à la définition
+de la fonction : les modules concernés utilisent
+``from __future__ import annotations``.
+
+``manage.py importtime`` mesure le coût d'import par module ;
+``apps.inventory.tests.test_lazy_imports`` échoue si l'URLconf importe un
+module de HEAVY_MODULES en tête de module.
+"""
+import importlib
+import json
+import os
+import subprocess
+import sys
+from dataclasses import dataclass
+from types import ModuleType
+from typing import List, Optional
+
+# Paquets dont l'import coûte plusieurs dizaines de ms / Mo
+HEAVY_MODULES = ('pandas', 'numpy', 'openpyxl', 'reportlab', 'pyarrow')
+
+
+class LazyModule:
+    """Proxy d'un module importé au premier accès à un attribut."""
+
+    __slots__ = ('_lazy_name', '_lazy_module')
+
+    def __init__(self, name: str):
+        self._lazy_name = name
+        self._lazy_module: Optional[ModuleType] = None
+
+    def _load(self) -> ModuleType:
+        module = self._lazy_module
+        if module is None:
+            module = self._lazy_module = importlib.import_module(self._lazy_name)
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = 'chargé' if self._lazy_module is not None else 'non chargé'
+        return f'<LazyModule {self._lazy_name} ({state})>'
+
+
+def lazy_import(name: str) -> LazyModule:
+    """
+    Module ``name`` importé au premier accès à l'un de ses attributs.
+
+    Args:
+        name: Nom complet du module (``'pandas'``, ``'reportlab.lib.units'``)
+    """
+    return LazyModule(name)
+
+
+def _subprocess_env() -> dict:
+    from django.conf import settings
+
+    env = dict(os.environ)
+    env.setdefault('DJANGO_SETTINGS_MODULE', settings.SETTINGS_MODULE)
+    return env
+
+
+# Exécuté dans un interpréteur neuf : enregistre chaque ``import`` d'un module
+# lourd fait par un module du projet pendant django.setup() et l'import des cibles
+_EAGER_IMPORT_PROBE = '''
+import builtins, importlib, json, sys
+heavy, prefixes, targets = json.loads(sys.argv[1])
+found = []
+original_import = builtins.__import__
+
+def probe(name, globals=None, locals=None, fromlist=(), level=0):
+    if level == 0 and name.partition('.')[0] in heavy and globals:
+        importer = globals.get('__name__') or ''
+        if importer.partition('.')[0] in prefixes:
+            found.append([importer, name])
+    return original_import(name, globals, locals, fromlist, level)
+
+builtins.__import__ = probe
+import django
+django.setup()
+for target in targets:
+    importlib.import_module(target)
+print(json.dumps(found))
+'''
+
+
+def find_eager_heavy_imports(
+    targets=('project.urls',),
+    heavy=HEAVY_MODULES,
+    prefixes=('apps', 'project'),
+):
+    """
+    Imports de modules lourds faits par le projet au chargement de ``targets``.
+
+    Lancé dans un sous-processus (les modules déjà importés par le processus
+    courant fausseraient le résultat). Les imports faits par des paquets
+    tiers (ex. tablib -> openpyxl via django-import-export) ne sont pas comptés.
+
+    Returns:
+        Liste triée et dédoublonnée de (module importateur, module lourd)
+    """
+    from django.conf import settings
+
+    result = subprocess.run(
+        [sys.executable, '-c', _EAGER_IMPORT_PROBE, json.dumps([list(heavy), list(prefixes), list(targets)])],
+        capture_output=True,
+        text=True,
+        cwd=str(settings.BASE_DIR),
+        env=_subprocess_env(),
+        check=True,
+    )
+    found = json.loads(result.stdout.strip().splitlines()[-1])
+    return sorted({(importer, name) for importer, name in found})
+
+
+@dataclass(frozen=True)
+class ImportTiming:
+    """Coût d'import d'un module (sortie de ``python -X importtime``)."""
+
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+    @property
+    def package(self) -> str:
+        return self.module.partition('.')[0]
+
+
+_IMPORTTIME_SCRIPT = '''
+import importlib, json, sys
+import django
+django.setup()
+for target in json.loads(sys.argv[1]):
+    importlib.import_module(target)
+'''
+
+
+def parse_importtime(output: str) -> List[ImportTiming]:
+    """
+    Parse la sortie stderr de ``python -X importtime``.
+
+    Format d'une ligne : ``import time: <self µs> | <cumulé µs> | <indentation><module>``
+    (la profondeur d'indentation donne l'imbrication).
+    """
+    timings = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+            self_us, cumulative_us = int(self_us), int(cumulative_us)
+        except ValueError:
+            # Ligne d'en-tête
+            continue
+        module = name.strip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        timings.append(ImportTiming(module, self_us, cumulative_us, depth))
+    return timings
+
+
+def measure_import_times(targets=('project.urls',)) -> List[ImportTiming]:
+    """
+    Mesure le coût d'import de django.setup() puis de ``targets`` dans un
+    interpréteur neuf (``-X importtime``).
+    """
+    from django.conf import settings
+
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _IMPORTTIME_SCRIPT, json.dumps(list(targets))],
+        capture_output=True,
+        text=True,
+        cwd=str(settings.BASE_DIR),
+        env=_subprocess_env(),
+    )
+    if result.returncode != 0:
+        tail = '\n'.join(line for line in result.stderr.splitlines() if not line.startswith('import time:'))
+        raise RuntimeError(f"Import de {', '.join(targets)} impossible :\n{tail[-2000:]}")
+    return parse_importtime(result.stderr)
@@ -0,0 +1,338 @@
+"""
+Partitionnement déclaratif PostgreSQL par liste (``PARTITION BY LIST``).
+
+Une table partitionnée a une partition par valeur de la clé
+(``<table>_p<valeur>``) et une partition par défaut (``<table>_default``) qui
+reçoit les lignes dont la partition n'existe pas (encore).
+
+- ``partition_table`` / ``unpartition_table`` : conversion d'une table
+  existante (migrations). Les lignes sont recopiées ; index, contraintes et
+  colonnes identité sont recréés à l'identique, la clé de partition étant
+  ajoutée à la clé primaire et aux contraintes uniques (obligatoire sous
+  PostgreSQL).
+- ``create_partition`` / ``create_partitions`` : crée la partition d'une
+  valeur (d'une ou de plusieurs tables liées), en y déplaçant les lignes déjà
+  présentes dans la partition par défaut.
+- ``drop_partition`` : détache puis supprime la partition d'une valeur, sans
+  DELETE ligne à ligne.
+
+Hors PostgreSQL, ou si la table n'est pas partitionnée, les fonctions ne font
+rien. Une table référencée par une clé étrangère (autre que composite avec la
+clé de partition) ne peut pas être convertie : la contrainte doit être
+supprimée avant.
+"""
+from __future__ import annotations
+
+import re
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from django.db import NotSupportedError
+
+DEFAULT_PARTITION_SUFFIX = '_default'
+
+# Première liste de colonnes d'une définition de contrainte (PRIMARY KEY (...), UNIQUE (...))
+_COLUMNS_RE = re.compile(r'\(([^)]*)\)')
+
+
+def partition_name(table: str, value: int) -> str:
+    return f'{table}_p{value}'
+
+
+def default_partition_name(table: str) -> str:
+    return f'{table}{DEFAULT_PARTITION_SUFFIX}'
+
+
+def _relkind(cursor, name: str) -> Optional[str]:
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [name])
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def is_partitioned(connection, table: str) -> bool:
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        return _relkind(cursor, table) == 'p'
+
+
+def partition_exists(connection, table: str, value: int) -> bool:
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        return _relkind(cursor, partition_name(table, value)) is not None
+
+
+def partition_has_rows(connection, table: str, value: int) -> bool:
+    if not partition_exists(connection, table, value):
+        return False
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {quote(partition_name(table, value))})")
+        return cursor.fetchone()[0]
+
+
+def partition_values(connection, table: str) -> List[int]:
+    """Valeurs de clé ayant leur propre partition (d'après le nom des partitions)."""
+    prefix = f'{table}_p'
+    return sorted(
+        int(name[len(prefix):])
+        for name, _, _ in list_partitions(connection, table)
+        if name.startswith(prefix) and name[len(prefix):].isdigit()
+    )
+
+
+def list_partitions(connection, table: str) -> List[Tuple[str, str, int]]:
+    """(partition, bornes, lignes estimées) des partitions d'une table."""
+    if not is_partitioned(connection, table):
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), GREATEST(c.reltuples, 0)::bigint
+              FROM pg_inherits i
+              JOIN pg_class c ON c.oid = i.inhrelid
+             WHERE i.inhparent = to_regclass(%s)
+             ORDER BY c.relname
+            """,
+            [table],
+        )
+        return cursor.fetchall()
+
+
+def create_partition(connection, table: str, key: str, value: int) -> bool:
+    """
+    Crée la partition ``value`` de ``table`` si elle n'existe pas.
+
+    Les lignes de cette valeur déjà présentes dans la partition par défaut y
+    sont déplacées (sinon PostgreSQL refuse la création). Pour des tables
+    liées par une clé étrangère, voir ``create_partitions``.
+
+    Returns:
+        bool: True si la partition a été créée
+    """
+    return bool(create_partitions(connection, [table], key, value))
+
+
+def create_partitions(connection, tables: Sequence[str], key: str, value: int) -> List[str]:
+    """
+    Crée la partition ``value`` de plusieurs tables liées par des clés
+    étrangères composites (avec la clé de partition).
+
+    ``tables`` est dans l'ordre de suppression (tables référençantes d'abord).
+    Les lignes de la partition par défaut sont d'abord sorties de toutes les
+    tables dans cet ordre, vers des tables non rattachées ; les partitions
+    sont ensuite rattachées dans l'ordre inverse. Ainsi, quand le contrôle
+    différé de la suppression d'une ligne référencée s'exécute (PostgreSQL le
+    fait sur la partition par défaut, pas sur la table parente), les lignes
+    qui la référencent ne sont plus dans la table parente ; elles y reviennent
+    au rattachement de leur partition, qui valide la clé étrangère.
+
+    Returns:
+        Tables pour lesquelles une partition a été créée
+    """
+    quote = connection.ops.quote_name
+    created = []
+    detached = []
+    with connection.cursor() as cursor:
+        for table in tables:
+            if not is_partitioned(connection, table):
+                continue
+            name = partition_name(table, value)
+            if _relkind(cursor, name) is not None:
+                continue
+            created.append(table)
+            cursor.execute(
+                f"SELECT EXISTS (SELECT 1 FROM {quote(default_partition_name(table))} WHERE {quote(key)} = %s)",
+                [value],
+            )
+            if not cursor.fetchone()[0]:
+                cursor.execute(f"CREATE TABLE {quote(name)} PARTITION OF {quote(table)} FOR VALUES IN (%s)", [value])
+                continue
+            cursor.execute(f"CREATE TABLE {quote(name)} (LIKE {quote(table)} INCLUDING DEFAULTS)")
+            cursor.execute(
+                f"WITH moved AS (DELETE FROM {quote(default_partition_name(table))} "
+                f"WHERE {quote(key)} = %s RETURNING *) "
+                f"INSERT INTO {quote(name)} SELECT * FROM moved",
+                [value],
+            )
+            detached.append(table)
+
+        for table in reversed(detached):
+            cursor.execute(
+                f"ALTER TABLE {quote(table)} ATTACH PARTITION {quote(partition_name(table, value))} "
+                f"FOR VALUES IN (%s)",
+                [value],
+            )
+            # Contrôles différés en attente exécutés table par table : les
+            # lignes référencées sont de nouveau visibles dans la table parente
+            connection.check_constraints()
+    return created
+
+
+def drop_partition(connection, table: str, value: int) -> Optional[int]:
+    """
+    Détache puis supprime la partition ``value`` de ``table``.
+
+    Returns:
+        Nombre de lignes de la partition supprimée, None si elle n'existe pas
+    """
+    if not partition_exists(connection, table, value):
+        return None
+    quote = connection.ops.quote_name
+    name = partition_name(table, value)
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT count(*) FROM {quote(name)}")
+        rows = cursor.fetchone()[0]
+        connection.check_constraints()
+        cursor.execute(f"ALTER TABLE {quote(table)} DETACH PARTITION {quote(name)}")
+        cursor.execute(f"DROP TABLE {quote(name)}")
+    return rows
+
+
+# ----------------------------------------------------------------------
+# Conversion (migrations)
+# ----------------------------------------------------------------------
+
+def _structure(cursor, table: str):
+    """Index (hors contraintes), contraintes et colonnes identité d'une table."""
+    cursor.execute(
+        """
+        SELECT pg_get_indexdef(i.indexrelid), i.indisunique
+          FROM pg_index i
+         WHERE i.indrelid = to_regclass(%s)
+           AND NOT EXISTS (
+               SELECT 1 FROM pg_constraint c
+                WHERE c.conrelid = i.indrelid AND c.conindid = i.indexrelid AND c.contype IN ('p', 'u', 'x')
+           )
+        """,
+        [table],
+    )
+    indexes = cursor.fetchall()
+    cursor.execute(
+        """
+        SELECT conname, contype, pg_get_constraintdef(oid)
+          FROM pg_constraint
+         WHERE conrelid = to_regclass(%s) AND conparentid = 0 AND contype IN ('p', 'u', 'f', 'c')
+         ORDER BY contype DESC, conname
+        """,
+        [table],
+    )
+    constraints = cursor.fetchall()
+    cursor.execute(
+        """
+        SELECT a.attname, a.attidentity
+          FROM pg_attribute a
+         WHERE a.attrelid = to_regclass(%s) AND a.attnum > 0 AND NOT a.attisdropped AND a.attidentity <> ''
+        """,
+        [table],
+    )
+    identities = []
+    for column, kind in cursor.fetchall():
+        cursor.execute("SELECT pg_get_serial_sequence(%s, %s)", [table, column])
+        sequence = cursor.fetchone()[0]
+        cursor.execute(f"SELECT last_value, is_called FROM {sequence}")
+        identities.append((column, kind, *cursor.fetchone()))
+    return indexes, constraints, identities
+
+
+def _check_not_referenced(cursor, table: str) -> None:
+    cursor.execute(
+        """
+        SELECT conrelid::regclass::text, conname
+          FROM pg_constraint
+         WHERE confrelid = to_regclass(%s) AND conrelid <> confrelid AND contype = 'f'
+        """,
+        [table],
+    )
+    references = cursor.fetchall()
+    if references:
+        raise NotSupportedError(
+            f"{table} est référencée par des clés étrangères : "
+            + ", ".join(f"{name} ({source})" for source, name in references)
+        )
+
+
+def _columns(definition: str) -> List[str]:
+    match = _COLUMNS_RE.search(definition)
+    return [column.strip().strip('"') for column in match.group(1).split(',')] if match else []
+
+
+def _with_key(definition: str, key: str, quote) -> str:
+    if key in _columns(definition):
+        return definition
+    return _COLUMNS_RE.sub(lambda m: f'({m.group(1)}, {quote(key)})', definition, count=1)
+
+
+def _without_key(definition: str, key: str, quote) -> str:
+    columns = _columns(definition)
+    if key not in columns or len(columns) == 1:
+        return definition
+    kept = ', '.join(quote(column) for column in columns if column != key)
+    return _COLUMNS_RE.sub(lambda m: f'({kept})', definition, count=1)
+
+
+def _rebuild(connection, table: str, key: str, partition_values: Optional[Iterable[int]]) -> None:
+    """
+    Recrée ``table`` (partitionnée par ``key`` si ``partition_values`` n'est
+    pas None, simple sinon) avec ses lignes, index, contraintes et identités.
+    """
+    quote = connection.ops.quote_name
+    partitioned = partition_values is not None
+    rebuilt = f'{table}__rebuild'
+    with connection.cursor() as cursor:
+        _check_not_referenced(cursor, table)
+        indexes, constraints, identities = _structure(cursor, table)
+        if partitioned:
+            for definition, unique in indexes:
+                if unique:
+                    raise NotSupportedError(f"{table} : index unique hors contrainte non supporté ({definition})")
+
+        suffix = f" PARTITION BY LIST ({quote(key)})" if partitioned else ""
+        cursor.execute(f"CREATE TABLE {quote(rebuilt)} (LIKE {quote(table)} INCLUDING DEFAULTS){suffix}")
+        if partitioned:
+            for value in partition_values:
+                cursor.execute(
+                    f"CREATE TABLE {quote(partition_name(table, value))} "
+                    f"PARTITION OF {quote(rebuilt)} FOR VALUES IN (%s)",
+                    [value],
+                )
+            cursor.execute(f"CREATE TABLE {quote(default_partition_name(table))} PARTITION OF {quote(rebuilt)} DEFAULT")
+        cursor.execute(f"INSERT INTO {quote(rebuilt)} SELECT * FROM {quote(table)}")
+        cursor.execute(f"DROP TABLE {quote(table)}")
+        cursor.execute(f"ALTER TABLE {quote(rebuilt)} RENAME TO {quote(table)}")
+
+        for column, kind, last_value, is_called in identities:
+            generated = 'ALWAYS' if kind == 'a' else 'BY DEFAULT'
+            cursor.execute(f"ALTER TABLE {quote(table)} ALTER COLUMN {quote(column)} ADD GENERATED {generated} AS IDENTITY")
+            cursor.execute("SELECT setval(pg_get_serial_sequence(%s, %s), %s, %s)", [table, column, last_value, is_called])
+
+        for name, kind, definition in constraints:
+            if kind in ('p', 'u'):
+                definition = _with_key(definition, key, quote) if partitioned else _without_key(definition, key, quote)
+            cursor.execute(f"ALTER TABLE {quote(table)} ADD CONSTRAINT {quote(name)} {definition}")
+        for definition, _ in indexes:
+            cursor.execute(definition)
+
+
+def partition_table(connection, table: str, key: str, values: Iterable[int] = ()) -> bool:
+    """
+    Convertit ``table`` en table partitionnée par liste sur ``key``, avec une
+    partition par valeur de ``values`` et une partition par défaut.
+
+    ``key`` doit être NOT NULL (elle entre dans la clé primaire).
+
+    Returns:
+        bool: True si la table a été convertie
+    """
+    if connection.vendor != 'postgresql' or is_partitioned(connection, table):
+        return False
+    _rebuild(connection, table, key, list(values))
+    return True
+
+
+def unpartition_table(connection, table: str, key: str) -> bool:
+    """Inverse de ``partition_table`` : table simple, clé retirée des contraintes."""
+    if not is_partitioned(connection, table):
+        return False
+    _rebuild(connection, table, key, None)
+    return True
@@ -0,0 +1,212 @@
+"""
+Budget de requêtes SQL et détection des N+1 (tests).
+
+``assertNumQueries`` échoue sur un nombre exact, sans dire d'où viennent les
+requêtes. Ici :
+
+- chaque requête est enregistrée avec son origine (frame du projet la plus
+  interne) ;
+- les requêtes sont regroupées par instruction normalisée (littéraux et listes
+  ``IN (...)`` remplacés) ;
+- une instruction répétée au moins ``repeat_threshold`` fois est signalée comme
+  candidate N+1 ;
+- le bloc échoue (``QueryBudgetExceeded``) si le nombre total dépasse
+  ``max_queries`` ou si une instruction est répétée plus de ``max_repeats`` fois.
+
+Utilisable en context manager ou en décorateur :
+
+    with QueryBudget(max_queries=12, max_repeats=2, name='sync'):
+        client.get(url)
+
+    @QueryBudget(max_queries=8)
+    def test_list(self): ...
+
+ou via ``QueryBudgetMixin.assertQueryBudget`` dans un TestCase.
+"""
+import re
+import traceback
+from collections import defaultdict
+from contextlib import ContextDecorator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Répétitions à partir desquelles une instruction est candidate N+1
+DEFAULT_REPEAT_THRESHOLD = 3
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*(?:%s|\?|NULL)\s*,?)+\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql: str) -> str:
+    """Instruction SQL sans littéraux : deux requêtes N+1 ont la même forme normalisée"""
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Budget de requêtes dépassé (total ou répétitions d'une même instruction)"""
+    pass
+
+
+@dataclass
+class QueryRecord:
+    """Requête exécutée : SQL brut, forme normalisée et origine dans le projet"""
+    sql: str
+    normalized: str
+    origin: str
+
+
+@dataclass
+class StatementGroup:
+    """Requêtes partageant la même instruction normalisée"""
+    normalized: str
+    count: int
+    origins: List[str]
+
+
+class QueryBudget(ContextDecorator):
+    """
+    Enregistre les requêtes d'un bloc et vérifie le budget à la sortie.
+
+    Args:
+        max_queries: Nombre maximal de requêtes (None : pas de limite)
+        max_repeats: Nombre maximal d'exécutions d'une même instruction (None : pas de limite)
+        repeat_threshold: Répétitions à partir desquelles une instruction est signalée N+1
+        using: Alias de base de données
+        name: Libellé du bloc dans le rapport
+    """
+
+    def __init__(
+        self,
+        max_queries: Optional[int] = None,
+        max_repeats: Optional[int] = None,
+        repeat_threshold: int = DEFAULT_REPEAT_THRESHOLD,
+        using: str = DEFAULT_DB_ALIAS,
+        name: str = '',
+    ):
+        self.max_queries = max_queries
+        self.max_repeats = max_repeats
+        self.repeat_threshold = repeat_threshold
+        self.using = using
+        self.name = name
+        self.queries: List[QueryRecord] = []
+        self._wrapper = None
+
+    def _recreate_cm(self):
+        # Décorateur : un enregistrement neuf à chaque appel
+        return QueryBudget(
+            max_queries=self.max_queries,
+            max_repeats=self.max_repeats,
+            repeat_threshold=self.repeat_threshold,
+            using=self.using,
+            name=self.name,
+        )
+
+    def __enter__(self):
+        self.queries = []
+        self._wrapper = connections[self.using].execute_wrapper(self._record)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self._wrapper.__exit__(exc_type, exc_value, tb)
+        self._wrapper = None
+        if exc_type is None:
+            self.check()
+        return False
+
+    def _record(self, execute, sql, params, many, context):
+        self.queries.append(QueryRecord(sql=sql, normalized=normalize_sql(sql), origin=_query_origin()))
+        return execute(sql, params, many, context)
+
+    # ------------------------------------------------------------------
+    # Analyse
+    # ------------------------------------------------------------------
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    def groups(self) -> List[StatementGroup]:
+        """Instructions normalisées, de la plus répétée à la moins répétée"""
+        grouped: Dict[str, List[str]] = defaultdict(list)
+        for query in self.queries:
+            grouped[query.normalized].append(query.origin)
+        groups = [
+            StatementGroup(normalized=normalized, count=len(origins), origins=list(dict.fromkeys(origins)))
+            for normalized, origins in grouped.items()
+        ]
+        return sorted(groups, key=lambda group: -group.count)
+
+    def n_plus_one_candidates(self) -> List[StatementGroup]:
+        """Instructions exécutées au moins repeat_threshold fois"""
+        return [group for group in self.groups() if group.count >= self.repeat_threshold]
+
+    def check(self) -> None:
+        """Lève QueryBudgetExceeded si le total ou une répétition dépasse le budget"""
+        problems = []
+        if self.max_queries is not None and self.count > self.max_queries:
+            problems.append(f"{self.count} requêtes pour un budget de {self.max_queries}")
+        if self.max_repeats is not None:
+            repeated = [group for group in self.groups() if group.count > self.max_repeats]
+            if repeated:
+                problems.append(
+                    f"{len(repeated)} instruction(s) répétée(s) plus de {self.max_repeats} fois"
+                )
+        if problems:
+            raise QueryBudgetExceeded('; '.join(problems) + '\n' + self.report())
+
+    def report(self) -> str:
+        """Rapport lisible : total, candidates N+1 avec origine, instructions les plus fréquentes"""
+        title = f"Budget de requêtes{f' [{self.name}]' if self.name else ''}"
+        lines = [f"{title} : {self.count} requête(s)"]
+        candidates = self.n_plus_one_candidates()
+        if candidates:
+            lines.append("Candidates N+1 :")
+            for group in candidates:
+                lines.append(f"  x{group.count}  {group.normalized[:300]}")
+                for origin in group.origins[:3]:
+                    lines.append(f"        depuis {origin}")
+        lines.append("Instructions :")
+        for group in self.groups()[:15]:
+            lines.append(f"  x{group.count}  {group.normalized[:160]}")
+        return '\n'.join(lines)
+
+
+class QueryBudgetMixin:
+    """
+    Mixin de TestCase :
+
+        with self.assertQueryBudget(10, max_repeats=2):
+            self.client.get(url)
+    """
+
+    def assertQueryBudget(self, max_queries: Optional[int] = None, max_repeats: Optional[int] = None, **kwargs):
+        return QueryBudget(max_queries=max_queries, max_repeats=max_repeats, **kwargs)
+
+
+_THIS_FILE = str(Path(__file__).resolve())
+
+
+def _query_origin() -> str:
+    """
+    Frame du projet la plus interne à l'origine de la requête (hors Django /
+    site-packages) : le service ou le serializer qui boucle, ou le test lui-même
+    s'il émet la requête directement.
+    """
+    base_dir = str(settings.BASE_DIR)
+    for frame in reversed(traceback.extract_stack()[:-2]):
+        filename = frame.filename
+        if filename == _THIS_FILE or not filename.startswith(base_dir) or 'site-packages' in filename:
+            continue
+        return f"{Path(filename).relative_to(base_dir)}:{frame.lineno} ({frame.name})"
+    return '<inconnu>'
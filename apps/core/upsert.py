@@ -0,0 +1,202 @@
+"""
+Upsert en masse natif PostgreSQL (``INSERT ... ON CONFLICT DO UPDATE``).
+
+Remplace le schéma « lecture des lignes existantes, partage create/update en
+Python, ``bulk_create`` + ``bulk_update`` » : ``bulk_update`` compile un CASE
+par champ et par ligne, dont le coût explose au-delà de quelques milliers de
+lignes. Ici, une requête par lot, sans lecture préalable.
+
+- La cible du conflit doit correspondre à une contrainte / un index unique
+  (``conflict_where`` pour un index partiel, ex. ``is_deleted = false``).
+- ``update_where`` permet de ne pas toucher certaines lignes existantes
+  (ex. lignes validées) : elles ne sont ni mises à jour ni renvoyées.
+- ``RETURNING (xmax = 0)`` distingue les insertions des mises à jour.
+- Les champs ``auto_now`` / ``auto_now_add`` et les valeurs par défaut sont
+  appliqués comme par ``bulk_create`` (``Field.pre_save``).
+- Les lignes historiques ``+`` / ``~`` sont écrites selon le mode du modèle
+  (``sync`` : un bulk_create immédiat, ``batched`` : buffer de transaction).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from django.db import NotSupportedError, connections, router
+from django.utils import timezone
+from simple_history.utils import get_history_model_for_model
+
+from apps.core.history import (
+    HISTORY_CHANGED,
+    HISTORY_CREATED,
+    HistoryMode,
+    build_history_row,
+    get_history_mode,
+    record_bulk_history,
+)
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+@dataclass
+class UpsertResult:
+    """Résultat d'un upsert : compteurs et pk par clé unique."""
+
+    created: int = 0
+    updated: int = 0
+    skipped: int = 0  # doublons de clé dans ``rows`` + lignes exclues par ``update_where``
+    created_ids: List[int] = field(default_factory=list)
+    updated_ids: List[int] = field(default_factory=list)
+    ids_by_key: Dict[Tuple, int] = field(default_factory=dict)
+    # Instances écrites avec leur pk (lots sans ligne exclue par update_where)
+    objects: List[Any] = field(default_factory=list)
+
+    def as_dict(self) -> Dict[str, int]:
+        return {'created': self.created, 'updated': self.updated, 'skipped': self.skipped}
+
+
+def bulk_upsert(
+    model,
+    rows: Sequence[Dict[str, Any]],
+    unique_fields: Sequence[str],
+    update_fields: Sequence[str],
+    *,
+    conflict_where: Optional[str] = None,
+    update_where: Optional[str] = None,
+    update_expressions: Optional[Dict[str, str]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    using: Optional[str] = None,
+) -> UpsertResult:
+    """
+    Insère ou met à jour des lignes en une requête par lot.
+
+    Args:
+        model: Modèle Django cible.
+        rows: Dictionnaires ``{champ: valeur}`` (noms de champ ou attname ``*_id``).
+        unique_fields: Champs de la contrainte unique servant de cible au conflit.
+        update_fields: Champs recopiés depuis la ligne proposée (``EXCLUDED``) en cas de conflit.
+        conflict_where: Prédicat SQL d'un index unique partiel (ex. ``"is_deleted = false"``).
+        update_where: Condition SQL de mise à jour ; la table existante est aliasée ``t``.
+        update_expressions: Expressions SQL par colonne remplaçant ``EXCLUDED.col``
+            (alias ``t`` pour la ligne existante, ``EXCLUDED`` pour la ligne proposée).
+        batch_size: Nombre de lignes par requête.
+        using: Alias de base (routeur par défaut).
+
+    Returns:
+        UpsertResult: créations, mises à jour, lignes ignorées par ``update_where``
+        et pk par tuple de valeurs de ``unique_fields``.
+
+    Raises:
+        NotSupportedError: Base autre que PostgreSQL.
+    """
+    using = using or router.db_for_write(model)
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        raise NotSupportedError("bulk_upsert nécessite PostgreSQL (INSERT ... ON CONFLICT ... RETURNING xmax)")
+
+    result = UpsertResult()
+    if not rows:
+        return result
+
+    opts = model._meta
+    fields = [f for f in opts.concrete_fields if not f.primary_key]
+    quote = connection.ops.quote_name
+    columns = [f.column for f in fields]
+    unique_columns = [opts.get_field(name).column for name in unique_fields]
+    update_columns = [opts.get_field(name).column for name in update_fields]
+    expressions = {
+        opts.get_field(name).column: sql for name, sql in (update_expressions or {}).items()
+    }
+
+    # updated_at (auto_now) est toujours rafraîchi sur une mise à jour
+    for f in fields:
+        if getattr(f, 'auto_now', False) and f.column not in update_columns:
+            update_columns.append(f.column)
+
+    assignments = ', '.join(
+        f"{quote(column)} = {expressions.get(column, f'EXCLUDED.{quote(column)}')}"
+        for column in update_columns
+    )
+    conflict = ', '.join(quote(column) for column in unique_columns)
+    if conflict_where:
+        conflict = f"({conflict}) WHERE {conflict_where}"
+    else:
+        conflict = f"({conflict})"
+    row_placeholder = f"({', '.join(['%s'] * len(columns))})"
+    returning = ', '.join(quote(column) for column in [opts.pk.column] + unique_columns)
+
+    # Une même clé deux fois dans une requête est refusée par PostgreSQL
+    # (« cannot affect row a second time ») : la dernière occurrence l'emporte.
+    # Les clés contenant NULL ne sont jamais en conflit et sont toutes conservées.
+    unique_attnames = [opts.get_field(name).attname for name in unique_fields]
+    instances: Dict[Any, Any] = {}
+    for index, data in enumerate(rows):
+        instance = model(**data)
+        key = tuple(getattr(instance, attname) for attname in unique_attnames)
+        instances.pop(key, None)
+        instances[key if None not in key else ('__null__', index)] = instance
+    instances = list(instances.values())
+    result.skipped = len(rows) - len(instances)
+
+    for start in range(0, len(instances), batch_size):
+        batch = instances[start:start + batch_size]
+        params: List[Any] = []
+        for instance in batch:
+            for f in fields:
+                params.append(f.get_db_prep_save(f.pre_save(instance, add=True), connection=connection))
+
+        sql = (
+            f"INSERT INTO {quote(opts.db_table)} AS t ({', '.join(quote(c) for c in columns)}) "
+            f"VALUES {', '.join([row_placeholder] * len(batch))} "
+            f"ON CONFLICT {conflict} DO UPDATE SET {assignments}"
+            f"{f' WHERE {update_where}' if update_where else ''} "
+            f"RETURNING {returning}, (xmax = 0) AS inserted"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            returned = cursor.fetchall()
+
+        for row in returned:
+            pk, key, inserted = row[0], tuple(row[1:-1]), row[-1]
+            result.ids_by_key[key] = pk
+            (result.created_ids if inserted else result.updated_ids).append(pk)
+        if len(returned) == len(batch):
+            # RETURNING suit l'ordre de VALUES (comme bulk_create) : pk posés
+            # sur les instances, y compris celles dont la clé contient NULL
+            for instance, row in zip(batch, returned):
+                instance.pk = row[0]
+                instance._state.adding = False
+            result.objects.extend(batch)
+        result.skipped += len(batch) - len(returned)
+
+    result.created = len(result.created_ids)
+    result.updated = len(result.updated_ids)
+
+    _record_history(model, result, using)
+    return result
+
+
+def _record_history(model, result: UpsertResult, using: str) -> None:
+    """
+    Historique des lignes upsertées selon le mode du modèle.
+
+    Un upsert remplace des save() unitaires (historisés en mode ``sync``) :
+    en ``sync`` les lignes historiques sont insérées immédiatement en un
+    bulk_create, en ``batched`` elles rejoignent le buffer de la transaction.
+    """
+    mode = get_history_mode(model)
+    if mode == HistoryMode.OFF or not hasattr(model, 'history'):
+        return
+
+    history_model = get_history_model_for_model(model)
+    history_date = timezone.now()
+    for ids, history_type in ((result.created_ids, HISTORY_CREATED), (result.updated_ids, HISTORY_CHANGED)):
+        if not ids:
+            continue
+        instances = model._base_manager.using(using).filter(pk__in=ids)
+        if mode == HistoryMode.BATCHED:
+            record_bulk_history(instances, model=model, history_type=history_type)
+        else:
+            history_model.objects.using(router.db_for_write(history_model)).bulk_create([
+                build_history_row(history_model, instance, history_type, history_date=history_date)
+                for instance in instances
+            ], batch_size=DEFAULT_BATCH_SIZE)
@@ -1,9 +1,23 @@
+from django.core.cache import cache
 from rest_framework import serializers
 
 from apps.devices.models import Device
 from apps.inventory.models import Inventory
 from apps.masterdata.models import Warehouse
 
+# Les heartbeats renvoient toujours les mêmes ids : existence mise en cache (positifs uniquement)
+EXISTS_CACHE_TIMEOUT_SECONDS = 300
+
+
+def _exists_cached(model, pk) -> bool:
+    key = f"pda:exists:{model._meta.label_lower}:{pk}"
+    if cache.get(key):
+        return True
+    exists = model.objects.filter(pk=pk, is_deleted=False).exists()
+    if exists:
+        cache.set(key, True, EXISTS_CACHE_TIMEOUT_SECONDS)
+    return exists
+
 
 class HeartbeatSerializer(serializers.Serializer):
     device_id = serializers.CharField(max_length=128)
@@ -26,13 +40,13 @@ class HeartbeatSerializer(serializers.Serializer):
     def validate_warehouse_id(self, value):
         if value is None:
             return None
-        if not Warehouse.objects.filter(pk=value, is_deleted=False).exists():
+        if not _exists_cached(Warehouse, value):
             raise serializers.ValidationError("Entrepôt introuvable.")
         return value
 
     def validate_inventory_id(self, value):
         if value is None:
             return None
-        if not Inventory.objects.filter(pk=value, is_deleted=False).exists():
+        if not _exists_cached(Inventory, value):
             raise serializers.ValidationError("Inventaire introuvable.")
         return value
@@ -1,3 +1,4 @@
 from apps.devices.services.device_presence_service import DevicePresenceService
+from apps.devices.services.presence_buffer import PresenceBuffer, PresenceState, presence_buffer
 
-__all__ = ["DevicePresenceService"]
+__all__ = ["DevicePresenceService", "PresenceBuffer", "PresenceState", "presence_buffer"]
@@ -1,5 +1,5 @@
 """
-Upsert heartbeat + calcul online/offline à la lecture (seuil 120 s par défaut).
+Heartbeat bufferisé (write-behind) + calcul online/offline à la lecture (seuil 120 s par défaut).
 """
 
 from __future__ import annotations
@@ -13,6 +13,9 @@ from django.utils import timezone
 
 from apps.devices.constants import HEARTBEAT_MIN_INTERVAL_SECONDS, OFFLINE_THRESHOLD_SECONDS
 from apps.devices.models import Device
+from apps.devices.services.presence_buffer import PresenceBuffer, PresenceState, presence_buffer
+from apps.inventory.models import Inventory
+from apps.masterdata.models import Warehouse
 
 User = get_user_model()
 
@@ -32,55 +35,46 @@ def _client_ip(request) -> Optional[str]:
 
 
 class DevicePresenceService:
+    def __init__(self, buffer: Optional[PresenceBuffer] = None):
+        self.buffer = buffer or presence_buffer
+
     def upsert_heartbeat(self, user, validated_data: dict, request) -> dict:
+        """
+        Enregistre un heartbeat dans le buffer de présence (aucune requête SQL).
+
+        L'écriture dans Device est différée et groupée (voir PresenceBuffer).
+        Les identifiants warehouse/inventory sont déjà validés par le serializer.
+        """
         device_id = validated_data["device_id"]
         now = timezone.now()
 
-        existing = Device.objects.filter(device_id=device_id).first()
-        if existing and existing.last_seen_at:
-            elapsed = (now - existing.last_seen_at).total_seconds()
+        previous = self.buffer.get(device_id)
+        if previous and previous.last_seen_at:
+            elapsed = (now - previous.last_seen_at).total_seconds()
             if elapsed < HEARTBEAT_MIN_INTERVAL_SECONDS:
                 return {
                     "device_id": device_id,
-                    "last_seen_at": existing.last_seen_at.isoformat(),
+                    "last_seen_at": previous.last_seen_at.isoformat(),
                     "server_offline_threshold_seconds": OFFLINE_THRESHOLD_SECONDS,
                     "throttled": True,
                 }
 
-        warehouse = None
-        inventory = None
-        if validated_data.get("warehouse_id"):
-            from apps.masterdata.models import Warehouse
-
-            warehouse = Warehouse.objects.filter(
-                pk=validated_data["warehouse_id"], is_deleted=False
-            ).first()
-        if validated_data.get("inventory_id"):
-            from apps.inventory.models import Inventory
-
-            inventory = Inventory.objects.filter(
-                pk=validated_data["inventory_id"], is_deleted=False
-            ).first()
-
-        defaults = {
-            "user": user,
-            "battery_level": validated_data.get("battery_level"),
-            "is_charging": validated_data.get("is_charging", False),
-            "app_version": (validated_data.get("app_version") or "")[:20] or None,
-            "last_seen_at": now,
-            "last_ip": _client_ip(request),
-            "warehouse": warehouse,
-            "inventory": inventory,
-        }
-
-        device, _created = Device.objects.update_or_create(
+        state = PresenceState(
             device_id=device_id,
-            defaults=defaults,
+            last_seen_at=now,
+            user_id=getattr(user, "pk", None),
+            battery_level=validated_data.get("battery_level"),
+            is_charging=validated_data.get("is_charging", False),
+            app_version=(validated_data.get("app_version") or "")[:20] or None,
+            last_ip=_client_ip(request),
+            warehouse_id=validated_data.get("warehouse_id"),
+            inventory_id=validated_data.get("inventory_id"),
         )
+        self.buffer.record(state)
 
         return {
-            "device_id": device.device_id,
-            "last_seen_at": device.last_seen_at.isoformat(),
+            "device_id": device_id,
+            "last_seen_at": now.isoformat(),
             "server_offline_threshold_seconds": OFFLINE_THRESHOLD_SECONDS,
             "throttled": False,
         }
@@ -92,6 +86,14 @@ class DevicePresenceService:
         inventory_id: Optional[int] = None,
         status_filter: str = "all",
     ) -> dict[str, Any]:
+        """
+        Liste des terminaux avec leur statut online/offline.
+
+        Les heartbeats encore dans le buffer de ce process sont pris en compte,
+        y compris ceux d'un terminal pas encore écrit en base. Un nouveau
+        terminal bufferisé par un autre worker n'apparaît qu'après son flush
+        (au plus PDA_PRESENCE_FLUSH_INTERVAL_SECONDS).
+        """
         now = timezone.now()
         qs: QuerySet[Device] = (
             Device.objects.filter(is_deleted=False)
@@ -104,11 +106,28 @@ class DevicePresenceService:
         if inventory_id is not None:
             qs = qs.filter(inventory_id=inventory_id)
 
+        devices = list(qs)
+        # Présence live : états du buffer (pas encore écrits en base) prioritaires
+        live_states = self.buffer.get_many(device.device_id for device in devices)
+        for device in devices:
+            live = live_states.get(device.device_id)
+            if live is not None and live.last_seen_at >= device.last_seen_at:
+                device.last_seen_at = live.last_seen_at
+                device.battery_level = live.battery_level
+                device.is_charging = live.is_charging
+                device.app_version = live.app_version
+        devices.extend(self._pending_new_devices(
+            {device.device_id for device in devices},
+            warehouse_id=warehouse_id,
+            inventory_id=inventory_id,
+        ))
+        devices.sort(key=lambda device: device.last_seen_at, reverse=True)
+
         rows = []
         online_count = 0
         offline_count = 0
 
-        for device in qs:
+        for device in devices:
             status = compute_device_status(device.last_seen_at, now)
             if status_filter == "online" and status != "online":
                 continue
@@ -134,6 +153,46 @@ class DevicePresenceService:
             "data": rows,
         }
 
+    def _pending_new_devices(
+        self,
+        listed_ids: set[str],
+        *,
+        warehouse_id: Optional[int],
+        inventory_id: Optional[int],
+    ) -> list[Device]:
+        """Terminaux (non enregistrés) des états en attente absents de la table Device."""
+        states = [
+            state
+            for state in self.buffer.pending_states()
+            if state.device_id not in listed_ids
+            and (warehouse_id is None or state.warehouse_id == warehouse_id)
+            and (inventory_id is None or state.inventory_id == inventory_id)
+        ]
+        if not states:
+            return []
+
+        # Terminaux déjà en base (supprimés ou hors filtre) : la ligne Device fait foi
+        known_ids = set(
+            Device._base_manager.filter(device_id__in=[state.device_id for state in states])
+            .values_list("device_id", flat=True)
+        )
+        states = [state for state in states if state.device_id not in known_ids]
+        if not states:
+            return []
+
+        users = User.objects.in_bulk({state.user_id for state in states if state.user_id})
+        warehouses = Warehouse.objects.in_bulk({state.warehouse_id for state in states if state.warehouse_id})
+        inventories = Inventory.objects.in_bulk({state.inventory_id for state in states if state.inventory_id})
+
+        devices = []
+        for state in states:
+            device = state.to_device()
+            device.user = users.get(state.user_id)
+            device.warehouse = warehouses.get(state.warehouse_id)
+            device.inventory = inventories.get(state.inventory_id)
+            devices.append(device)
+        return devices
+
     def _serialize_device_row(
         self, device: Device, status: str, seconds_since: int
     ) -> dict[str, Any]:
@@ -0,0 +1,216 @@
+"""
+Buffer write-behind de présence PDA.
+
+Chaque heartbeat est enregistré en O(1) :
+- état courant dans un dict en mémoire (coalescé par device_id, dernier état gagnant)
+- copie dans le cache Django (partagé entre workers si Redis) pour la lecture live
+
+Les états en attente sont écrits dans la table Device par lots, via un seul
+``bulk_create(update_conflicts=True)`` (INSERT ... ON CONFLICT (device_id) DO UPDATE),
+au plus toutes les ``PDA_PRESENCE_FLUSH_INTERVAL_SECONDS`` secondes.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from django.core.cache import caches
+from django.db import connection
+
+from apps.devices.constants import PRESENCE_FLUSH_INTERVAL_SECONDS
+from apps.devices.models import Device
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "pda:presence:"
+
+# Champs écrasés à chaque flush (created_at est conservé pour un device existant)
+UPSERT_FIELDS = [
+    "user",
+    "battery_level",
+    "is_charging",
+    "app_version",
+    "last_seen_at",
+    "last_ip",
+    "warehouse",
+    "inventory",
+    "updated_at",
+]
+
+
+@dataclass
+class PresenceState:
+    """Dernier état connu d'un terminal."""
+
+    device_id: str
+    last_seen_at: datetime
+    user_id: Optional[int] = None
+    battery_level: Optional[int] = None
+    is_charging: bool = False
+    app_version: Optional[str] = None
+    last_ip: Optional[str] = None
+    warehouse_id: Optional[int] = None
+    inventory_id: Optional[int] = None
+
+    def to_device(self) -> Device:
+        return Device(
+            device_id=self.device_id,
+            user_id=self.user_id,
+            battery_level=self.battery_level,
+            is_charging=self.is_charging,
+            app_version=self.app_version,
+            last_seen_at=self.last_seen_at,
+            last_ip=self.last_ip,
+            warehouse_id=self.warehouse_id,
+            inventory_id=self.inventory_id,
+        )
+
+
+class PresenceBuffer:
+    """
+    Buffer de présence : écriture O(1), flush périodique en un upsert groupé.
+
+    Args:
+        flush_interval: Délai max (s) entre un heartbeat et son écriture en base.
+            0 = écriture immédiate (write-through).
+        cache_alias: Alias du cache Django utilisé pour la lecture live.
+        cache_timeout: Durée de vie (s) des états dans le cache.
+        auto_flush: Planifie un flush en thread daemon après ``flush_interval``.
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = 10,
+        cache_alias: str = "default",
+        cache_timeout: int = 24 * 3600,
+        auto_flush: bool = True,
+    ):
+        self.flush_interval = flush_interval
+        self.cache_alias = cache_alias
+        self.cache_timeout = cache_timeout
+        self.auto_flush = auto_flush
+        self._pending: Dict[str, PresenceState] = {}
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._last_flush = time.monotonic()
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def record(self, state: PresenceState) -> None:
+        """Enregistre un heartbeat (coalescé avec les précédents du même terminal)."""
+        with self._lock:
+            self._pending[state.device_id] = state
+        self.cache.set(self._cache_key(state.device_id), asdict(state), self.cache_timeout)
+
+        if self.flush_interval <= 0:
+            self.flush()
+        elif time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+        elif self.auto_flush:
+            self._schedule_flush()
+
+    def get(self, device_id: str) -> Optional[PresenceState]:
+        """Dernier état connu d'un terminal (mémoire locale puis cache partagé)."""
+        with self._lock:
+            state = self._pending.get(device_id)
+        if state is not None:
+            return state
+        cached = self.cache.get(self._cache_key(device_id))
+        return PresenceState(**cached) if cached else None
+
+    def get_many(self, device_ids: Iterable[str]) -> Dict[str, PresenceState]:
+        """Derniers états connus pour plusieurs terminaux (un seul aller-retour cache)."""
+        device_ids = list(device_ids)
+        keys = {self._cache_key(device_id): device_id for device_id in device_ids}
+        states = {
+            keys[key]: PresenceState(**value)
+            for key, value in self.cache.get_many(list(keys)).items()
+        }
+        with self._lock:
+            for device_id in device_ids:
+                if device_id in self._pending:
+                    states[device_id] = self._pending[device_id]
+        return states
+
+    def pending_states(self) -> List[PresenceState]:
+        """États en attente d'écriture dans ce process (instantané)."""
+        with self._lock:
+            return list(self._pending.values())
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self) -> int:
+        """
+        Écrit les états en attente dans Device en un upsert groupé.
+
+        Returns:
+            int: Nombre de terminaux écrits
+        """
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+            self._last_flush = time.monotonic()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+        if not pending:
+            return 0
+
+        try:
+            Device.objects.bulk_create(
+                [state.to_device() for state in pending.values()],
+                update_conflicts=True,
+                unique_fields=["device_id"],
+                update_fields=UPSERT_FIELDS,
+            )
+        except Exception:
+            # Ne pas perdre les états : ils seront réessayés au prochain flush
+            # (sauf s'ils ont été remplacés entre-temps par un heartbeat plus récent).
+            with self._lock:
+                for device_id, state in pending.items():
+                    self._pending.setdefault(device_id, state)
+            raise
+
+        logger.debug("Présence PDA : %s terminal(aux) écrit(s) en base", len(pending))
+        return len(pending)
+
+    def clear(self) -> None:
+        """Vide le buffer local sans écrire (tests)."""
+        with self._lock:
+            self._pending = {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def _schedule_flush(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Timer(self.flush_interval, self._timed_flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _timed_flush(self) -> None:
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Erreur lors du flush de la présence PDA")
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _cache_key(device_id: str) -> str:
+        return f"{CACHE_KEY_PREFIX}{device_id}"
+
+
+presence_buffer = PresenceBuffer(flush_interval=PRESENCE_FLUSH_INTERVAL_SECONDS)
@@ -0,0 +1,121 @@
+"""
+Tests du heartbeat PDA bufferisé (DevicePresenceService + PresenceBuffer).
+"""
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+
+from apps.devices.models import Device
+from apps.devices.services import DevicePresenceService, PresenceBuffer
+from apps.masterdata.models import Warehouse
+from apps.users.models import UserApp
+
+
+class DevicePresenceServiceTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = UserApp.objects.create_user(username='pda_user', type='Mobile', password='x')
+        self.buffer = PresenceBuffer(flush_interval=3600, auto_flush=False)
+        self.service = DevicePresenceService(buffer=self.buffer)
+        self.request = RequestFactory().post('/mobile/api/devices/heartbeat/', REMOTE_ADDR='10.0.0.5')
+
+    def tearDown(self):
+        self.buffer.clear()
+        cache.clear()
+
+    def _heartbeat(self, device_id='PDA-1', **extra):
+        data = {'device_id': device_id, 'battery_level': 80, 'is_charging': False, 'app_version': '1.2.0'}
+        data.update(extra)
+        return self.service.upsert_heartbeat(self.user, data, self.request)
+
+    def test_heartbeat_is_buffered_without_sql(self):
+        with self.assertNumQueries(0):
+            result = self._heartbeat()
+
+        self.assertFalse(result['throttled'])
+        self.assertEqual(self.buffer.pending_count(), 1)
+        self.assertFalse(Device.objects.filter(device_id='PDA-1').exists())
+
+    def test_heartbeats_are_coalesced_and_flushed_in_one_upsert(self):
+        self._heartbeat('PDA-1')
+        self._heartbeat('PDA-2')
+        with patch('apps.devices.services.device_presence_service.HEARTBEAT_MIN_INTERVAL_SECONDS', 0):
+            self._heartbeat('PDA-1', battery_level=42)
+
+        self.assertEqual(self.buffer.pending_count(), 2)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.buffer.flush(), 2)
+
+        device = Device.objects.get(device_id='PDA-1')
+        self.assertEqual(device.battery_level, 42)
+        self.assertEqual(device.user_id, self.user.id)
+        self.assertEqual(device.last_ip, '10.0.0.5')
+        self.assertEqual(self.buffer.pending_count(), 0)
+
+    def test_flush_updates_existing_device(self):
+        Device.objects.create(
+            device_id='PDA-1',
+            label='Terminal quai',
+            last_seen_at=timezone.now() - timedelta(hours=1),
+        )
+        self._heartbeat('PDA-1', battery_level=15)
+        self.buffer.flush()
+
+        device = Device.objects.get(device_id='PDA-1')
+        self.assertEqual(device.label, 'Terminal quai')
+        self.assertEqual(device.battery_level, 15)
+        self.assertEqual(Device.objects.count(), 1)
+
+    def test_heartbeat_within_min_interval_is_throttled(self):
+        self._heartbeat()
+        result = self._heartbeat(battery_level=10)
+
+        self.assertTrue(result['throttled'])
+        self.assertEqual(self.buffer.get('PDA-1').battery_level, 80)
+
+    def test_write_through_when_interval_is_zero(self):
+        service = DevicePresenceService(buffer=PresenceBuffer(flush_interval=0, auto_flush=False))
+        service.upsert_heartbeat(self.user, {'device_id': 'PDA-9'}, self.request)
+
+        self.assertTrue(Device.objects.filter(device_id='PDA-9').exists())
+
+    def test_list_with_status_reads_live_presence_from_buffer(self):
+        Device.objects.create(
+            device_id='PDA-1',
+            last_seen_at=timezone.now() - timedelta(hours=1),
+            battery_level=90,
+        )
+        self.assertEqual(self.service.list_with_status()['meta']['online_count'], 0)
+
+        self._heartbeat('PDA-1', battery_level=33)
+        result = self.service.list_with_status()
+
+        self.assertEqual(result['meta']['online_count'], 1)
+        self.assertEqual(result['data'][0]['status'], 'online')
+        self.assertEqual(result['data'][0]['battery_level'], 33)
+
+    def test_list_with_status_includes_devices_not_yet_flushed(self):
+        warehouse = Warehouse.objects.create(
+            reference='WH-PDA', warehouse_name='Entrepôt PDA', warehouse_type='CENTRAL', status='ACTIVE',
+        )
+        Device.objects.create(device_id='PDA-OLD', is_deleted=True, last_seen_at=timezone.now())
+        self._heartbeat('PDA-NEW', warehouse_id=warehouse.id)
+        self._heartbeat('PDA-OTHER')
+        self._heartbeat('PDA-OLD', warehouse_id=warehouse.id)
+
+        result = self.service.list_with_status(warehouse_id=warehouse.id)
+
+        self.assertEqual(result['meta']['total'], 1)
+        row = result['data'][0]
+        self.assertEqual(row['device_id'], 'PDA-NEW')
+        self.assertEqual(row['status'], 'online')
+        self.assertEqual(row['user']['username'], 'pda_user')
+        self.assertEqual(row['warehouse']['reference'], 'WH-PDA')
+        self.assertFalse(Device.objects.filter(device_id='PDA-NEW').exists())
+
+        # Une fois écrit, le terminal vient de la table Device (pas de doublon)
+        self.buffer.flush()
+        self.assertEqual(self.service.list_with_status()['meta']['total'], 2)
@@ -17,6 +17,9 @@ class DeviceStatusListView(APIView):
     GET /web/api/devices/status/
 
     Liste des PDA avec statut online/offline calculé (seuil 120 s).
+
+    Un PDA jamais vu dont le premier heartbeat a été reçu par un autre worker
+    n'apparaît qu'après le flush de présence (PDA_PRESENCE_FLUSH_INTERVAL_SECONDS).
     """
 
     permission_classes = [IsAuthenticated]
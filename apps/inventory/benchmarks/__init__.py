@@ -0,0 +1,22 @@
+"""
+Suite de benchmarks in-process : jeu de données synthétique et chemins critiques.
+
+Commandes associées :
+    python manage.py generate_benchmark_dataset --tag BENCH --warehouses 4
+    python manage.py run_benchmarks --tag BENCH --output benchmarks/current.json --baseline benchmarks/baseline.json
+"""
+from .dataset import DatasetSpec, SyntheticInventoryGenerator, copy_insert
+from .runner import BenchmarkRunner, compare_reports
+from .scenarios import SCENARIOS, BenchmarkContext, Scenario, get_scenarios
+
+__all__ = [
+    'DatasetSpec',
+    'SyntheticInventoryGenerator',
+    'copy_insert',
+    'BenchmarkRunner',
+    'compare_reports',
+    'SCENARIOS',
+    'BenchmarkContext',
+    'Scenario',
+    'get_scenarios',
+]
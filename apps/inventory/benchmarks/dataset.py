@@ -0,0 +1,459 @@
+"""
+Générateur de jeu de données synthétique volumineux pour les benchmarks.
+
+Structure générée (toutes les références sont préfixées par le tag du jeu) :
+    Account ─ Family ─ Product (N)
+    Warehouse (W) ─ Zone (Z) ─ SousZone (S) ─ Location (L)
+    Inventory EN REALISATION ─ Setting (par entrepôt) ─ Counting (1..3)
+    Stock (L × stocks_per_location)
+    Job (par paquet de locations_per_job emplacements) ─ JobDetail (comptages 1 et 2)
+    Assigment ENTAME (comptages 1 et 2, sessions PDA en round-robin)
+    CountingDetail (comptages 1 et 2 pour une part counted_ratio des jobs)
+
+Les insertions passent par bulk_create par lots, ou par COPY (PostgreSQL)
+pour les tables feuilles volumineuses (Stock, CountingDetail) : plusieurs
+millions de lignes sans tout matérialiser en mémoire. L'historique n'est
+pas écrit (bulk_create / COPY ne déclenchent pas simple_history).
+"""
+import csv
+import io
+import random
+from dataclasses import asdict, dataclass
+from itertools import islice
+
+from django.db import connections, transaction
+from django.db.models import AutoField
+from django.utils import timezone
+
+from apps.inventory.constants import (
+    AssignmentStatus,
+    CountMode,
+    InventoryStatus,
+    InventoryType,
+    JobDetailStatus,
+    JobStatus,
+    SessionType,
+)
+from apps.inventory.models import (
+    Assigment,
+    Counting,
+    CountingDetail,
+    Inventory,
+    Job,
+    JobDetail,
+    Setting,
+)
+from apps.inventory.services.assigned_location_index import index_job_details
+from apps.inventory.services.inventory_partitions import create_inventory_partitions, drop_inventory_partitions
+from apps.masterdata.models import (
+    Account,
+    Family,
+    Location,
+    LocationType,
+    Product,
+    RegroupementEmplacement,
+    SousZone,
+    Stock,
+    Warehouse,
+    Zone,
+    ZoneType,
+)
+from apps.users.models import UserApp
+
+
+MAX_TAG_LENGTH = 6
+COUNTED_ORDERS = (1, 2)
+
+
+@dataclass
+class DatasetSpec:
+    """Dimensions du jeu de données (les volumes sont multiplicatifs)."""
+
+    tag: str = 'BENCH'
+    warehouses: int = 2
+    zones_per_warehouse: int = 5
+    sous_zones_per_zone: int = 4
+    locations_per_sous_zone: int = 50
+    products: int = 2000
+    stocks_per_location: int = 2
+    locations_per_job: int = 20
+    countings: int = 3
+    mobile_users: int = 10
+    counted_ratio: float = 0.5
+    batch_size: int = 5000
+    use_copy: bool = True
+    seed: int = 42
+
+    def __post_init__(self):
+        if not self.tag or len(self.tag) > MAX_TAG_LENGTH or not self.tag.isalnum():
+            raise ValueError(f"Le tag doit être alphanumérique et faire au plus {MAX_TAG_LENGTH} caractères")
+        if self.countings < len(COUNTED_ORDERS):
+            raise ValueError(f"Au moins {len(COUNTED_ORDERS)} comptages sont nécessaires")
+
+    @property
+    def locations(self):
+        return self.warehouses * self.zones_per_warehouse * self.sous_zones_per_zone * self.locations_per_sous_zone
+
+    @property
+    def inventory_reference(self):
+        return f'{self.tag}-INV'
+
+    def to_dict(self):
+        data = asdict(self)
+        data['locations'] = self.locations
+        return data
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _copy_value(field, obj, connection):
+    value = field.get_db_prep_save(field.pre_save(obj, True), connection)
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    return value
+
+
+def copy_insert(model, objs, using='default'):
+    """
+    Insère des instances via COPY FROM STDIN (PostgreSQL), sans récupérer les ids.
+
+    Returns:
+        int: Nombre de lignes insérées
+    """
+    connection = connections[using]
+    fields = [field for field in model._meta.concrete_fields if not isinstance(field, AutoField)]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    count = 0
+    for obj in objs:
+        writer.writerow([_copy_value(field, obj, connection) for field in fields])
+        count += 1
+    buffer.seek(0)
+
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(field.column) for field in fields)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {quote(model._meta.db_table)} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+            buffer,
+        )
+    return count
+
+
+class SyntheticInventoryGenerator:
+    """
+    Génère un inventaire complet et volumineux à partir d'un DatasetSpec.
+
+    Usage:
+        generator = SyntheticInventoryGenerator(DatasetSpec(tag='B1', warehouses=10))
+        summary = generator.generate()
+    """
+
+    def __init__(self, spec, using='default', log=None):
+        self.spec = spec
+        self.using = using
+        self.log = log or (lambda message: None)
+        self.random = random.Random(spec.seed)
+        self.now = timezone.now()
+        self.counts = {}
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
+    def exists(self):
+        return Inventory.objects.filter(reference=self.spec.inventory_reference).exists()
+
+    def generate(self):
+        """Crée le jeu de données complet. Returns: dict des volumes par modèle."""
+        with transaction.atomic(using=self.using):
+            self._create_masterdata()
+            self._create_inventory()
+            self._create_stocks()
+            self._create_jobs()
+            self._create_counting_details()
+        return dict(self.counts)
+
+    def clean(self):
+        """Supprime le jeu de données du tag (cascade depuis l'inventaire et le compte)."""
+        tag = self.spec.tag
+        with transaction.atomic(using=self.using):
+            inventory_ids = list(
+                Inventory._base_manager.filter(reference=self.spec.inventory_reference).values_list('id', flat=True)
+            )
+            Inventory._base_manager.filter(reference=self.spec.inventory_reference).delete()
+            for inventory_id in inventory_ids:
+                drop_inventory_partitions(inventory_id, using=self.using)
+            Warehouse._base_manager.filter(reference__startswith=f'{tag}-').delete()
+            Account._base_manager.filter(reference=f'{tag}-ACC').delete()
+            ZoneType._base_manager.filter(reference=f'{tag}-ZT').delete()
+            LocationType._base_manager.filter(reference=f'{tag}-LT').delete()
+            UserApp.objects.filter(username__startswith=f'{tag.lower()}_').delete()
+
+    # ------------------------------------------------------------------
+    # Étapes
+    # ------------------------------------------------------------------
+
+    def _ref(self, kind, index):
+        return f'{self.spec.tag}-{kind}{index}'
+
+    def _bulk(self, model, objs):
+        """bulk_create par lots ; renvoie les instances (ids renseignés sous PostgreSQL)."""
+        created = []
+        for chunk in _chunks(objs, self.spec.batch_size):
+            created.extend(model.objects.using(self.using).bulk_create(chunk))
+        self.counts[model.__name__] = self.counts.get(model.__name__, 0) + len(created)
+        self.log(f'{model.__name__}: {len(created)}')
+        return created
+
+    def _insert_leaf(self, model, objs):
+        """Insertion des tables feuilles (ids non relus) : COPY si possible, sinon bulk_create."""
+        use_copy = self.spec.use_copy and connections[self.using].vendor == 'postgresql'
+        total = 0
+        for chunk in _chunks(objs, self.spec.batch_size):
+            if use_copy:
+                total += copy_insert(model, chunk, using=self.using)
+            else:
+                total += len(model.objects.using(self.using).bulk_create(chunk))
+        self.counts[model.__name__] = self.counts.get(model.__name__, 0) + total
+        self.log(f'{model.__name__}: {total}')
+        return total
+
+    def _create_masterdata(self):
+        spec = self.spec
+        self.account = Account.objects.create(
+            reference=f'{spec.tag}-ACC', account_name=f'Compte {spec.tag}', account_statuts='ACTIVE',
+        )
+        family = Family.objects.create(
+            reference=f'{spec.tag}-FAM', family_name=f'Famille {spec.tag}', compte=self.account, family_status='ACTIVE',
+        )
+        zone_type = ZoneType.objects.create(reference=f'{spec.tag}-ZT', type_name='Stockage', status='ACTIVE')
+        location_type = LocationType.objects.create(reference=f'{spec.tag}-LT', name='Palette')
+
+        self.warehouses = self._bulk(Warehouse, (
+            Warehouse(
+                reference=self._ref('W', w),
+                warehouse_name=f'Entrepôt {spec.tag} {w}',
+                warehouse_type='CENTRAL',
+                status='ACTIVE',
+            )
+            for w in range(spec.warehouses)
+        ))
+        zones = self._bulk(Zone, (
+            Zone(
+                reference=self._ref('Z', w * spec.zones_per_warehouse + z),
+                warehouse=warehouse,
+                zone_name=f'Zone {z}',
+                zone_type=zone_type,
+                zone_status='ACTIVE',
+            )
+            for w, warehouse in enumerate(self.warehouses)
+            for z in range(spec.zones_per_warehouse)
+        ))
+        sous_zones = self._bulk(SousZone, (
+            SousZone(
+                reference=self._ref('S', i * spec.sous_zones_per_zone + s),
+                zone=zone,
+                sous_zone_name=f'Sous-zone {s}',
+                sous_zone_status='ACTIVE',
+            )
+            for i, zone in enumerate(zones)
+            for s in range(spec.sous_zones_per_zone)
+        ))
+        # Regroupement du compte : requis par l'import de stock
+        regroupement = RegroupementEmplacement.objects.create(
+            account=self.account, warehouse=self.warehouses[0], nom=f'Regroupement {spec.tag}',
+        )
+        locations = self._bulk(Location, (
+            Location(
+                reference=self._ref('L', i * spec.locations_per_sous_zone + l),
+                location_reference=f'{spec.tag}-{i:05d}-{l:04d}',
+                sous_zone=sous_zone,
+                location_type=location_type,
+                regroupement=regroupement,
+            )
+            for i, sous_zone in enumerate(sous_zones)
+            for l in range(spec.locations_per_sous_zone)
+        ))
+        # (id emplacement, id entrepôt) dans l'ordre de génération : les emplacements
+        # d'un même entrepôt sont contigus
+        locations_per_warehouse = spec.locations // spec.warehouses
+        self.locations = [
+            (location.id, self.warehouses[index // locations_per_warehouse].id)
+            for index, location in enumerate(locations)
+        ]
+        self.product_ids = [product.id for product in self._bulk(Product, (
+            Product(
+                reference=self._ref('P', p),
+                Internal_Product_Code=f'{spec.tag}-ART-{p:07d}',
+                Short_Description=f'Article {p}',
+                Barcode=f'{spec.seed:03d}{p:010d}',
+                Stock_Unit='UN',
+                Product_Family=family,
+            )
+            for p in range(spec.products)
+        ))]
+
+        self.users = self._bulk(UserApp, (
+            UserApp(
+                username=f'{spec.tag.lower()}_pda{u}',
+                type=SessionType.MOBILE,
+                compte=self.account,
+                password='!',
+            )
+            for u in range(spec.mobile_users)
+        ))
+        self.web_user = UserApp.objects.create_user(
+            username=f'{spec.tag.lower()}_web', type=SessionType.WEB, compte=self.account, is_staff=True,
+        )
+
+    def _create_inventory(self):
+        spec = self.spec
+        self.inventory = Inventory.objects.create(
+            reference=spec.inventory_reference,
+            label=f'Inventaire benchmark {spec.tag}',
+            date=self.now,
+            status=InventoryStatus.EN_REALISATION,
+            inventory_type=InventoryType.GENERAL,
+            en_realisation_status_date=self.now,
+        )
+        # Partitions créées tout de suite : les détails sont insérés dans la même transaction
+        create_inventory_partitions(self.inventory.id, using=self.using)
+        self._bulk(Setting, (
+            Setting(
+                reference=self._ref('ST', w),
+                account=self.account,
+                warehouse=warehouse,
+                inventory=self.inventory,
+            )
+            for w, warehouse in enumerate(self.warehouses)
+        ))
+        self.countings = self._bulk(Counting, (
+            Counting(
+                reference=self._ref('C', order),
+                order=order,
+                count_mode=CountMode.BY_ARTICLE,
+                show_product=True,
+                quantity_show=True,
+                inventory=self.inventory,
+            )
+            for order in range(1, spec.countings + 1)
+        ))
+
+    def _location_products(self, location_index):
+        spec = self.spec
+        base = location_index * spec.stocks_per_location
+        return [self.product_ids[(base + k) % len(self.product_ids)] for k in range(spec.stocks_per_location)]
+
+    def _create_stocks(self):
+        spec = self.spec
+
+        def stocks():
+            for index, (location_id, warehouse_id) in enumerate(self.locations):
+                for k, product_id in enumerate(self._location_products(index)):
+                    yield Stock(
+                        reference=self._ref('K', index * spec.stocks_per_location + k),
+                        location_id=location_id,
+                        product_id=product_id,
+                        quantity_available=self.random.randint(1, 500),
+                        inventory=self.inventory,
+                        warehouse_id=warehouse_id,
+                    )
+
+        self._insert_leaf(Stock, stocks())
+
+    def _create_jobs(self):
+        spec = self.spec
+        # Paquets d'emplacements contigus, sans chevaucher deux entrepôts
+        self.job_locations = []
+        current, current_warehouse = [], None
+        for index, (location_id, warehouse_id) in enumerate(self.locations):
+            if current and (warehouse_id != current_warehouse or len(current) >= spec.locations_per_job):
+                self.job_locations.append((current_warehouse, current))
+                current = []
+            current_warehouse = warehouse_id
+            current.append(index)
+        if current:
+            self.job_locations.append((current_warehouse, current))
+
+        jobs = self._bulk(Job, (
+            Job(
+                reference=f'JOB-{j + 1:04d}',
+                status=JobStatus.ENTAME,
+                entame_date=self.now,
+                warehouse_id=warehouse_id,
+                inventory=self.inventory,
+            )
+            for j, (warehouse_id, _) in enumerate(self.job_locations)
+        ))
+        self.job_ids = [job.id for job in jobs]
+        counted = [counting for counting in self.countings if counting.order in COUNTED_ORDERS]
+
+        job_details = self._bulk(JobDetail, (
+            JobDetail(
+                reference=self._ref('D', (j * len(counted) + c) * spec.locations_per_job + k),
+                location_id=self.locations[index][0],
+                job_id=job_id,
+                counting=counting,
+                status=JobDetailStatus.EN_ATTENTE,
+                en_attente_date=self.now,
+            )
+            for j, (job_id, (_, indexes)) in enumerate(zip(self.job_ids, self.job_locations))
+            for c, counting in enumerate(counted)
+            for k, index in enumerate(indexes)
+        ))
+        index_job_details(job_details, using=self.using)
+        self._bulk(Assigment, (
+            Assigment(
+                reference=self._ref('A', j * len(counted) + c),
+                status=AssignmentStatus.ENTAME,
+                entame_date=self.now,
+                job_id=job_id,
+                counting=counting,
+                session=self.users[(j + c) % len(self.users)] if self.users else None,
+            )
+            for j, job_id in enumerate(self.job_ids)
+            for c, counting in enumerate(counted)
+        ))
+
+    def _create_counting_details(self):
+        spec = self.spec
+        counted = [counting for counting in self.countings if counting.order in COUNTED_ORDERS]
+
+        def is_counted(job_index):
+            # Répartition régulière des jobs comptés (donc sur tous les entrepôts)
+            return int((job_index + 1) * spec.counted_ratio) > int(job_index * spec.counted_ratio)
+
+        def details():
+            sequence = 0
+            for j, (job_id, (_, indexes)) in enumerate(zip(self.job_ids, self.job_locations)):
+                if not is_counted(j):
+                    continue
+                for index in indexes:
+                    for product_id in self._location_products(index):
+                        quantity = self.random.randint(1, 500)
+                        for counting in counted:
+                            # ~10 % d'écarts entre le 1er et le 2e comptage
+                            if counting.order > 1 and self.random.random() < 0.1:
+                                quantity += self.random.randint(1, 5)
+                            yield CountingDetail(
+                                reference=self._ref('CD', sequence),
+                                quantity_inventoried=quantity,
+                                product_id=product_id,
+                                location_id=self.locations[index][0],
+                                counting=counting,
+                                job_id=job_id,
+                                inventory=self.inventory,
+                            )
+                            sequence += 1
+
+        self._insert_leaf(CountingDetail, details())
@@ -0,0 +1,160 @@
+"""
+Exécution des scénarios de benchmark et comparaison à un rapport de référence.
+
+Chaque itération est exécutée dans ``transaction.atomic()`` puis annulée :
+les scénarios d'écriture (envoi PDA, import, recalcul) repartent toujours du
+même état. Les callbacks on_commit (ex. flush de l'historique en mode batched)
+ne sont donc pas mesurés.
+"""
+import platform
+import statistics
+import time
+
+import django
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .scenarios import count_dataset
+
+
+REPORT_VERSION = 1
+
+
+class _Rollback(Exception):
+    pass
+
+
+class _QueryCounter:
+    """Wrapper d'exécution SQL : compte les requêtes sans les conserver (pas de limite de journal)."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _percentile(values, percent):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class BenchmarkRunner:
+    """
+    Exécute des scénarios en process et produit un rapport JSON sérialisable.
+
+    Args:
+        context: BenchmarkContext du jeu de données.
+        repeat: Nombre d'itérations mesurées par scénario.
+        warmup: Itérations non mesurées (caches, imports paresseux).
+    """
+
+    def __init__(self, context, repeat=5, warmup=1, log=None):
+        self.context = context
+        self.repeat = repeat
+        self.warmup = warmup
+        self.log = log or (lambda message: None)
+
+    def run(self, scenarios):
+        results = {}
+        for scenario in scenarios:
+            self.log(f'{scenario.name}...')
+            results[scenario.name] = self.run_scenario(scenario)
+        return {
+            'version': REPORT_VERSION,
+            'generated_at': timezone.now().isoformat(),
+            'environment': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+            },
+            'dataset': count_dataset(self.context.inventory),
+            'settings': {'repeat': self.repeat, 'warmup': self.warmup, 'batch_size': self.context.batch_size},
+            'scenarios': results,
+        }
+
+    def run_scenario(self, scenario):
+        client = APIClient()
+        user = self.context.mobile_user if scenario.user == 'mobile' else self.context.web_user
+        client.force_authenticate(user=user)
+
+        for _ in range(self.warmup):
+            self._call(client, scenario)
+
+        durations, queries, sizes, statuses = [], [], [], set()
+        for _ in range(self.repeat):
+            measure = self._call(client, scenario)
+            durations.append(measure['seconds'])
+            queries.append(measure['queries'])
+            sizes.append(measure['bytes'])
+            statuses.add(measure['status'])
+
+        return {
+            'description': scenario.description,
+            'status_codes': sorted(statuses),
+            'ok': all(status < 400 for status in statuses),
+            'median_ms': round(statistics.median(durations) * 1000, 2),
+            'min_ms': round(min(durations) * 1000, 2),
+            'p95_ms': round(_percentile(durations, 95) * 1000, 2),
+            'mean_ms': round(statistics.fmean(durations) * 1000, 2),
+            'queries': int(statistics.median(queries)),
+            'response_bytes': int(statistics.median(sizes)),
+        }
+
+    def _call(self, client, scenario):
+        url = scenario.path(self.context)
+        data = scenario.payload(self.context) if scenario.payload else None
+        kwargs = {'format': scenario.format} if data is not None else {}
+        measure = {}
+        try:
+            with transaction.atomic():
+                counter = _QueryCounter()
+                with connection.execute_wrapper(counter):
+                    start = time.perf_counter()
+                    response = getattr(client, scenario.method)(url, data, **kwargs)
+                    if response.streaming:
+                        size = sum(len(chunk) for chunk in response.streaming_content)
+                    else:
+                        size = len(response.content)
+                    measure['seconds'] = time.perf_counter() - start
+                measure.update(queries=counter.count, bytes=size, status=response.status_code)
+                raise _Rollback
+        except _Rollback:
+            pass
+        return measure
+
+
+def compare_reports(current, baseline, time_threshold=0.2, query_threshold=0):
+    """
+    Compare deux rapports scénario par scénario.
+
+    Une régression est signalée si la médiane augmente de plus de
+    ``time_threshold`` (ratio) ou si le nombre de requêtes SQL augmente de
+    plus de ``query_threshold``.
+
+    Returns:
+        list[dict]: Une entrée par scénario présent dans les deux rapports.
+    """
+    comparison = []
+    for name, result in current['scenarios'].items():
+        reference = baseline.get('scenarios', {}).get(name)
+        if reference is None:
+            continue
+        ratio = result['median_ms'] / reference['median_ms'] if reference['median_ms'] else None
+        query_delta = result['queries'] - reference['queries']
+        comparison.append({
+            'scenario': name,
+            'baseline_ms': reference['median_ms'],
+            'current_ms': result['median_ms'],
+            'ratio': round(ratio, 3) if ratio is not None else None,
+            'baseline_queries': reference['queries'],
+            'current_queries': result['queries'],
+            'query_delta': query_delta,
+            'regression': bool(
+                (ratio is not None and ratio > 1 + time_threshold) or query_delta > query_threshold
+            ),
+        })
+    return comparison
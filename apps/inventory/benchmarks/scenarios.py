@@ -0,0 +1,249 @@
+"""
+Scénarios de benchmark : chemins critiques appelés en process via APIClient.
+
+Chaque scénario décrit une requête HTTP (méthode, URL, payload) construite à
+partir du BenchmarkContext, c'est-à-dire des objets du jeu de données
+synthétique (voir dataset.py). Les scénarios sont exécutés dans une
+transaction annulée après chaque itération, ils ne modifient donc pas le jeu.
+"""
+import io
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from openpyxl import Workbook
+
+from apps.inventory.models import Assigment, Counting, CountingDetail, Inventory, JobDetail
+from apps.masterdata.models import Stock
+from apps.users.models import UserApp
+
+
+@dataclass
+class BenchmarkContext:
+    """Objets du jeu de données utilisés pour construire les requêtes."""
+
+    inventory: Inventory
+    warehouse_id: int
+    job_id: int
+    assignment: Assigment
+    counted_job_id: int
+    counted_assignment: Assigment
+    counting: Counting
+    mobile_user: UserApp
+    web_user: UserApp
+    batch_size: int = 1000
+
+    @classmethod
+    def from_tag(cls, tag, batch_size=1000):
+        """Contexte du jeu généré avec ``tag`` (voir DatasetSpec)."""
+        inventory = Inventory.objects.get(reference=f'{tag}-INV')
+        counting = Counting.objects.get(inventory=inventory, order=1)
+        assignments = (
+            Assigment.objects
+            .filter(job__inventory=inventory, counting=counting, session__isnull=False)
+            .select_related('job', 'session')
+            .order_by('id')
+        )
+        # Job sans détail saisi (cible de l'envoi PDA) et job déjà compté du même entrepôt (PDF)
+        counted = assignments.filter(job__countingdetail__counting=counting).distinct()
+        assignment = assignments.exclude(job__countingdetail__counting=counting).first()
+        if assignment is None:
+            raise ValueError(f"Aucun assignment de 1er comptage non compté pour le jeu {tag}")
+        counted_assignment = counted.filter(job__warehouse_id=assignment.job.warehouse_id).first() or assignment
+        return cls(
+            inventory=inventory,
+            warehouse_id=assignment.job.warehouse_id,
+            job_id=assignment.job_id,
+            assignment=assignment,
+            counted_job_id=counted_assignment.job_id,
+            counted_assignment=counted_assignment,
+            counting=counting,
+            mobile_user=assignment.session,
+            web_user=UserApp.objects.get(username=f'{tag.lower()}_web'),
+            batch_size=batch_size,
+        )
+
+
+@dataclass
+class Scenario:
+    """
+    Requête de benchmark.
+
+    Attributes:
+        name: Identifiant stable (clé du rapport JSON).
+        method: Méthode HTTP.
+        path: Fonction (context) -> URL.
+        payload: Fonction (context) -> données envoyées (optionnel).
+        user: 'web' ou 'mobile' (utilisateur authentifié).
+        format: 'json' ou 'multipart'.
+    """
+
+    name: str
+    method: str
+    path: Callable
+    payload: Optional[Callable] = None
+    user: str = 'web'
+    format: str = 'json'
+    description: str = ''
+    tags: tuple = field(default_factory=tuple)
+
+
+def _counting_details_payload(context):
+    """Lot PDA : un CountingDetail par (emplacement, article en stock) du job, comptage 1."""
+    location_ids = list(
+        JobDetail.objects.filter(job_id=context.job_id, counting=context.counting).values_list('location_id', flat=True)
+    )
+    stocks = Stock.objects.filter(inventory=context.inventory, location_id__in=location_ids).values_list(
+        'location_id', 'product_id',
+    )
+    payload = [
+        {
+            'counting_id': context.counting.id,
+            'location_id': location_id,
+            'product_id': product_id,
+            'quantity_inventoried': 10,
+            'assignment_id': context.assignment.id,
+        }
+        for location_id, product_id in stocks
+    ]
+    return payload[:context.batch_size]
+
+
+def _stock_import_file(context):
+    """Fichier Excel d'import de stock (format GENERAL) reconstruit depuis les stocks du jeu."""
+    rows = (
+        Stock.objects.filter(inventory=context.inventory, warehouse_id=context.warehouse_id)
+        .values_list('product__Internal_Product_Code', 'location__location_reference', 'quantity_available')
+        [:context.batch_size]
+    )
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(['article', 'emplacement', 'quantite'])
+    for row in rows:
+        sheet.append(list(row))
+    content = io.BytesIO()
+    workbook.save(content)
+    content.seek(0)
+    content.name = 'benchmark_stock.xlsx'
+    return {'file': content}
+
+
+def _inventory_warehouse(suffix):
+    return lambda c: f'/web/api/inventory/{c.inventory.id}/warehouses/{c.warehouse_id}/{suffix}'
+
+
+SCENARIOS = [
+    Scenario(
+        name='mobile_sync_data',
+        method='get',
+        path=lambda c: f'/mobile/api/sync/data/?inventory_id={c.inventory.id}',
+        user='mobile',
+        description='Synchronisation PDA (jobs, assignments, comptages)',
+        tags=('mobile',),
+    ),
+    Scenario(
+        name='mobile_counting_details_batch',
+        method='post',
+        path=lambda c: f'/mobile/api/job/{c.job_id}/counting-detail/',
+        payload=_counting_details_payload,
+        user='mobile',
+        description='Envoi d\'un lot de CountingDetail (create_counting_details_batch)',
+        tags=('mobile', 'write'),
+    ),
+    Scenario(
+        name='kpi_nombre_jobs_total',
+        method='get',
+        path=_inventory_warehouse('kpis/nombre-jobs-total/'),
+        description='KPI volume magasin',
+        tags=('kpi',),
+    ),
+    Scenario(
+        name='kpi_repartition_1er_comptage_par_equipe',
+        method='get',
+        path=_inventory_warehouse('kpis/repartition-1er-comptage-par-equipe/'),
+        description='KPI répartition par équipe',
+        tags=('kpi',),
+    ),
+    Scenario(
+        name='monitoring_zones',
+        method='get',
+        path=_inventory_warehouse('monitoring/'),
+        description='Monitoring par zone',
+        tags=('monitoring',),
+    ),
+    Scenario(
+        name='monitoring_global',
+        method='get',
+        path=_inventory_warehouse('global-monitoring/'),
+        description='Monitoring global',
+        tags=('monitoring',),
+    ),
+    Scenario(
+        name='stock_import',
+        method='post',
+        path=_inventory_warehouse('stocks/import/'),
+        payload=_stock_import_file,
+        format='multipart',
+        description='Import Excel de stock (inventaire GENERAL, remplacement)',
+        tags=('import', 'write'),
+    ),
+    Scenario(
+        name='datatable_inventories',
+        method='get',
+        path=lambda c: '/web/api/inventory/?page=1&page_size=50',
+        description='Datatable des inventaires',
+        tags=('datatable',),
+    ),
+    Scenario(
+        name='datatable_warehouse_jobs',
+        method='get',
+        path=lambda c: f'/web/api/inventory/{c.inventory.id}/warehouse/{c.warehouse_id}/jobs/?page=1&page_size=100',
+        description='Datatable des jobs d\'un entrepôt',
+        tags=('datatable',),
+    ),
+    Scenario(
+        name='export_results_excel',
+        method='get',
+        path=_inventory_warehouse('results/export/'),
+        description='Export Excel des résultats d\'inventaire',
+        tags=('export',),
+    ),
+    Scenario(
+        name='export_assignment_pdf',
+        method='post',
+        path=lambda c: f'/web/api/jobs/{c.counted_job_id}/assignments/{c.counted_assignment.id}/pdf/',
+        description='PDF d\'un assignment',
+        tags=('export',),
+    ),
+    Scenario(
+        name='ecart_stock_recalculation',
+        method='post',
+        path=_inventory_warehouse('ecarts-stock/sync/'),
+        payload=lambda c: {},
+        description='Recalcul des écarts stock théorique / compté',
+        tags=('ecart', 'write'),
+    ),
+]
+
+
+def get_scenarios(names=None, tags=None):
+    """Filtre les scénarios par nom et/ou tag (None = tous)."""
+    selected = SCENARIOS
+    if names:
+        unknown = set(names) - {scenario.name for scenario in SCENARIOS}
+        if unknown:
+            raise ValueError(f"Scénario(s) inconnu(s) : {', '.join(sorted(unknown))}")
+        selected = [scenario for scenario in selected if scenario.name in names]
+    if tags:
+        selected = [scenario for scenario in selected if set(tags) & set(scenario.tags)]
+    return selected
+
+
+def count_dataset(inventory):
+    """Volumétrie du jeu (enregistrée dans le rapport pour comparer à jeu constant)."""
+    return {
+        'jobs': inventory.job_set.count(),
+        'job_details': JobDetail.objects.filter(job__inventory=inventory).count(),
+        'assignments': Assigment.objects.filter(job__inventory=inventory).count(),
+        'stocks': Stock.objects.filter(inventory=inventory).count(),
+        'counting_details': CountingDetail.objects.filter(job__inventory=inventory).count(),
+    }
@@ -0,0 +1,71 @@
+"""
+Archive un inventaire clôturé en Parquet compressé et vide ses lignes des tables chaudes.
+
+Les fichiers sont écrits sous INVENTORY_ARCHIVE_DIR/<inventory_id>/ ; les
+résultats et exports restent consultables via les endpoints ``.../archive/``.
+
+Usage:
+  python manage.py archive_inventory --inventory-id 24 --dry-run
+  python manage.py archive_inventory --inventory-id 24
+  python manage.py archive_inventory --inventory-id 24 --verify
+"""
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.db_routing import primary_pinning
+from apps.inventory.exceptions import InventoryNotFoundError, InventoryStatusError, InventoryValidationError
+from apps.inventory.services.inventory_archive_service import InventoryArchiveService
+
+
+class Command(BaseCommand):
+    help = "Archive un inventaire clôturé (Parquet) et supprime ses lignes des tables chaudes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--inventory-id", type=int, required=True, help="ID inventaire (statut CLOTURE).")
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Affiche le nombre de lignes par table sans rien écrire ni supprimer.",
+        )
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Contrôle une archive existante (fichiers, lignes, empreintes) contre son manifeste.",
+        )
+
+    # Portée d'épinglage de la commande (lectures de reporting après écriture sur default)
+    @primary_pinning()
+    def handle(self, *args, **options):
+        inventory_id = options["inventory_id"]
+        service = InventoryArchiveService()
+
+        try:
+            if options["verify"]:
+                problems = service.verify(inventory_id)
+                if problems:
+                    for problem in problems:
+                        self.stdout.write(self.style.ERROR(f"  {problem}"))
+                    raise CommandError(f"Archive de l'inventaire {inventory_id} corrompue.")
+                self.stdout.write(self.style.SUCCESS(f"Archive de l'inventaire {inventory_id} intègre."))
+                return
+
+            if options["dry_run"]:
+                counts = service.plan(inventory_id)
+                for dataset, count in counts.items():
+                    self.stdout.write(f"  {dataset}: {count} ligne(s)")
+                self.stdout.write(f"Total : {sum(counts.values())} ligne(s) à archiver (dry-run).")
+                return
+
+            archive = service.archive(inventory_id)
+        except (InventoryNotFoundError, InventoryStatusError, InventoryValidationError, ValueError) as exc:
+            raise CommandError(str(exc))
+
+        for dataset, entry in archive.manifest.items():
+            self.stdout.write(f"  {dataset}: {entry['rows']} ligne(s), {entry['bytes']} octet(s)")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Inventaire {inventory_id} archivé : {archive.total_rows} ligne(s) supprimée(s) des tables, "
+                f"{archive.size_bytes // 1024} Ko dans {archive.path}."
+            )
+        )
@@ -0,0 +1,127 @@
+"""
+Commande Django pour mesurer le débit d'écriture selon le mode d'historique.
+
+Pour chaque mode (sync, batched, off), la commande crée N Personne dans une
+transaction via save() puis via bulk_create + record_bulk_history, et mesure
+le temps, le débit et le nombre de requêtes SQL (commit inclus, donc flush
+du buffer inclus en mode batched). Les lignes créées et leur historique sont
+supprimés à la fin de chaque mesure.
+
+Usage:
+    python manage.py benchmark_history_modes --rows 2000
+    python manage.py benchmark_history_modes --rows 5000 --modes batched off --json
+"""
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.core.history import HistoryMode, history_mode, record_bulk_history
+from apps.inventory.models import Personne
+
+
+BENCHMARK_PREFIX = 'BENCH-HIST'
+
+
+class Command(BaseCommand):
+    help = "Mesure le débit d'écriture des modèles historisés pour chaque mode d'historique"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=1000,
+            help='Nombre de lignes écrites par scénario (défaut: 1000)',
+        )
+        parser.add_argument(
+            '--modes',
+            nargs='+',
+            choices=HistoryMode.CHOICES,
+            default=list(HistoryMode.CHOICES),
+            help='Modes à mesurer (défaut: tous)',
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Affiche le résultat au format JSON',
+        )
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        results = []
+
+        for mode in options['modes']:
+            results.append(self._measure(mode, 'save', rows, self._write_with_save))
+            results.append(self._measure(mode, 'bulk', rows, self._write_with_bulk))
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(self.style.SUCCESS('=' * 80))
+        self.stdout.write(self.style.SUCCESS(f"DÉBIT D'ÉCRITURE PAR MODE D'HISTORIQUE ({rows} lignes)"))
+        self.stdout.write(self.style.SUCCESS('=' * 80))
+        self.stdout.write(
+            f"{'mode':<10}{'chemin':<8}{'durée (s)':>12}{'lignes/s':>12}{'requêtes':>10}{'historique':>12}"
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result['mode']:<10}{result['path']:<8}{result['seconds']:>12.3f}"
+                f"{result['rows_per_second']:>12.0f}{result['queries']:>10}{result['history_rows']:>12}"
+            )
+
+    def _measure(self, mode, path, rows, writer):
+        history_model = Personne.history.model
+        with history_mode(mode, [Personne]):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                with transaction.atomic():
+                    ids = writer(rows)
+                elapsed = time.perf_counter() - start
+
+        history_rows = history_model.objects.filter(id__in=ids).count()
+        self._cleanup(ids)
+
+        return {
+            'mode': mode,
+            'path': path,
+            'rows': rows,
+            'seconds': round(elapsed, 4),
+            'rows_per_second': round(rows / elapsed, 1) if elapsed else 0.0,
+            'queries': len(queries.captured_queries),
+            'history_rows': history_rows,
+        }
+
+    def _write_with_save(self, rows):
+        token = time.time_ns() % 1_000_000
+        ids = []
+        for i in range(rows):
+            personne = Personne(
+                full_name=f'{BENCHMARK_PREFIX} {i}',
+                numero=f'opr-{i % 9999 + 1:04d}',
+                reference=f'BS-{token}-{i}',
+            )
+            personne.save()
+            ids.append(personne.id)
+        return ids
+
+    def _write_with_bulk(self, rows):
+        token = time.time_ns() % 1_000_000
+        personnes = [
+            Personne(
+                full_name=f'{BENCHMARK_PREFIX} {i}',
+                numero=f'opr-{i % 9999 + 1:04d}',
+                reference=f'BH-{token}-{i}',
+            )
+            for i in range(rows)
+        ]
+        Personne.objects.bulk_create(personnes)
+        record_bulk_history(personnes, Personne)
+        return [personne.id for personne in personnes]
+
+    def _cleanup(self, ids):
+        with history_mode(HistoryMode.OFF, [Personne]):
+            Personne.history.model.objects.filter(id__in=ids).delete()
+            Personne.objects.filter(id__in=ids).delete()
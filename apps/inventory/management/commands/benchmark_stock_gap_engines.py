@@ -0,0 +1,191 @@
+"""
+Commande Django pour comparer les moteurs de consolidation des écarts stock
+théorique vs inventorié (``python`` : dictionnaires, ``columnar`` : tableaux NumPy).
+
+Deux modes :
+- synthétique (défaut) : N articles générés en mémoire, seule la consolidation
+  est mesurée (temps médian, pic mémoire via tracemalloc) ;
+- base : ``--inventory-id`` / ``--warehouse-id`` mesure
+  ``StockGapService.compute_stock_gaps`` de bout en bout avec chaque moteur.
+
+Les résultats des deux moteurs sont comparés ligne à ligne.
+
+Usage:
+    python manage.py benchmark_stock_gap_engines --skus 300000
+    python manage.py benchmark_stock_gap_engines --skus 50000 --repeat 5 --json
+    python manage.py benchmark_stock_gap_engines --inventory-id 24 --warehouse-id 5
+"""
+import json
+import statistics
+import time
+import tracemalloc
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.inventory.constants import StockGapGrouping
+from apps.inventory.services.stock_gap_service import StockGapService
+from apps.inventory.utils.stock_gap_engine import (
+    ColumnarStockGapEngine,
+    ProductColumns,
+    PythonStockGapEngine,
+)
+
+
+class Command(BaseCommand):
+    help = "Compare les moteurs de calcul des écarts stock théorique (python / columnar)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--skus', type=int, default=100000, help='Nombre d\'articles synthétiques (défaut: 100000)')
+        parser.add_argument('--products-per-key', type=float, default=1.2, help='Produits par clé de groupement (défaut: 1.2)')
+        parser.add_argument('--repeat', type=int, default=3, help='Itérations mesurées par moteur (défaut: 3)')
+        parser.add_argument('--seed', type=int, default=42, help='Graine du générateur (défaut: 42)')
+        parser.add_argument('--inventory-id', type=int, help='Mesure sur un inventaire existant')
+        parser.add_argument('--warehouse-id', type=int, help='Magasin de l\'inventaire mesuré')
+        parser.add_argument('--json', action='store_true', help='Affiche le résultat au format JSON')
+
+    def handle(self, *args, **options):
+        if options['inventory_id']:
+            if not options['warehouse_id']:
+                raise CommandError('--warehouse-id est requis avec --inventory-id')
+            results = self._benchmark_database(options)
+        else:
+            results = self._benchmark_synthetic(options)
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(self.style.SUCCESS('=' * 72))
+        self.stdout.write(self.style.SUCCESS(f"ÉCARTS STOCK THÉORIQUE — {results['dataset']}"))
+        self.stdout.write(self.style.SUCCESS('=' * 72))
+        self.stdout.write(f"{'moteur':<12}{'médiane (s)':>14}{'min (s)':>12}{'pic mémoire (Mo)':>20}{'lignes':>10}")
+        for engine in results['engines']:
+            self.stdout.write(
+                f"{engine['engine']:<12}{engine['median_seconds']:>14.3f}{engine['min_seconds']:>12.3f}"
+                f"{engine['peak_memory_mb']:>20.1f}{engine['lines']:>10}"
+            )
+        speedup = results['speedup']
+        self.stdout.write(f"Accélération columnar / python : x{speedup:.1f}")
+        if results['identical']:
+            self.stdout.write(self.style.SUCCESS('✓ Résultats identiques'))
+        else:
+            self.stdout.write(self.style.ERROR('✗ Résultats différents entre les moteurs'))
+
+    # ------------------------------------------------------------------
+    # Modes
+    # ------------------------------------------------------------------
+
+    def _benchmark_synthetic(self, options):
+        inputs = _synthetic_inputs(options['skus'], options['products_per_key'], options['seed'])
+        inventoried, theoretical, excluded, rows = inputs
+        grouping_mode = StockGapGrouping.BY_BARCODE
+
+        # Chaque moteur construit ses métadonnées produit depuis les mêmes
+        # lignes (id, clé, désignation), comme le repository depuis la base
+        def run_python():
+            products_info = {
+                product_id: {"product_id": product_id, "barcode": barcode or "", "designation": designation or ""}
+                for product_id, barcode, designation in rows
+            }
+            return PythonStockGapEngine().compute(
+                inventoried, theoretical, excluded, products_info, False, grouping_mode
+            )
+
+        def run_columnar():
+            return ColumnarStockGapEngine().compute(
+                inventoried, theoretical, excluded, ProductColumns.from_rows(rows), grouping_mode
+            )
+
+        return self._compare(
+            f"{options['skus']} articles synthétiques",
+            {'python': run_python, 'columnar': run_columnar},
+            options['repeat'],
+        )
+
+    def _benchmark_database(self, options):
+        def runner(engine):
+            service = StockGapService(engine=engine)
+            return lambda: service.compute_stock_gap_frame(
+                options['inventory_id'], options['warehouse_id'], only_nonzero=False
+            )[0]
+
+        return self._compare(
+            f"inventaire {options['inventory_id']} / magasin {options['warehouse_id']}",
+            {'python': runner('python'), 'columnar': runner('columnar')},
+            options['repeat'],
+        )
+
+    def _compare(self, dataset, runners, repeat):
+        measures = []
+        frames = {}
+        for name in ('python', 'columnar'):
+            durations, peak, frame = _measure(runners[name], repeat)
+            frames[name] = frame
+            measures.append({
+                'engine': name,
+                'median_seconds': statistics.median(durations),
+                'min_seconds': min(durations),
+                'peak_memory_mb': peak / (1024 * 1024),
+                'lines': len(frame),
+            })
+        python_median = measures[0]['median_seconds']
+        columnar_median = measures[1]['median_seconds']
+        return {
+            'dataset': dataset,
+            'engines': measures,
+            'speedup': python_median / columnar_median if columnar_median else 0.0,
+            'identical': list(frames['python'].iter_lines()) == list(frames['columnar'].iter_lines()),
+        }
+
+
+def _measure(run, repeat):
+    """Durées de ``repeat`` exécutions et pic mémoire de la première"""
+    durations = []
+    tracemalloc.start()
+    start = time.perf_counter()
+    frame = run()
+    durations.append(time.perf_counter() - start)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    for _ in range(max(repeat - 1, 0)):
+        start = time.perf_counter()
+        run()
+        durations.append(time.perf_counter() - start)
+    return durations, peak, frame
+
+
+def _synthetic_inputs(skus, products_per_key, seed):
+    """
+    Articles synthétiques : ~90 % en stock théorique, ~80 % inventoriés,
+    2 % sans clé, 1 % sans métadonnées, quelques produits exclus.
+    """
+    rng = np.random.default_rng(seed)
+    product_ids = np.arange(1, skus + 1, dtype=np.int64)
+    key_count = max(1, int(skus / products_per_key))
+    key_numbers = rng.integers(0, key_count, size=skus)
+    missing_key = rng.random(skus) < 0.02
+    missing_meta = rng.random(skus) < 0.01
+    empty_designation = rng.random(skus) < 0.1
+
+    theoretical_mask = rng.random(skus) < 0.9
+    inventoried_mask = rng.random(skus) < 0.8
+    theoretical = dict(zip(
+        product_ids[theoretical_mask].tolist(),
+        rng.integers(0, 500, size=int(theoretical_mask.sum())).tolist(),
+    ))
+    inventoried = dict(zip(
+        product_ids[inventoried_mask].tolist(),
+        rng.integers(0, 500, size=int(inventoried_mask.sum())).tolist(),
+    ))
+    excluded = set(product_ids[:10].tolist())
+
+    rows = [
+        (product_id, '' if no_key else f"{key_number:013d}", '' if no_designation else f"Article {key_number}")
+        for product_id, key_number, no_key, no_meta, no_designation in zip(
+            product_ids.tolist(), key_numbers.tolist(), missing_key.tolist(),
+            missing_meta.tolist(), empty_designation.tolist(),
+        )
+        if not no_meta
+    ]
+    return inventoried, theoretical, excluded, rows
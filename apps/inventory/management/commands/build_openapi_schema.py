@@ -0,0 +1,48 @@
+"""
+Génère le schéma OpenAPI de l'API (une fois par déploiement).
+
+Écrit ``swagger.json`` et ``swagger.json.gz`` dans OPENAPI_SCHEMA_DIR ; ils
+sont servis par /swagger.json (ETag) et chargés par les interfaces /swagger/
+et /redoc/. Les workers rechargent l'artefact dès que le fichier change.
+
+Usage:
+  python manage.py build_openapi_schema
+  python manage.py build_openapi_schema --check
+"""
+from __future__ import annotations
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from project.openapi import generate_schema, schema_path, write_schema_artifact
+
+
+class Command(BaseCommand):
+    help = "Génère le schéma OpenAPI (swagger.json + .gz) servi par /swagger.json."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="N'écrit rien : échoue si l'artefact est absent ou différent du schéma courant.",
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        content = generate_schema()
+        elapsed = time.perf_counter() - start
+
+        target = schema_path()
+        if options["check"]:
+            if not target.exists() or target.read_bytes() != content:
+                raise CommandError(f"Schéma OpenAPI absent ou obsolète : {target}")
+            self.stdout.write(self.style.SUCCESS(f"Schéma OpenAPI à jour : {target}"))
+            return
+
+        write_schema_artifact(content)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Schéma OpenAPI généré en {elapsed:.1f}s — {target} ({len(content) // 1024} Ko)."
+            )
+        )
@@ -25,6 +25,7 @@ from collections import defaultdict
 import logging
 
 from apps.inventory.models import Assigment, JobDetail, Job, CountingDetail, EcartComptage
+from apps.inventory.services.inventory_result_materializer import mark_inventory_results_dirty
 
 logger = logging.getLogger(__name__)
 
@@ -527,6 +528,7 @@ class Command(BaseCommand):
             for cd in counting_details_to_create:
                 cd.reference = cd.generate_reference(CountingDetail.REFERENCE_PREFIX)
             CountingDetail.objects.bulk_update(counting_details_to_create, ['reference'])
+            mark_inventory_results_dirty(counting_details=counting_details_to_create)
         
         return {
             'synchronized': True,
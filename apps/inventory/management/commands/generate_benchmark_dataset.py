@@ -0,0 +1,86 @@
+"""
+Commande Django pour générer un jeu de données synthétique volumineux (benchmarks).
+
+Les volumes sont multiplicatifs : warehouses × zones × sous-zones × emplacements.
+Les tables feuilles (Stock, CountingDetail) sont insérées par COPY sous PostgreSQL.
+
+Usage:
+    python manage.py generate_benchmark_dataset
+    python manage.py generate_benchmark_dataset --tag B1M --warehouses 10 --zones 10 \\
+        --sous-zones 10 --locations 100 --products 50000 --replace
+    python manage.py generate_benchmark_dataset --tag B1M --clean
+"""
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.inventory.benchmarks import DatasetSpec, SyntheticInventoryGenerator
+
+
+class Command(BaseCommand):
+    help = "Génère un inventaire synthétique volumineux (bulk insert / COPY) pour les benchmarks"
+
+    def add_arguments(self, parser):
+        defaults = DatasetSpec()
+        parser.add_argument('--tag', default=defaults.tag, help='Préfixe des références (6 caractères max)')
+        parser.add_argument('--warehouses', type=int, default=defaults.warehouses)
+        parser.add_argument('--zones', type=int, default=defaults.zones_per_warehouse, help='Zones par entrepôt')
+        parser.add_argument('--sous-zones', type=int, default=defaults.sous_zones_per_zone, help='Sous-zones par zone')
+        parser.add_argument('--locations', type=int, default=defaults.locations_per_sous_zone, help='Emplacements par sous-zone')
+        parser.add_argument('--products', type=int, default=defaults.products)
+        parser.add_argument('--stocks-per-location', type=int, default=defaults.stocks_per_location)
+        parser.add_argument('--locations-per-job', type=int, default=defaults.locations_per_job)
+        parser.add_argument('--mobile-users', type=int, default=defaults.mobile_users)
+        parser.add_argument(
+            '--counted-ratio',
+            type=float,
+            default=defaults.counted_ratio,
+            help='Part des jobs ayant déjà des CountingDetail (comptages 1 et 2)',
+        )
+        parser.add_argument('--batch-size', type=int, default=defaults.batch_size)
+        parser.add_argument('--seed', type=int, default=defaults.seed)
+        parser.add_argument('--no-copy', action='store_true', help='Utilise bulk_create au lieu de COPY')
+        parser.add_argument('--replace', action='store_true', help='Supprime le jeu existant du même tag avant génération')
+        parser.add_argument('--clean', action='store_true', help='Supprime le jeu du tag et s\'arrête')
+
+    def handle(self, *args, **options):
+        try:
+            spec = DatasetSpec(
+                tag=options['tag'],
+                warehouses=options['warehouses'],
+                zones_per_warehouse=options['zones'],
+                sous_zones_per_zone=options['sous_zones'],
+                locations_per_sous_zone=options['locations'],
+                products=options['products'],
+                stocks_per_location=options['stocks_per_location'],
+                locations_per_job=options['locations_per_job'],
+                mobile_users=options['mobile_users'],
+                counted_ratio=options['counted_ratio'],
+                batch_size=options['batch_size'],
+                use_copy=not options['no_copy'],
+                seed=options['seed'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        generator = SyntheticInventoryGenerator(spec, log=lambda message: self.stdout.write(f'  {message}'))
+
+        if options['clean'] or options['replace']:
+            generator.clean()
+            self.stdout.write(self.style.WARNING(f'Jeu {spec.tag} supprimé'))
+            if options['clean']:
+                return
+        elif generator.exists():
+            raise CommandError(f'Le jeu {spec.tag} existe déjà (utilisez --replace ou --clean)')
+
+        self.stdout.write(f"Génération du jeu {spec.tag} ({spec.locations} emplacements)...")
+        start = time.perf_counter()
+        counts = generator.generate()
+        elapsed = time.perf_counter() - start
+
+        total = sum(counts.values())
+        self.stdout.write(json.dumps({'spec': spec.to_dict(), 'counts': counts}, indent=2))
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {total} lignes générées en {elapsed:.1f}s ({total / elapsed:.0f} lignes/s)'
+        ))
@@ -0,0 +1,92 @@
+"""
+Mesure le coût d'import au démarrage d'un worker (django.setup() + URLconf).
+
+Lance ``python -X importtime`` dans un interpréteur neuf et affiche les
+modules les plus coûteux, le total par paquet de premier niveau, et les
+modules lourds (pandas, numpy, openpyxl, reportlab...) chargés au démarrage.
+
+Usage:
+  python manage.py importtime
+  python manage.py importtime --limit 40 --sort self
+  python manage.py importtime --prefix apps --by-package
+  python manage.py importtime --check
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.lazy_imports import HEAVY_MODULES, find_eager_heavy_imports, measure_import_times
+
+
+class Command(BaseCommand):
+    help = "Coût d'import par module au démarrage (django.setup() + URLconf)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--target",
+            action="append",
+            dest="targets",
+            help="Module importé après django.setup() (répétable, défaut : project.urls).",
+        )
+        parser.add_argument("--limit", type=int, default=25, help="Nombre de modules affichés (défaut : 25).")
+        parser.add_argument(
+            "--sort",
+            choices=("cumulative", "self"),
+            default="cumulative",
+            help="Tri par temps cumulé (module + dépendances) ou propre.",
+        )
+        parser.add_argument("--prefix", help="Ne garde que les modules commençant par ce préfixe (ex. apps).")
+        parser.add_argument("--by-package", action="store_true", help="Affiche le total par paquet de premier niveau.")
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Échoue si un module du projet importe un module lourd au chargement des cibles.",
+        )
+
+    def handle(self, *args, **options):
+        targets = tuple(options["targets"] or ("project.urls",))
+        try:
+            timings = measure_import_times(targets)
+        except RuntimeError as exc:
+            raise CommandError(str(exc))
+
+        total_us = sum(t.self_us for t in timings)
+        self.stdout.write(
+            f"{len(timings)} modules importés en {total_us / 1000:.0f} ms ({', '.join(targets)})"
+        )
+
+        rows = timings
+        if options["prefix"]:
+            rows = [t for t in rows if t.module.startswith(options["prefix"])]
+        key = "self_us" if options["sort"] == "self" else "cumulative_us"
+        rows = sorted(rows, key=lambda t: getattr(t, key), reverse=True)[: options["limit"]]
+
+        self.stdout.write(f"\n{'propre (ms)':>12} {'cumulé (ms)':>12}  module")
+        for t in rows:
+            self.stdout.write(f"{t.self_us / 1000:12.1f} {t.cumulative_us / 1000:12.1f}  {t.module}")
+
+        if options["by_package"]:
+            per_package = defaultdict(int)
+            for t in timings:
+                per_package[t.package] += t.self_us
+            self.stdout.write(f"\n{'total (ms)':>12}  paquet")
+            for package, us in sorted(per_package.items(), key=lambda item: item[1], reverse=True)[: options["limit"]]:
+                self.stdout.write(f"{us / 1000:12.1f}  {package}")
+
+        heavy = [t for t in timings if t.module in HEAVY_MODULES]
+        if heavy:
+            self.stdout.write("\nModules lourds chargés au démarrage :")
+            for t in heavy:
+                self.stdout.write(f"{t.cumulative_us / 1000:12.1f}  {t.module}")
+
+        eager = find_eager_heavy_imports(targets)
+        if eager:
+            self.stdout.write(self.style.WARNING("\nImports lourds en tête de module (utiliser lazy_import) :"))
+            for importer, name in eager:
+                self.stdout.write(f"  {importer} -> {name}")
+            if options["check"]:
+                raise CommandError(f"{len(eager)} import(s) lourd(s) au démarrage.")
+        else:
+            self.stdout.write(self.style.SUCCESS("\nAucun import lourd en tête de module dans le projet."))
@@ -0,0 +1,85 @@
+"""
+Maintenance des partitions par inventaire (CountingDetail, ComptageSequence
+et leurs tables historiques).
+
+Sans option : partitions par table (lignes estimées) et inventaires actifs
+sans partition (leurs lignes sont dans la partition par défaut).
+
+Usage:
+  python manage.py inventory_partitions
+  python manage.py inventory_partitions --ensure
+  python manage.py inventory_partitions --drop-stale
+"""
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.core import partitioning
+from apps.core.db_routing import primary_pinning
+from apps.inventory.models import Inventory, InventoryArchive
+from apps.inventory.services.inventory_partitions import (
+    create_inventory_partitions,
+    drop_inventory_partitions,
+    has_partitioned_rows,
+    inventories_with_partitions,
+    partitioned_tables,
+)
+
+
+class Command(BaseCommand):
+    help = "Partitions par inventaire des tables de comptage : état, création, suppression."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--ensure",
+            action="store_true",
+            help="Crée les partitions manquantes des inventaires non archivés (lignes reprises de la partition par défaut).",
+        )
+        parser.add_argument(
+            "--drop-stale",
+            action="store_true",
+            help="Supprime les partitions vides des inventaires archivés ou supprimés.",
+        )
+
+    # Portée d'épinglage de la commande (lectures de reporting après écriture sur default)
+    @primary_pinning()
+    def handle(self, *args, **options):
+        tables = partitioned_tables()
+        if not all(partitioning.is_partitioned(connection, table) for table in tables):
+            raise CommandError("Tables de comptage non partitionnées (migration inventory 0035, PostgreSQL).")
+
+        archived_ids = set(InventoryArchive.objects.values_list('inventory_id', flat=True))
+        active_ids = set(Inventory._base_manager.exclude(id__in=archived_ids).values_list('id', flat=True))
+
+        if options["ensure"]:
+            for inventory_id in sorted(active_ids):
+                created = create_inventory_partitions(inventory_id)
+                if created:
+                    self.stdout.write(f"  inventaire {inventory_id} : {len(created)} partition(s) créée(s)")
+
+        if options["drop_stale"]:
+            for inventory_id in inventories_with_partitions():
+                if inventory_id in active_ids:
+                    continue
+                if has_partitioned_rows(inventory_id):
+                    self.stdout.write(self.style.WARNING(
+                        f"  inventaire {inventory_id} : partitions non vides, conservées"
+                    ))
+                    continue
+                dropped = drop_inventory_partitions(inventory_id)
+                self.stdout.write(f"  inventaire {inventory_id} : {len(dropped)} partition(s) supprimée(s)")
+
+        for table in tables:
+            partitions = partitioning.list_partitions(connection, table)
+            self.stdout.write(f"{table} : {len(partitions)} partition(s)")
+            for name, bound, rows in partitions:
+                self.stdout.write(f"  {name} {bound} ~{rows} ligne(s)")
+
+        missing = sorted(active_ids - set(inventories_with_partitions()))
+        if missing:
+            self.stdout.write(self.style.WARNING(
+                f"Inventaires sans partition : {', '.join(map(str, missing))} (--ensure)"
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS("Tous les inventaires actifs ont leurs partitions."))
@@ -0,0 +1,58 @@
+"""
+Reconstruit l'index InventoryAssignedLocation (emplacements affectés par inventaire)
+depuis les JobDetail.
+
+À lancer après une écriture hors ORM (SQL brut, restauration) ; en
+fonctionnement normal l'index est tenu à jour à chaque création /
+suppression de JobDetail.
+
+Usage:
+  python manage.py rebuild_assigned_locations --inventory-id 24
+  python manage.py rebuild_assigned_locations --all
+"""
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.db_routing import primary_pinning
+from apps.inventory.models import Job
+from apps.inventory.services.assigned_location_index import rebuild_assigned_locations
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index des emplacements affectés par inventaire (InventoryAssignedLocation)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--inventory-id",
+            type=int,
+            default=None,
+            help="ID inventaire.",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Reconstruit tous les inventaires ayant des jobs.",
+        )
+
+    # Portée d'épinglage de la commande (lectures de reporting après écriture sur default)
+    @primary_pinning()
+    def handle(self, *args, **options):
+        if options["all"]:
+            inventory_ids = sorted(set(Job.objects.values_list("inventory_id", flat=True)))
+        elif options["inventory_id"]:
+            inventory_ids = [options["inventory_id"]]
+        else:
+            raise CommandError("Précisez --inventory-id ou --all.")
+
+        total = 0
+        for inventory_id in inventory_ids:
+            count = rebuild_assigned_locations(inventory_id)
+            self.stdout.write(f"  inv={inventory_id}: {count} emplacement(s) affecté(s)")
+            total += count
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Reconstruction terminée — {total} emplacement(s) ({len(inventory_ids)} inventaire(s))."
+            )
+        )
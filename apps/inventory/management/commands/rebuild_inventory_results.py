@@ -0,0 +1,70 @@
+"""
+Reconstruit la table matérialisée InventoryResult depuis les comptages.
+
+À lancer après une écriture hors ORM (SQL brut, restauration) ou pour
+initialiser la table sur des inventaires existants ; en fonctionnement normal
+elle est tenue à jour incrémentalement.
+
+Usage:
+  python manage.py rebuild_inventory_results --inventory-id 24
+  python manage.py rebuild_inventory_results --inventory-id 24 --warehouse-id 5
+  python manage.py rebuild_inventory_results --all
+"""
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.db_routing import primary_pinning
+from apps.inventory.models import Job
+from apps.inventory.services.inventory_result_materializer import InventoryResultMaterializer
+
+
+class Command(BaseCommand):
+    help = "Reconstruit la table InventoryResult (résultats matérialisés par emplacement / produit / job)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--inventory-id",
+            type=int,
+            default=None,
+            help="ID inventaire.",
+        )
+        parser.add_argument(
+            "--warehouse-id",
+            type=int,
+            default=None,
+            help="Magasin unique (défaut: tous les magasins de l'inventaire).",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Reconstruit tous les inventaires ayant des jobs.",
+        )
+
+    # Portée d'épinglage de la commande (lectures de reporting après écriture sur default)
+    @primary_pinning()
+    def handle(self, *args, **options):
+        inventory_id = options["inventory_id"]
+        if options["all"]:
+            inventory_ids = sorted(set(Job.objects.values_list("inventory_id", flat=True)))
+        elif inventory_id:
+            inventory_ids = [inventory_id]
+        else:
+            raise CommandError("Précisez --inventory-id ou --all.")
+
+        if options["warehouse_id"] and len(inventory_ids) != 1:
+            raise CommandError("--warehouse-id nécessite --inventory-id.")
+
+        materializer = InventoryResultMaterializer()
+        total_rows = 0
+        for iid in inventory_ids:
+            written = materializer.rebuild(iid, options["warehouse_id"])
+            for wid, count in written.items():
+                self.stdout.write(f"  inv={iid} wh={wid}: {count} ligne(s)")
+            total_rows += sum(written.values())
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Reconstruction terminée — {total_rows} ligne(s) ({len(inventory_ids)} inventaire(s))."
+            )
+        )
@@ -0,0 +1,94 @@
+"""
+Commande Django pour exécuter la suite de benchmarks in-process.
+
+Les scénarios (sync PDA, envoi de CountingDetail, KPI, monitoring, import de
+stock, datatables, exports Excel/PDF, recalcul des écarts) sont appelés via
+APIClient sur le jeu généré par generate_benchmark_dataset. Le rapport JSON
+peut être comparé à un rapport de référence.
+
+Usage:
+    python manage.py run_benchmarks --tag BENCH --output benchmarks/current.json
+    python manage.py run_benchmarks --tag BENCH --baseline benchmarks/baseline.json --fail-on-regression
+    python manage.py run_benchmarks --scenarios mobile_sync_data kpi_nombre_jobs_total --repeat 10
+"""
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.inventory.benchmarks import BenchmarkContext, BenchmarkRunner, compare_reports, get_scenarios
+from apps.inventory.models import Inventory
+
+
+class Command(BaseCommand):
+    help = "Exécute les benchmarks des chemins critiques et écrit un rapport JSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tag', default='BENCH', help='Tag du jeu de données (generate_benchmark_dataset)')
+        parser.add_argument('--scenarios', nargs='+', help='Scénarios à exécuter (défaut: tous)')
+        parser.add_argument('--tags', nargs='+', help='Filtre par tag de scénario (mobile, kpi, export...)')
+        parser.add_argument('--repeat', type=int, default=5, help='Itérations mesurées par scénario (défaut: 5)')
+        parser.add_argument('--warmup', type=int, default=1, help='Itérations de chauffe (défaut: 1)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Taille des lots envoyés (défaut: 1000)')
+        parser.add_argument('--output', help='Chemin du rapport JSON')
+        parser.add_argument('--baseline', help='Rapport JSON de référence à comparer')
+        parser.add_argument('--threshold', type=float, default=0.2, help='Ratio de régression toléré sur la médiane (défaut: 0.2)')
+        parser.add_argument('--fail-on-regression', action='store_true', help='Code de sortie non nul en cas de régression')
+
+    def handle(self, *args, **options):
+        try:
+            scenarios = get_scenarios(options['scenarios'], options['tags'])
+            context = BenchmarkContext.from_tag(options['tag'], batch_size=options['batch_size'])
+        except Inventory.DoesNotExist:
+            raise CommandError(f"Jeu {options['tag']} introuvable : lancez generate_benchmark_dataset --tag {options['tag']}")
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        runner = BenchmarkRunner(
+            context,
+            repeat=options['repeat'],
+            warmup=options['warmup'],
+            log=lambda message: self.stdout.write(f'  {message}'),
+        )
+        report = runner.run(scenarios)
+
+        self.stdout.write(f"{'scénario':<42}{'statut':>8}{'médiane ms':>12}{'p95 ms':>10}{'requêtes':>10}")
+        for name, result in report['scenarios'].items():
+            status = ','.join(str(code) for code in result['status_codes'])
+            line = f"{name:<42}{status:>8}{result['median_ms']:>12.1f}{result['p95_ms']:>10.1f}{result['queries']:>10}"
+            self.stdout.write(line if result['ok'] else self.style.WARNING(line))
+
+        if options['output']:
+            directory = os.path.dirname(options['output'])
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(options['output'], 'w', encoding='utf-8') as handle:
+                json.dump(report, handle, indent=2, ensure_ascii=False)
+            self.stdout.write(self.style.SUCCESS(f"✓ Rapport écrit : {options['output']}"))
+
+        if options['baseline']:
+            self._compare(report, options)
+
+    def _compare(self, report, options):
+        try:
+            with open(options['baseline'], encoding='utf-8') as handle:
+                baseline = json.load(handle)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Rapport de référence illisible : {e}")
+
+        if baseline.get('dataset') != report['dataset']:
+            self.stdout.write(self.style.WARNING('⚠ Volumétrie différente de la référence : comparaison indicative'))
+
+        comparison = compare_reports(report, baseline, time_threshold=options['threshold'])
+        regressions = [entry for entry in comparison if entry['regression']]
+        for entry in comparison:
+            line = (
+                f"{entry['scenario']:<42}{entry['baseline_ms']:>10.1f} → {entry['current_ms']:<10.1f}"
+                f"x{entry['ratio'] or 0:<7} requêtes {entry['baseline_queries']} → {entry['current_queries']}"
+            )
+            self.stdout.write(self.style.ERROR(line) if entry['regression'] else line)
+
+        if regressions and options['fail_on_regression']:
+            raise CommandError(f"{len(regressions)} régression(s) détectée(s)")
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS('✓ Aucune régression'))
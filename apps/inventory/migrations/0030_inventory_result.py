@@ -0,0 +1,53 @@
+# Generated manually — table matérialisée InventoryResult
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0029_setting_status_terminee_analyser'),
+        ('masterdata', '0022_stock_ilj_upsert_constraints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantities', models.JSONField(default=dict)),
+                ('max_counting_order', models.PositiveSmallIntegerField(default=0)),
+                ('ecart_comptage_id', models.BigIntegerField(blank=True, null=True)),
+                ('final_result', models.IntegerField(blank=True, null=True)),
+                ('resolved', models.BooleanField(blank=True, null=True)),
+                ('manual_result', models.BooleanField(blank=True, null=True)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+                ('inventory', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='materialized_results', to='inventory.inventory')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='inventory.job')),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='masterdata.location')),
+                ('product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='masterdata.product')),
+                ('warehouse', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='masterdata.warehouse')),
+            ],
+            options={
+                'verbose_name': "Résultat d'inventaire",
+                'verbose_name_plural': "Résultats d'inventaire",
+                'indexes': [models.Index(fields=['inventory', 'warehouse'], name='inv_result_inv_wh_idx'), models.Index(fields=['inventory', 'location'], name='inv_result_inv_loc_idx')],
+                'constraints': [models.UniqueConstraint(fields=('inventory', 'warehouse', 'location', 'product', 'job'), name='uniq_inv_result_key', nulls_distinct=False)],
+            },
+        ),
+        migrations.CreateModel(
+            name='InventoryResultBuild',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('built_at', models.DateTimeField()),
+                ('inventory', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='inventory.inventory')),
+                ('warehouse', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='masterdata.warehouse')),
+            ],
+            options={
+                'verbose_name': "Construction des résultats d'inventaire",
+                'verbose_name_plural': "Constructions des résultats d'inventaire",
+                'constraints': [models.UniqueConstraint(fields=('inventory', 'warehouse'), name='uniq_inv_result_build')],
+            },
+        ),
+    ]
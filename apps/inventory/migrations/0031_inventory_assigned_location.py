@@ -0,0 +1,53 @@
+# Generated manually — index des emplacements affectés par inventaire
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_assigned_locations(apps, schema_editor):
+    """Alimente l'index depuis les JobDetail actifs existants"""
+    JobDetail = apps.get_model('inventory', 'JobDetail')
+    InventoryAssignedLocation = apps.get_model('inventory', 'InventoryAssignedLocation')
+    keys = (
+        JobDetail.objects.filter(is_deleted=False)
+        .values_list('job__inventory_id', 'job__warehouse_id', 'location_id')
+        .order_by()
+        .distinct()
+        .iterator(chunk_size=5000)
+    )
+    batch = []
+    for inventory_id, warehouse_id, location_id in keys:
+        batch.append(InventoryAssignedLocation(
+            inventory_id=inventory_id, warehouse_id=warehouse_id, location_id=location_id,
+        ))
+        if len(batch) >= 5000:
+            InventoryAssignedLocation.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        InventoryAssignedLocation.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0030_inventory_result'),
+        ('masterdata', '0022_stock_ilj_upsert_constraints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryAssignedLocation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('inventory', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='assigned_locations', to='inventory.inventory')),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inventory_assignments', to='masterdata.location')),
+                ('warehouse', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='masterdata.warehouse')),
+            ],
+            options={
+                'verbose_name': 'Emplacement affecté',
+                'verbose_name_plural': 'Emplacements affectés',
+                'constraints': [models.UniqueConstraint(fields=('inventory', 'warehouse', 'location'), name='uniq_inv_assigned_location')],
+            },
+        ),
+        migrations.RunPython(populate_assigned_locations, migrations.RunPython.noop),
+    ]
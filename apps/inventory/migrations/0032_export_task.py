@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-19 09:10
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0031_inventory_assigned_location'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportTask',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('is_deleted', models.BooleanField(default=False)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('task_type', models.CharField(choices=[('consolidated_articles_excel', 'Excel articles consolidés')], max_length=50)),
+                ('params', models.JSONField(default=dict)),
+                ('status', models.CharField(choices=[('PENDING', 'En attente'), ('RUNNING', 'En cours'), ('SUCCESS', 'Terminé'), ('ERROR', 'Erreur')], default='PENDING', max_length=20)),
+                ('result_file', models.FileField(blank=True, null=True, upload_to='export_tasks/')),
+                ('error_message', models.TextField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': "Tâche d'export",
+                'verbose_name_plural': "Tâches d'export",
+                'indexes': [models.Index(fields=['task_type', 'status'], name='export_task_type_status_idx'), models.Index(fields=['created_at'], name='export_task_created_at_idx')],
+            },
+        ),
+    ]
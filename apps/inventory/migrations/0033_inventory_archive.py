@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-19 09:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0032_export_task'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('is_deleted', models.BooleanField(default=False)),
+                ('path', models.CharField(max_length=255)),
+                ('format_version', models.PositiveSmallIntegerField(default=1)),
+                ('manifest', models.JSONField(default=dict)),
+                ('total_rows', models.BigIntegerField(default=0)),
+                ('size_bytes', models.BigIntegerField(default=0)),
+                ('inventory', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='archive', to='inventory.inventory')),
+            ],
+            options={
+                'verbose_name': "Archive d'inventaire",
+                'verbose_name_plural': "Archives d'inventaire",
+            },
+        ),
+    ]
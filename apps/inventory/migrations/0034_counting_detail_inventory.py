@@ -0,0 +1,102 @@
+# Generated manually — clé de partition inventory_id sur CountingDetail / ComptageSequence
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Historique : inventaire de l'objet lié encore en base, sinon de sa dernière
+# version historique (objet supprimé). Les lignes restantes (inventaire
+# supprimé) sont traitées par 0035.
+BACKFILL_SQL = """
+UPDATE inventory_countingdetail cd
+   SET inventory_id = j.inventory_id
+  FROM inventory_job j
+ WHERE j.id = cd.job_id;
+
+UPDATE inventory_comptagesequence cs
+   SET inventory_id = cd.inventory_id
+  FROM inventory_countingdetail cd
+ WHERE cd.id = cs.counting_detail_id;
+
+UPDATE inventory_historicalcountingdetail h
+   SET inventory_id = j.inventory_id
+  FROM inventory_job j
+ WHERE j.id = h.job_id;
+
+UPDATE inventory_historicalcountingdetail h
+   SET inventory_id = j.inventory_id
+  FROM (
+        SELECT DISTINCT ON (id) id, inventory_id
+          FROM inventory_historicaljob
+         ORDER BY id, history_id DESC
+       ) j
+ WHERE h.inventory_id IS NULL
+   AND j.id = h.job_id;
+
+UPDATE inventory_historicalcomptagesequence h
+   SET inventory_id = e.inventory_id
+  FROM inventory_ecartcomptage e
+ WHERE e.id = h.ecart_comptage_id;
+
+UPDATE inventory_historicalcomptagesequence h
+   SET inventory_id = e.inventory_id
+  FROM (
+        SELECT DISTINCT ON (id) id, inventory_id
+          FROM inventory_historicalecartcomptage
+         ORDER BY id, history_id DESC
+       ) e
+ WHERE h.inventory_id IS NULL
+   AND e.id = h.ecart_comptage_id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0033_inventory_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='countingdetail',
+            name='inventory',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='inventory.inventory'),
+        ),
+        migrations.AddField(
+            model_name='comptagesequence',
+            name='inventory',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='inventory.inventory'),
+        ),
+        migrations.AddField(
+            model_name='historicalcountingdetail',
+            name='inventory',
+            field=models.ForeignKey(blank=True, db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='inventory.inventory'),
+        ),
+        migrations.AddField(
+            model_name='historicalcomptagesequence',
+            name='inventory',
+            field=models.ForeignKey(blank=True, db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='inventory.inventory'),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, reverse_sql=migrations.RunSQL.noop),
+        migrations.AlterField(
+            model_name='countingdetail',
+            name='inventory',
+            field=models.ForeignKey(editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='inventory.inventory'),
+        ),
+        migrations.AlterField(
+            model_name='comptagesequence',
+            name='inventory',
+            field=models.ForeignKey(editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='inventory.inventory'),
+        ),
+        # Une clé étrangère vers une table partitionnée doit inclure la clé de partition
+        migrations.AlterField(
+            model_name='comptagesequence',
+            name='counting_detail',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='counting_sequences', to='inventory.countingdetail', verbose_name='Détail de comptage'),
+        ),
+        migrations.AlterField(
+            model_name='nserieinventory',
+            name='counting_detail',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to='inventory.countingdetail'),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated manually — partitionnement par inventaire des tables de comptage
+
+from django.db import migrations
+
+from apps.core.partitioning import partition_table, unpartition_table
+
+PARTITION_KEY = 'inventory_id'
+
+# Ordre de conversion : CountingDetail avant ComptageSequence (clé composite)
+HOT_TABLES = ('inventory_countingdetail', 'inventory_comptagesequence')
+HISTORY_TABLES = ('inventory_historicalcountingdetail', 'inventory_historicalcomptagesequence')
+
+SEQUENCE_FK = 'inventory_comptagesequence_counting_detail_partition_fk'
+
+
+def partition_counting_tables(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    quote = connection.ops.quote_name
+    Inventory = apps.get_model('inventory', 'Inventory')
+    InventoryArchive = apps.get_model('inventory', 'InventoryArchive')
+    inventory_ids = list(
+        Inventory._base_manager.exclude(
+            id__in=InventoryArchive._base_manager.values('inventory_id')
+        ).order_by('id').values_list('id', flat=True)
+    )
+
+    with connection.cursor() as cursor:
+        for table in HISTORY_TABLES:
+            # Historique dont l'inventaire a été supprimé : clé 0 (partition par défaut)
+            cursor.execute(f"UPDATE {quote(table)} SET {PARTITION_KEY} = 0 WHERE {PARTITION_KEY} IS NULL")
+            cursor.execute(f"ALTER TABLE {quote(table)} ALTER COLUMN {PARTITION_KEY} SET NOT NULL")
+
+    for table in HOT_TABLES + HISTORY_TABLES:
+        partition_table(connection, table, PARTITION_KEY, inventory_ids)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"ALTER TABLE inventory_comptagesequence ADD CONSTRAINT {quote(SEQUENCE_FK)} "
+            f"FOREIGN KEY (counting_detail_id, {PARTITION_KEY}) "
+            f"REFERENCES inventory_countingdetail (id, {PARTITION_KEY}) DEFERRABLE INITIALLY DEFERRED"
+        )
+
+
+def unpartition_counting_tables(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE inventory_comptagesequence DROP CONSTRAINT IF EXISTS {quote(SEQUENCE_FK)}")
+
+    for table in reversed(HOT_TABLES + HISTORY_TABLES):
+        unpartition_table(connection, table, PARTITION_KEY)
+
+    with connection.cursor() as cursor:
+        for table in HISTORY_TABLES:
+            cursor.execute(f"ALTER TABLE {quote(table)} ALTER COLUMN {PARTITION_KEY} DROP NOT NULL")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0034_counting_detail_inventory'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_counting_tables, unpartition_counting_tables),
+    ]
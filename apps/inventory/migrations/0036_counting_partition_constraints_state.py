@@ -0,0 +1,48 @@
+# Generated manually — état des contraintes des tables partitionnées (0035)
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Aligne l'état des modèles sur les contraintes créées par 0035 : la clé de
+    partition ``inventory_id`` fait partie des contraintes uniques. Les
+    contraintes existent déjà en base (mêmes noms), seul l'état change.
+    """
+
+    dependencies = [
+        ('inventory', '0035_partition_counting_tables'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='countingdetail',
+                    name='reference',
+                    field=models.CharField(db_index=True, max_length=20),
+                ),
+                migrations.AddConstraint(
+                    model_name='countingdetail',
+                    constraint=models.UniqueConstraint(
+                        fields=('reference', 'inventory'), name='inventory_countingdetail_reference_key',
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name='comptagesequence',
+                    name='reference',
+                    field=models.CharField(db_index=True, max_length=20),
+                ),
+                migrations.AddConstraint(
+                    model_name='comptagesequence',
+                    constraint=models.UniqueConstraint(
+                        fields=('reference', 'inventory'), name='inventory_comptagesequence_reference_key',
+                    ),
+                ),
+                migrations.AlterUniqueTogether(
+                    name='comptagesequence',
+                    unique_together={('ecart_comptage', 'sequence_number', 'inventory')},
+                ),
+            ],
+        ),
+    ]
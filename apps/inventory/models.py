@@ -1,6 +1,6 @@
 from django.db import models
-from simple_history.models import HistoricalRecords
-from apps.masterdata.models import Account,TimeStampedModel,Warehouse,Location,Product
+from apps.core.history import BufferedHistoricalRecords
+from apps.masterdata.models import Account,ActiveManager,TimeStampedModel,Warehouse,Location,Product
 from apps.users.models import UserApp
 import hashlib
 from django.utils import timezone
@@ -62,6 +62,55 @@ class ReferenceMixin:
         super().save(*args, **kwargs)
 
 
+class InventoryPartitionMixin:
+    """
+    Mixin des tables partitionnées par inventaire (voir
+    apps.inventory.services.inventory_partitions).
+
+    ``inventory_id`` est la clé de partition : s'il n'est pas renseigné, il est
+    déduit de la relation ``INVENTORY_SOURCE`` (save et bulk_create).
+
+    PostgreSQL impose la clé de partition dans la clé primaire et les
+    contraintes uniques : en base, la clé primaire est (id, inventory_id) et la
+    référence est unique par inventaire, ce que déclarent les ``Meta`` des
+    modèles. L'``id`` reste unique (colonne identité commune aux partitions) ;
+    la référence, générée à partir de l'id, l'est en pratique mais n'est plus
+    garantie globalement par la base.
+    """
+    INVENTORY_SOURCE = None
+
+    @classmethod
+    def fill_inventory_ids(cls, objs):
+        """Renseigne ``inventory_id`` des objets qui n'en ont pas (une requête au plus)."""
+        missing = [obj for obj in objs if obj.inventory_id is None]
+        if not missing:
+            return
+        source = cls._meta.get_field(cls.INVENTORY_SOURCE)
+        uncached = {getattr(obj, source.attname) for obj in missing if not source.is_cached(obj)}
+        inventory_ids = dict(
+            source.related_model._base_manager.filter(pk__in=uncached).values_list('pk', 'inventory_id')
+        ) if uncached else {}
+        for obj in missing:
+            if source.is_cached(obj):
+                obj.inventory_id = getattr(obj, source.name).inventory_id
+            else:
+                obj.inventory_id = inventory_ids.get(getattr(obj, source.attname))
+
+    def save(self, *args, **kwargs):
+        if self.inventory_id is None:
+            self.fill_inventory_ids([self])
+        super().save(*args, **kwargs)
+
+
+class InventoryPartitionManager(ActiveManager):
+    """Manager des tables partitionnées : ``bulk_create`` renseigne la clé de partition."""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        self.model.fill_inventory_ids(objs)
+        return super().bulk_create(objs, *args, **kwargs)
+
+
 class Inventory(TimeStampedModel, ReferenceMixin):
     REFERENCE_PREFIX = 'INV'
     
@@ -90,7 +139,7 @@ class Inventory(TimeStampedModel, ReferenceMixin):
     termine_status_date = models.DateTimeField(null=True, blank=True)
     cloture_status_date = models.DateTimeField(null=True, blank=True)
 
-    history = HistoricalRecords()
+    history = BufferedHistoricalRecords()
 
     def __str__(self):
         return self.label
@@ -116,7 +165,7 @@ class Setting(TimeStampedModel, ReferenceMixin):
     status_date_termine = models.DateTimeField(null=True, blank=True)
     status_date_analyse = models.DateTimeField(null=True, blank=True)
     status_date_cloture = models.DateTimeField(null=True, blank=True)
-    history = HistoricalRecords()    
+    history = BufferedHistoricalRecords()    
 
     def __str__(self):
         return f"{self.account} - {self.warehouse} - {self.inventory}"
@@ -130,7 +179,7 @@ class Planning(TimeStampedModel, ReferenceMixin):
     end_date = models.DateTimeField(_('Date de fin'), blank=True, null=True)
     inventory = models.ForeignKey(Inventory, on_delete=models.CASCADE, verbose_name=_('Inventaire'))
     warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, verbose_name=_('Entrepôt'))
-    history = HistoricalRecords()    
+    history = BufferedHistoricalRecords()    
 
     class Meta:
         verbose_name = _('Planification')
@@ -156,7 +205,7 @@ class Counting(TimeStampedModel, ReferenceMixin):
     stock_situation = models.BooleanField(_('Situation de stock'), default=False)
     quantity_show = models.BooleanField(_('Afficher la quantité'), default=False)
     inventory = models.ForeignKey('Inventory', on_delete=models.CASCADE, related_name='countings', verbose_name=_('Inventaire'))
-    history = HistoricalRecords()
+    history = BufferedHistoricalRecords()
 
     class Meta:
         verbose_name = _('Comptage')
@@ -201,7 +250,7 @@ class Job(TimeStampedModel):
     annule_date = models.DateTimeField(null=True, blank=True)
     warehouse = models.ForeignKey('masterdata.Warehouse', on_delete=models.CASCADE)
     inventory = models.ForeignKey(Inventory, on_delete=models.CASCADE)
-    history = HistoricalRecords()
+    history = BufferedHistoricalRecords()
 
     def generate_sequential_reference(self):
         """
@@ -300,7 +349,7 @@ class Personne(TimeStampedModel, ReferenceMixin):
     reference = models.CharField(unique=True, max_length=20, null=False)
     full_name = models.CharField(max_length=200,null=True,blank=True)
     numero = models.CharField(max_length=20, validators=[validate_numero_format])
-    history = HistoricalRecords()    
+    history = BufferedHistoricalRecords()    
     def __str__(self):
         return self.numero
     
@@ -323,7 +372,7 @@ class JobDetail(TimeStampedModel, ReferenceMixin):
     en_attente_date = models.DateTimeField(null=True, blank=True)
     termine_date = models.DateTimeField(null=True, blank=True)
     annule_date = models.DateTimeField(null=True, blank=True)
-    history = HistoricalRecords()
+    history = BufferedHistoricalRecords()
 
     def __str__(self):
         return f"{self.job.reference} - {self.location}"
@@ -362,7 +411,7 @@ class Assigment(TimeStampedModel, ReferenceMixin):
     personne = models.ForeignKey('Personne', on_delete=models.CASCADE, related_name='primary_job_details',null=True,blank=True)
     personne_two = models.ForeignKey('Personne', on_delete=models.CASCADE, related_name='secondary_job_details',null=True,blank=True)   
     counting = models.ForeignKey(Counting, on_delete=models.CASCADE)
-    history = HistoricalRecords()
+    history = BufferedHistoricalRecords()
     
     class Meta:
         verbose_name = _('Affectation')
@@ -377,7 +426,7 @@ class JobDetailRessource(TimeStampedModel, ReferenceMixin):
     job = models.ForeignKey('Job', on_delete=models.CASCADE)
     ressource = models.ForeignKey('masterdata.Ressource', on_delete=models.CASCADE)
     quantity = models.IntegerField(null=True, blank=True)
-    history = HistoricalRecords()
+    history = BufferedHistoricalRecords()
     
     def __str__(self):
         return f"{self.job.reference} - {self.ressource} - {self.quantity}"
@@ -390,15 +439,17 @@ class InventoryDetailRessource(TimeStampedModel, ReferenceMixin):
     inventory = models.ForeignKey(Inventory, on_delete=models.CASCADE)
     ressource = models.ForeignKey('masterdata.Ressource', on_delete=models.CASCADE)
     quantity = models.IntegerField(null=True, blank=True)
-    history = HistoricalRecords()
+    history = BufferedHistoricalRecords()
     
     def __str__(self):
         return f"{self.inventory.reference} - {self.ressource} - {self.quantity}"
 
 
-class CountingDetail(TimeStampedModel, ReferenceMixin):
+class CountingDetail(InventoryPartitionMixin, TimeStampedModel, ReferenceMixin):
     REFERENCE_PREFIX = 'CD'
-    reference = models.CharField(unique=True, max_length=20, null=False)
+    INVENTORY_SOURCE = 'job'
+    # Unicité par inventaire (contrainte de la table partitionnée, voir Meta)
+    reference = models.CharField(max_length=20, null=False, db_index=True)
     quantity_inventoried = models.IntegerField()
     product = models.ForeignKey('masterdata.Product',on_delete=models.CASCADE,blank=True,null=True)
     dlc = models.DateField(null=True,blank=True)
@@ -406,10 +457,17 @@ class CountingDetail(TimeStampedModel, ReferenceMixin):
     location = models.ForeignKey('masterdata.Location',on_delete=models.CASCADE)
     counting = models.ForeignKey(Counting,on_delete=models.CASCADE)
     job = models.ForeignKey(Job,on_delete=models.CASCADE)
+    # Clé de partition (inventaire du job), renseignée automatiquement
+    inventory = models.ForeignKey(Inventory, on_delete=models.CASCADE, related_name='+', editable=False)
     last_synced_at = models.DateTimeField(null=True, blank=True)
-    history = HistoricalRecords()
+    history = BufferedHistoricalRecords()
+
+    objects = InventoryPartitionManager()
     
     class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['reference', 'inventory'], name='inventory_countingdetail_reference_key'),
+        ]
         indexes = [
             # Index composé pour la recherche de détails existants (pattern le plus fréquent)
             models.Index(fields=['counting', 'location', 'product', 'job'], name='counting_detail_lookup_idx'),
@@ -427,8 +485,11 @@ class NSerieInventory(TimeStampedModel, ReferenceMixin):
     REFERENCE_PREFIX = 'NS'
     reference = models.CharField(unique=True, max_length=20, null=False)
     n_serie = models.CharField(max_length=100,null=True,blank=True)
-    counting_detail = models.ForeignKey(CountingDetail,on_delete=models.CASCADE)
-    history = HistoricalRecords()
+    # Pas de contrainte en base : CountingDetail est partitionné (clé primaire id + inventory_id).
+    # La suppression en cascade est faite par l'ORM ; la suppression d'une partition
+    # (archivage) purge d'abord les numéros de série de l'inventaire (ARCHIVED_TABLES).
+    counting_detail = models.ForeignKey(CountingDetail,on_delete=models.CASCADE,db_constraint=False)
+    history = BufferedHistoricalRecords()
     
     class Meta:
         indexes = [
@@ -466,7 +527,7 @@ class EcartComptage(TimeStampedModel, ReferenceMixin):
         help_text="ECART_ZERO, RESOLU_MANUEL, etc."
     )
     
-    history = HistoricalRecords()
+    history = BufferedHistoricalRecords()
     
     class Meta:
         verbose_name = "Écart de comptage"
@@ -486,9 +547,11 @@ class EcartComptage(TimeStampedModel, ReferenceMixin):
         return f"{self.reference} - {self.inventory} ({status})"
 
 
-class ComptageSequence(TimeStampedModel, ReferenceMixin):
+class ComptageSequence(InventoryPartitionMixin, TimeStampedModel, ReferenceMixin):
     REFERENCE_PREFIX = 'CS'
-    reference = models.CharField(unique=True, max_length=20, null=False)
+    INVENTORY_SOURCE = 'counting_detail'
+    # Unicité par inventaire (contrainte de la table partitionnée, voir Meta)
+    reference = models.CharField(max_length=20, null=False, db_index=True)
     
     ecart_comptage = models.ForeignKey(
         EcartComptage, 
@@ -501,8 +564,12 @@ class ComptageSequence(TimeStampedModel, ReferenceMixin):
         CountingDetail, 
         on_delete=models.CASCADE,
         verbose_name="Détail de comptage",
-        related_name='counting_sequences'
+        related_name='counting_sequences',
+        # Contrainte composite (counting_detail_id, inventory_id) créée par la migration 0035
+        db_constraint=False,
     )
+    # Clé de partition (inventaire du détail de comptage), renseignée automatiquement
+    inventory = models.ForeignKey(Inventory, on_delete=models.CASCADE, related_name='+', editable=False)
     
     # Données du comptage
     quantity = models.IntegerField(verbose_name="Quantité comptée")
@@ -513,13 +580,18 @@ class ComptageSequence(TimeStampedModel, ReferenceMixin):
         help_text="Différence avec la séquence précédente (N - N-1)"
     )
     
-    history = HistoricalRecords()
+    history = BufferedHistoricalRecords()
+
+    objects = InventoryPartitionManager()
     
     class Meta:
         verbose_name = "Séquence de comptage"
         verbose_name_plural = "Séquences de comptage"
         ordering = ['ecart_comptage', 'sequence_number']
-        unique_together = ['ecart_comptage', 'sequence_number']
+        unique_together = ['ecart_comptage', 'sequence_number', 'inventory']
+        constraints = [
+            models.UniqueConstraint(fields=['reference', 'inventory'], name='inventory_comptagesequence_reference_key'),
+        ]
         indexes = [
             # Index existant pour tri par écart et séquence
             models.Index(fields=['ecart_comptage', 'sequence_number'], name='comptage_seq_ecart_seq_idx'),
@@ -610,7 +682,7 @@ class EcartStockTheorique(TimeStampedModel, ReferenceMixin):
         verbose_name=_("Validé par"),
     )
 
-    history = HistoricalRecords()
+    history = BufferedHistoricalRecords()
 
     class Meta:
         verbose_name = _("Écart stock théorique")
@@ -678,4 +750,171 @@ class PdfTask(TimeStampedModel):
         indexes = [
             models.Index(fields=["task_type", "status"], name="pdf_task_type_status_idx"),
             models.Index(fields=["created_at"], name="pdf_task_created_at_idx"),
-        ]
\ No newline at end of file
+        ]
+
+
+class ExportTask(TimeStampedModel):
+    """
+    Tâche d'export asynchrone (sans Celery) pour les fichiers volumineux,
+    comme l'Excel consolidé des plus gros magasins.
+    """
+
+    STATUS_PENDING = "PENDING"
+    STATUS_RUNNING = "RUNNING"
+    STATUS_SUCCESS = "SUCCESS"
+    STATUS_ERROR = "ERROR"
+
+    STATUS_CHOICES = (
+        (STATUS_PENDING, "En attente"),
+        (STATUS_RUNNING, "En cours"),
+        (STATUS_SUCCESS, "Terminé"),
+        (STATUS_ERROR, "Erreur"),
+    )
+
+    TYPE_CONSOLIDATED_ARTICLES_EXCEL = "consolidated_articles_excel"
+
+    TASK_TYPE_CHOICES = (
+        (TYPE_CONSOLIDATED_ARTICLES_EXCEL, "Excel articles consolidés"),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    task_type = models.CharField(max_length=50, choices=TASK_TYPE_CHOICES)
+    params = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    result_file = models.FileField(upload_to="export_tasks/", null=True, blank=True)
+    error_message = models.TextField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Tâche d'export"
+        verbose_name_plural = "Tâches d'export"
+        indexes = [
+            models.Index(fields=["task_type", "status"], name="export_task_type_status_idx"),
+            models.Index(fields=["created_at"], name="export_task_created_at_idx"),
+        ]
+
+class InventoryArchive(TimeStampedModel):
+    """
+    Archive d'un inventaire clôturé : les lignes volumineuses (comptages,
+    écarts, affectations, stocks et leur historique) sont exportées en
+    Parquet compressé sous INVENTORY_ARCHIVE_DIR puis supprimées des tables
+    chaudes (``InventoryArchiveService``).
+
+    Inventory, Setting, Counting et Job restent en base : l'inventaire reste
+    listé, ses résultats et exports sont servis depuis les fichiers.
+    """
+
+    FORMAT_VERSION = 1
+
+    inventory = models.OneToOneField(Inventory, on_delete=models.CASCADE, related_name="archive")
+    # Répertoire relatif à INVENTORY_ARCHIVE_DIR
+    path = models.CharField(max_length=255)
+    format_version = models.PositiveSmallIntegerField(default=FORMAT_VERSION)
+    # {dataset: {"file", "table", "rows", "bytes", "sha256"}}
+    manifest = models.JSONField(default=dict)
+    total_rows = models.BigIntegerField(default=0)
+    size_bytes = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Archive d'inventaire"
+        verbose_name_plural = "Archives d'inventaire"
+
+    def __str__(self) -> str:
+        return f"Archive {self.inventory_id} ({self.total_rows} lignes)"
+
+
+class InventoryResult(models.Model):
+    """
+    Résultat d'inventaire matérialisé, une ligne par
+    (inventaire, entrepôt, emplacement, produit, job).
+
+    Table dérivée de CountingDetail / ComptageSequence / EcartComptage, tenue à
+    jour par ``InventoryResultMaterializer`` (rafraîchissement incrémental par
+    emplacement, reconstruction complète via ``rebuild_inventory_results``).
+    Les statuts (job, affectations) ne sont pas stockés : ils sont lus à la
+    lecture car ils évoluent indépendamment des comptages.
+    """
+
+    inventory = models.ForeignKey(Inventory, on_delete=models.CASCADE, related_name="materialized_results")
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name="+")
+    location = models.ForeignKey(Location, on_delete=models.CASCADE, related_name="+")
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, null=True, blank=True, related_name="+")
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name="+")
+
+    # Quantité totale par ordre de comptage : {"1": 12, "2": 10, "3": 11}
+    quantities = models.JSONField(default=dict)
+    max_counting_order = models.PositiveSmallIntegerField(default=0)
+
+    # Écart de comptage (dernière séquence de l'emplacement / produit)
+    ecart_comptage_id = models.BigIntegerField(null=True, blank=True)
+    final_result = models.IntegerField(null=True, blank=True)
+    resolved = models.BooleanField(null=True, blank=True)
+    manual_result = models.BooleanField(null=True, blank=True)
+
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Résultat d'inventaire"
+        verbose_name_plural = "Résultats d'inventaire"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["inventory", "warehouse", "location", "product", "job"],
+                name="uniq_inv_result_key",
+                nulls_distinct=False,
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["inventory", "warehouse"], name="inv_result_inv_wh_idx"),
+            models.Index(fields=["inventory", "location"], name="inv_result_inv_loc_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.inventory_id}/{self.warehouse_id} - {self.location_id} / {self.product_id} (job {self.job_id})"
+
+
+class InventoryResultBuild(models.Model):
+    """
+    Marque un couple (inventaire, entrepôt) dont la table InventoryResult est
+    complète : seuls ces couples sont rafraîchis incrémentalement, les autres
+    sont construits entièrement à la première lecture.
+    """
+
+    inventory = models.ForeignKey(Inventory, on_delete=models.CASCADE, related_name="+")
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name="+")
+    built_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Construction des résultats d'inventaire"
+        verbose_name_plural = "Constructions des résultats d'inventaire"
+        constraints = [
+            models.UniqueConstraint(fields=["inventory", "warehouse"], name="uniq_inv_result_build"),
+        ]
+
+
+class InventoryAssignedLocation(models.Model):
+    """
+    Index des emplacements affectés à un inventaire : une ligne par
+    (inventaire, entrepôt du job, emplacement) ayant au moins un JobDetail actif.
+
+    Tenu à jour par ``apps.inventory.services.assigned_location_index`` à la
+    création / suppression des JobDetail (signaux pour les écritures unitaires,
+    appel explicite pour les bulk_create), reconstruit via
+    ``rebuild_assigned_locations``. Permet de lister les emplacements non
+    affectés par un anti-join indexé plutôt qu'un ``NOT IN`` sur JobDetail.
+    """
+
+    inventory = models.ForeignKey(Inventory, on_delete=models.CASCADE, related_name="assigned_locations")
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name="+")
+    location = models.ForeignKey(Location, on_delete=models.CASCADE, related_name="inventory_assignments")
+
+    class Meta:
+        verbose_name = "Emplacement affecté"
+        verbose_name_plural = "Emplacements affectés"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["inventory", "warehouse", "location"],
+                name="uniq_inv_assigned_location",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.inventory_id}/{self.warehouse_id} - {self.location_id}"
@@ -0,0 +1,16 @@
+"""
+Flux temps réel des tableaux de bord web (Server-Sent Events, django-channels).
+
+Chaque navigateur ouvre un flux ``live/`` par (inventaire, magasin) au lieu
+d'interroger périodiquement les endpoints monitoring/ et kpis/ ; le flux
+pousse les sections modifiées après chaque changement d'affectation, de job
+ou d'écart.
+"""
+from .groups import inventory_group, warehouse_group
+from .publisher import notify_dashboard_changes
+
+__all__ = [
+    'inventory_group',
+    'notify_dashboard_changes',
+    'warehouse_group',
+]
@@ -0,0 +1,150 @@
+"""
+Flux Server-Sent Events du tableau de bord d'un magasin :
+``web/api/inventory/<inventory_id>/warehouses/<warehouse_id>/live/``.
+
+Remplace l'interrogation périodique des endpoints monitoring/ et kpis/ :
+
+- ``event: snapshot`` : instantané complet à l'ouverture du flux ;
+- ``event: delta`` : sections modifiées (``changed`` / ``removed``) ;
+- commentaire ``: keepalive`` toutes les DASHBOARD_STREAM_HEARTBEAT_SECONDS.
+
+Les notifications reçues pendant DASHBOARD_STREAM_COALESCE_SECONDS sont
+regroupées : une rafale d'envois mobiles produit un seul recalcul et un seul
+delta. Authentification : jeton JWT (en-tête ou ``?token=``, EventSource ne
+pouvant pas poser d'en-tête).
+
+Les instantanés sont calculés sur la base principale (``primary_pinning``) :
+les services monitoring / KPI lisent sinon sur la réplique (reporting), dont
+le retard pourrait figer le tableau de bord sur un état antérieur au commit
+notifié.
+"""
+import asyncio
+import json
+import logging
+
+from channels.db import database_sync_to_async
+from channels.exceptions import StopConsumer
+from channels.generic.http import AsyncHttpConsumer
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from apps.core.db_routing import primary_pinning
+
+from ..exceptions.job_exceptions import JobCreationError
+from ..services.dashboard_snapshot_service import DashboardSnapshotService, diff_snapshots
+from .groups import inventory_group, warehouse_group
+
+logger = logging.getLogger(__name__)
+
+# Délai de reconnexion suggéré au navigateur (ms)
+RETRY_MILLISECONDS = 5000
+
+
+def _on_primary(func):
+    """Exécute ``func`` avec les lectures épinglées sur ``default``."""
+    def wrapper(*args, **kwargs):
+        with primary_pinning(True):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+class DashboardStreamConsumer(AsyncHttpConsumer):
+
+    async def handle(self, body):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self._send_json_response(401, {'success': False, 'message': 'Authentification requise'})
+            return
+
+        kwargs = self.scope['url_route']['kwargs']
+        self.inventory_id = kwargs['inventory_id']
+        self.warehouse_id = kwargs['warehouse_id']
+        self.service = DashboardSnapshotService()
+        try:
+            self.snapshot = await database_sync_to_async(_on_primary(self.service.build))(
+                self.inventory_id, self.warehouse_id,
+            )
+        except JobCreationError as exc:
+            await self._send_json_response(404, {'success': False, 'message': str(exc)})
+            return
+
+        self.groups_joined = [
+            warehouse_group(self.inventory_id, self.warehouse_id),
+            inventory_group(self.inventory_id),
+        ]
+        for group in self.groups_joined:
+            await self.channel_layer.group_add(group, self.channel_name)
+
+        self.latest_token = None
+        self.refresh_task = None
+        await self.send_headers(headers=[
+            (b'Content-Type', b'text/event-stream; charset=utf-8'),
+            (b'Cache-Control', b'no-cache'),
+            # Pas de mise en tampon par nginx
+            (b'X-Accel-Buffering', b'no'),
+        ])
+        await self.send_body(f'retry: {RETRY_MILLISECONDS}\n\n'.encode(), more_body=True)
+        await self._send_event('snapshot', self.snapshot)
+        self.heartbeat_task = asyncio.ensure_future(self._heartbeat())
+        self.streaming = True
+
+    async def http_request(self, message):
+        """
+        Contrairement à AsyncHttpConsumer, le consumer reste actif après
+        ``handle`` tant que le flux est ouvert (fin sur ``http.disconnect``).
+        """
+        if 'body' in message:
+            self.body.append(message['body'])
+        if message.get('more_body'):
+            return
+        await self.handle(b''.join(self.body))
+        if not getattr(self, 'streaming', False):
+            await self.disconnect()
+            raise StopConsumer()
+
+    async def disconnect(self):
+        for task in (getattr(self, 'heartbeat_task', None), getattr(self, 'refresh_task', None)):
+            if task is not None:
+                task.cancel()
+        for group in getattr(self, 'groups_joined', ()):
+            await self.channel_layer.group_discard(group, self.channel_name)
+
+    async def dashboard_changed(self, message):
+        self.latest_token = message['token']
+        if self.refresh_task is None:
+            self.refresh_task = asyncio.ensure_future(self._refresh_after_window())
+
+    async def _refresh_after_window(self):
+        await asyncio.sleep(settings.DASHBOARD_STREAM_COALESCE_SECONDS)
+        # Les notifications suivantes ouvrent une nouvelle fenêtre
+        self.refresh_task = None
+        try:
+            snapshot = await database_sync_to_async(_on_primary(self.service.get_cached))(
+                self.inventory_id, self.warehouse_id, self.latest_token
+            )
+        except Exception:
+            logger.exception(
+                "Recalcul du tableau de bord impossible (inventory_id=%s, warehouse_id=%s)",
+                self.inventory_id, self.warehouse_id,
+            )
+            return
+        delta = diff_snapshots(self.snapshot, snapshot)
+        self.snapshot = snapshot
+        if delta['changed'] or delta['removed']:
+            await self._send_event('delta', delta)
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(settings.DASHBOARD_STREAM_HEARTBEAT_SECONDS)
+            await self.send_body(b': keepalive\n\n', more_body=True)
+
+    async def _send_event(self, event, data):
+        payload = json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':'))
+        await self.send_body(f'event: {event}\ndata: {payload}\n\n'.encode(), more_body=True)
+
+    async def _send_json_response(self, status, data):
+        await self.send_response(
+            status,
+            json.dumps(data).encode(),
+            headers=[(b'Content-Type', b'application/json')],
+        )
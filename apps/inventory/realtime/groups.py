@@ -0,0 +1,16 @@
+"""
+Groupes du channel layer des flux tableau de bord et type des messages.
+"""
+
+# Handler du consumer appelé pour chaque changement (``dashboard.changed`` -> ``dashboard_changed``)
+DASHBOARD_CHANGED_MESSAGE_TYPE = 'dashboard.changed'
+
+
+def warehouse_group(inventory_id: int, warehouse_id: int) -> str:
+    """Groupe d'un magasin d'un inventaire (affectations et jobs)"""
+    return f'dashboard.{inventory_id}.{warehouse_id}'
+
+
+def inventory_group(inventory_id: int) -> str:
+    """Groupe de tous les magasins d'un inventaire (écarts, rattachés à l'inventaire seul)"""
+    return f'dashboard.{inventory_id}'
@@ -0,0 +1,116 @@
+"""
+Notification des tableaux de bord (flux SSE ``live/``) au commit.
+
+Les affectations, jobs, écarts et magasins modifiés pendant la transaction
+sont résolus au commit en couples (inventaire, magasin) ; chaque groupe
+concerné reçoit un seul message ``dashboard.changed`` portant un jeton
+unique. Le message ne transporte aucune donnée : les flux recalculent
+l'instantané après leur fenêtre de regroupement.
+
+Les ``save()`` sont signalés par ``apps.inventory.signals`` ; les chemins
+bulk (QuerySet.update, bulk_update, bulk_create) appellent
+``notify_dashboard_changes``.
+"""
+from __future__ import annotations
+
+import uuid
+from typing import Iterable, List, Optional, Tuple
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+
+from apps.core.commit_buffer import OnCommitBatchBuffer, PendingBatch
+from apps.inventory.models import Assigment, Job
+
+from .groups import DASHBOARD_CHANGED_MESSAGE_TYPE, inventory_group, warehouse_group
+
+
+class DashboardChangeNotifier(OnCommitBatchBuffer):
+    """
+    Changements accumulés par transaction, notifiés au commit
+    (apps.core.commit_buffer) ; hors transaction, la notification est immédiate.
+    """
+
+    fields = ("assignment_ids", "job_ids", "inventory_ids", "warehouses")
+    # Les données sont commitées : le tableau de bord se recalera au prochain changement
+    error_message = "Notification des tableaux de bord impossible"
+
+    def enabled(self) -> bool:
+        return getattr(settings, 'DASHBOARD_STREAM_ENABLED', True)
+
+    def mark(
+        self,
+        assignment_ids: Iterable[int] = (),
+        job_ids: Iterable[int] = (),
+        inventory_ids: Iterable[int] = (),
+        warehouses: Iterable[Tuple[int, int]] = (),
+        using: Optional[str] = None,
+    ) -> None:
+        self.add(
+            using=using,
+            assignment_ids=assignment_ids,
+            job_ids=job_ids,
+            inventory_ids=inventory_ids,
+            warehouses=warehouses,
+        )
+
+    def process(self, batch: PendingBatch) -> None:
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+        message = {"type": DASHBOARD_CHANGED_MESSAGE_TYPE, "token": uuid.uuid4().hex}
+        for group in resolve_groups(batch):
+            async_to_sync(channel_layer.group_send)(group, message)
+
+
+def resolve_groups(pending: PendingBatch) -> List[str]:
+    """Groupes à notifier (une requête par type de ligne au plus)"""
+    warehouses = set(pending.warehouses)
+    job_ids = set(pending.job_ids)
+    if pending.assignment_ids:
+        job_ids.update(
+            Assigment._base_manager.using(pending.using)
+            .filter(id__in=pending.assignment_ids)
+            .values_list('job_id', flat=True)
+        )
+    if job_ids:
+        warehouses.update(
+            Job._base_manager.using(pending.using)
+            .filter(id__in=job_ids)
+            .values_list('inventory_id', 'warehouse_id')
+            .distinct()
+        )
+    groups = [warehouse_group(inventory_id, warehouse_id) for inventory_id, warehouse_id in sorted(warehouses)]
+    groups.extend(inventory_group(inventory_id) for inventory_id in sorted(pending.inventory_ids))
+    return groups
+
+
+dashboard_change_notifier = DashboardChangeNotifier()
+
+
+def notify_dashboard_changes(
+    assignment_ids: Iterable[int] = (),
+    job_ids: Iterable[int] = (),
+    inventory_ids: Iterable[int] = (),
+    warehouses: Iterable[Tuple[int, int]] = (),
+    using: Optional[str] = None,
+) -> None:
+    """
+    Signale des changements visibles sur les tableaux de bord ; les flux
+    concernés sont notifiés au commit de la transaction.
+
+    Args:
+        assignment_ids: Affectations dont le statut ou l'utilisateur a changé
+        job_ids: Jobs dont le statut a changé
+        inventory_ids: Inventaires dont les écarts ont changé (tous magasins)
+        warehouses: Couples (inventory_id, warehouse_id) modifiés en masse
+        using: Alias de base
+    """
+    dashboard_change_notifier.mark(
+        assignment_ids=assignment_ids,
+        job_ids=job_ids,
+        inventory_ids=inventory_ids,
+        warehouses=warehouses,
+        using=using,
+    )
@@ -0,0 +1,16 @@
+"""
+Routes HTTP longues (SSE) de l'application inventory, montées par
+project/asgi.py avant l'application Django.
+"""
+from django.urls import path
+
+from apps.mobile.realtime.auth import JWTAuthMiddleware
+
+from .consumers import DashboardStreamConsumer
+
+http_urlpatterns = [
+    path(
+        'web/api/inventory/<int:inventory_id>/warehouses/<int:warehouse_id>/live/',
+        JWTAuthMiddleware(DashboardStreamConsumer.as_asgi()),
+    ),
+]
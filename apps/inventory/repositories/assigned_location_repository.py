@@ -0,0 +1,85 @@
+"""
+Repository de l'index InventoryAssignedLocation (emplacements affectés par inventaire).
+"""
+from typing import Iterable, Set, Tuple
+
+from django.db.models import OuterRef, QuerySet
+
+from ..models import InventoryAssignedLocation, JobDetail
+
+# (inventory_id, warehouse_id, location_id)
+AssignedKey = Tuple[int, int, int]
+
+
+class AssignedLocationRepository:
+    """
+    Repository pour la gestion de l'index InventoryAssignedLocation.
+    Contient uniquement la logique d'accès aux données (ORM).
+    """
+
+    def add(self, keys: Iterable[AssignedKey], using: str = 'default', batch_size: int = 1000) -> None:
+        """Ajoute les clés à l'index (déjà présentes : ignorées)"""
+        rows = [
+            InventoryAssignedLocation(inventory_id=inventory_id, warehouse_id=warehouse_id, location_id=location_id)
+            for inventory_id, warehouse_id, location_id in set(keys)
+        ]
+        if rows:
+            InventoryAssignedLocation.objects.using(using).bulk_create(
+                rows, batch_size=batch_size, ignore_conflicts=True,
+            )
+
+    def sync(self, keys: Iterable[AssignedKey], using: str = 'default') -> None:
+        """
+        Recalcule les clés données depuis les JobDetail actifs : ajoutées si
+        l'emplacement a encore au moins un JobDetail dans l'inventaire, retirées sinon.
+        """
+        keys = set(keys)
+        if not keys:
+            return
+        inventory_ids = {key[0] for key in keys}
+        location_ids = {key[2] for key in keys}
+
+        present = self.get_assigned_keys(inventory_ids, location_ids, using) & keys
+        missing = keys - present
+        if missing:
+            stale_ids = [
+                pk
+                for pk, *key in InventoryAssignedLocation.objects.using(using)
+                .filter(inventory_id__in=inventory_ids, location_id__in=location_ids)
+                .values_list('id', 'inventory_id', 'warehouse_id', 'location_id')
+                if tuple(key) in missing
+            ]
+            if stale_ids:
+                InventoryAssignedLocation.objects.using(using).filter(id__in=stale_ids).delete()
+        self.add(present, using)
+
+    def get_assigned_keys(
+        self,
+        inventory_ids: Iterable[int],
+        location_ids: Iterable[int] = None,
+        using: str = 'default',
+    ) -> Set[AssignedKey]:
+        """Clés (inventaire, entrepôt du job, emplacement) calculées depuis JobDetail"""
+        details = JobDetail.objects.using(using).filter(job__inventory_id__in=list(inventory_ids))
+        if location_ids is not None:
+            details = details.filter(location_id__in=list(location_ids))
+        return set(
+            details.values_list('job__inventory_id', 'job__warehouse_id', 'location_id')
+            .order_by()
+            .distinct()
+        )
+
+    def rebuild(self, inventory_id: int) -> int:
+        """Reconstruit l'index d'un inventaire ; à appeler dans une transaction"""
+        keys = self.get_assigned_keys([inventory_id])
+        InventoryAssignedLocation.objects.filter(inventory_id=inventory_id).delete()
+        self.add(keys)
+        return len(keys)
+
+    def assigned_for_outer_location(self, inventory_id: int, warehouse_id: int) -> QuerySet:
+        """Sous-requête corrélée sur ``OuterRef('pk')`` d'un Location (anti-join NOT EXISTS)"""
+        return InventoryAssignedLocation.objects.filter(
+            inventory_id=inventory_id,
+            warehouse_id=warehouse_id,
+            location_id=OuterRef('pk'),
+        )
@@ -4,6 +4,8 @@ from django.db import transaction
 from ..interfaces.assignment_interface import IAssignmentRepository
 from ..models import Job, Counting, Assigment
 from ..exceptions.assignment_exceptions import AssignmentNotFoundError
+from ..realtime import notify_dashboard_changes
+from apps.mobile.realtime import publish_pda_changes
 
 
 class AssignmentRepository(IAssignmentRepository):
@@ -86,6 +88,9 @@ class AssignmentRepository(IAssignmentRepository):
             date_field: timezone.now()
         }
         Job.objects.filter(id=job_id).update(**update_data)
+        # QuerySet.update ne déclenche pas les signaux : PDA et tableaux de bord notifiés au commit
+        publish_pda_changes(job_ids=[job_id])
+        notify_dashboard_changes(job_ids=[job_id])
     
     def get_existing_assignments_for_jobs(self, job_ids: List[int]) -> List[Any]:
         """
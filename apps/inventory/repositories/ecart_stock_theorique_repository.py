@@ -1,10 +1,12 @@
 """
 Repository pour EcartStockTheorique.
 """
-from typing import List, Optional
+import uuid
+from typing import Any, Dict, List, Optional
 
 from django.db.models import QuerySet
 
+from apps.core.upsert import UpsertResult, bulk_upsert
 from apps.inventory.models import EcartStockTheorique
 
 
@@ -61,6 +63,36 @@ class EcartStockTheoriqueRepository:
         instance.save()
         return instance
 
+    def bulk_upsert_compute_lines(self, rows: List[Dict[str, Any]]) -> UpsertResult:
+        """
+        Upsert des lignes calculées sur (inventory, warehouse, article_cle, mode_groupement).
+
+        Lignes validées : non modifiées (comptées dans ``skipped``).
+        Lignes non validées : quantités / écart / désignation rafraîchis,
+        produit conservé si non fourni, resultat_final forcé à la quantité
+        pratique en cas d'égalité, inchangé sinon.
+        """
+        for row in rows:
+            # 64 bits aléatoires : generate_reference (6 caractères d'uuid par
+            # seconde) n'est pas assez discriminant pour des milliers de lignes
+            row.setdefault("reference", f"{EcartStockTheorique.REFERENCE_PREFIX}-{uuid.uuid4().hex[:16]}")
+        return bulk_upsert(
+            EcartStockTheorique,
+            rows,
+            unique_fields=["inventory", "warehouse", "article_cle", "mode_groupement"],
+            update_fields=[
+                "designation", "product", "qte_theorique", "qte_pratique", "ecart", "resultat_final",
+            ],
+            update_expressions={
+                "product": "COALESCE(EXCLUDED.product_id, t.product_id)",
+                "resultat_final": (
+                    "CASE WHEN EXCLUDED.qte_theorique = EXCLUDED.qte_pratique "
+                    "THEN EXCLUDED.qte_pratique ELSE t.resultat_final END"
+                ),
+            },
+            update_where="t.valide = false",
+        )
+
     def bulk_get_existing_keys(
         self, inventory_id: int, warehouse_id: int
     ) -> dict:
@@ -1,11 +1,19 @@
 """
 Repository pour les opérations de données pour l'export Excel consolidé
 """
-from typing import Any, Dict, List, Optional, Tuple
+from itertools import batched
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from django.db.models import OuterRef, Subquery, Sum
 
 from apps.masterdata.models import Product, Warehouse
 
-from ..models import Counting, EcartComptage, Inventory
+from ..models import ComptageSequence, Counting, EcartComptage, Inventory
+
+# Code des articles de test, exclus de la consolidation
+EXCLUDED_PRODUCT_CODE = '111111111111111'
+
+CONSOLIDATED_CHUNK_SIZE = 2000
 
 
 class ExcelExportRepository:
@@ -54,119 +62,96 @@ class ExcelExportRepository:
         ).distinct()
         return ecarts.count(), ecarts.filter(resolved=True).count()
     
-    def get_consolidated_data_by_inventory_and_warehouse(
+    def iter_consolidated_rows(
         self,
         inventory_id: int,
         warehouse_id: int,
-    ) -> List[Dict[str, Any]]:
+        chunk_size: int = CONSOLIDATED_CHUNK_SIZE,
+    ) -> Iterator[Dict[str, Any]]:
         """
-        Récupère les données consolidées par article pour un inventaire / magasin.
-
-        Utilise UNIQUEMENT le final_result des EcartComptage RÉSOLUS.
+        Parcourt les données consolidées par article pour un inventaire / magasin.
 
-        Pour chaque produit apparaissant dans des EcartComptage résolus,
-        la quantité consolidée est la SOMME des final_result de TOUS les EcartComptage
-        résolus associés à ce produit.
+        Utilise UNIQUEMENT le final_result des EcartComptage RÉSOLUS : la quantité
+        consolidée d'un produit est la SOMME des final_result de tous les
+        EcartComptage résolus associés à ce produit (et non la somme des
+        quantités de comptage).
 
-        Contrairement à l'ancienne logique qui additionnait les quantités de comptage (5+3+2=10),
-        cette logique utilise les résultats finaux validés après résolution des écarts.
+        Un écart est rattaché à un seul produit (le plus petit product_id de ses
+        séquences du magasin) : un écart à plusieurs CountingSequence n'est
+        compté qu'une fois. Les articles de code '111111111111111' (test) sont
+        exclus.
 
-        Exclut les articles avec le code produit '1111111111111' de la consolidation.
+        L'agrégation est faite en base et lue par curseur serveur
+        (``iterator``) ; les détails produits sont chargés par lot : la mémoire
+        ne dépend pas du nombre d'articles.
 
         Args:
             inventory_id: ID de l'inventaire
             warehouse_id: ID du magasin
+            chunk_size: Nombre de lignes lues par aller-retour
 
-        Returns:
-            Liste de dictionnaires avec les données consolidées
+        Yields:
+            Dictionnaires produit + ``total_quantity``, triés par product_id
         """
+        ecart_product = (
+            ComptageSequence._base_manager.filter(
+                ecart_comptage_id=OuterRef('pk'),
+                counting_detail__job__warehouse_id=warehouse_id,
+                counting_detail__product_id__isnull=False,
+            )
+            .order_by('counting_detail__product_id')
+            .values('counting_detail__product_id')[:1]
+        )
+        totals = (
+            EcartComptage.objects.filter(
+                inventory_id=inventory_id,
+                resolved=True,
+                final_result__isnull=False,
+            )
+            .annotate(consolidated_product_id=Subquery(ecart_product))
+            .filter(consolidated_product_id__isnull=False)
+            .values('consolidated_product_id')
+            .annotate(total_quantity=Sum('final_result'))
+            .order_by('consolidated_product_id')
+            .values_list('consolidated_product_id', 'total_quantity')
+            .iterator(chunk_size=chunk_size)
+        )
 
-        # Logique simplifiée : Σ(final_result) par produit depuis EcartComptage résolus
-        # Plus de jointures complexes avec counting_sequences
-
-        # Étape 1 : Récupérer les IDs des produits à exclure (code test)
-        excluded_product_ids = Product.objects.filter(
-            Internal_Product_Code='111111111111111'
-        ).values_list('id', flat=True)
-
-        # Étape 2 : Récupérer les produits avec leur somme de final_result
-        # Solution : d'abord identifier les produits des EcartComptage, puis sommer
-        # Pour éviter les duplications si un EcartComptage a plusieurs CountingSequence
-
-        # Étape 2a : Récupérer les paires (ecart_id, product_id) uniques
-        ecart_product_pairs = EcartComptage.objects.filter(
-            inventory_id=inventory_id,
-            resolved=True,
-            final_result__isnull=False,
-            counting_sequences__counting_detail__job__warehouse_id=warehouse_id,
-        ).values(
-            'id',  # EcartComptage ID pour unicité
-            'counting_sequences__counting_detail__product_id'
-        ).distinct()
-
-        # Étape 2b : Créer un mapping ecart_id -> product_id (premier produit trouvé)
-        ecart_to_product = {}
-        for pair in ecart_product_pairs:
-            ecart_id = pair['id']
-            product_id = pair['counting_sequences__counting_detail__product_id']
-            if ecart_id not in ecart_to_product:
-                ecart_to_product[ecart_id] = product_id
-
-        # Étape 2c : Récupérer les EcartComptage avec leur produit et sommer par produit
-        consolidated_data = []
-        product_sums = {}
-
-        ecart_comptages = EcartComptage.objects.filter(
-            id__in=ecart_to_product.keys()
-        ).select_related()
-
-        for ecart in ecart_comptages:
-            product_id = ecart_to_product[ecart.id]
-            if product_id not in product_sums:
-                product_sums[product_id] = 0
-            product_sums[product_id] += ecart.final_result
-
-        # Convertir en format attendu
-        for product_id, total_quantity in product_sums.items():
-            consolidated_data.append({
-                'product_id': product_id,
-                'total_quantity': total_quantity
-            })
-
-        # Appliquer l'exclusion des produits test
-        consolidated_data = [
-            item for item in consolidated_data
-            if item['product_id'] not in excluded_product_ids
-        ]
-
-        # Récupérer les détails des produits
-        product_ids = [item['product_id'] for item in consolidated_data]
-        products = Product.objects.filter(id__in=product_ids).select_related('Product_Family')
-
-        # Créer un mapping produit_id -> détails produit
-        products_map = {}
-        for product in products:
-            products_map[product.id] = {
-                'product_reference': product.reference,
-                'product_code': product.Internal_Product_Code,
-                'product_description': product.Short_Description or '',
-                'product_barcode': product.Barcode or '',
-                'product_unit': product.Stock_Unit or '',
-                'product_family': product.Product_Family.family_name if product.Product_Family else '',
-            }
-
-        # Combiner les données
-        result = []
-        for item in consolidated_data:
-            product_id = item['product_id']
-            if product_id in products_map:
-                product_data = products_map[product_id].copy()
-                product_data.update({
+        for chunk in batched(totals, chunk_size):
+            quantities = dict(chunk)
+            products = (
+                Product.objects.filter(id__in=quantities.keys())
+                .exclude(Internal_Product_Code=EXCLUDED_PRODUCT_CODE)
+                .values_list(
+                    'id',
+                    'reference',
+                    'Internal_Product_Code',
+                    'Short_Description',
+                    'Barcode',
+                    'Stock_Unit',
+                    'Product_Family__family_name',
+                )
+                .order_by('id')
+            )
+            for product_id, reference, code, description, barcode, unit, family in products:
+                yield {
+                    'product_reference': reference,
+                    'product_code': code,
+                    'product_description': description or '',
+                    'product_barcode': barcode or '',
+                    'product_unit': unit or '',
+                    'product_family': family or '',
                     'product_id': product_id,
-                    'total_quantity': item['total_quantity'] or 0,
-                })
-                result.append(product_data)
-
-        return result
-    
+                    'total_quantity': quantities[product_id] or 0,
+                }
 
+    def get_consolidated_data_by_inventory_and_warehouse(
+        self,
+        inventory_id: int,
+        warehouse_id: int,
+    ) -> List[Dict[str, Any]]:
+        """
+        Données consolidées par article pour un inventaire / magasin, en liste
+        (voir ``iter_consolidated_rows``).
+        """
+        return list(self.iter_consolidated_rows(inventory_id, warehouse_id))
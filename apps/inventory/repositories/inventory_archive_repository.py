@@ -0,0 +1,258 @@
+"""
+Stockage des archives d'inventaire : fichiers Parquet sous INVENTORY_ARCHIVE_DIR.
+
+Un répertoire par inventaire :
+
+    <INVENTORY_ARCHIVE_DIR>/<inventory_id>/
+        manifest.json
+        counting_detail.parquet
+        historical_counting_detail.parquet
+        results.parquet
+        ...
+
+Les colonnes d'une table sont typées d'après les champs Django (entiers,
+décimaux, dates...) ; les JSONField sont stockés en texte JSON. Les lignes
+sont lues par curseur serveur et écrites par row group : la mémoire dépend de
+INVENTORY_ARCHIVE_BATCH_SIZE, pas de la taille de l'inventaire.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from itertools import batched
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from apps.core.lazy_imports import lazy_import
+
+from ..models import InventoryArchive
+
+pa = lazy_import('pyarrow')
+pq = lazy_import('pyarrow.parquet')
+
+MANIFEST_FILENAME = 'manifest.json'
+
+# Type interne Django -> fabrique de type Arrow
+_ARROW_TYPES = {
+    'AutoField': lambda field: pa.int64(),
+    'BigAutoField': lambda field: pa.int64(),
+    'SmallAutoField': lambda field: pa.int64(),
+    'IntegerField': lambda field: pa.int64(),
+    'BigIntegerField': lambda field: pa.int64(),
+    'SmallIntegerField': lambda field: pa.int64(),
+    'PositiveIntegerField': lambda field: pa.int64(),
+    'PositiveBigIntegerField': lambda field: pa.int64(),
+    'PositiveSmallIntegerField': lambda field: pa.int64(),
+    'FloatField': lambda field: pa.float64(),
+    'DecimalField': lambda field: pa.decimal128(field.max_digits, field.decimal_places),
+    'BooleanField': lambda field: pa.bool_(),
+    'DateTimeField': lambda field: pa.timestamp('us', tz='UTC'),
+    'DateField': lambda field: pa.date32(),
+    'TimeField': lambda field: pa.time64('us'),
+}
+
+
+def _column_field(field):
+    """Champ portant la valeur stockée (cible d'une clé étrangère)."""
+    while field.is_relation:
+        field = field.target_field
+    return field
+
+
+def _arrow_type(field):
+    factory = _ARROW_TYPES.get(_column_field(field).get_internal_type())
+    return factory(_column_field(field)) if factory else pa.string()
+
+
+def _text_converter(field):
+    internal_type = _column_field(field).get_internal_type()
+    if internal_type == 'JSONField':
+        return lambda value: None if value is None else json.dumps(value, cls=DjangoJSONEncoder)
+    if internal_type in _ARROW_TYPES:
+        return None
+    return lambda value: None if value is None else str(value)
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ParquetTableWriter:
+    """
+    Écrit des lignes (tuples dans l'ordre de ``columns``) dans un fichier Parquet.
+
+    Usage:
+        with ParquetTableWriter(path, columns, schema) as writer:
+            writer.write_rows(rows)
+    """
+
+    def __init__(self, path: str, columns: Sequence[str], schema, converters=None, compression: Optional[str] = None):
+        self.path = path
+        self.columns = list(columns)
+        self.schema = schema
+        self.converters = list(converters or [None] * len(self.columns))
+        self.compression = compression or settings.INVENTORY_ARCHIVE_COMPRESSION
+        self.rows = 0
+        self._writer = None
+
+    def __enter__(self) -> 'ParquetTableWriter':
+        self._writer = pq.ParquetWriter(self.path, self.schema, compression=self.compression)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._writer.close()
+
+    def write_rows(self, rows: Iterable[Sequence[Any]], batch_size: Optional[int] = None) -> int:
+        for chunk in batched(rows, batch_size or settings.INVENTORY_ARCHIVE_BATCH_SIZE):
+            arrays = []
+            for index, converter in enumerate(self.converters):
+                values = [row[index] for row in chunk]
+                if converter is not None:
+                    values = [converter(value) for value in values]
+                arrays.append(pa.array(values, type=self.schema.field(index).type))
+            self._writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+            self.rows += len(chunk)
+        return self.rows
+
+
+class InventoryArchiveRepository:
+    """
+    Lecture / écriture des fichiers d'archive d'un inventaire.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or settings.INVENTORY_ARCHIVE_DIR
+
+    # ------------------------------------------------------------------
+    # Écriture
+    # ------------------------------------------------------------------
+
+    def create_staging_dir(self, inventory_id: int) -> str:
+        """Répertoire temporaire, renommé en répertoire final par ``publish``."""
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, f'.tmp-{inventory_id}-{uuid.uuid4().hex}')
+        os.makedirs(path)
+        return path
+
+    def write_queryset(self, directory: str, dataset: str, queryset, batch_size: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Écrit toutes les colonnes concrètes du modèle du queryset dans ``<dataset>.parquet``.
+
+        Returns:
+            Entrée de manifeste (fichier, table, lignes écrites, colonnes)
+        """
+        batch_size = batch_size or settings.INVENTORY_ARCHIVE_BATCH_SIZE
+        fields = list(queryset.model._meta.concrete_fields)
+        columns = [field.attname for field in fields]
+        schema = pa.schema([pa.field(field.attname, _arrow_type(field), nullable=True) for field in fields])
+        filename = f'{dataset}.parquet'
+        rows = queryset.order_by('pk').values_list(*columns).iterator(chunk_size=batch_size)
+        with ParquetTableWriter(
+            os.path.join(directory, filename), columns, schema, [_text_converter(field) for field in fields],
+        ) as writer:
+            written = writer.write_rows(rows, batch_size)
+        return {'file': filename, 'table': queryset.model._meta.db_table, 'rows': written, 'columns': columns}
+
+    def write_rows(self, directory: str, dataset: str, schema, rows: Iterable[Sequence[Any]]) -> Dict[str, Any]:
+        """Écrit des lignes calculées (résultats, export consolidé) dans ``<dataset>.parquet``."""
+        filename = f'{dataset}.parquet'
+        with ParquetTableWriter(os.path.join(directory, filename), schema.names, schema) as writer:
+            written = writer.write_rows(rows)
+        return {'file': filename, 'table': None, 'rows': written, 'columns': list(schema.names)}
+
+    def seal(self, directory: str, manifest: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Relit le nombre de lignes de chaque fichier, ajoute taille et empreinte, écrit manifest.json.
+
+        Raises:
+            ValueError: Si un fichier ne contient pas le nombre de lignes attendu
+        """
+        for dataset, entry in manifest.items():
+            path = os.path.join(directory, entry['file'])
+            stored = pq.ParquetFile(path).metadata.num_rows
+            if stored != entry['rows']:
+                raise ValueError(f"{dataset} : {stored} ligne(s) dans le fichier, {entry['rows']} attendue(s)")
+            entry['bytes'] = os.path.getsize(path)
+            entry['sha256'] = _sha256(path)
+        with open(os.path.join(directory, MANIFEST_FILENAME), 'w', encoding='utf-8') as handle:
+            json.dump(manifest, handle, indent=2, ensure_ascii=False)
+        return manifest
+
+    def publish(self, staging_dir: str, inventory_id: int) -> str:
+        """Renomme le répertoire temporaire en ``<inventory_id>`` ; renvoie le chemin relatif."""
+        relative = str(inventory_id)
+        target = os.path.join(self.root, relative)
+        if os.path.exists(target):
+            # Reste d'une archive dont la transaction n'a pas abouti
+            shutil.rmtree(target)
+        os.replace(staging_dir, target)
+        return relative
+
+    def discard(self, path: str) -> None:
+        shutil.rmtree(path, ignore_errors=True)
+
+    # ------------------------------------------------------------------
+    # Lecture
+    # ------------------------------------------------------------------
+
+    def archive_dir(self, archive: InventoryArchive) -> str:
+        return os.path.join(self.root, archive.path)
+
+    def dataset_path(self, archive: InventoryArchive, dataset: str) -> str:
+        entry = archive.manifest.get(dataset)
+        if entry is None:
+            raise KeyError(dataset)
+        return os.path.join(self.archive_dir(archive), entry['file'])
+
+    def verify(self, archive: InventoryArchive) -> List[str]:
+        """
+        Contrôle les fichiers d'une archive contre son manifeste.
+
+        Returns:
+            Liste des anomalies (vide si l'archive est intègre)
+        """
+        problems = []
+        for dataset, entry in archive.manifest.items():
+            path = os.path.join(self.archive_dir(archive), entry['file'])
+            if not os.path.exists(path):
+                problems.append(f"{dataset} : fichier absent ({entry['file']})")
+                continue
+            try:
+                stored = pq.ParquetFile(path).metadata.num_rows
+            except pa.ArrowException as exc:
+                problems.append(f"{dataset} : fichier illisible ({exc})")
+                continue
+            if stored != entry['rows']:
+                problems.append(f"{dataset} : {stored} ligne(s), {entry['rows']} attendue(s)")
+            elif _sha256(path) != entry['sha256']:
+                problems.append(f"{dataset} : empreinte SHA-256 différente")
+        return problems
+
+    def read_rows(
+        self,
+        archive: InventoryArchive,
+        dataset: str,
+        columns: Optional[Sequence[str]] = None,
+        filters: Optional[list] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Lignes d'un dataset en dictionnaires.
+
+        ``filters`` au format pyarrow (``[('warehouse_id', '=', 3)]``) : les row
+        groups exclus par leurs statistiques ne sont pas lus.
+        """
+        table = pq.read_table(
+            self.dataset_path(archive, dataset),
+            columns=list(columns) if columns else None,
+            filters=filters or None,
+        )
+        return table.to_pylist()
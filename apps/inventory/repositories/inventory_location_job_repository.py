@@ -1,5 +1,6 @@
 from typing import Any, List, Dict
 from django.db import transaction
+from apps.core.upsert import bulk_upsert
 from apps.masterdata.models import InventoryLocationJob
 from ..interfaces.inventory_location_job_interface import IInventoryLocationJobRepository
 
@@ -73,7 +74,9 @@ class InventoryLocationJobRepository(IInventoryLocationJobRepository):
     def bulk_upsert(self, data_list: List[Dict[str, Any]], inventory_id: int) -> Dict[str, int]:
         """
         Effectue un upsert (update or insert) en masse pour InventoryLocationJob
-        Clé unique : (inventaire_id, emplacement_id)
+        Clé unique : (inventaire_id, emplacement_id) parmi les lignes non supprimées
+        
+        Une requête INSERT ... ON CONFLICT DO UPDATE par lot (voir apps.core.upsert).
         
         Args:
             data_list: Liste de dictionnaires contenant les données
@@ -82,59 +85,22 @@ class InventoryLocationJobRepository(IInventoryLocationJobRepository):
         Returns:
             Dict contenant le nombre d'objets créés et mis à jour
         """
-        if not data_list:
+        rows = [
+            {**data, 'inventaire_id': inventory_id}
+            for data in data_list
+            if data.get('emplacement_id')
+        ]
+        if not rows:
             return {'created': 0, 'updated': 0}
         
-        # Récupérer les emplacement_ids pour cet inventaire
-        emplacement_ids = [data['emplacement_id'] for data in data_list if data.get('emplacement_id')]
-        
-        # Récupérer les enregistrements existants
-        existing_objects = InventoryLocationJob.objects.filter(
-            inventaire_id=inventory_id,
-            emplacement_id__in=emplacement_ids,
-            is_deleted=False
+        result = bulk_upsert(
+            InventoryLocationJob,
+            rows,
+            unique_fields=['inventaire', 'emplacement'],
+            update_fields=['job', 'session_1', 'session_2'],
+            conflict_where='is_deleted = false',
         )
-        
-        # Créer un dictionnaire pour un accès rapide : (emplacement_id) -> InventoryLocationJob
-        existing_map = {obj.emplacement_id: obj for obj in existing_objects}
-        
-        # Séparer les objets à créer et ceux à mettre à jour
-        objects_to_create = []
-        objects_to_update = []
-        
-        for data in data_list:
-            emplacement_id = data.get('emplacement_id')
-            if not emplacement_id:
-                continue
-            
-            existing_obj = existing_map.get(emplacement_id)
-            
-            if existing_obj:
-                # Mettre à jour l'objet existant
-                for key, value in data.items():
-                    setattr(existing_obj, key, value)
-                objects_to_update.append(existing_obj)
-            else:
-                # Créer un nouvel objet
-                objects_to_create.append(InventoryLocationJob(**data))
-        
-        # Effectuer les opérations en masse
-        created_count = 0
-        updated_count = 0
-        
-        if objects_to_create:
-            created_objects = InventoryLocationJob.objects.bulk_create(objects_to_create)
-            created_count = len(created_objects)
-        
-        if objects_to_update:
-            InventoryLocationJob.objects.bulk_update(
-                objects_to_update,
-                ['job', 'session_1', 'session_2', 'updated_at']
-            )
-            updated_count = len(objects_to_update)
-        
         return {
-            'created': created_count,
-            'updated': updated_count
+            'created': result.created,
+            'updated': result.updated
         }
-
@@ -0,0 +1,254 @@
+"""
+Repository de la table matérialisée InventoryResult.
+
+Calcule les lignes depuis les comptages (CountingDetail, ComptageSequence,
+EcartComptage) et les relit pour les écrans et exports de résultats.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from ..models import (
+    Assigment,
+    ComptageSequence,
+    CountingDetail,
+    InventoryResult,
+    InventoryResultBuild,
+)
+
+# Colonnes réécrites lorsqu'une ligne existe déjà (rafraîchissements concurrents)
+RESULT_UPDATE_FIELDS = [
+    'quantities',
+    'max_counting_order',
+    'ecart_comptage_id',
+    'final_result',
+    'resolved',
+    'manual_result',
+    'refreshed_at',
+]
+RESULT_KEY_FIELDS = ['inventory', 'warehouse', 'location', 'product', 'job']
+
+
+class InventoryResultRepository:
+    """
+    Repository pour la gestion de la table InventoryResult.
+    Contient uniquement la logique d'accès aux données (ORM).
+    """
+
+    # ------------------------------------------------------------------
+    # Calcul depuis les comptages
+    # ------------------------------------------------------------------
+
+    def compute_rows(
+        self,
+        inventory_id: int,
+        warehouse_ids: Iterable[int],
+        location_ids: Optional[Iterable[int]] = None,
+    ) -> List[InventoryResult]:
+        """
+        Calcule les lignes de résultat (non sauvegardées) d'un inventaire.
+
+        Deux requêtes : les quantités groupées par (entrepôt, emplacement, produit,
+        job, ordre de comptage), puis la dernière séquence d'écart par
+        (produit, emplacement).
+
+        Args:
+            inventory_id: Identifiant de l'inventaire
+            warehouse_ids: Entrepôts à calculer
+            location_ids: Restreint le calcul à ces emplacements (rafraîchissement incrémental)
+        """
+        # inventory_id : clé de partition, seule la partition de l'inventaire est lue
+        details = CountingDetail.objects.filter(
+            inventory_id=inventory_id,
+            job__warehouse_id__in=list(warehouse_ids),
+        )
+        if location_ids is not None:
+            details = details.filter(location_id__in=list(location_ids))
+
+        quantity_rows = (
+            details.values('location_id', 'product_id', 'job_id')
+            .annotate(
+                warehouse_key=F('job__warehouse_id'),
+                counting_order=F('counting__order'),
+                total_quantity=Sum('quantity_inventoried'),
+            )
+            .order_by()
+        )
+
+        results: Dict[Tuple[int, int, Optional[int], int], InventoryResult] = {}
+        for row in quantity_rows:
+            key = (row['warehouse_key'], row['location_id'], row['product_id'], row['job_id'])
+            result = results.get(key)
+            if result is None:
+                result = results[key] = InventoryResult(
+                    inventory_id=inventory_id,
+                    warehouse_id=row['warehouse_key'],
+                    location_id=row['location_id'],
+                    product_id=row['product_id'],
+                    job_id=row['job_id'],
+                    quantities={},
+                )
+            order = row['counting_order']
+            result.quantities[str(order)] = row['total_quantity'] or 0
+            result.max_counting_order = max(result.max_counting_order or 0, order)
+
+        if not results:
+            return []
+
+        ecarts = self.get_latest_ecarts(
+            inventory_id,
+            location_ids={key[1] for key in results},
+        )
+        for (_, location_id, product_id, _), result in results.items():
+            ecart = ecarts.get((product_id, location_id))
+            if ecart is not None:
+                (
+                    result.ecart_comptage_id,
+                    result.final_result,
+                    result.resolved,
+                    result.manual_result,
+                ) = ecart
+
+        return list(results.values())
+
+    def get_latest_ecarts(
+        self,
+        inventory_id: int,
+        location_ids: Iterable[int],
+    ) -> Dict[Tuple[int, int], Tuple[int, Optional[int], bool, bool]]:
+        """
+        Écart de la séquence la plus récente (sequence_number max) par
+        (produit, emplacement) : (ecart_id, final_result, resolved, manual_result).
+        """
+        rows = (
+            # Clé de partition sur les deux tables (élagage des deux côtés de la jointure)
+            ComptageSequence.objects.filter(
+                inventory_id=inventory_id,
+                counting_detail__inventory_id=inventory_id,
+                counting_detail__location_id__in=list(location_ids),
+                counting_detail__product_id__isnull=False,
+            )
+            .order_by(
+                'counting_detail__product_id',
+                'counting_detail__location_id',
+                '-sequence_number',
+                '-id',
+            )
+            .distinct('counting_detail__product_id', 'counting_detail__location_id')
+            .values_list(
+                'counting_detail__product_id',
+                'counting_detail__location_id',
+                'ecart_comptage_id',
+                'ecart_comptage__final_result',
+                'ecart_comptage__resolved',
+                'ecart_comptage__manual_result',
+            )
+        )
+        return {
+            (product_id, location_id): (ecart_id, final_result, resolved, manual_result)
+            for product_id, location_id, ecart_id, final_result, resolved, manual_result in rows
+        }
+
+    # ------------------------------------------------------------------
+    # Écriture
+    # ------------------------------------------------------------------
+
+    def replace_rows(
+        self,
+        inventory_id: int,
+        warehouse_ids: Iterable[int],
+        rows: List[InventoryResult],
+        location_ids: Optional[Iterable[int]] = None,
+        batch_size: int = 1000,
+    ) -> int:
+        """
+        Remplace les lignes du périmètre (inventaire, entrepôts[, emplacements]).
+
+        À appeler dans une transaction. Une ligne insérée entre-temps par un
+        rafraîchissement concurrent est réécrite (ON CONFLICT DO UPDATE).
+        """
+        stale = InventoryResult.objects.filter(
+            inventory_id=inventory_id,
+            warehouse_id__in=list(warehouse_ids),
+        )
+        if location_ids is not None:
+            stale = stale.filter(location_id__in=list(location_ids))
+        stale.delete()
+
+        if rows:
+            InventoryResult.objects.bulk_create(
+                rows,
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=RESULT_KEY_FIELDS,
+                update_fields=RESULT_UPDATE_FIELDS,
+            )
+        return len(rows)
+
+    def get_built_warehouse_ids(self, inventory_id: int) -> List[int]:
+        """Entrepôts de l'inventaire dont la table est complète"""
+        return list(
+            InventoryResultBuild.objects.filter(inventory_id=inventory_id)
+            .values_list('warehouse_id', flat=True)
+        )
+
+    def is_built(self, inventory_id: int, warehouse_id: int) -> bool:
+        return InventoryResultBuild.objects.filter(
+            inventory_id=inventory_id,
+            warehouse_id=warehouse_id,
+        ).exists()
+
+    def mark_built(self, inventory_id: int, warehouse_id: int) -> None:
+        InventoryResultBuild.objects.update_or_create(
+            inventory_id=inventory_id,
+            warehouse_id=warehouse_id,
+            defaults={'built_at': timezone.now()},
+        )
+
+    # ------------------------------------------------------------------
+    # Lecture
+    # ------------------------------------------------------------------
+
+    def get_rows_for_warehouse(self, inventory_id: int, warehouse_id: int) -> List[Dict[str, Any]]:
+        """
+        Lignes matérialisées d'un entrepôt, avec les libellés emplacement /
+        produit / job (une seule requête, jointures sur les FK).
+        """
+        return list(
+            InventoryResult.objects.filter(
+                inventory_id=inventory_id,
+                warehouse_id=warehouse_id,
+            ).values(
+                'location_id',
+                'product_id',
+                'job_id',
+                'quantities',
+                'max_counting_order',
+                'ecart_comptage_id',
+                'final_result',
+                'resolved',
+                'manual_result',
+                location_reference_alias=F('location__location_reference'),
+                location_code_alias=F('location__reference'),
+                product_reference_alias=F('product__reference'),
+                product_barcode_alias=F('product__Barcode'),
+                product_description_alias=F('product__Short_Description'),
+                product_internal_code_alias=F('product__Internal_Product_Code'),
+                product_family_name_alias=F('product__Product_Family__family_name'),
+                job_reference_alias=F('job__reference'),
+                job_status_alias=F('job__status'),
+            )
+        )
+
+    def get_assignment_statuses(self, inventory_id: int, warehouse_id: int) -> Dict[Tuple[int, int], str]:
+        """Statut d'affectation par (job, ordre de comptage) — lu à chaque lecture, non matérialisé"""
+        statuses: Dict[Tuple[int, int], str] = {}
+        rows = (
+            Assigment.objects.filter(job__inventory_id=inventory_id, job__warehouse_id=warehouse_id)
+            .order_by('id')
+            .values_list('job_id', 'counting__order', 'status')
+        )
+        for job_id, order, status in rows:
+            statuses.setdefault((job_id, order), status)
+        return statuses
@@ -5,6 +5,7 @@ from django.db.models import Q
 from ..interfaces.job_interface import JobRepositoryInterface
 from ..models import Job, Assigment, Counting, Inventory, JobDetail, CountingDetail
 from apps.masterdata.models import Warehouse, Location
+from apps.core.history import is_history_batched, record_queryset_update_history
 from django.utils import timezone
 
 
@@ -258,7 +259,11 @@ class JobRepository(JobRepositoryInterface):
         update_data = {'status': status}
         if date_field:
             update_data[date_field] = timezone.now()
-        return queryset.update(**update_data)
+        # QuerySet.update() ne déclenche pas simple_history : ids relus en mode batched
+        ids = list(queryset.values_list('id', flat=True)) if is_history_batched(JobDetail) else []
+        updated = queryset.update(**update_data)
+        record_queryset_update_history(JobDetail, ids)
+        return updated
     
     def update_assignments_status(self, job: Job, status: str, date_field: str = None) -> int:
         """
@@ -276,7 +281,11 @@ class JobRepository(JobRepositoryInterface):
         update_data = {'status': status}
         if date_field:
             update_data[date_field] = timezone.now()
-        return queryset.update(**update_data)
+        # QuerySet.update() ne déclenche pas simple_history : ids relus en mode batched
+        ids = list(queryset.values_list('id', flat=True)) if is_history_batched(Assigment) else []
+        updated = queryset.update(**update_data)
+        record_queryset_update_history(Assigment, ids)
+        return updated
     
     def get_jobs_with_filters(self, warehouse_id: int, filters: Optional[Dict[str, Any]] = None) -> List[Job]:
         """Récupère des jobs avec filtres"""
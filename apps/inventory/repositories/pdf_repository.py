@@ -3,6 +3,7 @@ Repository pour les opérations de données pour la génération PDF
 """
 from typing import List, Optional
 from django.db import DatabaseError
+from apps.core.db_routing import reporting_service
 from ..interfaces.pdf_interface import PDFRepositoryInterface
 from ..models import Inventory, Counting, Job, JobDetail, Assigment, CountingDetail
 from ..exceptions.pdf_exceptions import PDFRepositoryError
@@ -12,6 +13,7 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+@reporting_service
 class PDFRepository(PDFRepositoryInterface):
     """Repository pour la génération PDF"""
     
@@ -1,12 +1,13 @@
 """
 Repository pour l'agrégation inventoriée / métadonnées écart stock théorique.
 """
-from typing import Dict, List, Optional, Set
+from typing import Dict, Iterable, List, Optional, Set
 
 from django.db.models import Max, Sum
 
 from apps.inventory.constants import StockGapGrouping
 from apps.inventory.models import ComptageSequence, Counting, CountingDetail, EcartComptage, Inventory
+from apps.inventory.utils.stock_gap_engine import ProductColumns
 from apps.masterdata.models import Product
 
 
@@ -164,3 +165,19 @@ class StockGapRepository:
                 "internal_code": product.Internal_Product_Code or "",
             }
         return result
+
+    def get_product_columns(self, product_ids: Iterable[int], is_variant: bool) -> ProductColumns:
+        """
+        Clé de groupement et désignation des produits, en colonnes.
+
+        Lecture par ``values_list`` (pas d'instanciation de Product).
+        """
+        product_ids = list(product_ids)
+        if not product_ids:
+            return ProductColumns.from_rows([])
+        key_field = "Internal_Product_Code" if is_variant else "Barcode"
+        return ProductColumns.from_rows(
+            Product.objects.filter(id__in=product_ids)
+            .values_list("id", key_field, "Short_Description")
+            .iterator(chunk_size=10000)
+        )
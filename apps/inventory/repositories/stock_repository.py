@@ -5,6 +5,7 @@ import logging
 from typing import List, Dict, Any, Optional
 from django.db import transaction
 from django.db.models import Q
+from apps.core.upsert import bulk_upsert, UpsertResult
 from apps.masterdata.models import Stock, Product, Location, UnitOfMeasure
 from ..exceptions import StockNotFoundError, StockValidationError
 
@@ -214,6 +215,56 @@ class StockRepository:
             logger.error(f"Erreur lors de la création en lot des stocks: {str(e)}")
             raise StockValidationError(f"Erreur lors de la création en lot des stocks: {str(e)}")
     
+    def bulk_upsert(self, stocks_data: List[Dict[str, Any]]) -> UpsertResult:
+        """
+        Crée ou met à jour des stocks en lot (INSERT ... ON CONFLICT DO UPDATE).
+        
+        Clé : (inventory, location, product) parmi les stocks non supprimés. Les
+        lignes sans emplacement ou sans article ne sont jamais en conflit et sont
+        toujours créées. La référence n'est posée qu'à la création.
+        
+        Args:
+            stocks_data: Liste des données des stocks (référence incluse)
+            
+        Returns:
+            UpsertResult: Compteurs et id par clé (inventory_id, location_id, product_id)
+        """
+        try:
+            result = bulk_upsert(
+                Stock,
+                stocks_data,
+                unique_fields=['inventory', 'location', 'product'],
+                update_fields=[
+                    'quantity_available', 'quantity_reserved', 'quantity_in_transit',
+                    'quantity_in_receiving', 'unit_of_measure', 'warehouse',
+                ],
+                conflict_where='is_deleted = false',
+            )
+            logger.info(f"Stocks en lot : {result.created} créés, {result.updated} mis à jour")
+            return result
+            
+        except Exception as e:
+            logger.error(f"Erreur lors de l'upsert en lot des stocks: {str(e)}")
+            raise StockValidationError(f"Erreur lors de l'upsert en lot des stocks: {str(e)}")
+    
+    def delete_by_inventory_id_except(self, inventory_id: int, kept_ids: List[int]) -> int:
+        """
+        Supprime les stocks d'un inventaire hors de ``kept_ids`` (ceux absents d'un import).
+        
+        Returns:
+            int: Nombre de stocks supprimés
+        """
+        try:
+            deleted_count, _ = (
+                Stock.objects.filter(inventory_id=inventory_id)
+                .exclude(id__in=kept_ids)
+                .delete()
+            )
+            return deleted_count
+        except Exception as e:
+            logger.error(f"Erreur lors de la suppression des stocks de l'inventaire {inventory_id}: {str(e)}")
+            raise StockValidationError(f"Erreur lors de la suppression des stocks: {str(e)}")
+    
     def bulk_update(self, stocks: List[Stock], fields: List[str]) -> int:
         """
         Met à jour plusieurs stocks en lot.
@@ -5,8 +5,20 @@ from __future__ import annotations
 
 from typing import Any, List, Optional
 
+from apps.core.datatables.requirements import DataRequirements
 from apps.inventory.models import Assigment, Counting, Setting
 
+# Relations lues par les helpers ci-dessous (déclarées par les serializers de liste)
+INVENTORY_DATA_REQUIREMENTS = DataRequirements(
+    prefetch_related=[
+        'awi_links__account',
+        'awi_links__warehouse',
+        'countings',
+        'job_set__assigment_set__session',
+        'job_set__assigment_set__counting',
+    ],
+)
+
 
 def get_inventory_settings(inventory: Any) -> List[Setting]:
     """
@@ -10,6 +10,7 @@ from .counting_serializer import CountingCreateSerializer, CountingDetailSeriali
 from apps.users.serializers import UserAppSerializer
 from apps.masterdata.serializers.warehouse_serializer import WarehouseSerializer
 from .inventory_prefetch import (
+    INVENTORY_DATA_REQUIREMENTS,
     get_first_inventory_setting,
     get_inventory_assignments,
     get_inventory_countings,
@@ -127,6 +128,8 @@ class InventoryDetailSerializer(serializers.ModelSerializer):
     """
     Sérialiseur pour les détails d'un inventaire.
     """
+    data_requirements = INVENTORY_DATA_REQUIREMENTS
+
     account_name = serializers.SerializerMethodField()
     account_reference = serializers.SerializerMethodField()
     warehouse_name = serializers.SerializerMethodField()
@@ -171,6 +174,8 @@ class InventoryDetailSerializer(serializers.ModelSerializer):
 
 
 class InventorySerializer(serializers.ModelSerializer):
+    data_requirements = INVENTORY_DATA_REQUIREMENTS
+
     account_name = serializers.SerializerMethodField()
     account_reference = serializers.SerializerMethodField()
     warehouse_name = serializers.SerializerMethodField()
@@ -3,6 +3,7 @@ from ..models import Job, JobDetail, Location, Assigment, JobDetailRessource, Co
 from apps.masterdata.serializers.location_serializer import LocationSerializer
 from apps.masterdata.serializers.sous_zone_serializer import SousZoneSerializer
 from apps.masterdata.serializers.zone_serializer import ZoneSerializer
+from apps.core.datatables.requirements import DataRequirements
 
 
 class IntegerListField(serializers.ListField):
@@ -181,6 +182,17 @@ class JobSetReadyRequestSerializer(serializers.Serializer):
     )
 
 
+# Relations lues par JobFullDetailSerializer / JobPendingSerializer
+# (emplacements -> sous-zone -> zone -> entrepôt, affectations, ressources)
+JOB_DETAIL_DATA_REQUIREMENTS = DataRequirements(
+    prefetch_related=[
+        'jobdetail_set__location__sous_zone__zone__warehouse',
+        'assigment_set__counting',
+        'assigment_set__session',
+        'jobdetailressource_set__ressource',
+    ],
+)
+
 class JobAssignmentDetailSerializer(serializers.ModelSerializer):
     id = serializers.IntegerField(read_only=True)
     counting_order = serializers.IntegerField(source='counting.order', read_only=True)
@@ -210,6 +222,8 @@ class JobEmplacementDetailSerializer(serializers.ModelSerializer):
         fields = ['id', 'reference', 'sous_zone', 'zone']
 
 class JobFullDetailSerializer(serializers.ModelSerializer):
+    data_requirements = JOB_DETAIL_DATA_REQUIREMENTS
+
     emplacements = serializers.SerializerMethodField()
     assignments = serializers.SerializerMethodField()
     ressources = serializers.SerializerMethodField()
@@ -336,6 +350,8 @@ class JobFullDetailSerializer(serializers.ModelSerializer):
         return JobRessourceSerializer(ressources, many=True).data
 
 class JobPendingSerializer(serializers.ModelSerializer):
+    data_requirements = JOB_DETAIL_DATA_REQUIREMENTS
+
     emplacements = serializers.SerializerMethodField()
     assignments = serializers.SerializerMethodField()
     ressources = serializers.SerializerMethodField()
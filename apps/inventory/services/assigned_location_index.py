@@ -0,0 +1,72 @@
+"""
+Maintenance de l'index InventoryAssignedLocation (emplacements affectés à un inventaire).
+
+- ``index_job_details`` : JobDetail créés (ajout à l'index) ;
+- ``refresh_job_details`` : JobDetail modifiés ou supprimés (recalcul des
+  emplacements concernés) ;
+- ``rebuild_assigned_locations`` : reconstruction complète d'un inventaire.
+
+Les écritures unitaires sont signalées par ``apps.inventory.signals`` ; les
+chemins ``bulk_create`` appellent ``index_job_details`` explicitement, comme
+``record_bulk_history`` pour l'historique. L'index est mis à jour dans la
+transaction de l'écriture.
+"""
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from ..models import Job, JobDetail
+from ..repositories.assigned_location_repository import AssignedKey, AssignedLocationRepository
+
+repository = AssignedLocationRepository()
+
+
+def _keys(job_details: Iterable[JobDetail], using: str) -> Set[AssignedKey]:
+    """Clés (inventaire, entrepôt, emplacement) des JobDetail, jobs lus en une requête au plus"""
+    job_details = [detail for detail in job_details if detail.location_id is not None]
+    scopes: Dict[int, Tuple[int, int]] = {}
+    uncached: List[int] = []
+    for detail in job_details:
+        if JobDetail.job.is_cached(detail):
+            scopes[detail.job_id] = (detail.job.inventory_id, detail.job.warehouse_id)
+        else:
+            uncached.append(detail.job_id)
+    if uncached:
+        rows = Job._base_manager.using(using).filter(id__in=set(uncached)).values_list(
+            'id', 'inventory_id', 'warehouse_id',
+        )
+        scopes.update((job_id, (inventory_id, warehouse_id)) for job_id, inventory_id, warehouse_id in rows)
+
+    return {
+        (*scopes[detail.job_id], detail.location_id)
+        for detail in job_details
+        if detail.job_id in scopes
+    }
+
+
+def index_job_details(job_details: Iterable[JobDetail], using: Optional[str] = None) -> None:
+    """Ajoute à l'index les emplacements de JobDetail nouvellement créés"""
+    using = using or DEFAULT_DB_ALIAS
+    repository.add(
+        _keys((detail for detail in job_details if not detail.is_deleted), using),
+        using,
+    )
+
+
+def refresh_job_details(job_details: Iterable[JobDetail], using: Optional[str] = None) -> None:
+    """Recalcule l'index des emplacements de JobDetail modifiés ou supprimés"""
+    using = using or DEFAULT_DB_ALIAS
+    repository.sync(_keys(job_details, using), using)
+
+
+def rebuild_assigned_locations(inventory_id: int) -> int:
+    """
+    Reconstruit l'index d'un inventaire depuis ses JobDetail.
+
+    Returns:
+        int: Nombre d'emplacements affectés
+    """
+    with transaction.atomic():
+        return repository.rebuild(inventory_id)
@@ -0,0 +1,421 @@
+"""
+Lancement par lot d'un nouveau comptage (3e et suivants) pour plusieurs jobs.
+
+``launch_counting`` traite un couple (job, emplacement) : recherche du job, du
+plus haut ordre avec JobDetail, des prérequis, puis insertions unitaires. En
+boucle sur des centaines de jobs, cela représente des dizaines de milliers de
+requêtes. Ici :
+
+- les emplacements avec écart de tous les jobs sont trouvés en une requête ;
+- jobs, emplacements, comptages, JobDetails et affectations sont préchargés
+  en quelques requêtes groupées ;
+- ordre cible et prérequis sont calculés en mémoire, avec les mêmes règles et
+  les mêmes messages que ``launch_counting`` ;
+- les JobDetails (prérequis recréés en TERMINE et comptage cible) et les
+  affectations sont écrits par ``bulk_create`` / ``bulk_update``.
+
+Un emplacement en erreur n'est pas écrit ; le résultat par emplacement a le
+même format que la boucle sur ``launch_counting``.
+"""
+import logging
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.db.models import F
+from django.utils import timezone
+
+from apps.core.history import HISTORY_CHANGED, HISTORY_CREATED, record_bulk_history
+from apps.inventory.realtime import notify_dashboard_changes
+from apps.masterdata.models import Location
+from apps.mobile.realtime import publish_pda_changes
+from apps.users.models import UserApp
+
+from ..exceptions.counting_exceptions import (
+    CountingCreationError,
+    CountingNotFoundError,
+    CountingValidationError,
+)
+from ..models import Assigment, Counting, CountingDetail, Job, JobDetail
+from ..repositories.counting_repository import CountingRepository
+from .assigned_location_index import index_job_details
+from ..utils.references import generate_unique_references
+
+logger = logging.getLogger(__name__)
+
+# Champs mis à jour sur une affectation existante
+ASSIGNMENT_UPDATE_FIELDS = [
+    'session', 'status', 'date_start', 'affecte_date', 'pret_date', 'transfert_date', 'updated_at',
+]
+
+BULK_BATCH_SIZE = 1000
+
+
+class CountingBatchLaunchEngine:
+    """
+    Calcule puis écrit en masse les lancements de comptage de plusieurs jobs.
+
+    Args:
+        session: Équipe mobile affectée aux comptages lancés.
+        counting_repository: Repository utilisé pour dupliquer le comptage d'ordre 3.
+    """
+
+    def __init__(self, session: UserApp, counting_repository: Optional[CountingRepository] = None):
+        self.session = session
+        self.counting_repository = counting_repository or CountingRepository()
+        self.now = timezone.now()
+
+    def run(self, job_ids: List[int]) -> Dict[str, Any]:
+        """
+        Lance le comptage suivant sur tous les emplacements avec écart des jobs.
+
+        Returns:
+            Dict: même structure que ``CountingLaunchService.launch_counting_for_jobs``.
+        """
+        results = {
+            'processed_jobs': [],
+            'total_locations_found': 0,
+            'total_locations_processed': 0,
+            'total_locations_failed': 0,
+            'errors': []
+        }
+
+        job_ids = list(dict.fromkeys(job_ids))
+        jobs = Job.objects.in_bulk(job_ids)
+        locations_by_job = self._get_locations_with_discrepancy(list(jobs.values()))
+        self._preload(jobs, locations_by_job)
+
+        # Planification en mémoire, emplacement par emplacement
+        planned: Dict[int, List[Dict[str, Any]]] = {}
+        for job_id in job_ids:
+            job = jobs.get(job_id)
+            if job is None:
+                continue
+            planned[job_id] = []
+            for location_id in locations_by_job.get(job_id, []):
+                try:
+                    planned[job_id].append(self._plan_location(job, location_id))
+                except (CountingValidationError, CountingNotFoundError) as exc:
+                    planned[job_id].append({'location_id': location_id, 'error': exc})
+                except Exception as exc:
+                    error = CountingCreationError(f"Erreur lors du lancement du comptage: {exc}")
+                    planned[job_id].append({'location_id': location_id, 'error': error})
+
+        self._write()
+
+        for job_id in job_ids:
+            if job_id not in planned:
+                message = f"Job introuvable pour l'identifiant {job_id}."
+                results['errors'].append({'job_id': job_id, 'error': message})
+                results['processed_jobs'].append({
+                    'job_id': job_id,
+                    'locations_processed': 0,
+                    'total_locations': 0,
+                    'error': message
+                })
+                continue
+            plans = planned[job_id]
+            if not plans:
+                results['processed_jobs'].append({
+                    'job_id': job_id,
+                    'locations_processed': 0,
+                    'total_locations': 0,
+                    'message': 'Aucun emplacement avec écart trouvé pour ce job'
+                })
+                continue
+
+            results['total_locations_found'] += len(plans)
+            job_results = []
+            for plan in plans:
+                location_id = plan['location_id']
+                if 'error' in plan:
+                    error_message, error_type = str(plan['error']), type(plan['error']).__name__
+                    job_results.append({
+                        'location_id': location_id,
+                        'success': False,
+                        'error': error_message,
+                        'error_type': error_type
+                    })
+                    results['total_locations_failed'] += 1
+                    results['errors'].append({
+                        'job_id': job_id,
+                        'location_id': location_id,
+                        'error': error_message,
+                        'error_type': error_type
+                    })
+                    continue
+                job_results.append({
+                    'location_id': location_id,
+                    'success': True,
+                    'result': self._location_result(job_id, plan)
+                })
+                results['total_locations_processed'] += 1
+
+            results['processed_jobs'].append({
+                'job_id': job_id,
+                'locations_processed': len([r for r in job_results if r['success']]),
+                'total_locations': len(plans),
+                'details': job_results
+            })
+
+        logger.info(
+            "Lancement de comptage par lot: %s job(s), %s emplacement(s) lancé(s), %s en erreur",
+            len(job_ids),
+            results['total_locations_processed'],
+            results['total_locations_failed'],
+        )
+        return results
+
+    def _get_locations_with_discrepancy(self, jobs: List[Job]) -> Dict[int, List[int]]:
+        """
+        Équivalent groupé de ``get_locations_with_discrepancy_for_job`` : emplacements
+        dont un CountingDetail du job est lié à un écart de l'inventaire sans résultat final.
+
+        La vérification « écart non résolu lié au job et à l'emplacement » de
+        ``launch_counting`` est impliquée par ce filtre (même séquence).
+        """
+        locations_by_job: Dict[int, List[int]] = defaultdict(list)
+        pairs = CountingDetail.objects.filter(
+            job_id__in=[job.id for job in jobs],
+            counting__inventory=F('job__inventory'),
+            counting_sequences__ecart_comptage__inventory=F('job__inventory'),
+            counting_sequences__ecart_comptage__final_result__isnull=True,
+        ).values_list('job_id', 'location_id').distinct().order_by('job_id', 'location_id')
+        for job_id, location_id in pairs:
+            locations_by_job[job_id].append(location_id)
+        return locations_by_job
+
+    def _preload(self, jobs: Dict[int, Job], locations_by_job: Dict[int, List[int]]) -> None:
+        """Charge emplacements, comptages, JobDetails et affectations des jobs en requêtes groupées"""
+        location_ids = {location_id for ids in locations_by_job.values() for location_id in ids}
+        self.locations = Location.objects.in_bulk(location_ids)
+
+        # (inventaire, ordre) -> comptage
+        self.countings: Dict[Tuple[int, int], Counting] = {}
+        for counting in Counting.objects.filter(
+            inventory_id__in={job.inventory_id for job in jobs.values()}
+        ).order_by('id'):
+            self.countings.setdefault((counting.inventory_id, counting.order), counting)
+
+        # (job, emplacement) -> JobDetails existants
+        self.job_details: Dict[Tuple[int, int], List[JobDetail]] = defaultdict(list)
+        for job_detail in JobDetail.objects.filter(
+            job_id__in=list(locations_by_job),
+            location_id__in=location_ids,
+        ).annotate(counting_order=F('counting__order')).order_by('id'):
+            self.job_details[(job_detail.job_id, job_detail.location_id)].append(job_detail)
+
+        # (job, comptage) -> affectation ; affectations par job pour la recherche par ordre
+        self.assignments: Dict[Tuple[int, int], Assigment] = {}
+        self.assignments_by_job: Dict[int, List[Assigment]] = defaultdict(list)
+        for assignment in Assigment.objects.filter(
+            job_id__in=list(locations_by_job),
+        ).annotate(counting_order=F('counting__order')).order_by('id'):
+            self.assignments.setdefault((assignment.job_id, assignment.counting_id), assignment)
+            self.assignments_by_job[assignment.job_id].append(assignment)
+
+        self.job_details_to_create: List[JobDetail] = []
+        self.assignments_to_create: List[Assigment] = []
+        self.assignments_to_update: Dict[int, Assigment] = {}
+
+    def _plan_location(self, job: Job, location_id: int) -> Dict[str, Any]:
+        """Applique les règles de ``launch_counting`` pour un emplacement, sans écrire (hors duplication)"""
+        location = self.locations.get(location_id)
+        if not location:
+            raise CountingValidationError(f"Emplacement introuvable pour l'identifiant {location_id}.")
+
+        details = self.job_details.get((job.id, location_id))
+        if not details:
+            raise CountingValidationError(
+                "L'emplacement indiqué n'est pas affecté au job sélectionné."
+            )
+
+        counting_order_three = self.countings.get((job.inventory_id, 3))
+        if not counting_order_three:
+            raise CountingNotFoundError(
+                f"Aucun comptage d'ordre 3 n'est défini pour l'inventaire {job.inventory_id}."
+            )
+
+        highest_order = max(job_detail.counting_order for job_detail in details)
+        target_order = 3 if highest_order < 3 else highest_order + 1
+        prerequisites = self._check_previous_countings(job, location, details, target_order)
+
+        new_counting_created = False
+        target_counting = counting_order_three if target_order == 3 else self.countings.get(
+            (job.inventory_id, target_order)
+        )
+        if target_counting is None:
+            # Comptage créé par duplication du comptage 3, réutilisé par les emplacements suivants
+            target_counting = self.counting_repository.duplicate_counting(counting_order_three.id)
+            self.countings[(job.inventory_id, target_counting.order)] = target_counting
+            new_counting_created = True
+
+        self.job_details_to_create.extend(prerequisites)
+        job_detail = next((jd for jd in details if jd.counting_id == target_counting.id), None)
+        job_detail_created = job_detail is None
+        if job_detail_created:
+            job_detail = JobDetail(
+                location=location,
+                job=job,
+                counting=target_counting,
+                status='EN ATTENTE',
+            )
+            self.job_details_to_create.append(job_detail)
+
+        key = (job.id, target_counting.id)
+        assignment = self.assignments.get(key)
+        assignment_created = assignment is None
+        if assignment_created:
+            assignment = Assigment(job=job, counting=target_counting)
+            self.assignments[key] = assignment
+            self.assignments_to_create.append(assignment)
+        elif assignment.pk:
+            self.assignments_to_update[assignment.pk] = assignment
+        assignment.session = self.session
+        assignment.status = 'TRANSFERT'
+        assignment.date_start = self.now
+        assignment.affecte_date = self.now
+        assignment.pret_date = self.now
+        assignment.transfert_date = self.now
+
+        return {
+            'location_id': location_id,
+            'counting': target_counting,
+            'new_counting_created': new_counting_created,
+            'job_detail': job_detail,
+            'job_detail_created': job_detail_created,
+            'assignment': assignment,
+            'assignment_created': assignment_created,
+        }
+
+    def _check_previous_countings(
+        self,
+        job: Job,
+        location: Location,
+        details: List[JobDetail],
+        target_order: int,
+    ) -> List[JobDetail]:
+        """
+        Équivalent en mémoire de ``_ensure_previous_countings_completed``.
+
+        Returns:
+            JobDetails TERMINE à recréer (affectation du comptage précédent terminée).
+
+        Raises:
+            CountingValidationError: Comptage précédent absent ou non terminé pour l'emplacement.
+        """
+        required_orders = [1, 2] if target_order == 3 else [target_order - 1]
+        to_create = []
+        for order in required_orders:
+            counting = self.countings.get((job.inventory_id, order))
+            if not counting:
+                if target_order == 3:
+                    raise CountingValidationError(
+                        f"Impossible de lancer le 3ème comptage : le comptage d'ordre {order} n'existe pas pour l'inventaire."
+                    )
+                raise CountingValidationError(
+                    f"Impossible de lancer le comptage d'ordre {target_order} : le comptage d'ordre {order} n'existe pas."
+                )
+
+            job_detail = next((jd for jd in details if jd.counting_id == counting.id), None)
+            if job_detail is None:
+                assignment = self._get_assignment_by_order(job.id, order)
+                if assignment and assignment.status == 'TERMINE':
+                    job_detail = JobDetail(
+                        location=location,
+                        job=job,
+                        counting=counting,
+                        status='TERMINE',
+                        termine_date=self.now,
+                    )
+                    to_create.append(job_detail)
+                else:
+                    if target_order == 3:
+                        raise CountingValidationError(
+                            f"Impossible de lancer le 3ème comptage pour cet emplacement : "
+                            f"l'emplacement n'a pas de JobDetail pour le comptage d'ordre {order}."
+                        )
+                    raise CountingValidationError(
+                        f"Impossible de lancer le comptage d'ordre {target_order} pour cet emplacement : "
+                        f"l'emplacement n'a pas de JobDetail pour le comptage d'ordre {order}."
+                    )
+
+            if job_detail.status != 'TERMINE':
+                if target_order == 3:
+                    raise CountingValidationError(
+                        f"Impossible de lancer le 3ème comptage pour cet emplacement : "
+                        f"le comptage d'ordre {order} n'est pas terminé pour cet emplacement (statut actuel: {job_detail.status})."
+                    )
+                raise CountingValidationError(
+                    f"Impossible de lancer le comptage d'ordre {target_order} pour cet emplacement : "
+                    f"le comptage d'ordre {order} n'est pas terminé pour cet emplacement (statut actuel: {job_detail.status})."
+                )
+        return to_create
+
+    def _get_assignment_by_order(self, job_id: int, order: int) -> Optional[Assigment]:
+        """Affectation la plus récente du job pour cet ordre de comptage (préchargée)"""
+        candidates = [
+            assignment for assignment in self.assignments_by_job.get(job_id, [])
+            if assignment.counting_order == order
+        ]
+        return max(candidates, key=lambda assignment: assignment.created_at, default=None)
+
+    def _write(self) -> None:
+        """Écrit en masse les JobDetails et affectations planifiés"""
+        for job_detail, reference in zip(
+            self.job_details_to_create,
+            generate_unique_references(JobDetail, len(self.job_details_to_create)),
+        ):
+            job_detail.reference = reference
+        JobDetail.objects.bulk_create(self.job_details_to_create, batch_size=BULK_BATCH_SIZE)
+        record_bulk_history(self.job_details_to_create, JobDetail, HISTORY_CREATED)
+        index_job_details(self.job_details_to_create)
+
+        for assignment, reference in zip(
+            self.assignments_to_create,
+            generate_unique_references(Assigment, len(self.assignments_to_create)),
+        ):
+            assignment.reference = reference
+        Assigment.objects.bulk_create(self.assignments_to_create, batch_size=BULK_BATCH_SIZE)
+        record_bulk_history(self.assignments_to_create, Assigment, HISTORY_CREATED)
+
+        if self.assignments_to_update:
+            assignments = list(self.assignments_to_update.values())
+            for assignment in assignments:
+                assignment.updated_at = self.now
+            Assigment.objects.bulk_update(assignments, ASSIGNMENT_UPDATE_FIELDS, batch_size=BULK_BATCH_SIZE)
+            record_bulk_history(assignments, Assigment, HISTORY_CHANGED)
+
+        publish_pda_changes(
+            assignment_ids=[assignment.id for assignment in self.assignments_to_create]
+            + [assignment.id for assignment in self.assignments_to_update.values()],
+            job_detail_ids=[job_detail.id for job_detail in self.job_details_to_create],
+        )
+        notify_dashboard_changes(
+            job_ids={assignment.job_id for assignment in self.assignments_to_create}
+            | {assignment.job_id for assignment in self.assignments_to_update.values()},
+        )
+
+    def _location_result(self, job_id: int, plan: Dict[str, Any]) -> Dict[str, Any]:
+        """Résultat d'un emplacement au format de ``launch_counting``"""
+        counting, assignment, job_detail = plan['counting'], plan['assignment'], plan['job_detail']
+        return {
+            'job_id': job_id,
+            'location_id': plan['location_id'],
+            'counting': {
+                'id': counting.id,
+                'order': counting.order,
+                'reference': counting.reference,
+                'new_counting_created': plan['new_counting_created'],
+            },
+            'assignment': {
+                'id': assignment.id,
+                'status': assignment.status,
+                'session_id': self.session.id,
+                'created': plan['assignment_created'],
+            },
+            'job_detail': {
+                'id': job_detail.id,
+                'created': plan['job_detail_created'],
+            },
+            'timestamp': self.now,
+        }
@@ -15,6 +15,7 @@ from ..exceptions.counting_exceptions import (
     CountingNotFoundError,
     CountingCreationError,
 )
+from .counting_batch_launch_engine import CountingBatchLaunchEngine
 from apps.users.models import UserApp
 
 
@@ -474,6 +475,9 @@ class CountingLaunchService:
         """
         Lance un comptage pour tous les emplacements avec écart des jobs fournis.
         
+        Traitement par lot (voir CountingBatchLaunchEngine) : quelques requêtes
+        groupées au lieu d'un launch_counting par emplacement.
+        
         Args:
             job_ids: Liste des identifiants des jobs
             session_id: Identifiant de la session (équipe mobile) à affecter
@@ -496,105 +500,6 @@ class CountingLaunchService:
         if not session:
             raise CountingValidationError("La session fournie n'existe pas ou n'est pas de type 'Mobile'.")
         
-        results = {
-            'processed_jobs': [],
-            'total_locations_found': 0,
-            'total_locations_processed': 0,
-            'total_locations_failed': 0,
-            'errors': []
-        }
-        
-        # Pour chaque job, trouver les emplacements avec écart et lancer le comptage
-        for job_id in job_ids:
-            try:
-                # Récupérer les emplacements avec écart pour ce job
-                location_ids = self.get_locations_with_discrepancy_for_job(job_id)
-                
-                if not location_ids:
-                    results['processed_jobs'].append({
-                        'job_id': job_id,
-                        'locations_processed': 0,
-                        'total_locations': 0,
-                        'message': 'Aucun emplacement avec écart trouvé pour ce job'
-                    })
-                    continue
-                
-                results['total_locations_found'] += len(location_ids)
-                
-                # DEBUG: Logger les emplacements qui seront traités
-                import logging
-                logger_debug = logging.getLogger(__name__)
-                logger_debug.info(f"[DEBUG] Job ID {job_id}: Traitement de {len(location_ids)} emplacement(s) avec écart")
-                logger_debug.info(f"[DEBUG] Job ID {job_id}: Location IDs à traiter: {location_ids}")
-                
-                # Pour chaque emplacement avec écart, lancer le comptage
-                job_results = []
-                for location_id in location_ids:
-                    try:
-                        logger_debug.info(f"[DEBUG] Traitement location ID {location_id} pour job ID {job_id}")
-                        result = self.launch_counting(job_id, location_id, session_id)
-                        logger_debug.info(f"[DEBUG] ✅ Location ID {location_id} traité avec succès")
-                        job_results.append({
-                            'location_id': location_id,
-                            'success': True,
-                            'result': result
-                        })
-                        results['total_locations_processed'] += 1
-                    except (CountingValidationError, CountingNotFoundError, CountingCreationError) as e:
-                        # Capturer les exceptions métier avec leur message complet
-                        error_message = str(e)
-                        logger_debug.error(f"[DEBUG] ❌ Erreur métier pour location ID {location_id}: {error_message}")
-                        job_results.append({
-                            'location_id': location_id,
-                            'success': False,
-                            'error': error_message,
-                            'error_type': type(e).__name__
-                        })
-                        results['total_locations_failed'] += 1
-                        results['errors'].append({
-                            'job_id': job_id,
-                            'location_id': location_id,
-                            'error': error_message,
-                            'error_type': type(e).__name__
-                        })
-                    except Exception as e:
-                        # Capturer les autres exceptions avec traceback complet
-                        import traceback
-                        error_message = f"{str(e)}\n{traceback.format_exc()}"
-                        logger_debug.error(f"[DEBUG] ❌ Erreur inattendue pour location ID {location_id}: {error_message}")
-                        job_results.append({
-                            'location_id': location_id,
-                            'success': False,
-                            'error': str(e),
-                            'error_type': type(e).__name__,
-                            'traceback': traceback.format_exc()
-                        })
-                        results['total_locations_failed'] += 1
-                        results['errors'].append({
-                            'job_id': job_id,
-                            'location_id': location_id,
-                            'error': str(e),
-                            'error_type': type(e).__name__
-                        })
-                
-                results['processed_jobs'].append({
-                    'job_id': job_id,
-                    'locations_processed': len([r for r in job_results if r['success']]),
-                    'total_locations': len(location_ids),
-                    'details': job_results
-                })
-                
-            except Exception as e:
-                results['errors'].append({
-                    'job_id': job_id,
-                    'error': str(e)
-                })
-                results['processed_jobs'].append({
-                    'job_id': job_id,
-                    'locations_processed': 0,
-                    'total_locations': 0,
-                    'error': str(e)
-                })
-        
-        return results
-
+        # Calcul groupé des ordres cibles et prérequis, puis écritures en masse
+        # (les règles et le résultat par emplacement sont ceux de launch_counting)
+        return CountingBatchLaunchEngine(session, self.counting_repository).run(job_ids)
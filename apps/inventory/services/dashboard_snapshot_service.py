@@ -0,0 +1,119 @@
+"""
+Instantané du tableau de bord d'un magasin (monitoring + KPI) et calcul des
+deltas pour le flux SSE ``live/``.
+
+L'instantané est un dictionnaire à plat ``section -> données`` :
+
+- ``monitoring.zones`` / ``monitoring.global`` : réponses de MonitoringService ;
+- ``kpis.<slug>`` : partie ``data`` de chaque KPI magasin (le ``meta`` porte
+  un horodatage et n'entre pas dans la comparaison).
+
+Un delta ne contient que les sections dont la valeur a changé.
+"""
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List, Optional
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .kpis_service import KpisService
+from .monitoring_service import MonitoringService
+
+# Méthodes KpisService calculées pour un magasin (celles des vues kpis/ magasin)
+WAREHOUSE_KPI_METHODS = (
+    'compute_nombre_jobs_total',
+    'compute_nombre_jobs_affectes',
+    'compute_nombre_emplacements_couverts',
+    'compute_taux_jobs_termines_1er_comptage',
+    'compute_taux_jobs_termines_2e_comptage',
+    'compute_repartition_assignments_1er_comptage',
+    'compute_repartition_assignments_2e_comptage',
+    'compute_repartition_assignments_3e_comptage',
+    'compute_repartition_assignments_nieme_comptage',
+    'compute_nombre_ecarts',
+    'compute_nombre_jobs_avec_ecart',
+    'compute_nombre_emplacements_avec_ecart',
+    'compute_nombre_ecarts_ouverts',
+    'compute_nombre_equipes',
+    'compute_taux_termine_1er_comptage_par_equipe',
+    'compute_taux_termine_2e_comptage_par_equipe',
+    'compute_repartition_1er_comptage_par_equipe',
+    'compute_repartition_2e_comptage_par_equipe',
+    'compute_equipes_multi_ecarts',
+    'compute_jobs_avec_ecart_par_equipe',
+)
+
+SNAPSHOT_CACHE_TIMEOUT = 60
+
+
+def _normalize(value: Any) -> Any:
+    """Forme JSON (Decimal, dates...) : comparable et directement sérialisable"""
+    return json.loads(json.dumps(value, cls=DjangoJSONEncoder))
+
+
+class DashboardSnapshotService:
+    """Calcule l'instantané monitoring + KPI d'un couple (inventaire, magasin)."""
+
+    def __init__(
+        self,
+        monitoring_service: Optional[MonitoringService] = None,
+        kpis_service: Optional[KpisService] = None,
+    ) -> None:
+        self.monitoring_service = monitoring_service or MonitoringService()
+        self.kpis_service = kpis_service or KpisService()
+
+    def build(self, inventory_id: int, warehouse_id: int) -> Dict[str, Any]:
+        """
+        Args:
+            inventory_id: ID de l'inventaire
+            warehouse_id: ID de l'entrepôt
+
+        Returns:
+            Dict section -> données (forme JSON)
+
+        Raises:
+            JobCreationError: inventaire ou entrepôt introuvable
+        """
+        snapshot: Dict[str, Any] = {
+            'monitoring.zones': self.monitoring_service.get_zone_monitoring_by_inventory_and_warehouse(
+                inventory_id=inventory_id, warehouse_id=warehouse_id
+            ),
+            'monitoring.global': self.monitoring_service.get_global_monitoring_by_inventory_and_warehouse(
+                inventory_id=inventory_id, warehouse_id=warehouse_id
+            ),
+        }
+        for method_name in WAREHOUSE_KPI_METHODS:
+            payload = getattr(self.kpis_service, method_name)(inventory_id, warehouse_id)
+            snapshot[f"kpis.{payload['meta']['kpi']}"] = payload['data']
+        return _normalize(snapshot)
+
+    def get_cached(self, inventory_id: int, warehouse_id: int, token: str) -> Dict[str, Any]:
+        """
+        Instantané partagé par les flux d'un même processus : ``token`` identifie
+        le dernier changement vu, les flux qui l'ont reçu ne recalculent qu'une fois.
+        """
+        key = f'dashboard-snapshot:{inventory_id}:{warehouse_id}:{token}'
+        snapshot = cache.get(key)
+        if snapshot is None:
+            snapshot = self.build(inventory_id, warehouse_id)
+            cache.set(key, snapshot, SNAPSHOT_CACHE_TIMEOUT)
+        return snapshot
+
+
+def diff_snapshots(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Sections modifiées entre deux instantanés.
+
+    Returns:
+        ``{'changed': {section: valeur}, 'removed': [section, ...]}`` ;
+        deux listes vides si rien n'a changé
+    """
+    changed = {
+        section: value
+        for section, value in current.items()
+        if section not in previous or previous[section] != value
+    }
+    removed: List[str] = sorted(section for section in previous if section not in current)
+    return {'changed': changed, 'removed': removed}
@@ -16,6 +16,8 @@ from ..models import (
     JobDetail,
 )
 from ..repositories.ecart_comptage_repository import EcartComptageRepository
+from .inventory_result_materializer import mark_inventory_results_dirty
+from ..realtime import notify_dashboard_changes
 from ..exceptions import InventoryValidationError
 from ..utils.ecart_consensus import calculate_ecart_consensus_result
 
@@ -148,11 +150,16 @@ class EcartComptageService:
         self.repository.get_warehouse_by_id(warehouse_id)
         min_sequences = self._min_sequences_for_inventory(inventory)
 
-        return self.repository.bulk_resolve_ecarts_by_inventory_and_warehouse(
+        resolved_count = self.repository.bulk_resolve_ecarts_by_inventory_and_warehouse(
             inventory_id=inventory_id,
             warehouse_id=warehouse_id,
             min_sequences=min_sequences,
         )
+        # QuerySet.update : pas de signal, résultats de l'entrepôt reconstruits au commit
+        if resolved_count:
+            mark_inventory_results_dirty(warehouses=[(inventory_id, warehouse_id)])
+            notify_dashboard_changes(warehouses=[(inventory_id, warehouse_id)])
+        return resolved_count
 
     @transaction.atomic
     def close_jobs_with_all_locations_resolved_by_inventory(
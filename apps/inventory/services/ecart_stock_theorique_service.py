@@ -52,14 +52,12 @@ class EcartStockTheoriqueService:
         only_nonzero: bool = False,
     ) -> Dict[str, Any]:
         """
-        Calcule les écarts puis upsert en base.
+        Calcule les écarts puis upsert en base (INSERT ... ON CONFLICT).
 
-        - Lignes validées : quantités/ecart/designation non écrasés pour
-          resultat_final / valide (les qté peuvent être rafraîchies sauf
-          si valide — plan : ne touche pas resultat_final/valide si valide).
+        - Lignes validées : non modifiées.
         - Création : applique default_resultat_final.
-        - Non validée : met à jour qté ; recalcule resultat_final si null
-          ou si égalité (pratique).
+        - Non validée : met à jour qté ; resultat_final = pratique si
+          égalité, inchangé sinon.
         """
         try:
             inventory = Inventory.objects.get(id=inventory_id)
@@ -76,82 +74,44 @@ class EcartStockTheoriqueService:
             ) from exc
 
         # Inclure aussi écarts 0 pour préremplir resultat_final = pratique
-        compute = self.stock_gap_service.compute_stock_gaps(
+        gaps, is_variant = self.stock_gap_service.compute_stock_gap_frame(
             inventory_id=inventory_id,
             warehouse_id=warehouse_id,
             only_nonzero=only_nonzero,
         )
 
-        existing = self.repository.bulk_get_existing_keys(inventory_id, warehouse_id)
-        created = 0
-        updated = 0
-        skipped_validated = 0
-
-        for line in compute["lignes"]:
-            cle = line["cle"]
-            mode = line["mode_groupement"]
+        rows = []
+        for line in gaps.iter_lines():
             qte_theo = int(line["qte_theorique"])
             qte_prat = int(line["qte_inventoriee"])
-            ecart = int(line["ecart"])
-            designation = line.get("designation") or ""
-            product_id = line.get("product_id")
-
-            key = (cle, mode)
-            row = existing.get(key)
-
-            if row is None:
-                self.repository.create(
-                    inventory=inventory,
-                    warehouse=warehouse,
-                    article_cle=cle,
-                    mode_groupement=mode,
-                    designation=designation,
-                    product_id=product_id,
-                    qte_theorique=qte_theo,
-                    qte_pratique=qte_prat,
-                    ecart=ecart,
-                    resultat_final=self.default_resultat_final(qte_theo, qte_prat),
-                    valide=False,
-                )
-                created += 1
-                continue
-
-            if row.valide:
-                # Ne pas toucher resultat_final / valide
-                skipped_validated += 1
-                continue
-
-            qty_changed = (
-                row.qte_theorique != qte_theo or row.qte_pratique != qte_prat
-            )
-            row.designation = designation
-            if product_id is not None:
-                row.product_id = product_id
-            row.qte_theorique = qte_theo
-            row.qte_pratique = qte_prat
-            row.ecart = ecart
-
-            # Recalcule resultat_final si null, ou si égalité (forcer pratique)
-            if qte_theo == qte_prat:
-                row.resultat_final = qte_prat
-            elif row.resultat_final is None or (
-                qty_changed and row.resultat_final is None
-            ):
-                row.resultat_final = self.default_resultat_final(qte_theo, qte_prat)
-
-            self.repository.save(row)
-            updated += 1
+            rows.append({
+                "inventory": inventory,
+                "warehouse": warehouse,
+                "article_cle": line["cle"],
+                "mode_groupement": line["mode_groupement"],
+                "designation": line.get("designation") or "",
+                "product_id": line.get("product_id"),
+                "qte_theorique": qte_theo,
+                "qte_pratique": qte_prat,
+                "ecart": int(line["ecart"]),
+                "resultat_final": self.default_resultat_final(qte_theo, qte_prat),
+                "valide": False,
+            })
+
+        # Un INSERT ... ON CONFLICT par lot ; les lignes validées ne sont pas
+        # touchées (règles détaillées dans le repository)
+        result = self.repository.bulk_upsert_compute_lines(rows)
 
         return {
             "inventory_id": inventory_id,
             "warehouse_id": warehouse_id,
-            "mode_groupement": compute["mode_groupement"],
-            "is_variant": compute["is_variant"],
-            "created": created,
-            "updated": updated,
-            "skipped_validated": skipped_validated,
-            "total_compute_lines": len(compute["lignes"]),
-            "totaux": compute["totaux"],
+            "mode_groupement": gaps.grouping_mode,
+            "is_variant": is_variant,
+            "created": result.created,
+            "updated": result.updated,
+            "skipped_validated": result.skipped,
+            "total_compute_lines": len(gaps),
+            "totaux": gaps.totals(),
         }
 
     def list_for_warehouse(
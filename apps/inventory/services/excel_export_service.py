@@ -1,13 +1,32 @@
 """
 Service pour la génération de fichiers Excel consolidés par article
 """
-from io import BytesIO
-from typing import Optional, Tuple
+import tempfile
+from typing import IO, Any, Dict, Iterable, Optional, Tuple
 
+from apps.core.db_routing import reporting_service
 from apps.inventory.constants import CountMode, InventoryType
+from ..models import Inventory, InventoryArchive
 from ..repositories.excel_export_repository import ExcelExportRepository
 
+CONSOLIDATED_SHEET_NAME = 'Articles Consolidés'
 
+# (en-tête, largeur de colonne)
+CONSOLIDATED_COLUMNS = (
+    ('Référence', 20),
+    ('Code Produit', 18),
+    ('Désignation', 50),
+    ('Code-barres', 18),
+    ('Unité', 10),
+    ('Famille', 25),
+    ('Quantité Consolidée', 21),
+)
+
+# Au-delà, le fichier généré est écrit sur disque et non gardé en mémoire
+CONSOLIDATED_SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+
+@reporting_service
 class ExcelExportService:
     """Service pour la génération d'Excel consolidé par article"""
     
@@ -47,32 +66,21 @@ class ExcelExportService:
 
         return True, None
     
-    def generate_consolidated_excel(
-        self,
-        inventory_id: int,
-        warehouse_id: int,
-    ) -> BytesIO:
+    def validate_consolidated_export(self, inventory_id: int, warehouse_id: int) -> Inventory:
         """
-        Génère un fichier Excel consolidé par article.
-        
-        Le fichier contient :
-        - Les informations de l'article (référence, code, description, etc.)
-        - La quantité consolidée (somme de toutes les quantités)
-        
-        Args:
-            inventory_id: ID de l'inventaire
-            warehouse_id: ID du magasin
-            
-        Returns:
-            BytesIO: Le contenu du fichier Excel en mémoire
-            
+        Vérifie qu'un export consolidé est possible pour l'inventaire / magasin.
+
         Raises:
-            ValueError: Si l'inventaire n'existe pas, si les comptages d'ordre 2 et 3 
-                       n'existent pas ou n'ont pas le mode "par article", ou s'il n'y a pas de données
-            ImportError: Si pandas ou openpyxl ne sont pas installés
+            ValueError: Si l'inventaire ou le magasin n'existe pas, si les comptages
+                       d'ordre 2 et 3 n'existent pas ou n'ont pas le mode "par article",
+                       ou si des écarts du magasin ne sont pas résolus
         """
         # Vérifier que l'inventaire existe
         inventory = self.repository.get_inventory_by_id(inventory_id)
+        if inventory and InventoryArchive.objects.filter(inventory_id=inventory_id).exists():
+            raise ValueError(
+                "Inventaire archivé : export disponible via .../archive/articles-consolides/export/."
+            )
         if not inventory:
             raise ValueError(f"Inventaire avec l'ID {inventory_id} non trouvé")
 
@@ -100,105 +108,129 @@ class ExcelExportService:
                 f"résolus pour ce magasin. Écarts résolus : "
                 f"{resolved_ecarts}/{total_ecarts}"
             )
+        return inventory
 
-        # Limiter strictement la consolidation au magasin demandé.
-        consolidated_data = (
-            self.repository.get_consolidated_data_by_inventory_and_warehouse(
-                inventory_id,
-                warehouse_id,
-            )
-        )
-        
-        if not consolidated_data:
-            raise ValueError(
-                f"Aucune donnée trouvée pour l'inventaire {inventory_id} "
-                f"et le magasin {warehouse_id}"
-            )
-        
-        # Vérifier que pandas et openpyxl sont disponibles
-        try:
-            import pandas as pd
-        except ImportError:
-            raise ImportError(
-                "pandas est requis pour l'export Excel. "
-                "Installez-le avec: pip install pandas"
-            )
-        
+    def write_consolidated_excel(
+        self,
+        inventory_id: int,
+        warehouse_id: int,
+        target: IO[bytes],
+        rows: Optional[Iterable[Dict[str, Any]]] = None,
+    ) -> int:
+        """
+        Écrit le classeur consolidé dans ``target``, ligne par ligne.
+
+        ``rows`` : lignes à écrire (défaut : ``iter_consolidated_rows`` du
+        repository ; l'archive d'inventaire fournit les siennes).
+
+        Les lignes sont lues par curseur serveur et écrites par openpyxl en
+        mode write-only : la mémoire reste constante quelle que soit la taille
+        du magasin. Les largeurs de colonnes sont fixes (le calcul d'après le
+        contenu imposerait de garder toutes les lignes).
+
+        Returns:
+            int: Nombre d'articles écrits
+
+        Raises:
+            ValueError: S'il n'y a pas de données
+            ImportError: Si openpyxl n'est pas installé
+        """
         try:
-            import openpyxl
+            from openpyxl import Workbook
+            from openpyxl.cell import WriteOnlyCell
+            from openpyxl.styles import Alignment, Font, PatternFill
+            from openpyxl.utils import get_column_letter
         except ImportError:
             raise ImportError(
                 "openpyxl est requis pour l'export Excel. "
                 "Installez-le avec: pip install openpyxl"
             )
-        
-        # Construire les données pour le DataFrame
-        rows = []
-        
-        for product_data in consolidated_data:
-            row = {
-                'Référence': product_data['product_reference'],
-                'Code Produit': product_data['product_code'],
-                'Désignation': product_data['product_description'],
-                'Code-barres': product_data['product_barcode'],
-                'Unité': product_data['product_unit'],
-                'Famille': product_data['product_family'],
-                'Quantité Consolidée': product_data['total_quantity'],
-            }
-            
-            rows.append(row)
-        
-        # Créer le DataFrame
-        df = pd.DataFrame(rows)
-        
-        # Générer le fichier Excel
-        excel_buffer = BytesIO()
-        
+
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet(CONSOLIDATED_SHEET_NAME)
+        # Figer la première ligne (en-têtes)
+        worksheet.freeze_panes = 'A2'
+        for idx, (_, width) in enumerate(CONSOLIDATED_COLUMNS, start=1):
+            worksheet.column_dimensions[get_column_letter(idx)].width = width
+
+        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+        header_font = Font(bold=True, color="FFFFFF")
+        header_alignment = Alignment(horizontal="center", vertical="center")
+        header = []
+        for title, _ in CONSOLIDATED_COLUMNS:
+            cell = WriteOnlyCell(worksheet, value=title)
+            cell.fill = header_fill
+            cell.font = header_font
+            cell.alignment = header_alignment
+            header.append(cell)
+        worksheet.append(header)
+
+        written = 0
+        if rows is None:
+            rows = self.repository.iter_consolidated_rows(inventory_id, warehouse_id)
+        for product_data in rows:
+            worksheet.append([
+                product_data['product_reference'],
+                product_data['product_code'],
+                product_data['product_description'],
+                product_data['product_barcode'],
+                product_data['product_unit'],
+                product_data['product_family'],
+                product_data['total_quantity'],
+            ])
+            written += 1
+
+        if not written:
+            raise ValueError(
+                f"Aucune donnée trouvée pour l'inventaire {inventory_id} "
+                f"et le magasin {warehouse_id}"
+            )
+
         try:
-            with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
-                df.to_excel(writer, index=False, sheet_name='Articles Consolidés')
-                
-                # Récupérer la feuille pour appliquer des formats
-                worksheet = writer.sheets['Articles Consolidés']
-                
-                # Appliquer un style aux en-têtes
-                from openpyxl.styles import Font, PatternFill, Alignment
-                from openpyxl.utils import get_column_letter
-                
-                header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-                header_font = Font(bold=True, color="FFFFFF")
-                
-                for cell in worksheet[1]:
-                    cell.fill = header_fill
-                    cell.font = header_font
-                    cell.alignment = Alignment(horizontal="center", vertical="center")
-                
-                # Ajuster la largeur des colonnes
-                for idx, col in enumerate(df.columns, start=1):
-                    try:
-                        # Remplacer les valeurs None par des chaînes vides
-                        col_data = df[col].fillna('').astype(str)
-                        
-                        # Calculer la longueur maximale
-                        if len(col_data) > 0:
-                            max_data_length = col_data.map(len).max()
-                        else:
-                            max_data_length = 0
-                        
-                        max_length = max(max_data_length, len(str(col)))
-                        # Limiter la largeur maximale à 50
-                        adjusted_width = min(max_length + 2, 50)
-                        worksheet.column_dimensions[get_column_letter(idx)].width = adjusted_width
-                    except Exception as e:
-                        # Si l'ajustement de la largeur échoue, utiliser une largeur par défaut
-                        worksheet.column_dimensions[get_column_letter(idx)].width = 15
-                
-                # Figer la première ligne (en-têtes)
-                worksheet.freeze_panes = 'A2'
-                
+            workbook.save(target)
         except Exception as e:
             raise ValueError(f"Impossible de générer le fichier Excel: {str(e)}")
-        
-        excel_buffer.seek(0)
-        return excel_buffer
+        return written
 
+    def generate_consolidated_excel(
+        self,
+        inventory_id: int,
+        warehouse_id: int,
+    ) -> IO[bytes]:
+        """
+        Génère un fichier Excel consolidé par article.
+
+        Le fichier contient :
+        - Les informations de l'article (référence, code, description, etc.)
+        - La quantité consolidée (somme de toutes les quantités)
+
+        Args:
+            inventory_id: ID de l'inventaire
+            warehouse_id: ID du magasin
+
+        Returns:
+            Fichier temporaire positionné au début (en mémoire jusqu'à
+            CONSOLIDATED_SPOOL_MAX_SIZE, sur disque au-delà), supprimé à sa fermeture
+
+        Raises:
+            ValueError: Voir ``validate_consolidated_export`` ; ou s'il n'y a pas de données
+            ImportError: Si openpyxl n'est pas installé
+        """
+        self.validate_consolidated_export(inventory_id, warehouse_id)
+
+        spooled = tempfile.SpooledTemporaryFile(max_size=CONSOLIDATED_SPOOL_MAX_SIZE, suffix='.xlsx')
+        try:
+            self.write_consolidated_excel(inventory_id, warehouse_id, spooled)
+        except BaseException:
+            spooled.close()
+            raise
+        spooled.seek(0)
+        return spooled
+
+    def get_consolidated_filename(self, inventory_id: int, warehouse_id: int) -> str:
+        """Nom du fichier d'export consolidé."""
+        inventory = self.repository.get_inventory_by_id(inventory_id)
+        inventory_ref = (
+            inventory.reference.replace(' ', '_') if inventory else f"inventaire_{inventory_id}"
+        )
+        return f"articles_consolides_{inventory_ref}_magasin_{warehouse_id}.xlsx"
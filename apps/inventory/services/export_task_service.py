@@ -0,0 +1,95 @@
+"""
+Service de tâches d'export asynchrones (Excel consolidé des gros magasins).
+
+Même fonctionnement que les tâches PDF : la tâche est créée en PENDING puis
+exécutée par le runner de ``pdf_task_service`` (thread aujourd'hui,
+remplaçable par Celery / Huey via ``set_task_runner``).
+"""
+from __future__ import annotations
+
+import logging
+from typing import Optional
+
+from django.core.files import File
+from django.db import close_old_connections
+
+from apps.inventory.models import ExportTask
+from apps.inventory.services.excel_export_service import ExcelExportService
+from apps.inventory.services.pdf_task_service import TaskRunner, get_task_runner
+
+logger = logging.getLogger(__name__)
+
+
+class ExportTaskService:
+    """
+    Orchestration des tâches d'export asynchrones (création + exécution).
+    """
+
+    def __init__(self, runner: Optional[TaskRunner] = None):
+        self.runner = runner or get_task_runner()
+        self.excel_export_service = ExcelExportService()
+
+    def get_export_task_by_id(self, task_id) -> Optional[ExportTask]:
+        """Récupère une tâche d'export par ID."""
+        try:
+            return ExportTask.objects.get(id=task_id)
+        except ExportTask.DoesNotExist:
+            return None
+
+    def enqueue_consolidated_excel_task(self, inventory_id: int, warehouse_id: int) -> ExportTask:
+        """
+        Valide puis lance l'export Excel consolidé en arrière-plan.
+
+        Returns:
+            ExportTask: Instance créée (status PENDING).
+
+        Raises:
+            ValueError: Export impossible (voir ExcelExportService.validate_consolidated_export)
+        """
+        self.excel_export_service.validate_consolidated_export(inventory_id, warehouse_id)
+        task = ExportTask.objects.create(
+            task_type=ExportTask.TYPE_CONSOLIDATED_ARTICLES_EXCEL,
+            params={"inventory_id": int(inventory_id), "warehouse_id": int(warehouse_id)},
+            status=ExportTask.STATUS_PENDING,
+        )
+        self.runner(self.run_consolidated_excel_task, (task.id,))
+        return task
+
+    @staticmethod
+    def run_consolidated_excel_task(task_id) -> None:
+        """Exécute l'export Excel consolidé en arrière-plan."""
+        close_old_connections()
+        try:
+            task = ExportTask.objects.get(id=task_id)
+        except ExportTask.DoesNotExist:
+            return
+
+        task.status = ExportTask.STATUS_RUNNING
+        task.error_message = None
+        task.save(update_fields=["status", "error_message", "updated_at"])
+
+        try:
+            inventory_id = int(task.params.get("inventory_id"))
+            warehouse_id = int(task.params.get("warehouse_id"))
+            service = ExcelExportService()
+
+            with service.generate_consolidated_excel(inventory_id, warehouse_id) as excel_file:
+                filename = service.get_consolidated_filename(inventory_id, warehouse_id)
+                # Copie par blocs vers le stockage : le fichier n'est pas relu en mémoire
+                task.result_file.save(filename, File(excel_file), save=False)
+
+            task.status = ExportTask.STATUS_SUCCESS
+            task.save(update_fields=["status", "result_file", "updated_at"])
+
+        except Exception as exc:
+            logger.error(
+                "Echec export asynchrone task=%s: %s",
+                task_id,
+                str(exc),
+                exc_info=True,
+            )
+            task.status = ExportTask.STATUS_ERROR
+            task.error_message = str(exc)
+            task.save(update_fields=["status", "error_message", "updated_at"])
+        finally:
+            close_old_connections()
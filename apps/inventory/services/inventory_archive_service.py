@@ -0,0 +1,365 @@
+"""
+Archivage des inventaires clôturés en Parquet compressé.
+
+``InventoryArchiveService.archive`` (commande ``archive_inventory``), en une
+transaction avec l'inventaire verrouillé :
+
+1. calcule les jeux dérivés servis par l'API d'archive : résultats par
+   entrepôt (lignes de ``InventoryResultService``) et Excel consolidé
+   (lignes de ``ExcelExportRepository.iter_consolidated_rows``) ;
+2. exporte les tables chaudes de l'inventaire et leurs tables ``Historical*``
+   (voir ARCHIVED_TABLES), chacune dans son fichier Parquet ;
+3. vérifie le nombre de lignes (base, lignes écrites, métadonnées Parquet) ;
+4. supprime les lignes archivées, tables historiques puis chaudes (DELETE
+   direct, sans signaux ni historique ; partition de l'inventaire détachée
+   puis supprimée pour les tables partitionnées), en contrôlant le nombre de
+   lignes supprimées ;
+5. publie le répertoire et crée ``InventoryArchive``.
+
+Toute anomalie annule la transaction et supprime les fichiers. Inventory,
+Setting, Counting et Job restent en base.
+
+Les méthodes de lecture (``get_inventory_results_for_warehouse``...) ont la
+même signature que les services « à chaud » pour être utilisées par les vues
+d'archive.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tempfile
+from collections import defaultdict
+from typing import IO, Any, Callable, Dict, Iterator, List, NamedTuple, Optional
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Q
+from simple_history.exceptions import NotHistoricalModelError
+from simple_history.utils import get_history_model_for_model
+
+from apps.core.lazy_imports import lazy_import
+from apps.masterdata.models import Stock
+
+from ..constants import InventoryStatus
+from ..exceptions import InventoryNotFoundError, InventoryStatusError, InventoryValidationError
+from ..models import (
+    Assigment,
+    ComptageSequence,
+    Counting,
+    CountingDetail,
+    EcartComptage,
+    Inventory,
+    InventoryArchive,
+    InventoryAssignedLocation,
+    InventoryResult,
+    InventoryResultBuild,
+    Job,
+    JobDetail,
+    NSerieInventory,
+    Setting,
+)
+from ..repositories.excel_export_repository import ExcelExportRepository
+from ..repositories.inventory_archive_repository import InventoryArchiveRepository
+from .excel_export_service import CONSOLIDATED_SPOOL_MAX_SIZE, ExcelExportService
+from .inventory_partitions import drop_inventory_partition, partitioned_tables
+from .inventory_result_service import InventoryResultService
+
+pa = lazy_import('pyarrow')
+
+logger = logging.getLogger(__name__)
+
+RESULTS_DATASET = 'results'
+CONSOLIDATED_DATASET = 'consolidated_articles'
+CONSOLIDATED_FIELDS = (
+    'product_id',
+    'product_reference',
+    'product_code',
+    'product_description',
+    'product_barcode',
+    'product_unit',
+    'product_family',
+    'total_quantity',
+)
+
+
+class _ArchiveScope:
+    """
+    Identifiants des lignes d'un inventaire, en sous-requêtes.
+
+    Chaque ensemble réunit les lignes actuelles et les lignes historiques :
+    l'historique d'un objet supprimé avant l'archivage est aussi archivé.
+    """
+
+    def __init__(self, inventory_id: int):
+        self.inventory_id = inventory_id
+        self.job_ids = _ids(Job, Q(inventory_id=inventory_id))
+        self.counting_detail_ids = _ids(CountingDetail, Q(inventory_id=inventory_id))
+
+
+def _ids(model, condition: Q) -> list:
+    querysets = [model._base_manager.filter(condition).values('id')]
+    history_model = _history_model(model)
+    if history_model is not None:
+        querysets.append(history_model._base_manager.filter(condition).values('id'))
+    return querysets
+
+
+def _any_in(field: str, querysets: list) -> Q:
+    condition = Q()
+    for queryset in querysets:
+        condition |= Q(**{f'{field}__in': queryset})
+    return condition
+
+
+def _history_model(model):
+    try:
+        return get_history_model_for_model(model)
+    except NotHistoricalModelError:
+        return None
+
+
+class ArchivedTable(NamedTuple):
+    dataset: str
+    model: Any
+    condition: Callable[[_ArchiveScope], Q]
+
+
+# Ordre de suppression des tables chaudes : enfants avant parents (clés étrangères)
+ARCHIVED_TABLES = (
+    ArchivedTable('nserie_inventory', NSerieInventory, lambda s: _any_in('counting_detail_id', s.counting_detail_ids)),
+    ArchivedTable('comptage_sequence', ComptageSequence, lambda s: Q(inventory_id=s.inventory_id)),
+    ArchivedTable('counting_detail', CountingDetail, lambda s: Q(inventory_id=s.inventory_id)),
+    ArchivedTable('ecart_comptage', EcartComptage, lambda s: Q(inventory_id=s.inventory_id)),
+    ArchivedTable('job_detail', JobDetail, lambda s: _any_in('job_id', s.job_ids)),
+    ArchivedTable('assigment', Assigment, lambda s: _any_in('job_id', s.job_ids)),
+    ArchivedTable('stock', Stock, lambda s: Q(inventory_id=s.inventory_id)),
+    ArchivedTable('inventory_result', InventoryResult, lambda s: Q(inventory_id=s.inventory_id)),
+    ArchivedTable('inventory_result_build', InventoryResultBuild, lambda s: Q(inventory_id=s.inventory_id)),
+    ArchivedTable('inventory_assigned_location', InventoryAssignedLocation, lambda s: Q(inventory_id=s.inventory_id)),
+)
+
+
+def _archived_querysets(scope: _ArchiveScope) -> Iterator[tuple]:
+    """
+    (dataset, queryset) des tables historiques puis des tables chaudes.
+
+    Ordre de suppression : les conditions des tables historiques lisent les
+    identifiants des tables chaudes, qui sont donc supprimées en dernier.
+    """
+    for table in ARCHIVED_TABLES:
+        history_model = _history_model(table.model)
+        if history_model is not None:
+            yield f'historical_{table.dataset}', history_model._base_manager.filter(table.condition(scope))
+    for table in ARCHIVED_TABLES:
+        yield table.dataset, table.model._base_manager.filter(table.condition(scope))
+
+
+class InventoryArchiveService:
+    """
+    Archivage des inventaires clôturés et lecture des archives.
+    """
+
+    def __init__(self, repository: Optional[InventoryArchiveRepository] = None):
+        self.repository = repository or InventoryArchiveRepository()
+
+    # ------------------------------------------------------------------
+    # Archivage
+    # ------------------------------------------------------------------
+
+    def _get_archivable_inventory(self, inventory_id: int, lock: bool = False) -> Inventory:
+        queryset = Inventory.objects.select_for_update() if lock else Inventory.objects
+        try:
+            inventory = queryset.get(pk=inventory_id)
+        except Inventory.DoesNotExist:
+            raise InventoryNotFoundError(f"Inventaire introuvable (ID: {inventory_id}).")
+        if inventory.status != InventoryStatus.CLOTURE:
+            raise InventoryStatusError(
+                f"Seul un inventaire {InventoryStatus.CLOTURE} peut être archivé "
+                f"(statut actuel : {inventory.status})."
+            )
+        if InventoryArchive.objects.filter(inventory_id=inventory_id).exists():
+            raise InventoryValidationError(f"L'inventaire {inventory.reference} est déjà archivé.")
+        return inventory
+
+    def plan(self, inventory_id: int) -> Dict[str, int]:
+        """Nombre de lignes qui seraient archivées, par dataset (rien n'est écrit)."""
+        self._get_archivable_inventory(inventory_id)
+        scope = _ArchiveScope(inventory_id)
+        return {dataset: queryset.count() for dataset, queryset in _archived_querysets(scope)}
+
+    def archive(self, inventory_id: int) -> InventoryArchive:
+        """
+        Archive un inventaire clôturé puis supprime ses lignes des tables chaudes.
+
+        Raises:
+            InventoryNotFoundError: Inventaire introuvable
+            InventoryStatusError: Inventaire non clôturé
+            InventoryValidationError: Inventaire déjà archivé
+            ValueError: Nombre de lignes incohérent (rien n'est supprimé)
+        """
+        staging_dir = self.repository.create_staging_dir(inventory_id)
+        published = None
+        try:
+            with transaction.atomic():
+                self._get_archivable_inventory(inventory_id, lock=True)
+                scope = _ArchiveScope(inventory_id)
+                warehouse_ids = sorted(set(
+                    Setting.objects.filter(inventory_id=inventory_id).values_list('warehouse_id', flat=True)
+                ))
+
+                manifest = {
+                    RESULTS_DATASET: self._write_results(staging_dir, inventory_id, warehouse_ids),
+                    CONSOLIDATED_DATASET: self._write_consolidated(staging_dir, inventory_id, warehouse_ids),
+                }
+                querysets = list(_archived_querysets(scope))
+                for dataset, queryset in querysets:
+                    expected = queryset.count()
+                    entry = self.repository.write_queryset(staging_dir, dataset, queryset)
+                    if entry['rows'] != expected:
+                        raise ValueError(f"{dataset} : {entry['rows']} ligne(s) écrite(s), {expected} en base")
+                    manifest[dataset] = entry
+                self.repository.seal(staging_dir, manifest)
+
+                for dataset, queryset in querysets:
+                    deleted = self._delete_rows(queryset, inventory_id)
+                    if deleted != manifest[dataset]['rows']:
+                        raise ValueError(
+                            f"{dataset} : {deleted} ligne(s) supprimée(s), {manifest[dataset]['rows']} archivée(s)"
+                        )
+
+                published = self.repository.publish(staging_dir, inventory_id)
+                archive = InventoryArchive.objects.create(
+                    inventory_id=inventory_id,
+                    path=published,
+                    manifest=manifest,
+                    total_rows=sum(entry['rows'] for entry in manifest.values() if entry['table']),
+                    size_bytes=sum(entry['bytes'] for entry in manifest.values()),
+                )
+        except BaseException:
+            self.repository.discard(staging_dir)
+            if published is not None:
+                self.repository.discard(os.path.join(self.repository.root, published))
+            raise
+
+        logger.info(
+            "Inventaire %s archivé : %s ligne(s), %s octet(s) dans %s",
+            inventory_id, archive.total_rows, archive.size_bytes, archive.path,
+        )
+        return archive
+
+    def _delete_rows(self, queryset, inventory_id: int) -> int:
+        """
+        Supprime les lignes archivées d'une table. Table partitionnée : la
+        partition de l'inventaire (exactement les lignes ``inventory_id``) est
+        détachée puis supprimée.
+        """
+        table = queryset.model._meta.db_table
+        if table in partitioned_tables():
+            dropped = drop_inventory_partition(table, inventory_id)
+            if dropped is not None:
+                return dropped
+        return queryset._raw_delete(DEFAULT_DB_ALIAS)
+
+    def _write_results(self, directory: str, inventory_id: int, warehouse_ids: List[int]) -> Dict[str, Any]:
+        result_service = InventoryResultService()
+
+        def rows():
+            for warehouse_id in warehouse_ids:
+                try:
+                    results = result_service.get_inventory_results_for_warehouse(inventory_id, warehouse_id)
+                except InventoryValidationError as exc:
+                    logger.warning(
+                        "Archive %s : pas de résultats pour l'entrepôt %s (%s)", inventory_id, warehouse_id, exc,
+                    )
+                    continue
+                for row in results:
+                    yield warehouse_id, json.dumps(row, cls=DjangoJSONEncoder)
+
+        schema = pa.schema([('warehouse_id', pa.int64()), ('row', pa.string())])
+        return self.repository.write_rows(directory, RESULTS_DATASET, schema, rows())
+
+    def _write_consolidated(self, directory: str, inventory_id: int, warehouse_ids: List[int]) -> Dict[str, Any]:
+        export_repository = ExcelExportRepository()
+
+        def rows():
+            for warehouse_id in warehouse_ids:
+                for product in export_repository.iter_consolidated_rows(inventory_id, warehouse_id):
+                    yield (warehouse_id, *(product[name] for name in CONSOLIDATED_FIELDS))
+
+        schema = pa.schema(
+            [('warehouse_id', pa.int64()), ('product_id', pa.int64())]
+            + [(name, pa.string()) for name in CONSOLIDATED_FIELDS[1:-1]]
+            + [('total_quantity', pa.int64())]
+        )
+        return self.repository.write_rows(directory, CONSOLIDATED_DATASET, schema, rows())
+
+    # ------------------------------------------------------------------
+    # Lecture
+    # ------------------------------------------------------------------
+
+    def get_archive(self, inventory_id: int) -> InventoryArchive:
+        try:
+            return InventoryArchive.objects.get(inventory_id=inventory_id)
+        except InventoryArchive.DoesNotExist:
+            raise InventoryNotFoundError(f"Aucune archive pour l'inventaire {inventory_id}.")
+
+    def verify(self, inventory_id: int) -> List[str]:
+        """Anomalies des fichiers de l'archive par rapport au manifeste (vide si intègre)."""
+        return self.repository.verify(self.get_archive(inventory_id))
+
+    def get_inventory_results_for_warehouse(self, inventory_id: int, warehouse_id: int) -> List[Dict[str, Any]]:
+        """Lignes de résultats d'un entrepôt, telles que servies avant archivage."""
+        archive = self.get_archive(inventory_id)
+        rows = self.repository.read_rows(
+            archive, RESULTS_DATASET, columns=['row'], filters=[('warehouse_id', '=', warehouse_id)],
+        )
+        return [json.loads(row['row']) for row in rows]
+
+    def iter_consolidated_rows(self, inventory_id: int, warehouse_id: int) -> Iterator[Dict[str, Any]]:
+        """Lignes de l'Excel consolidé par article (voir ExcelExportRepository.iter_consolidated_rows)."""
+        archive = self.get_archive(inventory_id)
+        yield from self.repository.read_rows(
+            archive, CONSOLIDATED_DATASET, columns=CONSOLIDATED_FIELDS, filters=[('warehouse_id', '=', warehouse_id)],
+        )
+
+    def get_assignment_statuses(self, inventory_id: int, job_ids) -> Dict[int, Dict[int, str]]:
+        """Statut des affectations archivées : {job_id: {ordre de comptage: statut}}."""
+        archive = self.get_archive(inventory_id)
+        counting_orders = dict(
+            Counting._base_manager.filter(inventory_id=inventory_id).values_list('id', 'order')
+        )
+        rows = self.repository.read_rows(
+            archive, 'assigment', columns=['job_id', 'counting_id', 'status'],
+            filters=[('job_id', 'in', list(job_ids))],
+        )
+        statuses = defaultdict(dict)
+        for row in rows:
+            order = counting_orders.get(row['counting_id'])
+            if order is not None:
+                statuses[row['job_id']][order] = row['status']
+        return statuses
+
+    def generate_consolidated_excel(self, inventory_id: int, warehouse_id: int) -> IO[bytes]:
+        """
+        Excel consolidé par article depuis l'archive (même format que
+        ``ExcelExportService.generate_consolidated_excel``).
+
+        Raises:
+            InventoryNotFoundError: Inventaire non archivé
+            ValueError: Aucune ligne pour ce magasin
+        """
+        self.get_archive(inventory_id)
+        spooled = tempfile.SpooledTemporaryFile(max_size=CONSOLIDATED_SPOOL_MAX_SIZE, suffix='.xlsx')
+        try:
+            ExcelExportService().write_consolidated_excel(
+                inventory_id, warehouse_id, spooled, rows=self.iter_consolidated_rows(inventory_id, warehouse_id),
+            )
+        except BaseException:
+            spooled.close()
+            raise
+        spooled.seek(0)
+        return spooled
+
+    def get_consolidated_filename(self, inventory_id: int, warehouse_id: int) -> str:
+        return ExcelExportService().get_consolidated_filename(inventory_id, warehouse_id)
@@ -0,0 +1,300 @@
+"""
+Matérialisation en masse des Jobs / JobDetails / Affectations de l'import InventoryLocationJob.
+
+La création unitaire exécutait, pour chaque couple (warehouse, job), un
+``Warehouse.objects.get``, un test d'existence du Job, la vérification des
+conflits puis un ``save()`` par JobDetail (avec contrôle de référence), le
+tout dans la transaction de l'import. Ici :
+
+- warehouses et jobs existants sont préchargés une seule fois ;
+- les lignes sont traitées par chunk (même découpage que le suivi de
+  l'ImportTask) : emplacements et JobDetails existants sont lus en une requête
+  par chunk, puis Jobs, JobDetails et Affectations manquants sont créés par
+  ``bulk_create`` ;
+- la progression est reportée chunk par chunk via
+  ``ImportTask.update_chunk_progress``.
+
+Les règles métier restent celles de la création unitaire : emplacements d'un
+autre warehouse → job ignoré, emplacement déjà affecté à un autre job →
+erreur bloquante, JobDetails selon le mode de comptage.
+"""
+import logging
+import re
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.utils import timezone
+
+from apps.core.history import HISTORY_CREATED, record_bulk_history
+from apps.inventory.models import Assigment, Counting, Inventory, Job, JobDetail
+from apps.inventory.realtime import notify_dashboard_changes
+from apps.inventory.services.assigned_location_index import index_job_details
+from apps.inventory.utils.references import generate_unique_references
+from apps.masterdata.exceptions import InventoryLocationJobValidationError
+from apps.masterdata.models import ImportTask, Location, Warehouse
+from apps.mobile.realtime import publish_pda_changes
+
+logger = logging.getLogger(__name__)
+
+# Taille des lots de bulk_create
+BULK_BATCH_SIZE = 1000
+
+JOB_REFERENCE_PATTERN = re.compile(r'^JOB-(\d{4})$')
+
+
+def get_job_number(job_reference: str) -> int:
+    """Extrait le numéro du job (ex: JOB-0001 -> 1)"""
+    match = JOB_REFERENCE_PATTERN.match(job_reference)
+    return int(match.group(1)) if match else 0
+
+
+class LocationJobImportMaterializer:
+    """
+    Crée les Jobs, JobDetails et Affectations décrits par les lignes validées d'un import.
+
+    Args:
+        inventory: Inventaire cible.
+        counting1: Comptage d'ordre 1.
+        counting2: Comptage d'ordre 2 (None en mono-comptage MAGASIN / TOURNANT).
+        import_task: Tâche d'import dont les chunks reçoivent la progression (optionnel).
+        chunk_size: Nombre de lignes par chunk (découpage de l'ImportTask).
+    """
+
+    def __init__(
+        self,
+        inventory: Inventory,
+        counting1: Counting,
+        counting2: Optional[Counting] = None,
+        import_task: Optional[ImportTask] = None,
+        chunk_size: int = 1000,
+    ):
+        self.inventory = inventory
+        self.counting1 = counting1
+        self.counting2 = counting2
+        self.import_task = import_task
+        self.chunk_size = chunk_size
+
+    @property
+    def countings(self) -> List[Counting]:
+        """Comptages portant les JobDetails et les Affectations"""
+        if self.counting2 is None:
+            # Mono-comptage (MAGASIN / TOURNANT) : comptage 1 uniquement
+            return [self.counting1]
+        if self.counting1.count_mode == "image de stock":
+            # 1er comptage = image de stock : seul le 2ème comptage est affecté
+            return [self.counting2]
+        return [self.counting1, self.counting2]
+
+    def materialize(self, validated_data: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Args:
+            validated_data: Lignes validées (warehouse_id, job, emplacement_id), dans l'ordre du fichier.
+
+        Returns:
+            Dict: jobs_created, job_details_created, assignments_created
+
+        Raises:
+            InventoryLocationJobValidationError: Emplacement déjà affecté à un autre job,
+                warehouse introuvable.
+        """
+        totals = {'jobs_created': 0, 'job_details_created': 0, 'assignments_created': 0}
+
+        # (warehouse_id, job) -> emplacements, chaque job étant rattaché au chunk de sa première ligne
+        jobs_by_warehouse: Dict[Tuple[int, str], List[int]] = {}
+        keys_by_chunk: Dict[int, List[Tuple[int, str]]] = defaultdict(list)
+        for index, data in enumerate(validated_data):
+            if not (data.get('job') and data.get('warehouse_id') and data.get('emplacement_id')):
+                continue
+            key = (data['warehouse_id'], data['job'])
+            if key not in jobs_by_warehouse:
+                jobs_by_warehouse[key] = []
+                keys_by_chunk[index // self.chunk_size + 1].append(key)
+            jobs_by_warehouse[key].append(data['emplacement_id'])
+
+        if not jobs_by_warehouse:
+            logger.info("Aucune ligne avec job à traiter")
+            return totals
+
+        warehouse_ids = {warehouse_id for warehouse_id, _ in jobs_by_warehouse}
+        self._warehouses = Warehouse.objects.in_bulk(warehouse_ids)
+        missing = warehouse_ids - set(self._warehouses)
+        if missing:
+            raise InventoryLocationJobValidationError(
+                f"Warehouse(s) introuvable(s): {', '.join(str(pk) for pk in sorted(missing))}"
+            )
+
+        self._existing_jobs: Dict[Tuple[int, str], Job] = {}
+        for job in Job.objects.filter(
+            inventory=self.inventory,
+            warehouse_id__in=warehouse_ids,
+            reference__in={reference for _, reference in jobs_by_warehouse},
+        ).order_by('id'):
+            self._existing_jobs.setdefault((job.warehouse_id, job.reference), job)
+
+        for chunk_number in sorted(keys_by_chunk):
+            keys = sorted(keys_by_chunk[chunk_number], key=lambda key: get_job_number(key[1]))
+            chunk_result = self._materialize_chunk(keys, jobs_by_warehouse)
+            for name, value in chunk_result.items():
+                totals[name] += value
+            if self.import_task:
+                self.import_task.update_chunk_progress(chunk_number, **chunk_result)
+            logger.info(
+                f"Chunk {chunk_number}: {chunk_result['jobs_created']} job(s), "
+                f"{chunk_result['job_details_created']} job detail(s), "
+                f"{chunk_result['assignments_created']} affectation(s) créé(s)"
+            )
+
+        return totals
+
+    def _materialize_chunk(
+        self,
+        keys: List[Tuple[int, str]],
+        jobs_by_warehouse: Dict[Tuple[int, str], List[int]],
+    ) -> Dict[str, int]:
+        """Crée en masse les Jobs, JobDetails et Affectations des jobs d'un chunk"""
+        now = timezone.now()
+        countings = self.countings
+        location_ids = {location_id for key in keys for location_id in jobs_by_warehouse[key]}
+
+        # id -> (référence, warehouse_id) des emplacements actifs
+        locations = {
+            location_id: (reference, warehouse_id)
+            for location_id, reference, warehouse_id in Location.objects.filter(
+                id__in=location_ids
+            ).values_list('id', 'location_reference', 'sous_zone__zone__warehouse_id')
+        }
+
+        # Emplacement -> JobDetails de l'inventaire (job_id, référence job, référence emplacement),
+        # complété au fil du chunk pour détecter les conflits entre jobs du fichier
+        details_by_location: Dict[int, List[Tuple[Optional[int], str, str]]] = defaultdict(list)
+        for location_id, job_id, job_reference, location_reference in JobDetail.objects.filter(
+            job__inventory=self.inventory,
+            location_id__in=location_ids,
+        ).values_list('location_id', 'job_id', 'job__reference', 'location__location_reference'):
+            details_by_location[location_id].append((job_id, job_reference, location_reference))
+
+        new_jobs: List[Job] = []
+        # (job, emplacements triés) pour chaque job recevant des JobDetails
+        planned: List[Tuple[Job, List[int]]] = []
+
+        for warehouse_id, job_reference in keys:
+            warehouse = self._warehouses[warehouse_id]
+            emplacement_ids = list(dict.fromkeys(jobs_by_warehouse[(warehouse_id, job_reference)]))
+            existing_job = self._existing_jobs.get((warehouse_id, job_reference))
+
+            if existing_job:
+                logger.info(
+                    f"Job {job_reference} existe déjà pour l'inventaire {self.inventory.reference} "
+                    f"et le warehouse {warehouse.warehouse_name}"
+                )
+                # Seuls les emplacements pas encore présents dans ce job
+                new_location_ids = [
+                    location_id for location_id in emplacement_ids
+                    if location_id in locations and not any(
+                        job_id == existing_job.id for job_id, _, _ in details_by_location[location_id]
+                    )
+                ]
+                if new_location_ids:
+                    planned.append((existing_job, self._sort_by_reference(new_location_ids, locations)))
+                    for location_id in new_location_ids:
+                        details_by_location[location_id].append(
+                            (existing_job.id, job_reference, locations[location_id][0])
+                        )
+                    logger.info(f"Ajout de {len(new_location_ids)} emplacement(s) au job existant {job_reference}")
+                continue
+
+            job_location_ids = [location_id for location_id in emplacement_ids if location_id in locations]
+
+            # Vérifier que tous les emplacements appartiennent au warehouse
+            if any(locations[location_id][1] != warehouse_id for location_id in job_location_ids):
+                logger.warning(f"Certains emplacements n'appartiennent pas au warehouse {warehouse.warehouse_name}")
+                continue
+
+            # Un emplacement déjà affecté à un autre job de l'inventaire est une erreur
+            # bloquante : elle annule TOUT l'import.
+            conflicting_locations = [
+                location_reference
+                for location_id in emplacement_ids
+                for _, other_reference, location_reference in details_by_location.get(location_id, [])
+                if other_reference != job_reference
+            ]
+            if conflicting_locations:
+                message = (
+                    "Certains emplacements sont déjà affectés à d'autres jobs pour cet inventaire. "
+                    f"Job demandé: {job_reference}, Warehouse: {warehouse.warehouse_name}. "
+                    f"Emplacements en conflit: {', '.join(conflicting_locations)}"
+                )
+                logger.error(message)
+                raise InventoryLocationJobValidationError(message)
+
+            job = Job(
+                reference=job_reference,  # Référence du fichier Excel (ex: JOB-0001)
+                status='EN ATTENTE',
+                en_attente_date=now,
+                warehouse=warehouse,
+                inventory=self.inventory,
+            )
+            new_jobs.append(job)
+            planned.append((job, self._sort_by_reference(job_location_ids, locations)))
+            for location_id in job_location_ids:
+                details_by_location[location_id].append((None, job_reference, locations[location_id][0]))
+
+        if new_jobs:
+            Job.objects.bulk_create(new_jobs, batch_size=BULK_BATCH_SIZE)
+            record_bulk_history(new_jobs, Job, HISTORY_CREATED)
+
+        job_details = [
+            JobDetail(
+                location_id=location_id,
+                job=job,
+                counting=counting,
+                status='EN ATTENTE',
+                en_attente_date=now,
+            )
+            for job, job_location_ids in planned
+            for location_id in job_location_ids
+            for counting in countings
+        ]
+        for job_detail, reference in zip(job_details, generate_unique_references(JobDetail, len(job_details))):
+            job_detail.reference = reference
+        JobDetail.objects.bulk_create(job_details, batch_size=BULK_BATCH_SIZE)
+        record_bulk_history(job_details, JobDetail, HISTORY_CREATED)
+        index_job_details(job_details)
+
+        # Affectations EN ATTENTE manquantes (job, comptage), comme à la création d'un job
+        new_job_ids = {job.id for job in new_jobs}
+        existing_assignments = set(
+            Assigment.objects.filter(
+                job_id__in=[job.id for job, _ in planned if job.id not in new_job_ids],
+            ).values_list('job_id', 'counting_id')
+        )
+        assignments = [
+            Assigment(job=job, counting=counting, status='EN ATTENTE')
+            for job, _ in planned
+            for counting in countings
+            if (job.id, counting.id) not in existing_assignments
+        ]
+        for assignment, reference in zip(assignments, generate_unique_references(Assigment, len(assignments))):
+            assignment.reference = reference
+        Assigment.objects.bulk_create(assignments, batch_size=BULK_BATCH_SIZE)
+        record_bulk_history(assignments, Assigment, HISTORY_CREATED)
+
+        # Chemins bulk sans signaux : PDA et tableaux de bord notifiés au commit de l'import
+        job_ids = {job.id for job, _ in planned}
+        publish_pda_changes(
+            assignment_ids=[assignment.id for assignment in assignments],
+            job_ids=job_ids,
+            job_detail_ids=[job_detail.id for job_detail in job_details],
+        )
+        notify_dashboard_changes(job_ids=job_ids)
+
+        return {
+            'jobs_created': len(new_jobs),
+            'job_details_created': len(job_details),
+            'assignments_created': len(assignments),
+        }
+
+    @staticmethod
+    def _sort_by_reference(location_ids: List[int], locations: Dict[int, Tuple[str, int]]) -> List[int]:
+        """Emplacements triés par location_reference (ordre croissant)"""
+        return sorted(location_ids, key=lambda location_id: locations[location_id][0])
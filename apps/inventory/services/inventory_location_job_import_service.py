@@ -1,13 +1,15 @@
 """
 Service pour l'import asynchrone des InventoryLocationJob depuis un fichier Excel
 """
-import pandas as pd
+from __future__ import annotations
+
 import re
 import logging
 import threading
 from typing import Dict, List, Any, Optional
 from django.db import transaction
 from django.utils import timezone
+from apps.core.lazy_imports import lazy_import
 from apps.inventory.models import Inventory, Setting, Job, JobDetail, Counting
 from apps.masterdata.models import Warehouse, Location, InventoryLocationJob, ImportTask, ImportError
 from apps.inventory.repositories.inventory_location_job_repository import InventoryLocationJobRepository
@@ -15,6 +17,8 @@ from apps.masterdata.repositories.warehouse_repository import WarehouseRepositor
 from apps.masterdata.repositories.location_repository import LocationRepository
 from apps.masterdata.exceptions import InventoryLocationJobValidationError
 from apps.inventory.repositories.inventory_repository import InventoryRepository
+from apps.inventory.services.inventory_location_job_import_validation import LocationJobImportLookups
+from apps.inventory.services.inventory_location_job_import_materialization import LocationJobImportMaterializer
 from apps.inventory.constants import InventoryType
 from apps.inventory.interfaces.location_job_import_session_strategy_interface import (
     ILocationJobImportSessionStrategy,
@@ -23,6 +27,8 @@ from apps.inventory.usecases.location_job_import_session_dispatcher import (
     LocationJobImportSessionDispatcher,
 )
 
+pd = lazy_import('pandas')
+
 logger = logging.getLogger(__name__)
 
 # Taille des chunks pour le tracking
@@ -324,12 +330,16 @@ class InventoryLocationJobImportService:
             validation_errors = []
             validated_data = []
             
-            for index, row in df.iterrows():
+            # Warehouses, liens Setting et emplacements du fichier chargés en
+            # quelques requêtes : aucune requête par ligne pendant la validation
+            rows = df.to_dict('records')
+            lookups = LocationJobImportLookups.from_rows(inventory, rows)
+            
+            for index, row_dict in zip(df.index, rows):
                 # Log de progression tous les 1000 lignes
                 if (index + 1) % 1000 == 0:
                     print(f"[IMPORT] Validation en cours: {index + 1}/{len(df)} lignes traitées...")
                 row_number = index + 2  # +2 car ligne 1 = header, index 0-based
-                row_dict = row.to_dict()
                 
                 # Valider la ligne
                 errors = self._validate_row(
@@ -337,6 +347,7 @@ class InventoryLocationJobImportService:
                     row_number=row_number,
                     inventory=inventory,
                     session_strategy=session_strategy,
+                    lookups=lookups,
                 )
                 
                 if errors:
@@ -555,8 +566,12 @@ class InventoryLocationJobImportService:
                 # 9. Créer automatiquement les Jobs et JobDetails à partir des données importées
                 # Cette étape s'exécute uniquement si toutes les étapes précédentes sont réussies
                 # Elle est dans la transaction atomique pour garantir la cohérence
-                jobs_result = self._create_jobs_and_details(inventory_id, validated_data)
-                logger.info(f"Jobs créés: {jobs_result['jobs_created']} job(s), {jobs_result['job_details_created']} job detail(s)")
+                jobs_result = self._create_jobs_and_details(inventory_id, validated_data, import_task)
+                logger.info(
+                    f"Jobs créés: {jobs_result['jobs_created']} job(s), "
+                    f"{jobs_result['job_details_created']} job detail(s), "
+                    f"{jobs_result['assignments_created']} affectation(s)"
+                )
                 
                 # 8. Identifier les emplacements non consommés (présents en base mais absents du fichier Excel)
                 unconsumed_locations = self._get_unconsumed_locations(inventory_id, validated_data)
@@ -584,7 +599,8 @@ class InventoryLocationJobImportService:
                     'unconsumed_locations_count': len(unconsumed_locations),
                     'unconsumed_cleanup': cleanup_stats,
                     'jobs_created': jobs_result['jobs_created'],
-                    'job_details_created': jobs_result['job_details_created']
+                    'job_details_created': jobs_result['job_details_created'],
+                    'assignments_created': jobs_result['assignments_created']
                 }
                 
         except InventoryLocationJobValidationError as e:
@@ -642,6 +658,7 @@ class InventoryLocationJobImportService:
         row_number: int,
         inventory: Inventory,
         session_strategy: Optional[ILocationJobImportSessionStrategy] = None,
+        lookups: Optional[LocationJobImportLookups] = None,
     ) -> List[Dict[str, Any]]:
         """
         Valide une ligne du fichier Excel
@@ -651,6 +668,8 @@ class InventoryLocationJobImportService:
             row_number: Numéro de la ligne (pour les messages d'erreur)
             inventory: Objet Inventory
             session_strategy: Strategy sessions selon inventory_type
+            lookups: Référentiels préchargés pour tout le fichier (chargés
+                pour cette seule ligne si absents)
             
         Returns:
             List[Dict]: Liste des erreurs de validation (vide si aucune erreur)
@@ -659,6 +678,8 @@ class InventoryLocationJobImportService:
             session_strategy = self.session_dispatcher.get_strategy(
                 getattr(inventory, "inventory_type", "") or ""
             )
+        if lookups is None:
+            lookups = LocationJobImportLookups.from_rows(inventory, [row_dict])
         errors = []
         
         # 0. Déterminer si la ligne est active
@@ -682,7 +703,7 @@ class InventoryLocationJobImportService:
         else:
             # Vérifier que le warehouse existe par son nom (warehouse_name)
             try:
-                warehouse = self.warehouse_repo.get_by_name(warehouse_value)
+                warehouse = lookups.get_warehouse(warehouse_value)
             except Exception as e:
                 errors.append({
                     'row_number': row_number,
@@ -693,10 +714,7 @@ class InventoryLocationJobImportService:
                 return errors  # Pas besoin de continuer si le warehouse n'existe pas
             
             # Vérifier que le warehouse appartient à l'inventaire
-            if not Setting.objects.filter(
-                inventory=inventory,
-                warehouse=warehouse
-            ).exists():
+            if not lookups.warehouse_in_inventory(warehouse):
                 errors.append({
                     'row_number': row_number,
                     'field': 'warehouse',
@@ -721,23 +739,12 @@ class InventoryLocationJobImportService:
             # Vérifier que l'emplacement existe ET qu'il est lié au warehouse spécifié
             # Les emplacements sont liés aux warehouses via: location -> sous_zone -> zone -> warehouse
             # Note: location_reference peut être dupliqué, l'unicité est garantie par warehouse
-            try:
-                location = Location.objects.select_related(
-                    'sous_zone__zone__warehouse'
-                ).get(
-                    location_reference=emplacement_value,
-                    sous_zone__zone__warehouse=warehouse,
-                    is_deleted=False
-                )
-                row_dict['emplacement_id'] = location.id
-            except Location.DoesNotExist:
+            location_ids = lookups.get_location_ids(emplacement_value, warehouse.id)
+            if len(location_ids) == 1:
+                row_dict['emplacement_id'] = location_ids[0]
+            elif not location_ids:
                 # Vérifier si l'emplacement existe mais dans un autre warehouse
-                location_exists = Location.objects.filter(
-                    location_reference=emplacement_value,
-                    is_deleted=False
-                ).exists()
-                
-                if location_exists:
+                if lookups.location_exists(emplacement_value):
                     errors.append({
                         'row_number': row_number,
                         'field': 'emplacement',
@@ -752,7 +759,7 @@ class InventoryLocationJobImportService:
                         'message': f"L'emplacement '{emplacement_value}' n'existe pas"
                     })
                 return errors  # Pas besoin de continuer si l'emplacement n'existe pas ou n'est pas lié au warehouse
-            except Location.MultipleObjectsReturned:
+            else:
                 # Cas théorique : plusieurs locations avec la même référence dans le même warehouse (ne devrait pas arriver)
                 errors.append({
                     'row_number': row_number,
@@ -1478,20 +1485,22 @@ class InventoryLocationJobImportService:
     def _create_jobs_and_details(
         self,
         inventory_id: int,
-        validated_data: List[Dict[str, Any]]
+        validated_data: List[Dict[str, Any]],
+        import_task: Optional[ImportTask] = None,
     ) -> Dict[str, Any]:
         """
-        Crée automatiquement les Jobs et JobDetails à partir des données importées
+        Crée automatiquement les Jobs, JobDetails et Affectations à partir des données importées
         
-        Cette méthode applique exactement la même logique métier que JobCreateAPIView.
-        Elle regroupe les lignes par job, trie par ordre croissant, et crée les Jobs/JobDetails.
+        Cette méthode applique la même logique métier que JobCreateAPIView ; la création
+        est faite en masse, chunk par chunk (voir LocationJobImportMaterializer).
         
         Args:
             inventory_id: ID de l'inventaire
             validated_data: Liste des données validées (contient warehouse_id, job, emplacement_id)
+            import_task: ImportTask dont les chunks reçoivent la progression (optionnel)
             
         Returns:
-            Dict contenant le nombre de jobs et job details créés
+            Dict contenant le nombre de jobs, job details et affectations créés
         """
         try:
             # Récupérer l'inventaire
@@ -1508,153 +1517,25 @@ class InventoryLocationJobImportService:
                     "Comptage d'ordre 1 requis. Comptages trouvés: %s",
                     countings.count(),
                 )
-                return {'jobs_created': 0, 'job_details_created': 0}
+                return {'jobs_created': 0, 'job_details_created': 0, 'assignments_created': 0}
             if not is_single and not counting2:
                 logger.warning(
                     "Comptages d'ordre 1 et 2 requis (GENERAL). Comptages trouvés: %s",
                     countings.count(),
                 )
-                return {'jobs_created': 0, 'job_details_created': 0}
-            
-            # Filtrer uniquement les lignes avec job (ignorer les lignes où active = false et job est vide)
-            data_with_jobs = [
-                data for data in validated_data
-                if data.get('job') and data.get('warehouse_id') and data.get('emplacement_id')
-            ]
-            
-            if not data_with_jobs:
-                logger.info("Aucune ligne avec job à traiter")
-                return {'jobs_created': 0, 'job_details_created': 0}
-            
-            # Regrouper par warehouse et job
-            jobs_by_warehouse = {}
-            for data in data_with_jobs:
-                warehouse_id = data['warehouse_id']
-                job_reference = data['job']
-                emplacement_id = data['emplacement_id']
-                
-                key = (warehouse_id, job_reference)
-                if key not in jobs_by_warehouse:
-                    jobs_by_warehouse[key] = []
-                jobs_by_warehouse[key].append(emplacement_id)
-            
-            # Trier les jobs par ordre croissant (extraire le numéro du job)
-            def get_job_number(job_ref):
-                """Extrait le numéro du job (ex: JOB-0001 -> 1)"""
-                import re
-                match = re.match(r'^JOB-(\d{4})$', job_ref)
-                return int(match.group(1)) if match else 0
-            
-            sorted_jobs = sorted(jobs_by_warehouse.keys(), key=lambda x: get_job_number(x[1]))
+                return {'jobs_created': 0, 'job_details_created': 0, 'assignments_created': 0}
             
-            jobs_created = 0
-            job_details_created = 0
-            
-            # Créer les Jobs et JobDetails pour chaque combinaison warehouse/job
-            for warehouse_id, job_reference in sorted_jobs:
-                    # Récupérer le warehouse
-                    warehouse = Warehouse.objects.get(id=warehouse_id)
-                    
-                    # Vérifier si le job existe déjà pour cet inventaire avec cette référence
-                    existing_job = Job.objects.filter(
-                        inventory=inventory,
-                        warehouse=warehouse,
-                        reference=job_reference
-                    ).first()
-                    
-                    if existing_job:
-                        logger.info(f"Job {job_reference} existe déjà pour l'inventaire {inventory.reference} et le warehouse {warehouse.warehouse_name}")
-                        # Récupérer les emplacements pour ce job existant
-                        emplacement_ids = jobs_by_warehouse[(warehouse_id, job_reference)]
-                        
-                        # Vérifier quels emplacements ne sont pas déjà dans ce job
-                        existing_location_ids = set(
-                            JobDetail.objects.filter(
-                                job=existing_job
-                            ).values_list('location_id', flat=True)
-                        )
-                        
-                        new_location_ids = [
-                            loc_id for loc_id in emplacement_ids
-                            if loc_id not in existing_location_ids
-                        ]
-                        
-                        if new_location_ids:
-                            # Créer les JobDetails pour les nouveaux emplacements
-                            locations = Location.objects.filter(id__in=new_location_ids)
-                            # Trier les emplacements par location_reference (ordre croissant)
-                            locations = sorted(locations, key=lambda l: l.location_reference)
-                            
-                            details_count = self._create_job_details_for_job(
-                                existing_job, locations, counting1, counting2
-                            )
-                            job_details_created += details_count
-                            logger.info(f"Ajouté {details_count} job detail(s) au job existant {job_reference}")
-                        continue
-                    
-                    # Récupérer les emplacements pour ce job
-                    emplacement_ids = jobs_by_warehouse[(warehouse_id, job_reference)]
-                    locations = Location.objects.filter(id__in=emplacement_ids)
-                    
-                    # Trier les emplacements par location_reference (ordre croissant)
-                    locations = sorted(locations, key=lambda l: l.location_reference)
-                    
-                    # Vérifier que tous les emplacements appartiennent au warehouse
-                    invalid_locations = [
-                        loc for loc in locations
-                        if loc.sous_zone.zone.warehouse.id != warehouse_id
-                    ]
-                    if invalid_locations:
-                        logger.warning(f"Certains emplacements n'appartiennent pas au warehouse {warehouse.warehouse_name}")
-                        continue
-                    
-                    # Vérifier qu'aucun emplacement n'est déjà affecté à un autre job pour cet inventaire.
-                    # Si c'est le cas, on considère que c'est une erreur de validation bloquante
-                    # (on ne doit PAS ignorer silencieusement cette situation !).
-                    existing_job_details = JobDetail.objects.filter(
-                        location_id__in=emplacement_ids,
-                        job__inventory=inventory
-                    ).exclude(job__reference=job_reference)
-                    
-                    if existing_job_details.exists():
-                        conflicting_locations = [
-                            jd.location.location_reference
-                            for jd in existing_job_details.select_related('location', 'job')
-                        ]
-                        message = (
-                            "Certains emplacements sont déjà affectés à d'autres jobs pour cet inventaire. "
-                            f"Job demandé: {job_reference}, Warehouse: {warehouse.warehouse_name}. "
-                            f"Emplacements en conflit: {', '.join(conflicting_locations)}"
-                        )
-                        logger.error(message)
-                        # On lève une erreur de validation pour annuler TOUT l'import
-                        # et remonter une information claire à l'utilisateur.
-                        raise InventoryLocationJobValidationError(message)
-                    
-                    # Créer le Job avec la référence du fichier Excel
-                    job = Job.objects.create(
-                        reference=job_reference,  # Utiliser la référence du fichier Excel (ex: JOB-0001)
-                        status='EN ATTENTE',
-                        en_attente_date=timezone.now(),
-                        warehouse=warehouse,
-                        inventory=inventory
-                    )
-                    jobs_created += 1
-                    logger.info(f"Job {job.reference} créé pour l'inventaire {inventory.reference} et le warehouse {warehouse.warehouse_name}")
-                    
-                    # Créer les JobDetails selon la logique des comptages.
-                    # IMPORTANT : en cas d'erreur dans la création des JobDetails,
-                    # _create_job_details_for_job lèvera une InventoryLocationJobValidationError,
-                    # ce qui fera échouer toute la transaction (comportement "tout ou rien").
-                    details_count = self._create_job_details_for_job(
-                        job, locations, counting1, counting2
-                    )
-                    job_details_created += details_count
-            
-            return {
-                'jobs_created': jobs_created,
-                'job_details_created': job_details_created
-            }
+            # Les lignes sans job (active = false et job vide) sont ignorées par le matérialiseur.
+            # IMPORTANT : un conflit d'emplacement lève une InventoryLocationJobValidationError,
+            # ce qui fait échouer toute la transaction (comportement "tout ou rien").
+            materializer = LocationJobImportMaterializer(
+                inventory,
+                counting1,
+                counting2,
+                import_task=import_task,
+                chunk_size=CHUNK_SIZE,
+            )
+            return materializer.materialize(validated_data)
             
         except InventoryLocationJobValidationError:
             # Laisser remonter l'erreur de validation pour qu'elle annule l'import complet
@@ -1665,203 +1546,3 @@ class InventoryLocationJobImportService:
             raise InventoryLocationJobValidationError(
                 f"Erreur lors de la création des jobs et job details: {str(e)}"
             )
-    
-    def _create_job_details_for_job(
-        self,
-        job: Job,
-        locations: List[Location],
-        counting1: Counting,
-        counting2: Optional[Counting] = None,
-    ) -> int:
-        """
-        Crée ou met à jour les JobDetails pour un job selon la logique des comptages (UPSERT)
-        Clé unique : (job_id, location_id, counting_id)
-
-        MAGASIN/TOURNANT : counting2=None → JobDetails sur le comptage 1 uniquement.
-        """
-        details_count = 0
-        
-        # Récupérer les JobDetails existants pour ce job
-        location_ids = [loc.id for loc in locations]
-        existing_job_details = JobDetail.objects.filter(
-            job=job,
-            location_id__in=location_ids
-        ).select_related('counting')
-        
-        # Créer un dictionnaire pour un accès rapide : (location_id, counting_id) -> JobDetail
-        existing_map = {
-            (jd.location_id, jd.counting_id): jd
-            for jd in existing_job_details
-        }
-        
-        # Préparer les objets à créer et à mettre à jour
-        objects_to_create = []
-        objects_to_update = []
-
-        # Mono-comptage (MAGASIN / TOURNANT) : JobDetails uniquement sur counting1
-        if counting2 is None:
-            for location in locations:
-                key1 = (location.id, counting1.id)
-                existing_jd1 = existing_map.get(key1)
-                if existing_jd1:
-                    existing_jd1.status = 'EN ATTENTE'
-                    existing_jd1.en_attente_date = timezone.now()
-                    objects_to_update.append(existing_jd1)
-                else:
-                    objects_to_create.append(JobDetail(
-                        location=location,
-                        job=job,
-                        counting=counting1,
-                        status='EN ATTENTE',
-                        en_attente_date=timezone.now()
-                    ))
-                details_count += 1
-        elif counting1.count_mode == "image de stock":
-            # Cas 1: 1er comptage = image de stock
-            # Créer/mettre à jour les emplacements seulement pour le 2ème comptage
-            logger.debug(f"Configuration 'image de stock' détectée pour le job {job.reference}")
-            
-            for location in locations:
-                key = (location.id, counting2.id)
-                existing_jd = existing_map.get(key)
-                
-                if existing_jd:
-                    # Mettre à jour l'existant
-                    existing_jd.status = 'EN ATTENTE'
-                    existing_jd.en_attente_date = timezone.now()
-                    objects_to_update.append(existing_jd)
-                else:
-                    # Créer un nouveau (la référence sera auto‑générée par le modèle)
-                    objects_to_create.append(JobDetail(
-                        location=location,
-                        job=job,
-                        counting=counting2,  # Assigner au 2ème comptage
-                        status='EN ATTENTE',
-                        en_attente_date=timezone.now()
-                    ))
-                details_count += 1
-        else:
-            # Cas 2: 1er comptage différent de "image de stock"
-            # Dupliquer les emplacements pour les deux comptages
-            logger.debug(f"Configuration normale détectée pour le job {job.reference}")
-            
-            for location in locations:
-                # JobDetail pour le 1er comptage
-                key1 = (location.id, counting1.id)
-                existing_jd1 = existing_map.get(key1)
-                
-                if existing_jd1:
-                    existing_jd1.status = 'EN ATTENTE'
-                    existing_jd1.en_attente_date = timezone.now()
-                    objects_to_update.append(existing_jd1)
-                else:
-                    objects_to_create.append(JobDetail(
-                        location=location,
-                        job=job,
-                        counting=counting1,
-                        status='EN ATTENTE',
-                        en_attente_date=timezone.now()
-                    ))
-                details_count += 1
-                
-                # JobDetail pour le 2ème comptage
-                key2 = (location.id, counting2.id)
-                existing_jd2 = existing_map.get(key2)
-                
-                if existing_jd2:
-                    existing_jd2.status = 'EN ATTENTE'
-                    existing_jd2.en_attente_date = timezone.now()
-                    objects_to_update.append(existing_jd2)
-                else:
-                    objects_to_create.append(JobDetail(
-                        location=location,
-                        job=job,
-                        counting=counting2,
-                        status='EN ATTENTE',
-                        en_attente_date=timezone.now()
-                    ))
-                details_count += 1
-        
-        # Effectuer les opérations en masse
-        try:
-            if objects_to_create:
-                # Générer les références et vérifier les doublons
-                existing_references = set(
-                    JobDetail.objects.filter(
-                        reference__in=[obj.reference for obj in objects_to_create if obj.reference]
-                    ).values_list('reference', flat=True)
-                )
-                
-                # Régénérer les références pour les objets qui ont des doublons
-                for obj in objects_to_create:
-                    if obj.reference and obj.reference in existing_references:
-                        # Régénérer la référence jusqu'à ce qu'elle soit unique
-                        max_attempts = 10
-                        attempt = 0
-                        while attempt < max_attempts:
-                            new_reference = JobDetail().generate_reference(JobDetail.REFERENCE_PREFIX)
-                            if not JobDetail.objects.filter(reference=new_reference).exists():
-                                obj.reference = new_reference
-                                existing_references.add(new_reference)
-                                break
-                            attempt += 1
-                        else:
-                            # Si on n'a pas réussi après 10 tentatives, utiliser un UUID complet
-                            import uuid
-                            obj.reference = f"{JobDetail.REFERENCE_PREFIX}-{uuid.uuid4().hex[:16].upper()}"
-                
-                # Créer / mettre à jour les objets un par un.
-                # En cas d'erreur sur un seul JobDetail, on lève une erreur de validation
-                # pour forcer le rollback de toute la transaction (comportement tout ou rien).
-                for obj in objects_to_create:
-                    # Vérifier si un JobDetail existe déjà avec cette combinaison (job, location, counting)
-                    existing_by_key = JobDetail.objects.filter(
-                        job=obj.job,
-                        location=obj.location,
-                        counting=obj.counting
-                    ).first()
-                    
-                    if existing_by_key:
-                        # Mettre à jour l'existant au lieu de créer un nouveau
-                        existing_by_key.status = obj.status
-                        existing_by_key.en_attente_date = obj.en_attente_date
-                        existing_by_key.save(update_fields=['status', 'en_attente_date', 'updated_at'])
-                        logger.debug(
-                            f"JobDetail existant mis à jour pour job={obj.job.reference}, "
-                            f"location={obj.location.location_reference}, counting={obj.counting.reference}"
-                        )
-                    else:
-                        # Générer une référence unique si elle est absente / vide
-                        if not getattr(obj, 'reference', None):
-                            max_attempts = 10
-                            for attempt in range(max_attempts):
-                                new_ref = JobDetail().generate_reference(JobDetail.REFERENCE_PREFIX)
-                                if not JobDetail.objects.filter(reference=new_ref).exists():
-                                    obj.reference = new_ref
-                                    break
-                            else:
-                                raise InventoryLocationJobValidationError(
-                                    "Impossible de générer une référence unique pour un JobDetail"
-                                )
-                        obj.save()
-                    # Chaque création/mise à jour compte pour 1 détail
-                    # (on a déjà incrémenté details_count plus haut)
-            
-            if objects_to_update:
-                JobDetail.objects.bulk_update(
-                    objects_to_update,
-                    ['status', 'en_attente_date', 'updated_at']
-                )
-        
-        except Exception as e:
-            logger.error(
-                f"Erreur lors de la création ou mise à jour des JobDetail pour le job {job.reference}: {str(e)}",
-                exc_info=True
-            )
-            # Faire échouer l'import complet
-            raise InventoryLocationJobValidationError(
-                f"Erreur lors de la création ou mise à jour des JobDetail pour le job {job.reference}: {str(e)}"
-            )
-        
-        return details_count
-
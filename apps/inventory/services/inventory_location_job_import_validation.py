@@ -0,0 +1,95 @@
+"""
+Référentiels préchargés pour la validation de l'import InventoryLocationJob.
+
+La validation ligne à ligne interrogeait la base trois fois par ligne
+(warehouse par nom, lien Setting, emplacement du warehouse). Ces lookups sont
+remplacés par quelques requêtes ``__in`` sur l'ensemble des valeurs du
+fichier, chargées dans des dictionnaires ; les messages d'erreur restent
+identiques à ceux de la validation unitaire.
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+
+from apps.inventory.models import Inventory, Setting
+from apps.masterdata.exceptions import WarehouseNotFoundError
+from apps.masterdata.models import Location, Warehouse
+
+# Nombre maximal de valeurs par clause IN
+LOOKUP_BATCH_SIZE = 10000
+
+
+def _batches(values: List[str]) -> Iterable[List[str]]:
+    for start in range(0, len(values), LOOKUP_BATCH_SIZE):
+        yield values[start:start + LOOKUP_BATCH_SIZE]
+
+
+class LocationJobImportLookups:
+    """
+    Warehouses, liens Setting et emplacements référencés par un fichier d'import.
+
+    Args:
+        inventory: Inventaire cible.
+        warehouse_names: Noms de warehouse présents dans le fichier.
+        location_references: Références d'emplacement présentes dans le fichier.
+    """
+
+    def __init__(self, inventory: Inventory, warehouse_names: Iterable[str], location_references: Iterable[str]):
+        self.inventory = inventory
+        self._warehouses: Dict[str, List[Warehouse]] = defaultdict(list)
+        self._locations: Dict[Tuple[str, int], List[int]] = defaultdict(list)
+        self._known_references: Set[str] = set()
+
+        names = sorted({name for name in warehouse_names if name})
+        for batch in _batches(names):
+            for warehouse in Warehouse.objects.filter(warehouse_name__in=batch):
+                self._warehouses[warehouse.warehouse_name].append(warehouse)
+
+        self._inventory_warehouse_ids = set(
+            Setting.objects.filter(inventory=inventory).values_list('warehouse_id', flat=True)
+        )
+
+        references = sorted({reference for reference in location_references if reference})
+        for batch in _batches(references):
+            rows = Location.objects.filter(
+                location_reference__in=batch,
+                is_deleted=False,
+            ).values_list('id', 'location_reference', 'sous_zone__zone__warehouse_id')
+            for location_id, reference, warehouse_id in rows:
+                self._known_references.add(reference)
+                self._locations[(reference, warehouse_id)].append(location_id)
+
+    @classmethod
+    def from_rows(cls, inventory: Inventory, rows: Iterable[Dict]) -> 'LocationJobImportLookups':
+        """Construit les lookups à partir des lignes brutes du fichier (mêmes normalisations que _validate_row)"""
+        warehouse_names, location_references = set(), set()
+        for row in rows:
+            warehouse_names.add(str(row.get('warehouse', '')).strip())
+            location_references.add(str(row.get('emplacement', '')).strip())
+        return cls(inventory, warehouse_names, location_references)
+
+    def get_warehouse(self, name: str) -> Warehouse:
+        """
+        Équivalent en mémoire de WarehouseRepository.get_by_name.
+
+        Raises:
+            WarehouseNotFoundError: Warehouse absent ou nom ambigu (mêmes messages).
+        """
+        matches = self._warehouses.get(name, [])
+        if not matches:
+            raise WarehouseNotFoundError(f"Entrepôt avec le nom '{name}' non trouvé.")
+        if len(matches) > 1:
+            raise WarehouseNotFoundError(
+                f"Plusieurs entrepôts trouvés avec le nom '{name}'. Veuillez utiliser la référence."
+            )
+        return matches[0]
+
+    def warehouse_in_inventory(self, warehouse: Warehouse) -> bool:
+        return warehouse.id in self._inventory_warehouse_ids
+
+    def get_location_ids(self, reference: str, warehouse_id: int) -> List[int]:
+        """Ids des emplacements non supprimés de cette référence dans le warehouse"""
+        return self._locations.get((reference, warehouse_id), [])
+
+    def location_exists(self, reference: str) -> bool:
+        """L'emplacement existe-t-il dans un warehouse quelconque"""
+        return reference in self._known_references
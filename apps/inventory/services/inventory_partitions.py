@@ -0,0 +1,110 @@
+"""
+Partitions par inventaire des tables de comptage.
+
+CountingDetail, ComptageSequence et leurs tables historiques sont
+partitionnées par liste sur ``inventory_id`` (migration 0035, voir
+apps.core.partitioning) :
+
+- la partition d'un inventaire est créée à la création de l'inventaire
+  (signal, après commit) ; d'ici là ses lignes vont dans la partition par
+  défaut et y sont reprises à la création ;
+- l'archivage d'un inventaire détache puis supprime ses partitions au lieu
+  de supprimer les lignes une à une (InventoryArchiveService) ;
+- les requêtes filtrées sur ``inventory_id`` ne lisent que la partition de
+  l'inventaire (élagage par le planificateur).
+
+Commande de maintenance : ``python manage.py inventory_partitions``.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Dict, List, Optional
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from simple_history.utils import get_history_model_for_model
+
+from apps.core import partitioning
+
+from ..models import ComptageSequence, CountingDetail
+
+logger = logging.getLogger(__name__)
+
+PARTITION_KEY = 'inventory_id'
+
+# Ordre de suppression : ComptageSequence référence CountingDetail (clé composite)
+PARTITIONED_MODELS = (ComptageSequence, CountingDetail)
+
+
+def partitioned_tables() -> List[str]:
+    """Tables partitionnées par inventaire (historiques comprises), dans l'ordre de suppression."""
+    tables = [get_history_model_for_model(model)._meta.db_table for model in PARTITIONED_MODELS]
+    return tables + [model._meta.db_table for model in PARTITIONED_MODELS]
+
+
+def create_inventory_partitions(inventory_id: int, using: str = DEFAULT_DB_ALIAS) -> List[str]:
+    """
+    Crée les partitions d'un inventaire (lignes déjà en partition par défaut reprises).
+
+    Returns:
+        Tables pour lesquelles une partition a été créée
+    """
+    with transaction.atomic(using=using):
+        created = partitioning.create_partitions(
+            connections[using], partitioned_tables(), PARTITION_KEY, inventory_id,
+        )
+    if created:
+        logger.info("Partitions de l'inventaire %s créées : %s", inventory_id, ', '.join(created))
+    return created
+
+
+def schedule_inventory_partitions(inventory_id: int, using: str = DEFAULT_DB_ALIAS) -> None:
+    """
+    Crée les partitions après le commit de la transaction courante : la
+    création verrouille la table parente, le verrou n'est pas gardé pendant
+    toute la transaction de création de l'inventaire.
+    """
+    def create():
+        try:
+            create_inventory_partitions(inventory_id, using=using)
+        except Exception:
+            # Les lignes restent dans la partition par défaut ; reprise par
+            # ``inventory_partitions --ensure``.
+            logger.exception("Création des partitions de l'inventaire %s impossible", inventory_id)
+
+    transaction.on_commit(create, using=using)
+
+
+def drop_inventory_partition(table: str, inventory_id: int, using: str = DEFAULT_DB_ALIAS) -> Optional[int]:
+    """
+    Détache puis supprime la partition d'un inventaire.
+
+    Returns:
+        Nombre de lignes supprimées, None si l'inventaire n'a pas de partition
+    """
+    return partitioning.drop_partition(connections[using], table, inventory_id)
+
+
+def drop_inventory_partitions(inventory_id: int, using: str = DEFAULT_DB_ALIAS) -> Dict[str, int]:
+    """Supprime toutes les partitions d'un inventaire : {table: lignes supprimées}."""
+    dropped = {}
+    with transaction.atomic(using=using):
+        for table in partitioned_tables():
+            rows = drop_inventory_partition(table, inventory_id, using=using)
+            if rows is not None:
+                dropped[table] = rows
+    return dropped
+
+
+def inventories_with_partitions(using: str = DEFAULT_DB_ALIAS) -> List[int]:
+    """Inventaires ayant une partition dans au moins une des tables."""
+    connection = connections[using]
+    return sorted({
+        inventory_id
+        for table in partitioned_tables()
+        for inventory_id in partitioning.partition_values(connection, table)
+    })
+
+
+def has_partitioned_rows(inventory_id: int, using: str = DEFAULT_DB_ALIAS) -> bool:
+    connection = connections[using]
+    return any(partitioning.partition_has_rows(connection, table, inventory_id) for table in partitioned_tables())
@@ -0,0 +1,217 @@
+"""
+Maintenance de la table matérialisée InventoryResult.
+
+- ``InventoryResultMaterializer.rebuild`` : reconstruction complète d'un
+  inventaire (ou d'un entrepôt) ;
+- ``InventoryResultMaterializer.refresh_locations`` : recalcul des seuls
+  emplacements touchés ;
+- ``mark_inventory_results_dirty`` : signale des comptages / écarts modifiés.
+  Les emplacements concernés sont rafraîchis au commit de la transaction
+  (immédiatement en autocommit), une seule fois par transaction.
+
+Les écritures unitaires (save / delete) sont signalées par les signaux de
+``apps.inventory.signals`` ; les chemins bulk (bulk_create, bulk_update,
+QuerySet.update) doivent appeler ``mark_inventory_results_dirty`` explicitement,
+comme ``record_bulk_history`` pour l'historique.
+"""
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from django.db import transaction
+
+from apps.core.commit_buffer import OnCommitBatchBuffer, PendingBatch
+from apps.core.db_routing import primary_pinning
+
+from ..models import ComptageSequence, Counting, CountingDetail, Job
+from ..repositories.inventory_result_repository import InventoryResultRepository
+
+logger = logging.getLogger(__name__)
+
+
+class InventoryResultMaterializer:
+    """
+    Service de construction et de rafraîchissement de la table InventoryResult.
+    """
+
+    def __init__(self, repository: Optional[InventoryResultRepository] = None) -> None:
+        self.repository = repository or InventoryResultRepository()
+
+    def rebuild(self, inventory_id: int, warehouse_id: Optional[int] = None) -> Dict[int, int]:
+        """
+        Reconstruit entièrement les résultats d'un inventaire.
+
+        Args:
+            inventory_id: Identifiant de l'inventaire
+            warehouse_id: Entrepôt unique (défaut : tous les entrepôts de l'inventaire)
+
+        Returns:
+            Dict[int, int]: Nombre de lignes écrites par entrepôt
+        """
+        if warehouse_id is not None:
+            warehouse_ids = [warehouse_id]
+        else:
+            warehouse_ids = sorted(set(
+                Job.objects.filter(inventory_id=inventory_id).values_list('warehouse_id', flat=True)
+            ))
+
+        written = {}
+        for wid in warehouse_ids:
+            with transaction.atomic():
+                rows = self.repository.compute_rows(inventory_id, [wid])
+                written[wid] = self.repository.replace_rows(inventory_id, [wid], rows)
+                self.repository.mark_built(inventory_id, wid)
+            logger.info(
+                "Résultats matérialisés : %s ligne(s) pour inventory_id=%s, warehouse_id=%s",
+                written[wid], inventory_id, wid,
+            )
+        return written
+
+    def ensure_built(self, inventory_id: int, warehouse_id: int) -> None:
+        """
+        Construit les résultats d'un entrepôt s'ils ne l'ont jamais été.
+
+        Le marqueur est lu sur ``default`` même depuis un service de reporting :
+        la réplique peut ne pas encore voir une construction récente. La
+        reconstruction reste dans la portée de l'appelant, dont les lectures
+        suivantes sont ainsi épinglées sur ``default``.
+        """
+        with primary_pinning(pinned=True):
+            built = self.repository.is_built(inventory_id, warehouse_id)
+        if not built:
+            self.rebuild(inventory_id, warehouse_id)
+
+    def refresh_locations(self, inventory_id: int, location_ids: Iterable[int]) -> int:
+        """
+        Recalcule les lignes des emplacements donnés.
+
+        Seuls les entrepôts déjà construits sont rafraîchis : les autres le
+        seront entièrement à leur première lecture.
+
+        Returns:
+            int: Nombre de lignes écrites
+        """
+        location_ids = set(location_ids)
+        warehouse_ids = self.repository.get_built_warehouse_ids(inventory_id)
+        if not location_ids or not warehouse_ids:
+            return 0
+        with transaction.atomic():
+            rows = self.repository.compute_rows(inventory_id, warehouse_ids, location_ids)
+            return self.repository.replace_rows(inventory_id, warehouse_ids, rows, location_ids)
+
+
+class InventoryResultRefreshBuffer(OnCommitBatchBuffer):
+    """
+    Rafraîchissements d'InventoryResult accumulés par transaction, faits au
+    commit (apps.core.commit_buffer). Un rafraîchissement recalcule l'état
+    courant des emplacements : le rejouer ou le faire en trop est sans effet
+    sur le résultat.
+    """
+
+    fields = ("warehouses", "counting_locations", "counting_detail_ids", "ecart_ids")
+    # Les comptages sont déjà commités : la table sera corrigée par
+    # rebuild_inventory_results, on ne fait pas échouer l'appelant.
+    error_message = "Rafraîchissement des résultats d'inventaire impossible"
+
+    def __init__(self, materializer: Optional[InventoryResultMaterializer] = None):
+        super().__init__()
+        self._materializer = materializer
+
+    @property
+    def materializer(self) -> InventoryResultMaterializer:
+        if self._materializer is None:
+            self._materializer = InventoryResultMaterializer()
+        return self._materializer
+
+    def mark(
+        self,
+        warehouses: Iterable[Tuple[int, int]] = (),
+        counting_details: Iterable[CountingDetail] = (),
+        counting_detail_ids: Iterable[int] = (),
+        ecart_ids: Iterable[int] = (),
+        using: Optional[str] = None,
+    ) -> None:
+        self.add(
+            using=using,
+            warehouses=warehouses,
+            counting_locations=[(detail.counting_id, detail.location_id) for detail in counting_details],
+            counting_detail_ids=counting_detail_ids,
+            ecart_ids=ecart_ids,
+        )
+
+    def process(self, batch: PendingBatch) -> None:
+        for inventory_id, warehouse_id in sorted(batch.warehouses):
+            if self.materializer.repository.is_built(inventory_id, warehouse_id):
+                self.materializer.rebuild(inventory_id, warehouse_id)
+        for inventory_id, location_ids in _resolve_locations(batch).items():
+            self.materializer.refresh_locations(inventory_id, location_ids)
+
+
+def _resolve_locations(pending: PendingBatch) -> Dict[int, Set[int]]:
+    """Emplacements à rafraîchir, par inventaire"""
+    locations: Dict[int, Set[int]] = defaultdict(set)
+
+    if pending.counting_locations:
+        inventory_by_counting = dict(
+            Counting._base_manager.using(pending.using)
+            .filter(id__in={counting_id for counting_id, _ in pending.counting_locations})
+            .values_list('id', 'inventory_id')
+        )
+        for counting_id, location_id in pending.counting_locations:
+            inventory_id = inventory_by_counting.get(counting_id)
+            if inventory_id is not None:
+                locations[inventory_id].add(location_id)
+
+    if pending.counting_detail_ids:
+        rows = (
+            CountingDetail._base_manager.using(pending.using)
+            .filter(id__in=pending.counting_detail_ids)
+            .values_list('inventory_id', 'location_id')
+        )
+        for inventory_id, location_id in rows:
+            locations[inventory_id].add(location_id)
+
+    if pending.ecart_ids:
+        rows = (
+            ComptageSequence._base_manager.using(pending.using)
+            .filter(ecart_comptage_id__in=pending.ecart_ids)
+            .values_list('ecart_comptage__inventory_id', 'counting_detail__location_id')
+        )
+        for inventory_id, location_id in rows:
+            locations[inventory_id].add(location_id)
+
+    return locations
+
+
+inventory_results_buffer = InventoryResultRefreshBuffer()
+
+
+def mark_inventory_results_dirty(
+    warehouses: Iterable[Tuple[int, int]] = (),
+    counting_details: Iterable[CountingDetail] = (),
+    counting_detail_ids: Iterable[int] = (),
+    ecart_ids: Iterable[int] = (),
+    using: Optional[str] = None,
+) -> None:
+    """
+    Signale des comptages ou des écarts modifiés ; les emplacements concernés
+    seront recalculés dans InventoryResult au commit.
+
+    Args:
+        warehouses: Couples (inventaire, entrepôt) à reconstruire entièrement
+            (opérations de masse sur tout un entrepôt)
+        counting_details: CountingDetail créés / modifiés / supprimés
+            (seuls ``counting_id`` et ``location_id`` sont lus)
+        counting_detail_ids: Identifiants de CountingDetail (séquences d'écart modifiées)
+        ecart_ids: Identifiants d'EcartComptage modifiés
+        using: Alias de base
+    """
+    inventory_results_buffer.mark(
+        warehouses=warehouses,
+        counting_details=counting_details,
+        counting_detail_ids=counting_detail_ids,
+        ecart_ids=ecart_ids,
+        using=using,
+    )
@@ -1,20 +1,27 @@
 """
 Service pour le calcul des résultats d'inventaire par entrepôt et par comptage.
+
+Les quantités et résultats d'écart sont lus dans la table matérialisée
+InventoryResult (voir ``inventory_result_materializer``).
 """
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional
 
+from apps.core.db_routing import reporting_service
 from ..exceptions import InventoryNotFoundError, InventoryValidationError
-from ..models import Setting
+from ..models import InventoryArchive, Setting
 from ..repositories import (
     CountingRepository,
     InventoryRepository,
     WarehouseRepository,
 )
+from ..repositories.inventory_result_repository import InventoryResultRepository
+from .inventory_result_materializer import InventoryResultMaterializer
 
 
+@reporting_service
 class InventoryResultService:
     """
     Service responsable de l'agrégation des résultats de comptage par entrepôt.
@@ -25,10 +32,13 @@ class InventoryResultService:
         counting_repository: Optional[CountingRepository] = None,
         inventory_repository: Optional[InventoryRepository] = None,
         warehouse_repository: Optional[WarehouseRepository] = None,
+        result_repository: Optional[InventoryResultRepository] = None,
     ) -> None:
         self.counting_repository = counting_repository or CountingRepository()
         self.inventory_repository = inventory_repository or InventoryRepository()
         self.warehouse_repository = warehouse_repository or WarehouseRepository()
+        self.result_repository = result_repository or InventoryResultRepository()
+        self.materializer = InventoryResultMaterializer(self.result_repository)
         self.logger = logging.getLogger(__name__)
 
     def get_inventory_results_for_warehouse(
@@ -56,6 +66,11 @@ class InventoryResultService:
             )
             raise exc
 
+        if InventoryArchive.objects.filter(inventory_id=inventory_id).exists():
+            raise InventoryValidationError(
+                "Inventaire archivé : résultats disponibles via .../archive/results/."
+            )
+
         # Vérifier que l'entrepôt existe et est associé à cet inventaire
         from apps.masterdata.models import Warehouse
         try:
@@ -123,51 +138,58 @@ class InventoryResultService:
 
         mode = modes.pop()
 
-        aggregated_rows = self.counting_repository.get_inventory_results_by_warehouse(
+        # Lecture de la table matérialisée (construite à la première lecture)
+        self.materializer.ensure_built(inventory_id, warehouse_id)
+        materialized_rows = self.result_repository.get_rows_for_warehouse(
             inventory_id=inventory_id,
             warehouse_id=warehouse_id,
         )
 
-        self.logger.debug(f"📊 Nombre de lignes agrégées récupérées: {len(aggregated_rows)}")
-
-        max_order_global = 0
-        entries: Dict[Tuple[int, Optional[int], Optional[int]], Dict[str, Any]] = {}
+        self.logger.debug(f"📊 Nombre de lignes matérialisées récupérées: {len(materialized_rows)}")
 
-        if not aggregated_rows:
+        if not materialized_rows:
             self.logger.warning(
                 f"⚠️ Aucune donnée agrégée trouvée pour inventory_id={inventory_id}, warehouse_id={warehouse_id}"
             )
             return []
 
-        for row in aggregated_rows:
-            entry_key: Tuple[int, Optional[int], Optional[int]] = (
-                row["location_id"],
-                row.get("product_id"),
-                row.get("job_id"),
-            )
+        # Les statuts d'affectation ne sont pas matérialisés (ils évoluent sans toucher aux comptages)
+        assignment_statuses_by_job = self.result_repository.get_assignment_statuses(
+            inventory_id=inventory_id,
+            warehouse_id=warehouse_id,
+        )
 
-            entry_data = entries.setdefault(
-                entry_key,
-                {
-                    "location": {
-                        "id": row["location_id"],
-                        "reference": row["location_reference_alias"],
-                        "code": row["location_code_alias"],
-                    },
-                    "job": {
-                        "id": row.get("job_id"),
-                        "reference": row.get("job_reference_alias"),
-                        "status": row.get("job_status_alias"),
-                    },
-                    "product": None,
-                    "quantities": {},
-                    "assignment_statuses": {},  # Stocker le statut de l'assignment par ordre de comptage
-                    "final_result": None,  # Stocker le final_result depuis EcartComptage
-                    "ecart_id": row.get("ecart_id_alias"),
-                    "resolved": None,  # Stocker le resolved depuis EcartComptage
-                    "manual_result": None,  # Stocker le manual_result depuis EcartComptage
+        max_order_global = 0
+        entries: List[Dict[str, Any]] = []
+
+        for row in materialized_rows:
+            quantities = {int(order): quantity for order, quantity in row["quantities"].items()}
+            job_id = row["job_id"]
+
+            entry_data: Dict[str, Any] = {
+                "location": {
+                    "id": row["location_id"],
+                    "reference": row["location_reference_alias"],
+                    "code": row["location_code_alias"],
                 },
-            )
+                "job": {
+                    "id": job_id,
+                    "reference": row.get("job_reference_alias"),
+                    "status": row.get("job_status_alias"),
+                },
+                "product": None,
+                "quantities": quantities,
+                # Statut de l'assignment par ordre de comptage (ordres comptés uniquement)
+                "assignment_statuses": {
+                    order: assignment_statuses_by_job[(job_id, order)]
+                    for order in quantities
+                    if assignment_statuses_by_job.get((job_id, order))
+                },
+                "final_result": row.get("final_result"),
+                "ecart_id": row.get("ecart_comptage_id"),
+                "resolved": row.get("resolved"),
+                "manual_result": row.get("manual_result"),
+            }
 
             if row.get("product_id"):
                 entry_data["product"] = {
@@ -178,33 +200,13 @@ class InventoryResultService:
                     "family_name": row.get("product_family_name_alias"),
                 }
 
-            order = row["counting_order_alias"]
-            quantity = row["total_quantity"] or 0
-            entry_data["quantities"][order] = quantity
-            # Stocker le statut de l'assignment pour cet ordre de comptage
-            assignment_status = row.get("assignment_status_alias")
-            if assignment_status:
-                entry_data["assignment_statuses"][order] = assignment_status
-            max_order_global = max(max_order_global, order)
-            
-            # Mettre à jour le final_result si disponible (sera le même pour tous les ordres)
-            if row.get("final_result_agg") is not None:
-                entry_data["final_result"] = row["final_result_agg"]
-            
-            # Mettre à jour le resolved si disponible (sera le même pour tous les ordres)
-            # Convertir 0/1 en False/True car PostgreSQL retourne un entier après MAX(Cast(...))
-            if row.get("resolved_agg") is not None:
-                entry_data["resolved"] = bool(row["resolved_agg"])
-            
-            # Mettre à jour le manual_result si disponible (sera le même pour tous les ordres)
-            # Convertir 0/1 en False/True car PostgreSQL retourne un entier après MAX(Cast(...))
-            if row.get("manual_result_agg") is not None:
-                entry_data["manual_result"] = bool(row["manual_result_agg"])
+            max_order_global = max(max_order_global, row["max_counting_order"])
+            entries.append(entry_data)
 
         formatted_results: List[Dict[str, Any]] = []
 
         for entry in sorted(
-            entries.values(),
+            entries,
             key=lambda item: (
                 item["location"]["reference"] or "",
                 item["product"]["reference"] if item["product"] else "",
@@ -0,0 +1,106 @@
+"""
+Agrégats par job pour les écrans d'écarts (JobDiscrepancyService).
+
+Le calcul job par job exécutait plusieurs requêtes par job (nombre de
+JobDetails, affectations lues deux fois, ComptageSequence par job et par
+ordre de comptage) et chargeait chaque CountingDetail avec ses relations.
+Ici, chaque agrégat est une requête GROUP BY sur l'ensemble des jobs d'un
+(inventaire, entrepôt), filtrée par sous-requête sur les jobs : le nombre de
+requêtes ne dépend plus du nombre de jobs.
+"""
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set
+
+from django.db.models import Count, Sum
+
+from ..models import Assigment, ComptageSequence, CountingDetail, Job
+
+
+class JobDiscrepancyAggregates:
+    """
+    Requêtes groupées sur les jobs d'un inventaire et d'un entrepôt.
+
+    Args:
+        inventory_id: ID de l'inventaire
+        warehouse_id: ID de l'entrepôt
+        status: Statut des jobs à retenir (tous si None)
+    """
+
+    def __init__(self, inventory_id: int, warehouse_id: int, status: Optional[str] = None):
+        self.inventory_id = inventory_id
+        jobs = Job.objects.filter(inventory_id=inventory_id, warehouse_id=warehouse_id)
+        if status:
+            jobs = jobs.filter(status=status)
+        self._jobs = jobs
+
+    def _job_ids(self):
+        """Sous-requête des jobs retenus (évite une clause IN de plusieurs milliers d'ids)"""
+        return self._jobs.values('id')
+
+    def jobs(self) -> List[Dict[str, Any]]:
+        """Jobs triés par référence : id, reference, status"""
+        return list(self._jobs.order_by('reference').values('id', 'reference', 'status'))
+
+    def assignments(self) -> Dict[int, List[Dict[str, Any]]]:
+        """Affectations rattachées à un comptage, par job : status, counting_order, username"""
+        assignments = defaultdict(list)
+        rows = (
+            Assigment.objects.filter(job_id__in=self._job_ids(), counting__isnull=False)
+            .order_by('id')
+            .values_list('job_id', 'status', 'counting__order', 'session__username')
+        )
+        for job_id, status, counting_order, username in rows:
+            assignments[job_id].append({
+                'status': status,
+                'counting_order': counting_order,
+                'username': username,
+            })
+        return assignments
+
+    def quantities(self) -> Dict[int, Dict[int, Dict[int, int]]]:
+        """
+        Quantités comptées par job, ordre de comptage et emplacement
+        (somme de tous les produits de l'emplacement, comme CountingDetailAggregated).
+        """
+        quantities = defaultdict(lambda: defaultdict(dict))
+        rows = (
+            CountingDetail.objects.filter(
+                job_id__in=self._job_ids(),
+                counting__inventory_id=self.inventory_id,
+            )
+            .values('job_id', 'counting__order', 'location_id')
+            .annotate(total=Sum('quantity_inventoried'))
+            .values_list('job_id', 'counting__order', 'location_id', 'total')
+        )
+        for job_id, counting_order, location_id, total in rows:
+            quantities[job_id][counting_order][location_id] = total
+        return quantities
+
+    def unresolved_counting_orders(self) -> Dict[int, Set[int]]:
+        """Ordres de comptage ayant au moins un écart sans résultat final, par job"""
+        orders = defaultdict(set)
+        rows = (
+            ComptageSequence.objects.filter(
+                counting_detail__job_id__in=self._job_ids(),
+                ecart_comptage__isnull=False,
+                ecart_comptage__final_result__isnull=True,
+            )
+            .values_list('counting_detail__job_id', 'counting_detail__counting__order')
+            .distinct()
+        )
+        for job_id, counting_order in rows:
+            orders[job_id].add(counting_order)
+        return orders
+
+    def unresolved_location_counts(self) -> Dict[int, int]:
+        """Nombre d'emplacements distincts ayant un écart sans résultat final, par job"""
+        return dict(
+            ComptageSequence.objects.filter(
+                counting_detail__job_id__in=self._job_ids(),
+                ecart_comptage__isnull=False,
+                ecart_comptage__final_result__isnull=True,
+            )
+            .values('counting_detail__job_id')
+            .annotate(total=Count('counting_detail__location_id', distinct=True))
+            .values_list('counting_detail__job_id', 'total')
+        )
@@ -1,6 +1,7 @@
 from typing import List, Dict, Any
 import logging
 from io import BytesIO
+from apps.core.db_routing import reporting_service
 from ..repositories.job_export_repository import JobExportRepository
 from ..exceptions.job_exceptions import JobCreationError
 from ..exceptions.inventory_exceptions import InventoryNotFoundError
@@ -9,6 +10,7 @@ from ..exceptions.warehouse_exceptions import WarehouseNotFoundError
 logger = logging.getLogger(__name__)
 
 
+@reporting_service
 class JobExportService:
     """
     Service pour l'export des jobs prêts
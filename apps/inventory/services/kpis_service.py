@@ -8,6 +8,7 @@ from typing import Any, Dict, Optional, Tuple, TypedDict
 
 from django.db.models import Q
 
+from apps.core.db_routing import reporting_service
 from ..exceptions.job_exceptions import JobCreationError
 from ..repositories.kpis_repository import KpiContext, KpisRepository
 
@@ -168,6 +169,7 @@ def _bucket_payload(
     )
 
 
+@reporting_service
 class KpisService:
     """Calcule les indicateurs pour un magasin ou pour tout l'inventaire."""
 
@@ -18,6 +18,7 @@ from django.utils import timezone
 from apps.inventory.constants import InventoryType, StockGapGrouping
 from apps.inventory.exceptions.job_exceptions import JobCreationError
 from apps.inventory.models import Assigment, Counting, CountingDetail, Job, JobDetail
+from apps.inventory.services.inventory_result_materializer import mark_inventory_results_dirty
 from apps.masterdata.models import Product
 
 logger = logging.getLogger(__name__)
@@ -206,6 +207,7 @@ class MagasinJobsForceCompleteService:
                         CountingDetail.REFERENCE_PREFIX
                     )
             CountingDetail.objects.bulk_update(to_create, ["reference"])
+            mark_inventory_results_dirty(counting_details=to_create)
             detail["counting_details_created"] = len(to_create)
 
         # 2) JobDetails → TERMINE
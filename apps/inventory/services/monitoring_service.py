@@ -3,6 +3,7 @@ Service pour le monitoring par zone
 """
 import logging
 from typing import Dict, Any, List
+from apps.core.db_routing import reporting_service
 from ..repositories.job_repository import JobRepository
 from ..models import Job, Assigment, Counting, JobDetail
 from ..exceptions.job_exceptions import JobCreationError
@@ -10,6 +11,7 @@ from ..exceptions.job_exceptions import JobCreationError
 logger = logging.getLogger(__name__)
 
 
+@reporting_service
 class MonitoringService:
     """
     Service pour calculer les statistiques de monitoring par zone
@@ -69,29 +71,40 @@ class MonitoringService:
                 order__in=[1, 2, 3]
             ).only('id', 'reference', 'order').order_by('order')
 
-            # Construire les statistiques par zone
-            zone_stats = []
-
-            for zone in zones:
-                # Compter le nombre de jobs distincts qui ont des jobdetails dans cette zone
-                nombre_jobs = Job.objects.filter(
+            # Agrégats groupés par zone (une requête chacun, quel que soit le nombre de zones)
+            # Nombre de jobs distincts qui ont des jobdetails dans chaque zone
+            jobs_by_zone = dict(
+                Job.objects.filter(
                     inventory_id=inventory_id,
                     warehouse_id=warehouse_id,
-                    jobdetail__location__sous_zone__zone_id=zone.id
-                ).distinct().count()
+                ).values_list('jobdetail__location__sous_zone__zone_id')
+                .annotate(total=Count('id', distinct=True))
+                .order_by()
+            )
 
-                # Compter le nombre d'emplacements (jobdetails) dans cette zone
-                nombre_emplacements = JobDetail.objects.filter(
+            # Nombre d'emplacements (jobdetails) dans chaque zone
+            locations_by_zone = dict(
+                JobDetail.objects.filter(
                     job__inventory_id=inventory_id,
                     job__warehouse_id=warehouse_id,
-                    location__sous_zone__zone_id=zone.id
-                ).values('location').distinct().count()
+                ).values_list('location__sous_zone__zone_id')
+                .annotate(total=Count('location', distinct=True))
+                .order_by()
+            )
+
+            assignment_counts = self._get_assignment_status_counts_by_zone(
+                inventory_id, warehouse_id, countings
+            )
 
+            # Construire les statistiques par zone
+            zone_stats = []
+
+            for zone in zones:
                 # Calculer les statistiques détaillées par comptage
                 counting_stats = []
                 for counting in countings:
                     counting_detail = self._get_counting_assignment_stats_by_zone(
-                        inventory_id, warehouse_id, zone.id, counting
+                        counting, assignment_counts.get((zone.id, counting.id), {})
                     )
                     counting_stats.append(counting_detail)
 
@@ -99,8 +112,8 @@ class MonitoringService:
                     'zone_id': zone.id,
                     'zone_reference': zone.reference,
                     'zone_name': zone.zone_name,
-                    'nombre_jobs': nombre_jobs,
-                    'nombre_emplacements': nombre_emplacements,
+                    'nombre_jobs': jobs_by_zone.get(zone.id, 0),
+                    'nombre_emplacements': locations_by_zone.get(zone.id, 0),
                     'countings': counting_stats
                 })
 
@@ -236,44 +249,56 @@ class MonitoringService:
                 f"Erreur lors du calcul du monitoring global: {str(e)}"
             )
     
-    def _get_counting_assignment_stats_by_zone(
+    def _get_assignment_status_counts_by_zone(
         self,
         inventory_id: int,
         warehouse_id: int,
-        zone_id: int,
-        counting: Counting
-    ) -> Dict[str, Any]:
+        countings
+    ) -> Dict[tuple, Dict[str, int]]:
         """
-        Récupère les statistiques des assignments pour un comptage spécifique dans une zone.
+        Compte les assignments par (zone, comptage) et par statut, en une requête.
 
-        Args:
-            inventory_id: ID de l'inventaire
-            warehouse_id: ID de l'entrepôt
-            zone_id: ID de la zone
-            counting: Instance du comptage
+        Un job peut avoir un seul assignment par comptage, mais plusieurs emplacements
+        dans différentes zones : un assignment est compté une fois dans chaque zone
+        où son job a des emplacements.
 
         Returns:
-            Dictionnaire avec les statistiques d'assignments pour ce comptage
+            Dictionnaire {(zone_id, counting_id): {status: count}}
         """
         from django.db.models import Count
 
-        # Compter les assignments par statut pour ce comptage dans cette zone
-        # Un job peut avoir un seul assignment par comptage, mais plusieurs emplacements dans différentes zones
-        # Il faut compter les jobs distincts qui ont des emplacements dans cette zone
-        job_ids_in_zone = Job.objects.filter(
-            inventory_id=inventory_id,
-            warehouse_id=warehouse_id,
-            jobdetail__location__sous_zone__zone_id=zone_id
-        ).values_list('id', flat=True).distinct()
+        rows = (
+            Assigment.objects.filter(
+                job__inventory_id=inventory_id,
+                job__warehouse_id=warehouse_id,
+                job__is_deleted=False,
+                counting_id__in=[counting.id for counting in countings],
+            )
+            .values_list('job__jobdetail__location__sous_zone__zone_id', 'counting_id', 'status')
+            .annotate(count=Count('id', distinct=True))
+            .order_by()
+        )
 
-        job_stats = Assigment.objects.filter(
-            job_id__in=job_ids_in_zone,
-            counting_id=counting.id
-        ).values('status').annotate(count=Count('id')).order_by('status')
+        counts: Dict[tuple, Dict[str, int]] = {}
+        for zone_id, counting_id, status, count in rows:
+            counts.setdefault((zone_id, counting_id), {})[status] = count
+        return counts
 
-        # Créer un dictionnaire des comptages par statut
-        status_counts = {stat['status']: stat['count'] for stat in job_stats}
+    def _get_counting_assignment_stats_by_zone(
+        self,
+        counting: Counting,
+        status_counts: Dict[str, int]
+    ) -> Dict[str, Any]:
+        """
+        Statistiques des assignments pour un comptage spécifique dans une zone.
+
+        Args:
+            counting: Instance du comptage
+            status_counts: Nombre d'assignments par statut pour ce comptage dans la zone
 
+        Returns:
+            Dictionnaire avec les statistiques d'assignments pour ce comptage
+        """
         # Calculer le total des assignments pour ce comptage dans cette zone
         total_assignments = sum(status_counts.values())
 
@@ -0,0 +1,117 @@
+"""
+Numéros de série saisis au comptage (NSerieInventory), traités par lot.
+
+- Validation : les numéros d'un produit sont confrontés à masterdata.NSerie en
+  une requête (NSerieBulkService.existing_serials), et non un ``exists()`` par
+  numéro.
+- Écriture : les ids sont réservés sur la séquence de la table en une requête,
+  les références définitives (``ReferenceMixin.generate_reference``, format
+  avec id) sont calculées avant l'insertion ; un seul ``bulk_create`` par lot,
+  sans second passage ``bulk_update`` des références.
+- Un même numéro n'est enregistré qu'une fois par CountingDetail (doublons de
+  la saisie et numéros déjà rattachés ignorés).
+"""
+from __future__ import annotations
+
+import logging
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from apps.core.history import HISTORY_CREATED, record_bulk_history
+from apps.core.upsert import DEFAULT_BATCH_SIZE
+from apps.masterdata.services.nserie_bulk_service import NSerieBulkService, normalize_serial
+
+from ..models import CountingDetail, NSerieInventory
+
+logger = logging.getLogger(__name__)
+
+
+def unknown_serials(product_id: int, serials: Iterable[str]) -> List[str]:
+    """
+    Numéros absents de masterdata.NSerie pour ce produit (une requête).
+
+    Returns:
+        Numéros inconnus, dans l'ordre de saisie
+    """
+    serials = [normalize_serial(serial) for serial in serials]
+    known = NSerieBulkService().existing_serials(product_id, serials)
+    return [serial for serial in serials if serial not in known]
+
+
+def _allocate_ids(count: int, using: str) -> Optional[List[int]]:
+    """Réserve ``count`` ids sur la séquence de NSerieInventory (PostgreSQL)."""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    opts = NSerieInventory._meta
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)",
+            [opts.db_table, opts.pk.column, count],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def attach_serials(
+    items: Sequence[Tuple[CountingDetail, Iterable[str]]],
+    replace: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Dict[int, List[NSerieInventory]]:
+    """
+    Rattache des numéros de série à des CountingDetail en bulk.
+
+    Args:
+        items: Couples (CountingDetail, numéros saisis)
+        replace: Supprime d'abord les numéros déjà rattachés à ces CountingDetail
+            (resynchronisation mobile) ; sinon ils sont conservés et non dupliqués
+        batch_size: Lignes par requête d'insertion
+
+    Returns:
+        Dict[int, List[NSerieInventory]]: counting_detail_id -> numéros créés
+    """
+    using = router.db_for_write(NSerieInventory)
+    detail_ids = [counting_detail.id for counting_detail, _ in items]
+    created: Dict[int, List[NSerieInventory]] = {detail_id: [] for detail_id in detail_ids}
+    if not items:
+        return created
+
+    with transaction.atomic(using=using):
+        existing: Set[Tuple[int, str]] = set()
+        if replace:
+            NSerieInventory.objects.filter(counting_detail_id__in=detail_ids).delete()
+        else:
+            existing = set(
+                NSerieInventory.objects.filter(counting_detail_id__in=detail_ids)
+                .values_list('counting_detail_id', 'n_serie')
+            )
+
+        to_create: List[NSerieInventory] = []
+        for counting_detail, serials in items:
+            for serial in serials:
+                serial = normalize_serial(serial)
+                key = (counting_detail.id, serial)
+                if not serial or key in existing:
+                    continue
+                existing.add(key)
+                nserie = NSerieInventory(n_serie=serial, counting_detail=counting_detail)
+                to_create.append(nserie)
+                created[counting_detail.id].append(nserie)
+
+        if not to_create:
+            return created
+
+        ids = _allocate_ids(len(to_create), using)
+        now = timezone.now()
+        for index, nserie in enumerate(to_create):
+            if ids is not None:
+                nserie.id = ids[index]
+            nserie.created_at = now
+            nserie.reference = nserie.generate_reference(NSerieInventory.REFERENCE_PREFIX)
+
+        NSerieInventory.objects.bulk_create(to_create, batch_size=batch_size)
+        record_bulk_history(to_create, NSerieInventory, HISTORY_CREATED)
+
+    logger.debug("%s numéro(s) de série rattaché(s) à %s CountingDetail", len(to_create), len(items))
+    return created
@@ -16,6 +16,7 @@ from django.core.files.base import ContentFile
 from django.db import close_old_connections
 from django.utils import timezone
 
+from apps.core.db_routing import primary_pinning
 from apps.inventory.models import Assigment, Inventory, Job, PdfTask
 from apps.inventory.exceptions.pdf_exceptions import (
     PDFEmptyContentError,
@@ -36,9 +37,15 @@ logger = logging.getLogger(__name__)
 TaskRunner = Callable[[Callable[..., Any], tuple], None]
 
 
+def _in_pinning_scope(target: Callable[..., Any], *args: Any) -> Any:
+    """Exécute une tâche dans sa propre portée d'épinglage (lectures de reporting après écriture)."""
+    with primary_pinning():
+        return target(*args)
+
+
 def _thread_runner(target: Callable[..., Any], args: tuple) -> None:
     """Runner par défaut : thread daemon (compatible déploiement actuel)."""
-    threading.Thread(target=target, args=args, daemon=True).start()
+    threading.Thread(target=_in_pinning_scope, args=(target, *args), daemon=True).start()
 
 
 _default_runner: TaskRunner = _thread_runner
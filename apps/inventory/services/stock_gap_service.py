@@ -2,8 +2,12 @@
 Service de calcul d'écart stock théorique vs inventorié.
 
 Formule : ecart = qte_theorique - qte_inventoriee (signe conservé).
+
+La consolidation par clé est faite par ``ColumnarStockGapEngine`` (NumPy) ;
+``settings.STOCK_GAP_ENGINE = "python"`` revient à l'implémentation par
+dictionnaires.
 """
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from apps.inventory.constants import StockGapGrouping
 from apps.inventory.exceptions import InventoryNotFoundError
@@ -15,6 +19,12 @@ from apps.inventory.repositories.ecart_stock_theorique_repository import (
     EcartStockTheoriqueRepository,
 )
 from apps.inventory.repositories.stock_gap_repository import StockGapRepository
+from apps.inventory.utils.stock_gap_engine import (
+    ColumnarStockGapEngine,
+    PythonStockGapEngine,
+    StockGapFrame,
+    get_engine_name,
+)
 
 
 class StockGapService:
@@ -25,12 +35,14 @@ class StockGapService:
         repository: Optional[StockGapRepository] = None,
         theoretical_provider: Optional[ITheoreticalStockProvider] = None,
         ecart_repository: Optional[EcartStockTheoriqueRepository] = None,
+        engine: Optional[str] = None,
     ) -> None:
         self.repository = repository or StockGapRepository()
         self.theoretical_provider = (
             theoretical_provider or ExcelTheoreticalStockProvider()
         )
         self.ecart_repository = ecart_repository or EcartStockTheoriqueRepository()
+        self.engine = get_engine_name(engine)
 
 
     def compute_stock_gaps(
@@ -50,6 +62,34 @@ class StockGapService:
         Returns:
             Dict avec mode_groupement, lignes, totaux.
 
+        Raises:
+            InventoryNotFoundError: Si l'inventaire n'existe pas.
+        """
+        gaps, is_variant = self.compute_stock_gap_frame(
+            inventory_id, warehouse_id, only_nonzero=only_nonzero
+        )
+        return {
+            "inventory_id": inventory_id,
+            "warehouse_id": warehouse_id,
+            "mode_groupement": gaps.grouping_mode,
+            "is_variant": is_variant,
+            "lignes": list(gaps.iter_lines()),
+            "totaux": gaps.totals(),
+        }
+
+    def compute_stock_gap_frame(
+        self,
+        inventory_id: int,
+        warehouse_id: int,
+        only_nonzero: bool = True,
+    ) -> Tuple[StockGapFrame, bool]:
+        """
+        Calcule les écarts en colonnes (lignes produites à la demande via
+        ``StockGapFrame.iter_lines``).
+
+        Returns:
+            (StockGapFrame trié par clé, is_variant)
+
         Raises:
             InventoryNotFoundError: Si l'inventaire n'existe pas.
         """
@@ -72,64 +112,29 @@ class StockGapService:
         )
 
         excluded = self.repository.get_excluded_product_ids()
-        product_ids = set(inventoried.keys()) | set(theoretical.keys())
-        product_ids -= excluded
-
-        products_info = self.repository.get_products_info(list(product_ids))
-
-        buckets: Dict[str, Dict[str, Any]] = {}
-        for product_id in product_ids:
-            info = products_info.get(product_id)
-            if info is None:
-                continue
-            key = self._grouping_key(info, is_variant)
-            if not key:
-                continue
-            if key not in buckets:
-                buckets[key] = {
-                    "cle": key,
-                    "mode_groupement": grouping_mode,
-                    "designation": info["designation"],
-                    "product_id": product_id,
-                    "qte_theorique": 0,
-                    "qte_inventoriee": 0,
-                }
-            if info["designation"] and not buckets[key]["designation"]:
-                buckets[key]["designation"] = info["designation"]
-
-            buckets[key]["qte_theorique"] += int(theoretical.get(product_id, 0))
-            buckets[key]["qte_inventoriee"] += int(inventoried.get(product_id, 0))
-
-        lines: List[Dict[str, Any]] = []
-        total_theo = 0
-        total_inv = 0
-        total_ecart = 0
+        product_ids = (set(inventoried) | set(theoretical)) - excluded
+
+        if self.engine == "python":
+            gaps = PythonStockGapEngine().compute(
+                inventoried,
+                theoretical,
+                excluded,
+                self.repository.get_products_info(list(product_ids)),
+                is_variant,
+                grouping_mode,
+            )
+        else:
+            gaps = ColumnarStockGapEngine().compute(
+                inventoried,
+                theoretical,
+                excluded,
+                self.repository.get_product_columns(product_ids, is_variant),
+                grouping_mode,
+            )
 
-        for bucket in buckets.values():
-            ecart = bucket["qte_theorique"] - bucket["qte_inventoriee"]
-            if only_nonzero and ecart == 0:
-                continue
-            line = {**bucket, "ecart": ecart}
-            lines.append(line)
-            total_theo += line["qte_theorique"]
-            total_inv += line["qte_inventoriee"]
-            total_ecart += ecart
-
-        lines.sort(key=lambda row: row["cle"] or "")
-
-        return {
-            "inventory_id": inventory_id,
-            "warehouse_id": warehouse_id,
-            "mode_groupement": grouping_mode,
-            "is_variant": is_variant,
-            "lignes": lines,
-            "totaux": {
-                "qte_theorique": total_theo,
-                "qte_inventoriee": total_inv,
-                "ecart": total_ecart,
-                "nombre_lignes": len(lines),
-            },
-        }
+        if only_nonzero:
+            gaps = gaps.nonzero()
+        return gaps, is_variant
 
     def list_persisted_stock_gaps(
         self,
@@ -190,10 +195,3 @@ class StockGapService:
                 "nombre_valides": nb_valides,
             },
         }
-
-    @staticmethod
-    def _grouping_key(info: Dict[str, Any], is_variant: bool) -> str:
-        """Clé : Internal_Product_Code (variante) ou barcode."""
-        if is_variant:
-            return info.get("internal_code") or ""
-        return info.get("barcode") or ""
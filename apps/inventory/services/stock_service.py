@@ -1,7 +1,9 @@
-import pandas as pd
+from __future__ import annotations
+
 import logging
 from typing import List, Dict, Any, Optional
 from django.db import transaction
+from apps.core.lazy_imports import lazy_import
 from ..interfaces.stock_interface import IStockService
 from ..repositories.stock_repository import StockRepository
 from ..repositories import InventoryRepository
@@ -11,6 +13,8 @@ from ..exceptions import InventoryNotFoundError, StockValidationError, StockNotF
 from apps.inventory.constants import InventoryType
 import uuid
 
+pd = lazy_import('pandas')
+
 logger = logging.getLogger(__name__)
 
 class StockService(IStockService):
@@ -188,16 +192,14 @@ class StockService(IStockService):
 
             if valid_stocks_data:
                 with transaction.atomic():
-                    deleted_count = self.repository.delete_by_inventory_id(inventory_id)
-                    if deleted_count > 0:
-                        logger.info(
-                            f"Suppression de {deleted_count} stocks existants "
-                            f"pour l'inventaire {inventory_id}"
-                        )
-
+                    # Le fichier remplace le stock de l'inventaire : upsert sur
+                    # (inventaire, emplacement, article) puis suppression des
+                    # stocks absents du fichier (les id des lignes conservées
+                    # restent stables)
                     try:
-                        imported_stocks = self.repository.bulk_create(valid_stocks_data)
-                    except Exception as e:
+                        with transaction.atomic():
+                            upsert_result = self.repository.bulk_upsert(valid_stocks_data)
+                    except StockValidationError as e:
                         if "masterdata_stock_pkey" in str(e):
                             from django.db import connection
                             with connection.cursor() as cursor:
@@ -205,9 +207,18 @@ class StockService(IStockService):
                                     "SELECT setval('masterdata_stock_id_seq', "
                                     "(SELECT MAX(id) FROM masterdata_stock))"
                                 )
-                            imported_stocks = self.repository.bulk_create(valid_stocks_data)
+                            upsert_result = self.repository.bulk_upsert(valid_stocks_data)
                         else:
                             raise
+                    imported_stocks = upsert_result.objects
+
+                    deleted_count = self.repository.delete_by_inventory_id_except(
+                        inventory_id, [stock.id for stock in imported_stocks]
+                    )
+                    logger.info(
+                        f"Stocks de l'inventaire {inventory_id}: {upsert_result.created} créé(s), "
+                        f"{upsert_result.updated} mis à jour, {deleted_count} supprimé(s)"
+                    )
 
                     results['imported_stocks'] = [
                         {
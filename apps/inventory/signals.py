@@ -0,0 +1,112 @@
+"""
+Signaux de l'application inventory.
+
+- rafraîchissement de la table matérialisée InventoryResult sur les écritures
+  unitaires (save / delete) des comptages et des écarts ;
+- maintenance de l'index InventoryAssignedLocation sur les écritures
+  unitaires des JobDetail ;
+- notification des flux SSE des tableaux de bord (affectations, jobs, écarts) ;
+- création des partitions des tables de comptage d'un nouvel inventaire.
+
+Les chemins bulk appellent ``mark_inventory_results_dirty`` /
+``index_job_details`` / ``notify_dashboard_changes`` explicitement.
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Assigment, ComptageSequence, CountingDetail, EcartComptage, Inventory, Job, JobDetail
+from .realtime import notify_dashboard_changes
+from .services.assigned_location_index import index_job_details, refresh_job_details
+from .services.inventory_partitions import schedule_inventory_partitions
+from .services.inventory_result_materializer import mark_inventory_results_dirty
+
+
+@receiver([post_save, post_delete], sender=CountingDetail, dispatch_uid='inventory_results_counting_detail')
+def refresh_results_on_counting_detail(sender, instance, using, **kwargs):
+    mark_inventory_results_dirty(counting_details=[instance], using=using)
+
+
+@receiver([post_save, post_delete], sender=ComptageSequence, dispatch_uid='inventory_results_sequence')
+def refresh_results_on_sequence(sender, instance, using, **kwargs):
+    mark_inventory_results_dirty(counting_detail_ids=[instance.counting_detail_id], using=using)
+
+
+@receiver(post_save, sender=EcartComptage, dispatch_uid='inventory_results_ecart')
+def refresh_results_on_ecart(sender, instance, using, **kwargs):
+    # La suppression d'un écart supprime ses séquences (CASCADE), déjà signalées
+    mark_inventory_results_dirty(ecart_ids=[instance.pk], using=using)
+
+
+def _touches(update_fields, fields):
+    return update_fields is None or bool(fields & set(update_fields))
+
+
+ASSIGNED_LOCATION_FIELDS = {'job', 'job_id', 'location', 'location_id', 'is_deleted'}
+
+
+@receiver(pre_save, sender=JobDetail, dispatch_uid='assigned_locations_job_detail_previous')
+def remember_assigned_location_key(sender, instance, using, raw=False, update_fields=None, **kwargs):
+    # Ancien état (job, emplacement, suppression) d'un JobDetail modifié : l'index n'est
+    # recalculé que s'il change, l'ancienne clé étant retirée si elle n'est plus utilisée
+    instance._assigned_previous = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    if not _touches(update_fields, ASSIGNED_LOCATION_FIELDS):
+        return
+    instance._assigned_previous = (
+        JobDetail._base_manager.using(using).filter(pk=instance.pk)
+        .values_list('job_id', 'location_id', 'is_deleted').first()
+    )
+
+
+@receiver(post_save, sender=JobDetail, dispatch_uid='assigned_locations_job_detail_save')
+def index_assigned_location_on_save(sender, instance, created, update_fields, using, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        index_job_details([instance], using=using)
+        return
+    # Statut, dates… : l'index ne dépend que du job, de l'emplacement et de la suppression
+    if not _touches(update_fields, ASSIGNED_LOCATION_FIELDS):
+        return
+    previous = getattr(instance, '_assigned_previous', None)
+    if previous == (instance.job_id, instance.location_id, instance.is_deleted):
+        return
+    # Suppression logique, changement d'emplacement ou de job : ancienne et nouvelle clés
+    job_details = [instance]
+    if previous and previous[:2] != (instance.job_id, instance.location_id):
+        job_details.append(JobDetail(job_id=previous[0], location_id=previous[1]))
+    refresh_job_details(job_details, using=using)
+
+
+@receiver(post_delete, sender=JobDetail, dispatch_uid='assigned_locations_job_detail_delete')
+def refresh_assigned_location_on_delete(sender, instance, using, **kwargs):
+    refresh_job_details([instance], using=using)
+
+
+DASHBOARD_ASSIGNMENT_FIELDS = {'status', 'session', 'session_id'}
+DASHBOARD_JOB_FIELDS = {'status'}
+
+
+@receiver(post_save, sender=Assigment, dispatch_uid='dashboard_stream_assignment')
+def notify_dashboard_on_assignment(sender, instance, update_fields, using, raw=False, **kwargs):
+    if not raw and _touches(update_fields, DASHBOARD_ASSIGNMENT_FIELDS):
+        notify_dashboard_changes(job_ids=[instance.job_id], using=using)
+
+
+@receiver(post_save, sender=Job, dispatch_uid='dashboard_stream_job')
+def notify_dashboard_on_job(sender, instance, update_fields, using, raw=False, **kwargs):
+    if not raw and _touches(update_fields, DASHBOARD_JOB_FIELDS):
+        notify_dashboard_changes(job_ids=[instance.pk], using=using)
+
+
+@receiver([post_save, post_delete], sender=EcartComptage, dispatch_uid='dashboard_stream_ecart')
+def notify_dashboard_on_ecart(sender, instance, using, raw=False, **kwargs):
+    if not raw:
+        notify_dashboard_changes(inventory_ids=[instance.inventory_id], using=using)
+
+
+@receiver(post_save, sender=Inventory, dispatch_uid='inventory_partitions')
+def create_partitions_on_inventory(sender, instance, created, using, raw=False, **kwargs):
+    if created and not raw:
+        schedule_inventory_partitions(instance.pk, using=using)
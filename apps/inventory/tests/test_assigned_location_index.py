@@ -0,0 +1,203 @@
+"""
+Tests de l'index InventoryAssignedLocation et de la liste des emplacements non affectés.
+
+Endpoint : GET /masterdata/api/warehouses/<account_id>/warehouse/<warehouse_id>/inventory/<inventory_id>/locations/unassigned/
+"""
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.core.querybudget import QueryBudgetMixin
+from apps.inventory.constants import CountMode, InventoryStatus, JobStatus, SessionType
+from apps.inventory.models import Counting, Inventory, InventoryAssignedLocation, Job, JobDetail
+from apps.masterdata.models import (
+    Account,
+    Family,
+    Location,
+    LocationType,
+    Product,
+    RegroupementEmplacement,
+    SousZone,
+    Stock,
+    Warehouse,
+    Zone,
+    ZoneType,
+)
+from apps.users.models import UserApp
+
+
+# Indépendant du nombre d'emplacements et des inventaires passés
+UNASSIGNED_QUERY_BUDGET = 8
+
+
+class AssignedLocationIndexTests(QueryBudgetMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.account = Account.objects.create(
+            reference='ACC-IAL', account_name='Compte IAL', account_statuts='ACTIVE',
+        )
+        family = Family.objects.create(
+            reference='IAL-FAM', family_name='Famille IAL', compte=cls.account, family_status='ACTIVE',
+        )
+        cls.product = Product.objects.create(
+            reference='IAL-P', Internal_Product_Code='IAL-ART-1', Short_Description='Article IAL',
+            Barcode='3000000000001', Stock_Unit='UN', Product_Family=family,
+        )
+        zone_type = ZoneType.objects.create(reference='ZT-IAL', type_name='Stockage', status='ACTIVE')
+        location_type = LocationType.objects.create(reference='LT-IAL', name='Palette')
+        cls.warehouse = Warehouse.objects.create(
+            reference='WH-IAL', warehouse_name='Entrepôt IAL', warehouse_type='CENTRAL', status='ACTIVE',
+        )
+        zone = Zone.objects.create(
+            reference='Z-IAL', warehouse=cls.warehouse, zone_name='Zone', zone_type=zone_type, zone_status='ACTIVE',
+        )
+        regroupement = RegroupementEmplacement.objects.create(
+            account=cls.account, warehouse=cls.warehouse, nom='Regroupement IAL',
+        )
+        cls.user = UserApp.objects.create_user(username='ial_web', type=SessionType.WEB, is_staff=True)
+        cls.inventory = Inventory.objects.create(
+            label='Inventaire IAL', date=timezone.now(), status=InventoryStatus.EN_REALISATION,
+        )
+        cls.counting = Counting.objects.create(
+            reference='C-IAL-1', order=1, count_mode=CountMode.BY_ARTICLE, inventory=cls.inventory,
+        )
+        # 2 sous-zones de 4 emplacements, chacune affectée à un job ; un stock de l'inventaire par emplacement
+        cls.jobs = []
+        for s in range(2):
+            sous_zone = SousZone.objects.create(
+                reference=f'SZ-IAL-{s}', zone=zone, sous_zone_name=f'Sous-zone {s}', sous_zone_status='ACTIVE',
+            )
+            job = Job.objects.create(
+                reference=f'JOB-{s + 1:04d}', status=JobStatus.EN_ATTENTE, warehouse=cls.warehouse,
+                inventory=cls.inventory,
+            )
+            cls.jobs.append(job)
+            for index in range(4):
+                location = Location.objects.create(
+                    reference=f'L-IAL-{s}-{index}', location_reference=f'IAL-{s}-{index:04d}',
+                    sous_zone=sous_zone, location_type=location_type, regroupement=regroupement,
+                )
+                Stock.objects.create(
+                    reference=f'K-IAL-{s}-{index}', location=location, product=cls.product, quantity_available=5,
+                    inventory=cls.inventory, warehouse=cls.warehouse,
+                )
+                JobDetail.objects.create(
+                    reference=f'JD-IAL-{s}-{index}', location=location, job=job, counting=cls.counting,
+                )
+        cls.job_id = cls.jobs[0].id
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = (
+            f'/masterdata/api/warehouses/{self.account.id}/warehouse/{self.warehouse.id}'
+            f'/inventory/{self.inventory.id}/locations/unassigned/'
+        )
+
+    def _index(self):
+        return set(
+            InventoryAssignedLocation.objects.filter(inventory=self.inventory)
+            .values_list('warehouse_id', 'location_id')
+        )
+
+    def _expected_index(self):
+        return set(
+            JobDetail.objects.filter(job__inventory=self.inventory)
+            .values_list('job__warehouse_id', 'location_id')
+        )
+
+    def _unassigned_ids(self):
+        response = self.client.get(self.url, {'page_size': 1000})
+        self.assertEqual(response.status_code, 200)
+        return {row['id'] for row in response.data['rows']}
+
+    def test_index_follows_job_detail_create_and_delete(self):
+        self.assertEqual(self._index(), self._expected_index())
+        self.assertEqual(self._unassigned_ids(), set())
+
+        freed = JobDetail.objects.filter(job_id=self.job_id)
+        freed_location_ids = set(freed.values_list('location_id', flat=True))
+        freed.delete()
+
+        self.assertEqual(self._index(), self._expected_index())
+        self.assertEqual(self._unassigned_ids(), freed_location_ids)
+
+        location_id = min(freed_location_ids)
+        detail = JobDetail.objects.create(
+            reference=f'IAL-JD-{location_id}',
+            location_id=location_id,
+            job_id=self.job_id,
+            counting=self.counting,
+        )
+        self.assertEqual(self._unassigned_ids(), freed_location_ids - {location_id})
+
+        # Changement d'emplacement : l'ancien emplacement redevient libre
+        moved_to = max(freed_location_ids)
+        detail.location_id = moved_to
+        detail.save()
+        self.assertEqual(self._index(), self._expected_index())
+        self.assertEqual(self._unassigned_ids(), freed_location_ids - {moved_to})
+
+        detail.soft_delete()
+        self.assertEqual(self._unassigned_ids(), freed_location_ids)
+
+    def test_unrelated_job_detail_saves_skip_index_refresh(self):
+        detail = JobDetail.objects.filter(job_id=self.job_id).first()
+
+        with mock.patch('apps.inventory.signals.refresh_job_details') as refresh:
+            detail.status = 'TERMINE'
+            detail.save(update_fields=['status'])
+            detail.save()
+            detail.location_id = JobDetail.objects.exclude(job_id=self.job_id).first().location_id
+            detail.save(update_fields=['status', 'location'])
+
+        self.assertEqual(refresh.call_count, 1)
+
+    def test_families_only_from_inventory_stocks(self):
+        JobDetail.objects.filter(job_id=self.job_id).delete()
+        location_id = min(self._unassigned_ids())
+
+        # Stock d'un inventaire passé, sur une autre famille
+        past_inventory = Inventory.objects.create(
+            reference='IAL-INV-OLD', label='Inventaire passé', status='TERMINE',
+            inventory_type='GENERAL', date=timezone.now(),
+        )
+        other_family = Family.objects.create(
+            reference='IAL-FAM-OLD', family_name='Famille passée', compte=self.account, family_status='ACTIVE',
+        )
+        product = Product.objects.create(
+            reference='IAL-P-OLD', Internal_Product_Code='IAL-P-OLD', Short_Description='Article passé',
+            Barcode='IAL-P-OLD', Stock_Unit='UN', Product_Family=other_family,
+        )
+        Stock.objects.create(
+            reference='IAL-K-OLD', location_id=location_id, product=product,
+            quantity_available=1, inventory=past_inventory, warehouse_id=self.warehouse.id,
+        )
+
+        response = self.client.get(self.url, {'page_size': 1000})
+
+        row = next(row for row in response.data['rows'] if row['id'] == location_id)
+        self.assertEqual([family['family_name'] for family in row['families']], ['Famille IAL'])
+
+    def test_unassigned_list_within_query_budget(self):
+        JobDetail.objects.filter(job__inventory=self.inventory).delete()
+
+        with self.assertQueryBudget(UNASSIGNED_QUERY_BUDGET, max_repeats=2, name='unassigned_locations'):
+            ids = self._unassigned_ids()
+
+        self.assertEqual(len(ids), 8)
+
+    def test_rebuild_command_restores_index(self):
+        expected = self._index()
+        InventoryAssignedLocation.objects.all().delete()
+
+        out = StringIO()
+        call_command('rebuild_assigned_locations', inventory_id=self.inventory.id, stdout=out)
+
+        self.assertIn('Reconstruction terminée', out.getvalue())
+        self.assertEqual(self._index(), expected)
@@ -0,0 +1,170 @@
+"""
+Tests de la suite de benchmarks (générateur synthétique, runner, comparaison).
+"""
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.core.querybudget import QueryBudget, QueryBudgetExceeded, QueryBudgetMixin, normalize_sql
+from apps.inventory.benchmarks import (
+    BenchmarkContext,
+    BenchmarkRunner,
+    DatasetSpec,
+    SyntheticInventoryGenerator,
+    compare_reports,
+    get_scenarios,
+)
+from apps.inventory.models import Assigment, CountingDetail, Job, JobDetail
+from apps.inventory.services.inventory_result_materializer import InventoryResultMaterializer
+from apps.masterdata.models import Location, Stock
+
+
+SPEC = DatasetSpec(
+    tag='T1',
+    warehouses=2,
+    zones_per_warehouse=1,
+    sous_zones_per_zone=2,
+    locations_per_sous_zone=5,
+    products=15,
+    stocks_per_location=2,
+    locations_per_job=4,
+    mobile_users=2,
+    counted_ratio=0.5,
+    batch_size=7,
+)
+
+
+class SyntheticInventoryGeneratorTests(TestCase):
+    def test_generates_expected_volumes(self):
+        counts = SyntheticInventoryGenerator(SPEC).generate()
+
+        # 10 emplacements par entrepôt -> 3 jobs (4 + 4 + 2) par entrepôt
+        self.assertEqual(Location.objects.filter(reference__startswith='T1-').count(), 20)
+        self.assertEqual(Stock.objects.filter(inventory__reference='T1-INV').count(), 40)
+        self.assertEqual(Job.objects.filter(inventory__reference='T1-INV').count(), 6)
+        self.assertEqual(JobDetail.objects.filter(job__inventory__reference='T1-INV').count(), 40)
+        self.assertEqual(Assigment.objects.filter(job__inventory__reference='T1-INV', status='ENTAME').count(), 12)
+        self.assertEqual(counts['CountingDetail'], CountingDetail.objects.filter(job__inventory__reference='T1-INV').count())
+        self.assertGreater(counts['CountingDetail'], 0)
+
+    def test_clean_removes_dataset(self):
+        generator = SyntheticInventoryGenerator(SPEC)
+        generator.generate()
+        generator.clean()
+
+        self.assertFalse(generator.exists())
+        self.assertFalse(Location.objects.filter(reference__startswith='T1-').exists())
+
+    def test_invalid_tag_is_rejected(self):
+        with self.assertRaises(ValueError):
+            DatasetSpec(tag='TROP-LONG')
+
+
+class BenchmarkRunnerTests(TestCase):
+    def test_runs_scenario_and_rolls_back_writes(self):
+        SyntheticInventoryGenerator(SPEC).generate()
+        context = BenchmarkContext.from_tag('T1')
+        before = CountingDetail.objects.count()
+
+        report = BenchmarkRunner(context, repeat=2, warmup=0).run(
+            get_scenarios(['kpi_nombre_jobs_total', 'mobile_counting_details_batch'])
+        )
+
+        self.assertEqual(CountingDetail.objects.count(), before)
+        self.assertEqual(report['dataset']['jobs'], 6)
+        self.assertTrue(report['scenarios']['kpi_nombre_jobs_total']['ok'])
+        self.assertGreater(report['scenarios']['mobile_counting_details_batch']['queries'], 0)
+
+    def test_compare_reports_flags_time_and_query_regressions(self):
+        baseline = {'scenarios': {
+            'a': {'median_ms': 100.0, 'queries': 10},
+            'b': {'median_ms': 100.0, 'queries': 10},
+            'c': {'median_ms': 100.0, 'queries': 10},
+        }}
+        current = {'scenarios': {
+            'a': {'median_ms': 110.0, 'queries': 10},
+            'b': {'median_ms': 150.0, 'queries': 10},
+            'c': {'median_ms': 90.0, 'queries': 12},
+            'new': {'median_ms': 1.0, 'queries': 1},
+        }}
+
+        comparison = {entry['scenario']: entry for entry in compare_reports(current, baseline)}
+
+        self.assertEqual(set(comparison), {'a', 'b', 'c'})
+        self.assertFalse(comparison['a']['regression'])
+        self.assertTrue(comparison['b']['regression'])
+        self.assertTrue(comparison['c']['regression'])
+
+
+BUDGET_SPEC = DatasetSpec(
+    tag='QB',
+    warehouses=1,
+    zones_per_warehouse=2,
+    sous_zones_per_zone=2,
+    locations_per_sous_zone=12,
+    products=6,
+    stocks_per_location=2,
+    locations_per_job=4,
+    mobile_users=2,
+    counted_ratio=0.5,
+    batch_size=20,
+)
+
+# Scénario -> (max_queries, max_repeats). Jeu de 12 jobs : une instruction répétée
+# une fois par job, emplacement ou zone dépasse max_repeats.
+# stock_import n'est pas budgété : validate_stock_data lit article et emplacement ligne par ligne.
+SCENARIO_BUDGETS = {
+    'mobile_sync_data': (14, 2),
+    # Écarts créés emplacement par emplacement : budget total à taille de lot fixe
+    'mobile_counting_details_batch': (40, None),
+    'kpi_nombre_jobs_total': (6, 2),
+    'kpi_repartition_1er_comptage_par_equipe': (7, 2),
+    'monitoring_zones': (9, 2),
+    'monitoring_global': (14, 3),
+    'datatable_inventories': (12, 2),
+    'datatable_warehouse_jobs': (16, 2),
+    'export_results_excel': (15, 2),
+    'export_assignment_pdf': (7, 2),
+    'ecart_stock_recalculation': (18, 2),
+}
+
+
+class ScenarioQueryBudgetTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        SyntheticInventoryGenerator(BUDGET_SPEC).generate()
+        self.context = BenchmarkContext.from_tag('QB')
+        # Résultats matérialisés déjà construits, comme en production
+        InventoryResultMaterializer().rebuild(self.context.inventory.id)
+
+    def test_main_endpoints_stay_within_query_budget(self):
+        for scenario in get_scenarios(list(SCENARIO_BUDGETS)):
+            max_queries, max_repeats = SCENARIO_BUDGETS[scenario.name]
+            with self.subTest(scenario=scenario.name):
+                client = APIClient()
+                user = self.context.mobile_user if scenario.user == 'mobile' else self.context.web_user
+                client.force_authenticate(user=user)
+                data = scenario.payload(self.context) if scenario.payload else None
+                kwargs = {'format': scenario.format} if data is not None else {}
+
+                with self.assertQueryBudget(max_queries, max_repeats=max_repeats, name=scenario.name):
+                    response = getattr(client, scenario.method)(scenario.path(self.context), data, **kwargs)
+
+                self.assertLess(response.status_code, 300)
+
+    def test_repeated_statement_reported_with_origin(self):
+        jobs = list(Job.objects.filter(inventory__reference='QB-INV'))
+
+        with self.assertRaises(QueryBudgetExceeded) as error:
+            with QueryBudget(max_repeats=2, name='n+1'):
+                for job in jobs:
+                    job.jobdetail_set.count()
+
+        message = str(error.exception)
+        self.assertIn('Candidates N+1', message)
+        self.assertIn(f'x{len(jobs)}', message)
+        self.assertIn('test_benchmark_suite.py', message)
+
+    def test_normalize_sql_ignores_literals(self):
+        self.assertEqual(
+            normalize_sql("SELECT * FROM t WHERE id = 12 AND name = 'a''b' AND x IN (%s, %s, %s)"),
+            normalize_sql("SELECT * FROM t WHERE id = 7 AND name = 'c' AND x IN (%s)"),
+        )
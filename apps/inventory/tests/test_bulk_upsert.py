@@ -0,0 +1,140 @@
+"""
+Tests de l'upsert natif (INSERT ... ON CONFLICT) : InventoryLocationJob, Stock, EcartStockTheorique.
+"""
+from django.test import TestCase
+
+from django.utils import timezone
+
+from apps.inventory.constants import InventoryStatus
+from apps.inventory.models import EcartStockTheorique, Inventory
+from apps.inventory.repositories.ecart_stock_theorique_repository import EcartStockTheoriqueRepository
+from apps.inventory.repositories.inventory_location_job_repository import InventoryLocationJobRepository
+from apps.inventory.repositories.stock_repository import StockRepository
+from apps.masterdata.models import (
+    Account,
+    Family,
+    InventoryLocationJob,
+    Location,
+    LocationType,
+    Product,
+    SousZone,
+    Stock,
+    Warehouse,
+    Zone,
+    ZoneType,
+)
+
+
+class BulkUpsertTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        account = Account.objects.create(reference='ACC-UPS', account_name='Compte UPS', account_statuts='ACTIVE')
+        family = Family.objects.create(
+            reference='FAM-UPS', family_name='Famille UPS', compte=account, family_status='ACTIVE',
+        )
+        zone_type = ZoneType.objects.create(reference='ZT-UPS', type_name='Stockage', status='ACTIVE')
+        location_type = LocationType.objects.create(reference='LT-UPS', name='Palette')
+        cls.warehouse = Warehouse.objects.create(
+            reference='WH-UPS', warehouse_name='Entrepôt UPS', warehouse_type='CENTRAL', status='ACTIVE',
+        )
+        zone = Zone.objects.create(
+            reference='Z-UPS', warehouse=cls.warehouse, zone_name='Zone', zone_type=zone_type, zone_status='ACTIVE',
+        )
+        sous_zone = SousZone.objects.create(
+            reference='SZ-UPS', zone=zone, sous_zone_name='Sous-zone', sous_zone_status='ACTIVE',
+        )
+        cls.location_ids = [
+            Location.objects.create(
+                reference=f'L-UPS-{index}', location_reference=f'UPS-{index:04d}',
+                sous_zone=sous_zone, location_type=location_type,
+            ).id
+            for index in range(5)
+        ]
+        product = Product.objects.create(
+            reference='P-UPS', Internal_Product_Code='UPS-ART-1', Short_Description='Article UPS',
+            Barcode='3000000000001', Stock_Unit='UN', Product_Family=family,
+        )
+        cls.inventory = Inventory.objects.create(
+            label='Inventaire UPS', date=timezone.now(), status=InventoryStatus.EN_PREPARATION,
+        )
+        Stock.objects.create(
+            reference='STK-UPS', location_id=cls.location_ids[0], product=product, quantity_available=10,
+            inventory=cls.inventory, warehouse=cls.warehouse,
+        )
+
+    def test_inventory_location_job_upsert_counts_and_dedup(self):
+        repository = InventoryLocationJobRepository()
+        rows = [
+            {'emplacement_id': location_id, 'job': 'JOB-0001', 'session_1': 'equipe-1001', 'session_2': None}
+            for location_id in self.location_ids[:3]
+        ]
+        self.assertEqual(repository.bulk_upsert(rows, self.inventory.id), {'created': 3, 'updated': 0})
+
+        rows = [dict(row, job='JOB-0002') for row in rows] + [
+            {'emplacement_id': self.location_ids[3], 'job': 'JOB-0003', 'session_1': None, 'session_2': None},
+            # Même emplacement deux fois : la dernière ligne l'emporte
+            {'emplacement_id': self.location_ids[3], 'job': 'JOB-0004', 'session_1': None, 'session_2': None},
+        ]
+        self.assertEqual(repository.bulk_upsert(rows, self.inventory.id), {'created': 1, 'updated': 3})
+
+        jobs = dict(
+            InventoryLocationJob.objects.filter(inventaire=self.inventory).values_list('emplacement_id', 'job')
+        )
+        self.assertEqual(len(jobs), 4)
+        self.assertEqual(jobs[self.location_ids[0]], 'JOB-0002')
+        self.assertEqual(jobs[self.location_ids[3]], 'JOB-0004')
+
+    def test_stock_upsert_keeps_ids_and_updates_quantities(self):
+        existing = Stock.objects.filter(inventory=self.inventory).order_by('id').first()
+        rows = [
+            {
+                'reference': 'UPS-NEWSTK',
+                'inventory_id': self.inventory.id,
+                'warehouse_id': existing.warehouse_id,
+                'location_id': existing.location_id,
+                'product_id': existing.product_id,
+                'quantity_available': 999,
+            },
+            {
+                'reference': 'UPS-NOLOC',
+                'inventory_id': self.inventory.id,
+                'warehouse_id': existing.warehouse_id,
+                'location_id': None,
+                'product_id': existing.product_id,
+                'quantity_available': 1,
+            },
+        ]
+
+        result = StockRepository().bulk_upsert(rows)
+
+        self.assertEqual((result.created, result.updated), (1, 1))
+        self.assertEqual(result.objects[0].id, existing.id)
+        existing.refresh_from_db()
+        self.assertEqual(existing.quantity_available, 999)
+        self.assertNotEqual(existing.reference, 'UPS-NEWSTK')
+
+    def test_ecart_upsert_skips_validated_lines(self):
+        repository = EcartStockTheoriqueRepository()
+        base = {'inventory': self.inventory, 'warehouse_id': self.warehouse.id, 'mode_groupement': 'BARCODE'}
+        result = repository.bulk_upsert_compute_lines([
+            dict(base, article_cle='A', qte_theorique=5, qte_pratique=5, ecart=0, resultat_final=5),
+            dict(base, article_cle='B', qte_theorique=5, qte_pratique=3, ecart=2, resultat_final=None),
+        ])
+        self.assertEqual((result.created, result.updated), (2, 0))
+        EcartStockTheorique.objects.filter(article_cle='A').update(valide=True)
+        EcartStockTheorique.objects.filter(article_cle='B').update(resultat_final=4)
+
+        result = repository.bulk_upsert_compute_lines([
+            dict(base, article_cle='A', qte_theorique=7, qte_pratique=1, ecart=6, resultat_final=None),
+            dict(base, article_cle='B', qte_theorique=6, qte_pratique=2, ecart=4, resultat_final=None),
+            dict(base, article_cle='C', qte_theorique=1, qte_pratique=1, ecart=0, resultat_final=1),
+        ])
+
+        self.assertEqual((result.created, result.updated, result.skipped), (1, 1, 1))
+        lines = {line.article_cle: line for line in EcartStockTheorique.objects.filter(inventory=self.inventory)}
+        self.assertEqual((lines['A'].qte_theorique, lines['A'].resultat_final), (5, 5))
+        # Résultat saisi conservé tant que théorique != pratique
+        self.assertEqual((lines['B'].qte_pratique, lines['B'].resultat_final), (2, 4))
+        self.assertEqual(lines['C'].resultat_final, 1)
+        self.assertTrue(lines['C'].reference.startswith('EST-'))
@@ -6,8 +6,11 @@ Couvre :
 - lancement 4e / 5e (duplication order 3)
 - réutilisation d'un comptage déjà créé pour un autre emplacement
 - prérequis JobDetail TERMINE et écart non résolu
+- lancement par lot (launch_counting_for_jobs)
 """
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from apps.inventory.exceptions.counting_exceptions import (
@@ -491,3 +494,77 @@ class CountingLaunchServiceNiemeTestCase(TestCase):
         ).first()
         self.assertIsNotNone(recreated)
         self.assertEqual(recreated.status, 'EN ATTENTE')
+
+    def _add_location_with_ecart(self, suffix: str) -> Location:
+        """Second emplacement du job avec comptages 1 et 2 terminés et un écart non résolu."""
+        location = Location.objects.create(
+            reference=f'LOC-NIE-{suffix}',
+            location_reference=f'LOC-NIE-000{suffix}',
+            sous_zone=self.sous_zone,
+            location_type=self.location_type,
+        )
+        for counting in (self.counting1, self.counting2):
+            JobDetail.objects.create(
+                reference=_ref(JobDetail),
+                location=location,
+                job=self.job,
+                counting=counting,
+                status='TERMINE',
+            )
+        self._create_unresolved_ecart(location)
+        return location
+
+    def test_launch_for_jobs_batches_locations(self) -> None:
+        location2 = self._add_location_with_ecart('2')
+
+        result = self.service.launch_counting_for_jobs([self.job.id], self.session.id)
+
+        self.assertEqual(result['total_locations_found'], 2)
+        self.assertEqual(result['total_locations_processed'], 2)
+        details = result['processed_jobs'][0]['details']
+        self.assertEqual([d['location_id'] for d in details], [self.location.id, location2.id])
+        self.assertEqual([d['result']['counting']['order'] for d in details], [3, 3])
+        # Une seule affectation (job, comptage 3), créée pour le premier emplacement
+        self.assertEqual([d['result']['assignment']['created'] for d in details], [True, False])
+        assignment = Assigment.objects.get(job=self.job, counting=self.counting3)
+        self.assertEqual((assignment.status, assignment.session_id), ('TRANSFERT', self.session.id))
+        self.assertEqual(
+            JobDetail.objects.filter(job=self.job, counting=self.counting3, status='EN ATTENTE').count(),
+            2,
+        )
+
+        # 4e comptage : duplication unique du comptage 3, réutilisée par le second emplacement
+        self._complete_counting_for_location(self.counting3, self.location)
+        self._complete_counting_for_location(self.counting3, location2)
+        with CaptureQueriesContext(connection) as queries:
+            result = self.service.launch_counting_for_jobs([self.job.id], self.session.id)
+
+        details = result['processed_jobs'][0]['details']
+        self.assertEqual([d['result']['counting']['order'] for d in details], [4, 4])
+        self.assertEqual([d['result']['counting']['new_counting_created'] for d in details], [True, False])
+        self.assertEqual(Counting.objects.filter(inventory=self.inventory, order=4).count(), 1)
+        self.assertLess(len(queries), 25)
+
+    def test_launch_for_jobs_reports_failed_location(self) -> None:
+        location2 = self._add_location_with_ecart('2')
+        JobDetail.objects.filter(
+            job=self.job,
+            location=self.location,
+            counting=self.counting1,
+        ).update(status='EN ATTENTE')
+
+        result = self.service.launch_counting_for_jobs([self.job.id, 999999], self.session.id)
+
+        self.assertEqual(result['total_locations_processed'], 1)
+        self.assertEqual(result['total_locations_failed'], 1)
+        failed = result['processed_jobs'][0]['details'][0]
+        self.assertFalse(failed['success'])
+        self.assertEqual(failed['error_type'], 'CountingValidationError')
+        self.assertIn('3ème comptage', failed['error'])
+        self.assertEqual(result['processed_jobs'][1]['error'], "Job introuvable pour l'identifiant 999999.")
+        self.assertFalse(
+            JobDetail.objects.filter(job=self.job, location=self.location, counting=self.counting3).exists()
+        )
+        self.assertTrue(
+            JobDetail.objects.filter(job=self.job, location=location2, counting=self.counting3).exists()
+        )
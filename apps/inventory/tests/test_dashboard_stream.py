@@ -0,0 +1,223 @@
+"""
+Tests du flux SSE des tableaux de bord (.../warehouses/<id>/live/).
+"""
+import json
+from unittest import mock
+
+from channels.db import database_sync_to_async
+from channels.testing import ApplicationCommunicator
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.core.db_routing import reporting_reads
+from apps.inventory.constants import (
+    AssignmentStatus,
+    CountMode,
+    InventoryStatus,
+    JobDetailStatus,
+    JobStatus,
+    SessionType,
+)
+from apps.inventory.models import Assigment, Counting, Inventory, Job, JobDetail, Setting
+from apps.inventory.realtime.groups import warehouse_group
+from apps.inventory.realtime.publisher import dashboard_change_notifier, resolve_groups
+from apps.inventory.services.dashboard_snapshot_service import DashboardSnapshotService, diff_snapshots
+from apps.masterdata.models import Account, Location, LocationType, SousZone, Warehouse, Zone, ZoneType
+from apps.users.models import UserApp
+from project.asgi import application
+
+
+def _create_dashboard_fixture(target):
+    """Inventaire d'un entrepôt : 2 jobs de 4 emplacements, comptages 1 et 2 affectés à un PDA"""
+    now = timezone.now()
+    account = Account.objects.create(reference='ACC-SSE', account_name='Compte SSE', account_statuts='ACTIVE')
+    zone_type = ZoneType.objects.create(reference='ZT-SSE', type_name='Stockage', status='ACTIVE')
+    location_type = LocationType.objects.create(reference='LT-SSE', name='Palette')
+    target.warehouse = Warehouse.objects.create(
+        reference='WH-SSE', warehouse_name='Entrepôt SSE', warehouse_type='CENTRAL', status='ACTIVE',
+    )
+    zone = Zone.objects.create(
+        reference='Z-SSE', warehouse=target.warehouse, zone_name='Zone', zone_type=zone_type, zone_status='ACTIVE',
+    )
+    sous_zone = SousZone.objects.create(
+        reference='SZ-SSE', zone=zone, sous_zone_name='Sous-zone', sous_zone_status='ACTIVE',
+    )
+    target.inventory = Inventory.objects.create(
+        label='Inventaire SSE', date=now, status=InventoryStatus.EN_REALISATION, en_realisation_status_date=now,
+    )
+    Setting.objects.create(reference='ST-SSE', account=account, warehouse=target.warehouse, inventory=target.inventory)
+    countings = [
+        Counting.objects.create(
+            reference=f'C-SSE-{order}', order=order, count_mode=CountMode.BY_ARTICLE, inventory=target.inventory,
+        )
+        for order in (1, 2)
+    ]
+    target.web_user = UserApp.objects.create_user(
+        username='sse_web', type=SessionType.WEB, compte=account, is_staff=True,
+    )
+    mobile_user = UserApp.objects.create(username='sse_pda', type=SessionType.MOBILE, compte=account, password='!')
+    target.assignments = []
+    for j in range(2):
+        job = Job.objects.create(
+            reference=f'JOB-{j + 1:04d}', status=JobStatus.ENTAME, entame_date=now,
+            warehouse=target.warehouse, inventory=target.inventory,
+        )
+        locations = [
+            Location.objects.create(
+                reference=f'L-SSE-{j}-{k}', location_reference=f'SSE-{j}-{k:04d}',
+                sous_zone=sous_zone, location_type=location_type,
+            )
+            for k in range(4)
+        ]
+        for counting in countings:
+            target.assignments.append(Assigment.objects.create(
+                reference=f'A-SSE-{j}-{counting.order}', status=AssignmentStatus.ENTAME, entame_date=now,
+                job=job, counting=counting, session=mobile_user,
+            ))
+            for location in locations:
+                JobDetail.objects.create(
+                    reference=f'JD-SSE-{j}-{counting.order}-{location.id}', location=location, job=job,
+                    counting=counting, status=JobDetailStatus.EN_ATTENTE, en_attente_date=now,
+                )
+
+
+def _parse_events(chunks):
+    events = []
+    for block in b''.join(chunks).decode().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if ': ' in line and not line.startswith(':'))
+        if 'event' in fields:
+            events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+class DiffSnapshotsTests(SimpleTestCase):
+
+    def test_only_changed_and_removed_sections(self):
+        previous = {'monitoring.global': {'total_jobs': 2}, 'kpis.a': 1, 'kpis.b': 2}
+        current = {'monitoring.global': {'total_jobs': 3}, 'kpis.a': 1, 'kpis.c': 0}
+
+        self.assertEqual(diff_snapshots(previous, current), {
+            'changed': {'monitoring.global': {'total_jobs': 3}, 'kpis.c': 0},
+            'removed': ['kpis.b'],
+        })
+        self.assertEqual(diff_snapshots(current, current), {'changed': {}, 'removed': []})
+
+
+class DashboardSnapshotTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        _create_dashboard_fixture(cls)
+
+    def test_snapshot_sections_and_groups(self):
+        snapshot = DashboardSnapshotService().build(self.inventory.id, self.warehouse.id)
+
+        self.assertIn('monitoring.zones', snapshot)
+        self.assertIn('monitoring.global', snapshot)
+        self.assertEqual(snapshot['kpis.nombre-jobs-total'], {'nombre_jobs_total': 2})
+
+        pending = dashboard_change_notifier.new_batch('default')
+        pending.assignment_ids.add(self.assignments[0].id)
+        self.assertEqual(
+            resolve_groups(pending),
+            [warehouse_group(self.inventory.id, self.warehouse.id)],
+        )
+
+
+@override_settings(
+    CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+    DASHBOARD_STREAM_COALESCE_SECONDS=0.3,
+    DASHBOARD_STREAM_HEARTBEAT_SECONDS=60,
+)
+class DashboardStreamTests(TransactionTestCase):
+    """
+    TransactionTestCase : le consumer lit la base depuis d'autres threads et
+    les notifications partent au vrai commit.
+    """
+
+    def setUp(self):
+        _create_dashboard_fixture(self)
+        self.path = (
+            f'/web/api/inventory/{self.inventory.id}'
+            f'/warehouses/{self.warehouse.id}/live/'
+        )
+
+    def _scope(self, query_string=b''):
+        return {
+            'type': 'http',
+            'method': 'GET',
+            'path': self.path,
+            'query_string': query_string,
+            'headers': [],
+        }
+
+    def _set_assignments_status(self, status):
+        for assignment in Assigment.objects.filter(job__inventory=self.inventory):
+            assignment.status = status
+            assignment.save(update_fields=['status'])
+
+    async def _receive_body(self, communicator, count, timeout=5):
+        # receive_output annule l'application sur timeout : nombre de blocs attendu
+        return [(await communicator.receive_output(timeout=timeout))['body'] for _ in range(count)]
+
+    async def test_unauthenticated_stream_is_rejected(self):
+        communicator = ApplicationCommunicator(application, self._scope())
+        await communicator.send_input({'type': 'http.request', 'body': b''})
+
+        start = await communicator.receive_output(timeout=2)
+        self.assertEqual(start['status'], 401)
+
+    async def test_snapshot_then_single_coalesced_delta(self):
+        token = str(AccessToken.for_user(self.web_user))
+        communicator = ApplicationCommunicator(application, self._scope(f'token={token}'.encode()))
+        await communicator.send_input({'type': 'http.request', 'body': b''})
+
+        start = await communicator.receive_output(timeout=5)
+        self.assertEqual(start['status'], 200)
+        self.assertIn((b'Content-Type', b'text/event-stream; charset=utf-8'), start['headers'])
+        # retry + snapshot
+        events = _parse_events(await self._receive_body(communicator, 2))
+        self.assertEqual([name for name, _ in events], ['snapshot'])
+        snapshot = events[0][1]
+
+        # Rafale de sauvegardes (une transaction chacune) : un seul delta
+        await database_sync_to_async(self._set_assignments_status)('BLOQUE')
+        await database_sync_to_async(self._set_assignments_status)('TERMINE')
+        events = _parse_events(await self._receive_body(communicator, 1))
+        self.assertTrue(await communicator.receive_nothing(timeout=1))
+
+        self.assertEqual([name for name, _ in events], ['delta'])
+        delta = events[0][1]
+        self.assertEqual(delta['removed'], [])
+        self.assertIn('monitoring.zones', delta['changed'])
+        self.assertNotIn('kpis.nombre-jobs-total', delta['changed'])
+        self.assertNotEqual(
+            delta['changed']['kpis.repartition-assignments-1er-comptage'],
+            snapshot['kpis.repartition-assignments-1er-comptage'],
+        )
+
+        await communicator.send_input({'type': 'http.disconnect'})
+        await communicator.wait(timeout=2)
+
+    @override_settings(REPORTING_READS_ENABLED=True)
+    async def test_snapshot_reads_are_pinned_to_primary(self):
+        # Les lectures de reporting du flux ne passent pas par la réplique
+        aliases = []
+        build = DashboardSnapshotService.build
+
+        def recording_build(service, *args):
+            with reporting_reads():
+                aliases.append(Job.objects.all().db)
+            return build(service, *args)
+
+        token = str(AccessToken.for_user(self.web_user))
+        communicator = ApplicationCommunicator(application, self._scope(f'token={token}'.encode()))
+        with mock.patch.object(DashboardSnapshotService, 'build', recording_build):
+            await communicator.send_input({'type': 'http.request', 'body': b''})
+            start = await communicator.receive_output(timeout=5)
+
+        self.assertEqual(start['status'], 200)
+        self.assertEqual(aliases, ['default'])
+        await communicator.send_input({'type': 'http.disconnect'})
+        await communicator.wait(timeout=2)
@@ -0,0 +1,144 @@
+"""
+Tests des besoins en données déclarés par les serializers de liste (data_requirements).
+"""
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import serializers
+
+from apps.core.datatables import DataRequirements, LazyQueryError, QueryModelView
+from apps.inventory.constants import (
+    AssignmentStatus,
+    CountMode,
+    InventoryStatus,
+    JobDetailStatus,
+    JobStatus,
+    SessionType,
+)
+from apps.inventory.models import Assigment, Counting, Inventory, Job, JobDetail, Setting
+from apps.inventory.serializers.inventory_serializer import InventoryDetailSerializer
+from apps.inventory.views.job_views import JobPendingListView
+from apps.masterdata.models import Account, Location, LocationType, SousZone, Warehouse, Zone, ZoneType
+from apps.users.models import UserApp
+
+
+def _ref(model_cls) -> str:
+    return model_cls().generate_reference(model_cls.REFERENCE_PREFIX)
+
+
+class JobAssignmentCountSerializer(serializers.ModelSerializer):
+    """Lit les affectations sans les déclarer"""
+    assignments = serializers.SerializerMethodField()
+    data_requirements = DataRequirements(select_related=['warehouse'])
+
+    class Meta:
+        model = Job
+        fields = ['id', 'assignments']
+
+    def get_assignments(self, obj):
+        return len(obj.assigment_set.all())
+
+
+class JobAssignmentCountView(QueryModelView):
+    serializer_class = JobAssignmentCountSerializer
+
+    def get_queryset(self):
+        return Job.objects.filter(inventory__reference='DRQ-INV').order_by('id')
+
+
+class InventoryListView(QueryModelView):
+    serializer_class = InventoryDetailSerializer
+
+    def get_queryset(self):
+        return Inventory.objects.filter(reference='DRQ-INV')
+
+
+@override_settings(DATATABLES_STRICT_DATA_REQUIREMENTS=True)
+class DataRequirementsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        account = Account.objects.create(reference='ACC-DRQ', account_name='Compte DRQ', account_statuts='ACTIVE')
+        zone_type = ZoneType.objects.create(reference='ZT-DRQ', type_name='Stockage', status='ACTIVE')
+        location_type = LocationType.objects.create(reference='LT-DRQ', name='Palette')
+        warehouse = Warehouse.objects.create(
+            reference='WH-DRQ', warehouse_name='Entrepôt DRQ', warehouse_type='CENTRAL', status='ACTIVE',
+        )
+        inventory = Inventory.objects.create(
+            reference='DRQ-INV', label='Inventaire DRQ', date=now, status=InventoryStatus.EN_REALISATION,
+        )
+        Setting.objects.create(reference='ST-DRQ', account=account, warehouse=warehouse, inventory=inventory)
+        countings = [
+            Counting.objects.create(
+                reference=_ref(Counting), order=order, count_mode=CountMode.BY_ARTICLE, inventory=inventory,
+            )
+            for order in (1, 2, 3)
+        ]
+        users = [
+            UserApp.objects.create(username=f'drq_mobile_{index}', type=SessionType.MOBILE, password='!')
+            for index in (1, 2)
+        ]
+        # 2 zones de 8 emplacements, 4 jobs de 4 emplacements comptés en 1er et 2e comptage
+        locations = []
+        for z in range(2):
+            zone = Zone.objects.create(
+                reference=f'Z-DRQ-{z}', warehouse=warehouse, zone_name=f'Zone {z}', zone_type=zone_type,
+                zone_status='ACTIVE',
+            )
+            sous_zone = SousZone.objects.create(
+                reference=f'SZ-DRQ-{z}', zone=zone, sous_zone_name=f'Sous-zone {z}', sous_zone_status='ACTIVE',
+            )
+            locations += [
+                Location.objects.create(
+                    reference=f'L-DRQ-{z}-{index}', location_reference=f'DRQ-{z}-{index:04d}',
+                    sous_zone=sous_zone, location_type=location_type,
+                )
+                for index in range(8)
+            ]
+        for j in range(4):
+            job = Job.objects.create(
+                reference=f'JOB-{j + 1:04d}', status=JobStatus.EN_ATTENTE, warehouse=warehouse, inventory=inventory,
+            )
+            for counting, user in zip(countings, users):
+                Assigment.objects.create(
+                    reference=_ref(Assigment), status=AssignmentStatus.ENTAME, entame_date=now,
+                    job=job, counting=counting, session=user,
+                )
+                for location in locations[j * 4:(j + 1) * 4]:
+                    JobDetail.objects.create(
+                        reference=_ref(JobDetail), location=location, job=job, counting=counting,
+                        status=JobDetailStatus.EN_ATTENTE, en_attente_date=now,
+                    )
+
+    def _serialize(self, view):
+        return view.serialize_data(view.get_data_source().get_data())
+
+    def test_pending_jobs_serialized_without_lazy_queries(self):
+        view = JobPendingListView()
+        view.get_queryset = lambda: Job.objects.filter(inventory__reference='DRQ-INV').order_by('id')
+
+        with CaptureQueriesContext(connection) as queries:
+            rows = self._serialize(view)
+
+        # 4 jobs : requête principale + un prefetch par niveau de relation, quel que soit le nombre de jobs
+        self.assertEqual(len(rows), 4)
+        self.assertLessEqual(len(queries), 10)
+        self.assertEqual(len(rows[0]['emplacements']), 4)
+        self.assertIn('warehouse_name', rows[0]['emplacements'][0]['zone'])
+
+    def test_inventory_list_applies_serializer_requirements(self):
+        rows = self._serialize(InventoryListView())
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(len(rows[0]['comptages']), 3)
+        self.assertTrue(rows[0]['equipe'])
+
+    def test_undeclared_relation_raises_in_strict_mode(self):
+        with self.assertRaises(LazyQueryError):
+            self._serialize(JobAssignmentCountView())
+
+        with override_settings(DATATABLES_STRICT_DATA_REQUIREMENTS=False):
+            rows = self._serialize(JobAssignmentCountView())
+        self.assertEqual(len(rows), 4)
@@ -1,14 +1,19 @@
 """
 Tests pour l'API d'export Excel consolidé par article
 """
+import tempfile
+from unittest.mock import patch
+
 from django.test import TestCase
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from openpyxl import load_workbook
 
 from apps.inventory.models import (
+    ExportTask,
     Inventory,
     Counting,
     CountingDetail,
@@ -27,6 +32,8 @@ from apps.masterdata.models import (
     Family,
     Account,
 )
+from apps.inventory.repositories.excel_export_repository import ExcelExportRepository
+from apps.inventory.services.export_task_service import ExportTaskService
 
 
 class ExcelExportAPITestCase(TestCase):
@@ -195,7 +202,7 @@ class ExcelExportAPITestCase(TestCase):
         self.assertIn('articles_consolides', response['Content-Disposition'])
 
         # Vérifier que le contenu n'est pas vide
-        self.assertGreater(len(response.content), 0)
+        self.assertGreater(len(b"".join(response.streaming_content)), 0)
 
     def test_export_excel_inventory_not_found(self):
         """
@@ -357,8 +364,93 @@ class ExcelExportAPITestCase(TestCase):
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         from io import BytesIO
-        from openpyxl import load_workbook
 
-        workbook = load_workbook(BytesIO(response.content), data_only=True)
+        workbook = load_workbook(BytesIO(b"".join(response.streaming_content)), data_only=True)
         worksheet = workbook["Articles Consolidés"]
         self.assertEqual(worksheet["G2"].value, 15)
+
+    def test_export_sums_ecarts_per_product_and_excludes_test_code(self):
+        """Σ final_result par article, un écart à plusieurs séquences compté une fois."""
+        ComptageSequence.objects.create(
+            reference="CS-EXCEL-002",
+            ecart_comptage=self.ecart_comptage,
+            sequence_number=2,
+            counting_detail=self.counting_detail,
+            quantity=12,
+        )
+        second_ecart = EcartComptage.objects.create(
+            reference="ECT-EXCEL-002",
+            inventory=self.inventory,
+            final_result=5,
+            resolved=True,
+        )
+        ComptageSequence.objects.create(
+            reference="CS-EXCEL-003",
+            ecart_comptage=second_ecart,
+            sequence_number=1,
+            counting_detail=self.counting_detail,
+            quantity=5,
+        )
+        test_product = Product.objects.create(
+            reference="PROD-EXCEL-TEST",
+            Internal_Product_Code="111111111111111",
+            Short_Description="Article de test",
+            Product_Family=self.product_family,
+        )
+        test_detail = CountingDetail.objects.create(
+            reference="CD-EXCEL-TEST",
+            quantity_inventoried=7,
+            product=test_product,
+            location=self.location,
+            counting=self.counting_order_2,
+            job=self.job,
+        )
+        test_ecart = EcartComptage.objects.create(
+            reference="ECT-EXCEL-TEST",
+            inventory=self.inventory,
+            final_result=7,
+            resolved=True,
+        )
+        ComptageSequence.objects.create(
+            reference="CS-EXCEL-TEST",
+            ecart_comptage=test_ecart,
+            sequence_number=1,
+            counting_detail=test_detail,
+            quantity=7,
+        )
+
+        rows = ExcelExportRepository().get_consolidated_data_by_inventory_and_warehouse(
+            self.inventory.id,
+            self.warehouse.id,
+        )
+
+        self.assertEqual(
+            [(row["product_reference"], row["product_family"], row["total_quantity"]) for row in rows],
+            [("PROD-EXCEL-001", "Famille Excel", 20)],
+        )
+
+    def test_export_async_task(self):
+        """L'export asynchrone produit le même classeur, suivi via export-tasks/."""
+        service = ExportTaskService(runner=lambda target, args: target(*args))
+        with tempfile.TemporaryDirectory() as media_root, self.settings(MEDIA_ROOT=media_root):
+            # Exécution inline : la connexion de la transaction de test ne doit pas être fermée
+            with patch("apps.inventory.views.excel_export_views.ExportTaskService", return_value=service), \
+                    patch("apps.inventory.services.export_task_service.close_old_connections"):
+                response = self.client.post(
+                    reverse(
+                        "inventory-articles-consolides-export-async",
+                        kwargs={"inventory_id": self.inventory.id, "warehouse_id": self.warehouse.id},
+                    )
+                )
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+            status_response = self.client.get(
+                reverse("export-task-status", kwargs={"task_id": response.data["task_id"]})
+            )
+            self.assertEqual(status_response.data["status"], ExportTask.STATUS_SUCCESS)
+            self.assertIn("download_url", status_response.data)
+
+            task = ExportTask.objects.get(id=response.data["task_id"])
+            with task.result_file.open("rb") as handle:
+                worksheet = load_workbook(handle, read_only=True)["Articles Consolidés"]
+                self.assertEqual([row[6] for row in worksheet.iter_rows(values_only=True)], ["Quantité Consolidée", 15])
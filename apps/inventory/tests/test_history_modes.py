@@ -0,0 +1,112 @@
+"""
+Tests du sous-système d'historique par mode (apps.core.history).
+"""
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from apps.core.history import (
+    HistoryMode,
+    get_history_mode,
+    history_buffer,
+    history_mode,
+    record_bulk_history,
+)
+from apps.inventory.models import Personne
+
+
+def _personne(index: int) -> Personne:
+    return Personne(
+        full_name=f'Test {index}',
+        numero=f'opr-{index:04d}',
+        reference=f'PER-HIST-{index}',
+    )
+
+
+class HistoryModeResolutionTests(TestCase):
+    @override_settings(HISTORY_MODES={'inventory.Personne': 'off'}, HISTORY_DEFAULT_MODE='sync')
+    def test_model_mode_from_settings(self):
+        self.assertEqual(get_history_mode(Personne), HistoryMode.OFF)
+
+    @override_settings(HISTORY_MODES={}, HISTORY_DEFAULT_MODE='batched')
+    def test_default_mode_from_settings(self):
+        self.assertEqual(get_history_mode(Personne), HistoryMode.BATCHED)
+
+    @override_settings(HISTORY_MODES={'inventory.Personne': 'off'})
+    def test_override_takes_precedence(self):
+        with history_mode(HistoryMode.SYNC, [Personne]):
+            self.assertEqual(get_history_mode(Personne), HistoryMode.SYNC)
+        self.assertEqual(get_history_mode(Personne), HistoryMode.OFF)
+
+    @override_settings(HISTORY_MODES={'inventory.Personne': 'lazy'})
+    def test_invalid_mode_raises(self):
+        with self.assertRaises(ValueError):
+            get_history_mode(Personne)
+
+
+class HistoryWriteModesTests(TestCase):
+    def setUp(self):
+        self.history_model = Personne.history.model
+
+    def test_sync_writes_history_on_save(self):
+        with history_mode(HistoryMode.SYNC, [Personne]):
+            personne = _personne(1)
+            personne.save()
+        self.assertEqual(self.history_model.objects.filter(id=personne.id).count(), 1)
+
+    def test_off_writes_no_history(self):
+        with history_mode(HistoryMode.OFF, [Personne]):
+            personne = _personne(2)
+            personne.save()
+            personne.full_name = 'Modifié'
+            personne.save()
+        self.assertFalse(self.history_model.objects.filter(id=personne.id).exists())
+
+    def test_batched_flushes_on_commit_in_one_insert(self):
+        with history_mode(HistoryMode.BATCHED, [Personne]):
+            with self.captureOnCommitCallbacks() as callbacks:
+                personnes = [_personne(i) for i in range(10, 15)]
+                for personne in personnes:
+                    personne.save()
+                self.assertEqual(history_buffer.pending_count(), 5)
+
+            ids = [p.id for p in personnes]
+            self.assertFalse(self.history_model.objects.filter(id__in=ids).exists())
+            self.assertEqual(len(callbacks), 1)
+
+            with self.assertNumQueries(1):
+                callbacks[0]()
+
+        rows = self.history_model.objects.filter(id__in=ids)
+        self.assertEqual(rows.count(), 5)
+        self.assertEqual(set(rows.values_list('history_type', flat=True)), {'+'})
+
+    def test_batched_drops_rows_of_rolled_back_savepoint(self):
+        with history_mode(HistoryMode.BATCHED, [Personne]):
+            with self.captureOnCommitCallbacks(execute=True):
+                kept = _personne(20)
+                kept.save()
+                try:
+                    with transaction.atomic():
+                        dropped = _personne(21)
+                        dropped.save()
+                        raise RuntimeError('rollback')
+                except RuntimeError:
+                    pass
+                kept.full_name = 'Après rollback'
+                kept.save()
+
+        self.assertEqual(self.history_model.objects.filter(id=kept.id).count(), 2)
+        self.assertFalse(self.history_model.objects.filter(id=dropped.id).exists())
+
+    def test_record_bulk_history_only_in_batched_mode(self):
+        personnes = Personne.objects.bulk_create([_personne(i) for i in range(30, 33)])
+        ids = [p.id for p in personnes]
+
+        with history_mode(HistoryMode.SYNC, [Personne]):
+            self.assertEqual(record_bulk_history(personnes, Personne), 0)
+
+        with history_mode(HistoryMode.BATCHED, [Personne]):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(record_bulk_history(personnes, Personne), 3)
+
+        self.assertEqual(self.history_model.objects.filter(id__in=ids).count(), 3)
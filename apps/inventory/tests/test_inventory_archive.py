@@ -0,0 +1,190 @@
+"""
+Tests de l'archivage Parquet des inventaires clôturés (InventoryArchiveService, API .../archive/).
+"""
+import json
+import os
+import tempfile
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.inventory.constants import (
+    AssignmentStatus,
+    CountMode,
+    InventoryStatus,
+    JobDetailStatus,
+    JobStatus,
+    SessionType,
+)
+from apps.inventory.exceptions import InventoryStatusError, InventoryValidationError
+from apps.inventory.models import (
+    Assigment,
+    Counting,
+    CountingDetail,
+    Inventory,
+    InventoryArchive,
+    Job,
+    JobDetail,
+    Setting,
+)
+from apps.inventory.services.inventory_archive_service import InventoryArchiveService
+from apps.inventory.services.inventory_partitions import create_inventory_partitions
+from apps.inventory.services.inventory_result_service import InventoryResultService
+from apps.masterdata.models import (
+    Account,
+    Family,
+    Location,
+    LocationType,
+    Product,
+    SousZone,
+    Stock,
+    Warehouse,
+    Zone,
+    ZoneType,
+)
+from apps.users.models import UserApp
+
+
+def _normalized(rows):
+    return json.loads(json.dumps(rows, cls=DjangoJSONEncoder))
+
+
+class InventoryArchiveTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        account = Account.objects.create(reference='ACC-ARC', account_name='Compte ARC', account_statuts='ACTIVE')
+        family = Family.objects.create(
+            reference='FAM-ARC', family_name='Famille ARC', compte=account, family_status='ACTIVE',
+        )
+        zone_type = ZoneType.objects.create(reference='ZT-ARC', type_name='Stockage', status='ACTIVE')
+        location_type = LocationType.objects.create(reference='LT-ARC', name='Palette')
+        warehouse = Warehouse.objects.create(
+            reference='WH-ARC', warehouse_name='Entrepôt ARC', warehouse_type='CENTRAL', status='ACTIVE',
+        )
+        zone = Zone.objects.create(
+            reference='Z-ARC', warehouse=warehouse, zone_name='Zone', zone_type=zone_type, zone_status='ACTIVE',
+        )
+        sous_zone = SousZone.objects.create(
+            reference='SZ-ARC', zone=zone, sous_zone_name='Sous-zone', sous_zone_status='ACTIVE',
+        )
+        cls.inventory = Inventory.objects.create(
+            label='Inventaire ARC', date=now, status=InventoryStatus.EN_REALISATION, en_realisation_status_date=now,
+        )
+        # Comptages dans la partition de l'inventaire, comme en production
+        create_inventory_partitions(cls.inventory.id)
+        cls.warehouse_id = warehouse.id
+        Setting.objects.create(reference='ST-ARC', account=account, warehouse=warehouse, inventory=cls.inventory)
+        countings = [
+            Counting.objects.create(
+                reference=f'C-ARC-{order}', order=order, count_mode=CountMode.BY_ARTICLE, inventory=cls.inventory,
+            )
+            for order in (1, 2)
+        ]
+        cls.web_user = UserApp.objects.create_user(
+            username='arc_web', type=SessionType.WEB, compte=account, is_staff=True,
+        )
+        mobile_user = UserApp.objects.create(username='arc_pda', type=SessionType.MOBILE, compte=account, password='!')
+        job = Job.objects.create(
+            reference='JOB-0001', status=JobStatus.ENTAME, entame_date=now, warehouse=warehouse, inventory=cls.inventory,
+        )
+        # Un job de 4 emplacements (un produit et un stock chacun) compté deux fois
+        for counting in countings:
+            Assigment.objects.create(
+                reference=f'A-ARC-{counting.order}', status=AssignmentStatus.ENTAME, entame_date=now,
+                job=job, counting=counting, session=mobile_user,
+            )
+        for index in range(4):
+            location = Location.objects.create(
+                reference=f'L-ARC-{index}', location_reference=f'ARC-{index:04d}',
+                sous_zone=sous_zone, location_type=location_type,
+            )
+            product = Product.objects.create(
+                reference=f'P-ARC-{index}', Internal_Product_Code=f'ARC-ART-{index}',
+                Short_Description=f'Article {index}', Barcode=f'300000000000{index}', Stock_Unit='UN',
+                Product_Family=family,
+            )
+            Stock.objects.create(
+                reference=f'K-ARC-{index}', location=location, product=product, quantity_available=10,
+                inventory=cls.inventory, warehouse=warehouse,
+            )
+            for counting in countings:
+                JobDetail.objects.create(
+                    reference=f'JD-ARC-{counting.order}-{index}', location=location, job=job, counting=counting,
+                    status=JobDetailStatus.EN_ATTENTE, en_attente_date=now,
+                )
+                CountingDetail.objects.create(
+                    reference=f'CD-ARC-{counting.order}-{index}', quantity_inventoried=10 - index * counting.order,
+                    product=product, location=location, counting=counting, job=job, inventory=cls.inventory,
+                )
+
+    def setUp(self):
+        self.archive_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.archive_dir.cleanup)
+        settings_override = self.settings(INVENTORY_ARCHIVE_DIR=self.archive_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def _close(self):
+        self.inventory.status = InventoryStatus.CLOTURE
+        self.inventory.save(update_fields=['status'])
+
+    def test_only_closed_inventories_are_archived(self):
+        with self.assertRaises(InventoryStatusError):
+            InventoryArchiveService().archive(self.inventory.id)
+        self.assertEqual(os.listdir(self.archive_dir.name), [])
+
+    def test_archive_moves_rows_to_parquet_and_serves_results(self):
+        self._close()
+        service = InventoryArchiveService()
+        live_results = _normalized(
+            InventoryResultService().get_inventory_results_for_warehouse(self.inventory.id, self.warehouse_id)
+        )
+        counting_details = CountingDetail.objects.filter(job__inventory=self.inventory).count()
+        planned = service.plan(self.inventory.id)
+        self.assertEqual(counting_details, 8)
+        self.assertEqual(planned['counting_detail'], counting_details)
+
+        archive = service.archive(self.inventory.id)
+
+        # Lignes vérifiées puis supprimées des tables chaudes ; Job conservé
+        for dataset, count in planned.items():
+            self.assertEqual(archive.manifest[dataset]['rows'], count, dataset)
+        self.assertFalse(CountingDetail.objects.filter(job__inventory=self.inventory).exists())
+        self.assertFalse(Assigment.objects.filter(job__inventory=self.inventory).exists())
+        self.assertFalse(Stock.objects.filter(inventory=self.inventory).exists())
+        self.assertTrue(Job.objects.filter(inventory=self.inventory).exists())
+        self.assertEqual(service.verify(self.inventory.id), [])
+
+        # Résultats servis depuis l'archive, identiques aux résultats avant archivage
+        self.assertTrue(live_results)
+        self.assertEqual(service.get_inventory_results_for_warehouse(self.inventory.id, self.warehouse_id), live_results)
+        with self.assertRaises(InventoryValidationError):
+            InventoryResultService().get_inventory_results_for_warehouse(self.inventory.id, self.warehouse_id)
+        with self.assertRaises(InventoryValidationError):
+            service.archive(self.inventory.id)
+
+        client = APIClient()
+        client.force_authenticate(user=self.web_user)
+        response = client.get(reverse('inventory-archive-detail', args=[self.inventory.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data['data']['datasets']['counting_detail']['rows'], counting_details,
+        )
+        response = client.get(
+            reverse('inventory-archive-warehouse-results', args=[self.inventory.id, self.warehouse_id]),
+            {'pageSize': 100},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # Fichier altéré : détecté par verify
+        path = os.path.join(self.archive_dir.name, archive.path, archive.manifest['stock']['file'])
+        with open(path, 'ab') as handle:
+            handle.write(b'\0')
+        self.assertTrue(InventoryArchiveService().verify(self.inventory.id))
+        self.assertTrue(InventoryArchive.objects.filter(inventory=self.inventory).exists())
@@ -7,6 +7,7 @@ from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase
 
+from apps.core.querybudget import QueryBudgetMixin
 from apps.inventory.models import (
     Assigment,
     ComptageSequence,
@@ -30,7 +31,35 @@ from apps.masterdata.models import (
 from apps.users.models import UserApp
 
 
-class InventoryWarehouseKpiAPITestCase(APITestCase):
+# Validation (inventaire, entrepôt, setting) et agrégats du KPI,
+# indépendamment du nombre de jobs, d'équipes et d'écarts
+KPI_QUERY_BUDGET = 6
+
+KPI_URL_NAMES = [
+    'kpi-nombre-jobs-total',
+    'kpi-nombre-jobs-affectes',
+    'kpi-nombre-emplacements-couverts',
+    'kpi-taux-jobs-termines-1er-comptage',
+    'kpi-taux-jobs-termines-2e-comptage',
+    'kpi-repartition-assignments-1er-comptage',
+    'kpi-repartition-assignments-2e-comptage',
+    'kpi-repartition-assignments-3e-comptage',
+    'kpi-repartition-assignments-nieme-comptage',
+    'kpi-nombre-ecarts',
+    'kpi-nombre-jobs-avec-ecart',
+    'kpi-nombre-emplacements-avec-ecart',
+    'kpi-nombre-ecarts-ouverts',
+    'kpi-nombre-equipes',
+    'kpi-taux-termine-1er-comptage-par-equipe',
+    'kpi-taux-termine-2e-comptage-par-equipe',
+    'kpi-repartition-1er-comptage-par-equipe',
+    'kpi-repartition-2e-comptage-par-equipe',
+    'kpi-equipes-multi-ecarts',
+    'kpi-jobs-avec-ecart-par-equipe',
+]
+
+
+class InventoryWarehouseKpiAPITestCase(QueryBudgetMixin, APITestCase):
     def setUp(self) -> None:
         self.user = get_user_model().objects.create_user(
             username='kpi_tester',
@@ -190,6 +219,35 @@ class InventoryWarehouseKpiAPITestCase(APITestCase):
         self.assertEqual(len(teams), 1)
         self.assertEqual(teams[0]['team_key'], f'session:{self.mobile_user.id}')
 
+    def test_kpi_endpoints_within_query_budget(self) -> None:
+        # Jobs et équipes supplémentaires : une requête par job ou par équipe dépasserait le budget
+        for index in range(2, 5):
+            job = Job.objects.create(
+                reference=f'JOB-KPI-0{index}',
+                status='AFFECTE',
+                warehouse=self.warehouse,
+                inventory=self.inventory,
+            )
+            session = UserApp.objects.create_user(
+                username=f'equipe-kpi-{index}',
+                type='Mobile',
+                password='password123',
+            )
+            for counting in (self.counting_1, self.counting_2):
+                Assigment.objects.create(
+                    reference=f'ASS-KPI-{index}-{counting.order}',
+                    status='ENTAME',
+                    job=job,
+                    counting=counting,
+                    session=session,
+                )
+
+        for name in KPI_URL_NAMES:
+            with self.subTest(kpi=name):
+                with self.assertQueryBudget(KPI_QUERY_BUDGET, max_repeats=2, name=name):
+                    response = self.client.get(self._kpi_url(name))
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+
     def test_kpi_endpoint_inventory_not_found(self) -> None:
         url = reverse(
             'kpi-nombre-jobs-total',
@@ -0,0 +1,175 @@
+"""
+Tests du partitionnement par inventaire des tables de comptage
+(apps.core.partitioning, services.inventory_partitions).
+"""
+import tempfile
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.core.partitioning import default_partition_name, is_partitioned, partition_exists, partition_name
+from apps.inventory.constants import CountMode, InventoryStatus, JobStatus
+from apps.inventory.models import ComptageSequence, Counting, CountingDetail, EcartComptage, Inventory, Job, Setting
+from apps.inventory.repositories.inventory_result_repository import InventoryResultRepository
+from apps.inventory.services.inventory_archive_service import InventoryArchiveService
+from apps.inventory.services.inventory_partitions import create_inventory_partitions, partitioned_tables
+from apps.masterdata.models import (
+    Account,
+    Family,
+    Location,
+    LocationType,
+    Product,
+    SousZone,
+    Warehouse,
+    Zone,
+    ZoneType,
+)
+
+
+def _create_counted_inventory(tag, partitions=True):
+    """Inventaire d'un entrepôt : un job de 4 emplacements compté une fois (un produit par emplacement)"""
+    now = timezone.now()
+    account = Account.objects.create(reference=f'ACC-{tag}', account_name=f'Compte {tag}', account_statuts='ACTIVE')
+    family = Family.objects.create(
+        reference=f'FAM-{tag}', family_name=f'Famille {tag}', compte=account, family_status='ACTIVE',
+    )
+    zone_type = ZoneType.objects.create(reference=f'ZT-{tag}', type_name='Stockage', status='ACTIVE')
+    location_type = LocationType.objects.create(reference=f'LT-{tag}', name='Palette')
+    warehouse = Warehouse.objects.create(
+        reference=f'WH-{tag}', warehouse_name=f'Entrepôt {tag}', warehouse_type='CENTRAL', status='ACTIVE',
+    )
+    zone = Zone.objects.create(
+        reference=f'Z-{tag}', warehouse=warehouse, zone_name='Zone', zone_type=zone_type, zone_status='ACTIVE',
+    )
+    sous_zone = SousZone.objects.create(
+        reference=f'SZ-{tag}', zone=zone, sous_zone_name='Sous-zone', sous_zone_status='ACTIVE',
+    )
+    inventory = Inventory.objects.create(
+        reference=f'{tag}-INV', label=f'Inventaire {tag}', date=now, status=InventoryStatus.EN_REALISATION,
+        en_realisation_status_date=now,
+    )
+    # Sans partitions (création au commit, non exécutée en TestCase) : lignes en partition par défaut
+    if partitions:
+        create_inventory_partitions(inventory.id)
+    Setting.objects.create(reference=f'ST-{tag}', account=account, warehouse=warehouse, inventory=inventory)
+    counting = Counting.objects.create(
+        reference=f'C-{tag}-1', order=1, count_mode=CountMode.BY_ARTICLE, inventory=inventory,
+    )
+    job = Job.objects.create(
+        reference='JOB-0001', status=JobStatus.ENTAME, entame_date=now, warehouse=warehouse, inventory=inventory,
+    )
+    for index in range(4):
+        location = Location.objects.create(
+            reference=f'L-{tag}-{index}', location_reference=f'{tag}-{index:04d}',
+            sous_zone=sous_zone, location_type=location_type,
+        )
+        product = Product.objects.create(
+            reference=f'P-{tag}-{index}', Internal_Product_Code=f'{tag}-ART-{index}',
+            Short_Description=f'Article {index}', Barcode=f'{tag}-{index}', Stock_Unit='UN', Product_Family=family,
+        )
+        CountingDetail.objects.create(
+            reference=f'CD-{tag}-{index}', quantity_inventoried=index + 1, product=product, location=location,
+            counting=counting, job=job,
+        )
+    return inventory
+
+
+class InventoryPartitionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.inventory = _create_counted_inventory('PTA')
+        cls.other = _create_counted_inventory('PTB')
+
+    def _explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN {sql}')
+            return '\n'.join(row[0] for row in cursor.fetchall())
+
+    def test_tables_are_partitioned_and_rows_routed_by_inventory(self):
+        for table in partitioned_tables():
+            self.assertTrue(is_partitioned(connection, table), table)
+            self.assertTrue(partition_exists(connection, table, self.inventory.id), table)
+
+        detail = CountingDetail.objects.filter(job__inventory=self.inventory).first()
+        ecart = EcartComptage.objects.create(inventory=self.inventory)
+        sequence = ComptageSequence.objects.create(
+            ecart_comptage=ecart, sequence_number=1, counting_detail_id=detail.id, quantity=1,
+        )
+        # Clé de partition déduite du job (détail) puis du détail (séquence)
+        self.assertEqual(detail.inventory_id, self.inventory.id)
+        self.assertEqual(sequence.inventory_id, self.inventory.id)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT count(*) FROM {partition_name(CountingDetail._meta.db_table, self.inventory.id)}'
+            )
+            self.assertEqual(cursor.fetchone()[0], 4)
+
+    def test_inventory_creation_creates_partitions_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            inventory = Inventory.objects.create(
+                reference='PTC-INV', label='Partitions', date=timezone.now(),
+                status=InventoryStatus.EN_PREPARATION,
+            )
+        for table in partitioned_tables():
+            self.assertTrue(partition_exists(connection, table, inventory.id), table)
+
+    def test_default_partition_rows_are_moved_with_their_sequences(self):
+        # Inventaire dont les lignes sont restées dans la partition par défaut
+        inventory = _create_counted_inventory('PTD', partitions=False)
+        details = list(CountingDetail.objects.filter(inventory=inventory).order_by('id')[:2])
+        ecart = EcartComptage.objects.create(inventory=inventory)
+        for number, detail in enumerate(details, start=1):
+            ComptageSequence.objects.create(
+                ecart_comptage=ecart, sequence_number=number, counting_detail_id=detail.id, quantity=number,
+                reference=f'CS-PTD-{number}',
+            )
+        self.assertEqual(CountingDetail.objects.filter(inventory=inventory).count(), 4)
+
+        self.assertEqual(sorted(create_inventory_partitions(inventory.id)), sorted(partitioned_tables()))
+
+        with connection.cursor() as cursor:
+            for model, expected in ((CountingDetail, 4), (ComptageSequence, 2)):
+                table = model._meta.db_table
+                cursor.execute(f'SELECT count(*) FROM {partition_name(table, inventory.id)}')
+                self.assertEqual(cursor.fetchone()[0], expected, table)
+                cursor.execute(f'SELECT count(*) FROM {default_partition_name(table)} WHERE inventory_id = %s',
+                               [inventory.id])
+                self.assertEqual(cursor.fetchone()[0], 0, table)
+        self.assertEqual(
+            sorted(ComptageSequence.objects.filter(inventory=inventory).values_list('counting_detail_id', flat=True)),
+            [detail.id for detail in details],
+        )
+
+    def test_results_queries_only_read_the_inventory_partition(self):
+        with CaptureQueriesContext(connection) as queries:
+            rows = InventoryResultRepository().compute_rows(
+                self.inventory.id, self.inventory.awi_links.values_list('warehouse_id', flat=True),
+            )
+        self.assertTrue(rows)
+
+        plans = [
+            self._explain(query['sql']) for query in queries.captured_queries
+            if CountingDetail._meta.db_table in query['sql']
+        ]
+        self.assertTrue(plans)
+        for plan in plans:
+            self.assertIn(partition_name(CountingDetail._meta.db_table, self.inventory.id), plan)
+            self.assertNotIn(f'_p{self.other.id} ', plan)
+            self.assertNotIn('_default', plan)
+
+    def test_archive_drops_the_inventory_partitions(self):
+        self.inventory.status = InventoryStatus.CLOTURE
+        self.inventory.save(update_fields=['status'])
+        with tempfile.TemporaryDirectory() as archive_dir, self.settings(INVENTORY_ARCHIVE_DIR=archive_dir):
+            archive = InventoryArchiveService().archive(self.inventory.id)
+
+        self.assertEqual(archive.manifest['counting_detail']['rows'], 4)
+        for table in partitioned_tables():
+            self.assertFalse(partition_exists(connection, table, self.inventory.id), table)
+            self.assertTrue(partition_exists(connection, table, self.other.id), table)
+        self.assertFalse(CountingDetail.objects.filter(inventory=self.inventory).exists())
+        self.assertTrue(CountingDetail.objects.filter(inventory=self.other).exists())
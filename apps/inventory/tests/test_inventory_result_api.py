@@ -8,6 +8,7 @@ from rest_framework import status
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 
+from apps.core.querybudget import QueryBudgetMixin
 from apps.inventory.models import (
     Inventory,
     Counting,
@@ -26,7 +27,12 @@ from apps.masterdata.models import (
 )
 
 
-class InventoryResultAPIViewTestCase(TestCase):
+# Validation, table matérialisée (marqueur + lignes) et statuts d'affectation,
+# indépendamment du nombre d'emplacements et de jobs
+RESULTS_QUERY_BUDGET = 8
+
+
+class InventoryResultAPIViewTestCase(QueryBudgetMixin, TestCase):
     """
     Suite de tests pour l'endpoint /inventory/<inventory_id>/warehouses/<warehouse_id>/results/.
     """
@@ -215,6 +221,43 @@ class InventoryResultAPIViewTestCase(TestCase):
         if "resolved" in entry_b:
             self.assertIsInstance(entry_b["resolved"], bool)
 
+    def test_results_within_query_budget(self) -> None:
+        """
+        Le nombre de requêtes ne dépend pas du nombre de lignes de résultats.
+        """
+        sous_zone = SousZone.objects.first()
+        location_type = LocationType.objects.first()
+        for i in range(1, 11):
+            location = Location.objects.create(
+                reference=f"LOC-QB-{i:03d}",
+                location_reference=f"QB-{i:03d}",
+                sous_zone=sous_zone,
+                location_type=location_type,
+            )
+            job = Job.objects.create(
+                reference=f"JOB-QB-{i:03d}",
+                status="EN ATTENTE",
+                warehouse=self.warehouse,
+                inventory=self.inventory,
+            )
+            for order in (1, 2):
+                CountingDetail.objects.create(
+                    reference=f"CD-QB-{i:03d}-{order}",
+                    counting=self.countings[order],
+                    location=location,
+                    job=job,
+                    quantity_inventoried=10 * order + i,
+                )
+
+        # Première lecture : construction de la table matérialisée
+        self.client.get(self.url)
+        with self.assertQueryBudget(RESULTS_QUERY_BUDGET, max_repeats=2, name="inventory_results"):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # 2 emplacements du jeu initial + 10 ajoutés
+        self.assertEqual(response.data["total"], 12)
+
     def test_pagination_with_startrow_endrow(self) -> None:
         """
         Test de pagination avec startRow=20 et endRow=40 (1-indexed).
@@ -0,0 +1,234 @@
+"""
+Tests de la table matérialisée des résultats d'inventaire (InventoryResult).
+"""
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.inventory.constants import AssignmentStatus, CountMode, InventoryStatus, JobStatus, SessionType
+from apps.inventory.models import (
+    Assigment,
+    ComptageSequence,
+    Counting,
+    CountingDetail,
+    EcartComptage,
+    Inventory,
+    InventoryResult,
+    InventoryResultBuild,
+    Job,
+    Setting,
+)
+from apps.inventory.repositories import CountingRepository
+from apps.inventory.services.ecart_comptage_service import EcartComptageService
+from apps.inventory.services.inventory_result_service import InventoryResultService
+from apps.masterdata.models import (
+    Account,
+    Family,
+    Location,
+    LocationType,
+    Product,
+    SousZone,
+    Warehouse,
+    Zone,
+    ZoneType,
+)
+from apps.users.models import UserApp
+
+
+# Validation (inventaire, entrepôt, setting, comptages), marqueur de construction,
+# lignes matérialisées et statuts d'affectation — indépendant du volume
+MAX_READ_QUERIES = 8
+
+
+def _ref(model_cls) -> str:
+    return model_cls().generate_reference(model_cls.REFERENCE_PREFIX)
+
+
+class InventoryResultMaterializedTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        account = Account.objects.create(reference='ACC-IRM', account_name='Compte IRM', account_statuts='ACTIVE')
+        family = Family.objects.create(
+            reference='FAM-IRM', family_name='Famille IRM', compte=account, family_status='ACTIVE',
+        )
+        products = [
+            Product.objects.create(
+                reference=f'P-IRM-{p}', Internal_Product_Code=f'IRM-ART-{p}', Short_Description=f'Article {p}',
+                Barcode=f'30000000000{p}', Stock_Unit='UN', Product_Family=family,
+            )
+            for p in range(2)
+        ]
+        zone_type = ZoneType.objects.create(reference='ZT-IRM', type_name='Stockage', status='ACTIVE')
+        location_type = LocationType.objects.create(reference='LT-IRM', name='Palette')
+        warehouse = Warehouse.objects.create(
+            reference='WH-IRM', warehouse_name='Entrepôt IRM', warehouse_type='CENTRAL', status='ACTIVE',
+        )
+        zone = Zone.objects.create(
+            reference='Z-IRM', warehouse=warehouse, zone_name='Zone', zone_type=zone_type, zone_status='ACTIVE',
+        )
+        sous_zone = SousZone.objects.create(
+            reference='SZ-IRM', zone=zone, sous_zone_name='Sous-zone', sous_zone_status='ACTIVE',
+        )
+        inventory = Inventory.objects.create(
+            label='Inventaire IRM', date=now, status=InventoryStatus.EN_REALISATION, en_realisation_status_date=now,
+        )
+        Setting.objects.create(reference='ST-IRM', account=account, warehouse=warehouse, inventory=inventory)
+        countings = [
+            Counting.objects.create(
+                reference=_ref(Counting), order=order, count_mode=CountMode.BY_ARTICLE, inventory=inventory,
+            )
+            for order in (1, 2, 3)
+        ]
+        users = [
+            UserApp.objects.create(username=f'irm_mobile_{index}', type=SessionType.MOBILE, password='!')
+            for index in (1, 2)
+        ]
+        # 2 jobs de 3 emplacements, un produit par emplacement compté aux comptages 1 et 2
+        # (le 2e comptage diffère sur le dernier emplacement de chaque job). Détails insérés
+        # par bulk_create : sans signal, aucun rafraîchissement n'est mis en attente ici.
+        details = []
+        for j in range(2):
+            job = Job.objects.create(
+                reference=f'JOB-{j + 1:04d}', status=JobStatus.ENTAME, entame_date=now,
+                warehouse=warehouse, inventory=inventory,
+            )
+            for counting, user in zip(countings, users):
+                Assigment.objects.create(
+                    reference=_ref(Assigment), status=AssignmentStatus.ENTAME, entame_date=now,
+                    job=job, counting=counting, session=user,
+                )
+            for k in range(3):
+                location = Location.objects.create(
+                    reference=f'L-IRM-{j}-{k}', location_reference=f'IRM-{j}-{k:04d}',
+                    sous_zone=sous_zone, location_type=location_type,
+                )
+                details += [
+                    CountingDetail(
+                        reference=_ref(CountingDetail),
+                        quantity_inventoried=10 + k + (counting.order - 1) * (k == 2),
+                        product=products[k % 2], location=location, counting=counting, job=job,
+                        inventory=inventory,
+                    )
+                    for counting in countings[:2]
+                ]
+        CountingDetail.objects.bulk_create(details)
+        cls.inventory_id = inventory.id
+        cls.warehouse_id = warehouse.id
+
+    def setUp(self):
+        self.service = InventoryResultService()
+
+    def _results(self):
+        return self.service.get_inventory_results_for_warehouse(self.inventory_id, self.warehouse_id)
+
+    def _create_ecart(self, final_result=None):
+        """Écart sur les comptages 1 et 2 du premier emplacement / produit compté deux fois"""
+        detail_1 = CountingDetail.objects.filter(
+            counting__inventory_id=self.inventory_id, counting__order=1,
+        ).order_by('id').first()
+        detail_2 = CountingDetail.objects.filter(
+            job_id=detail_1.job_id, location_id=detail_1.location_id,
+            product_id=detail_1.product_id, counting__order=2,
+        ).first()
+        ecart = EcartComptage.objects.create(
+            reference=_ref(EcartComptage), inventory_id=self.inventory_id, final_result=final_result,
+        )
+        for sequence_number, detail in enumerate((detail_1, detail_2), start=1):
+            ComptageSequence.objects.create(
+                reference=_ref(ComptageSequence),
+                ecart_comptage=ecart,
+                sequence_number=sequence_number,
+                counting_detail=detail,
+                quantity=detail.quantity_inventoried,
+            )
+        return ecart, detail_1
+
+    def _row(self, results, detail):
+        return next(
+            row for row in results
+            if row['location_id'] == detail.location_id and row['job_id'] == detail.job_id
+            and row['product'] in (detail.product.Barcode, detail.product.Internal_Product_Code)
+        )
+
+    def test_first_read_builds_table_matching_aggregate(self):
+        ecart, _ = self._create_ecart(final_result=7)
+
+        results = self._results()
+
+        self.assertTrue(InventoryResultBuild.objects.filter(
+            inventory_id=self.inventory_id, warehouse_id=self.warehouse_id,
+        ).exists())
+        aggregate = CountingRepository().get_inventory_results_by_warehouse(self.inventory_id, self.warehouse_id)
+        rows = list(InventoryResult.objects.filter(inventory_id=self.inventory_id, warehouse_id=self.warehouse_id))
+        self.assertEqual(
+            {(row.location_id, row.product_id, row.job_id, int(order)): quantity
+             for row in rows for order, quantity in row.quantities.items()},
+            {(row['location_id'], row['product_id'], row['job_id'], row['counting_order_alias']): row['total_quantity']
+             for row in aggregate},
+        )
+        self.assertEqual(
+            {(row.location_id, row.product_id, row.job_id): (row.ecart_comptage_id, row.final_result) for row in rows},
+            {(row['location_id'], row['product_id'], row['job_id']): (row['ecart_id_alias'], row['final_result_agg'])
+             for row in aggregate},
+        )
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(len(results), len(rows))
+        with_ecart = [row for row in results if row['result_id'] is not None]
+        self.assertTrue(with_ecart)
+        self.assertTrue(all(row['result_id'] == ecart.id and row['final_result'] == 7 for row in with_ecart))
+        self.assertIn('statut_1er_comptage', results[0])
+
+        with CaptureQueriesContext(connection) as queries:
+            self._results()
+        self.assertLessEqual(len(queries), MAX_READ_QUERIES)
+
+    def test_counting_detail_change_refreshes_location_on_commit(self):
+        self._results()
+        detail = CountingDetail.objects.filter(
+            counting__inventory_id=self.inventory_id, counting__order=1, product__isnull=False,
+        ).select_related('product').order_by('id').first()
+        built_ids = set(InventoryResult.objects.values_list('id', flat=True))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            detail.quantity_inventoried += 100
+            detail.save()
+
+        row = self._row(self._results(), detail)
+        self.assertEqual(row['1er comptage'], detail.quantity_inventoried)
+        # Seules les lignes de l'emplacement modifié sont réécrites
+        self.assertEqual(
+            set(InventoryResult.objects.exclude(id__in=built_ids).values_list('location_id', flat=True)),
+            {detail.location_id},
+        )
+
+    def test_bulk_ecart_resolution_refreshes_warehouse(self):
+        self._results()
+        with self.captureOnCommitCallbacks(execute=True):
+            ecart, detail = self._create_ecart(final_result=5)
+        self.assertIs(self._row(self._results(), detail)['resolved'], False)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            resolved_count = EcartComptageService().bulk_resolve_ecarts_by_inventory(
+                self.inventory_id, self.warehouse_id,
+            )
+
+        self.assertEqual(resolved_count, 1)
+        row = self._row(self._results(), detail)
+        self.assertEqual((row['result_id'], row['final_result'], row['resolved']), (ecart.id, 5, True))
+
+    def test_rebuild_command_restores_table(self):
+        self._results()
+        expected = self._results()
+        InventoryResult.objects.all().delete()
+
+        out = StringIO()
+        call_command('rebuild_inventory_results', inventory_id=self.inventory_id, stdout=out)
+
+        self.assertIn('Reconstruction terminée', out.getvalue())
+        self.assertEqual(self._results(), expected)
@@ -0,0 +1,145 @@
+"""
+Tests du calcul groupé des écarts par job (JobDiscrepancyService).
+"""
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.inventory.constants import AssignmentStatus, CountMode, InventoryStatus, JobStatus, SessionType
+from apps.inventory.models import (
+    Assigment,
+    ComptageSequence,
+    Counting,
+    CountingDetail,
+    EcartComptage,
+    Inventory,
+    Job,
+)
+from apps.inventory.services.job_discrepancy_service import JobDiscrepancyService
+from apps.masterdata.models import Location, LocationType, SousZone, Warehouse, Zone, ZoneType
+from apps.users.models import UserApp
+
+
+# Existence inventaire + warehouse, puis une requête par agrégat
+MAX_QUERIES = 6
+
+# Quantités (comptage 1, comptage 2) des 2 emplacements de chaque job ; le 4e job n'est pas compté
+QUANTITIES = [
+    [(5, 5), (3, 4)],
+    [(2, 1), (2, 1)],
+    [(1, 1), (1, 1)],
+    None,
+]
+
+
+def _ref(model_cls) -> str:
+    return model_cls().generate_reference(model_cls.REFERENCE_PREFIX)
+
+
+class JobDiscrepancyServiceTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        zone_type = ZoneType.objects.create(reference='ZT-JDS', type_name='Stockage', status='ACTIVE')
+        location_type = LocationType.objects.create(reference='LT-JDS', name='Palette')
+        cls.warehouse = Warehouse.objects.create(
+            reference='WH-JDS', warehouse_name='Entrepôt JDS', warehouse_type='CENTRAL', status='ACTIVE',
+        )
+        zone = Zone.objects.create(
+            reference='Z-JDS', warehouse=cls.warehouse, zone_name='Zone', zone_type=zone_type, zone_status='ACTIVE',
+        )
+        sous_zone = SousZone.objects.create(
+            reference='SZ-JDS', zone=zone, sous_zone_name='Sous-zone', sous_zone_status='ACTIVE',
+        )
+        cls.inventory = Inventory.objects.create(
+            label='Inventaire JDS', date=timezone.now(), status=InventoryStatus.EN_REALISATION,
+        )
+        countings = [
+            Counting.objects.create(
+                reference=_ref(Counting), order=order, count_mode=CountMode.BY_ARTICLE, inventory=cls.inventory,
+            )
+            for order in (1, 2)
+        ]
+        users = [
+            UserApp.objects.create(username=f'jds_mobile_{index}', type=SessionType.MOBILE, password='!')
+            for index in (1, 2)
+        ]
+        cls.jobs = []
+        for index, quantities in enumerate(QUANTITIES, start=1):
+            job = Job.objects.create(
+                reference=f'JOB-{index:04d}', status=JobStatus.ENTAME, entame_date=timezone.now(),
+                warehouse=cls.warehouse, inventory=cls.inventory,
+            )
+            cls.jobs.append(job)
+            for counting, user in zip(countings, users):
+                Assigment.objects.create(
+                    reference=_ref(Assigment), status=AssignmentStatus.ENTAME, entame_date=timezone.now(),
+                    job=job, counting=counting, session=user,
+                )
+            for position in range(2):
+                location = Location.objects.create(
+                    reference=f'L-JDS-{index}-{position}', location_reference=f'JDS-{index:02d}-{position:02d}',
+                    sous_zone=sous_zone, location_type=location_type,
+                )
+                for counting, quantity in zip(countings, quantities[position] if quantities else ()):
+                    CountingDetail.objects.create(
+                        reference=_ref(CountingDetail), quantity_inventoried=quantity, location=location,
+                        counting=counting, job=job, inventory=cls.inventory,
+                    )
+
+    def setUp(self):
+        self.service = JobDiscrepancyService()
+
+    def test_discrepancy_screen_uses_constant_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            result = self.service.get_jobs_with_discrepancies(self.inventory.id, self.warehouse.id)
+
+        self.assertLessEqual(len(queries), MAX_QUERIES)
+        self.assertEqual([row['job_reference'] for row in result], [job.reference for job in self.jobs])
+        self.assertEqual([row['discrepancy_count'] for row in result], [1, 2, 0, 0])
+        for row in result:
+            self.assertEqual({a['counting_order'] for a in row['assignments']}, {1, 2})
+            self.assertIsNotNone(row['counting_1_session'])
+
+    def test_unresolved_discrepancies_grouped_by_next_counting(self):
+        first, second, third = self.jobs[:3]
+        Assigment.objects.filter(job__in=[first, second, third]).update(status='TERMINE')
+        for job in (first, second):
+            ecart = EcartComptage.objects.create(reference=_ref(EcartComptage), inventory=self.inventory)
+            location_id = CountingDetail.objects.filter(job=job).order_by('location_id').first().location_id
+            details = [
+                CountingDetail.objects.filter(job=job, location_id=location_id, counting__order=order).first()
+                for order in (1, 2)
+            ]
+            for sequence_number, detail in enumerate(details, start=1):
+                ComptageSequence.objects.create(
+                    reference=_ref(ComptageSequence),
+                    ecart_comptage=ecart,
+                    sequence_number=sequence_number,
+                    counting_detail=detail,
+                    quantity=detail.quantity_inventoried,
+                )
+        # Écart résolu : pas de comptage suivant pour le 3e job
+        resolved = EcartComptage.objects.create(reference=_ref(EcartComptage), inventory=self.inventory, final_result=3)
+        ComptageSequence.objects.create(
+            reference=_ref(ComptageSequence),
+            ecart_comptage=resolved,
+            sequence_number=1,
+            counting_detail=CountingDetail.objects.filter(job=third).first(),
+            quantity=3,
+        )
+        Job.objects.filter(id__in=[first.id, second.id, third.id]).update(status='ENTAME')
+
+        with CaptureQueriesContext(connection) as queries:
+            result = self.service.get_jobs_with_unresolved_discrepancies_grouped_by_counting(
+                self.inventory.id, self.warehouse.id
+            )
+
+        self.assertLessEqual(len(queries), MAX_QUERIES)
+        self.assertEqual(len(result), 1)
+        self.assertEqual(result[0]['next_counting_order'], 3)
+        self.assertEqual(
+            [(job['job_id'], job['current_max_counting'], job['discrepancies_locations_count']) for job in result[0]['jobs']],
+            [(first.id, 2, 1), (second.id, 2, 1)],
+        )
@@ -0,0 +1,42 @@
+"""
+Tests de l'import différé des dépendances lourdes (apps.core.lazy_imports).
+"""
+import sys
+
+from django.test import SimpleTestCase
+
+from apps.core.lazy_imports import LazyModule, find_eager_heavy_imports, lazy_import, parse_importtime
+
+
+class LazyModuleTests(SimpleTestCase):
+
+    def test_module_loaded_on_first_attribute_access(self):
+        proxy = lazy_import('json.tool')
+        sys.modules.pop('json.tool', None)
+
+        self.assertIsInstance(proxy, LazyModule)
+        self.assertNotIn('json.tool', sys.modules)
+        self.assertTrue(callable(proxy.main))
+        self.assertIn('json.tool', sys.modules)
+
+    def test_parse_importtime(self):
+        output = (
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       120 |        120 |     numpy.version\n'
+            'import time:      3000 |       3120 |   numpy\n'
+            'Traceback (most recent call last):\n'
+        )
+        timings = parse_importtime(output)
+
+        self.assertEqual([(t.module, t.self_us, t.cumulative_us, t.depth) for t in timings], [
+            ('numpy.version', 120, 120, 2),
+            ('numpy', 3000, 3120, 1),
+        ])
+        self.assertEqual(timings[0].package, 'numpy')
+
+
+class EagerHeavyImportTests(SimpleTestCase):
+
+    def test_urlconf_does_not_import_heavy_modules(self):
+        # pandas / numpy / openpyxl / reportlab : lazy_import ou import local
+        self.assertEqual(find_eager_heavy_imports(('project.urls',)), [])
@@ -0,0 +1,131 @@
+"""
+Tests de la création en masse des Jobs / JobDetails / Affectations de l'import InventoryLocationJob.
+"""
+import os
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.inventory.constants import CountMode, InventoryStatus, SessionType
+from apps.inventory.models import Assigment, Counting, Inventory, Job, JobDetail
+from apps.inventory.services.inventory_location_job_import_materialization import LocationJobImportMaterializer
+from apps.masterdata.exceptions import InventoryLocationJobValidationError
+from apps.masterdata.models import ImportTask, Location, LocationType, SousZone, Warehouse, Zone, ZoneType
+from apps.users.models import UserApp
+
+
+class LocationJobImportMaterializerTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        zone_type = ZoneType.objects.create(reference='ZT-LJM', type_name='Stockage', status='ACTIVE')
+        location_type = LocationType.objects.create(reference='LT-LJM', name='Palette')
+        cls.user = UserApp.objects.create_user(username='ljm_web', type=SessionType.WEB)
+        cls.inventory = Inventory.objects.create(
+            label='Inventaire LJM', date=timezone.now(), status=InventoryStatus.EN_PREPARATION,
+        )
+        cls.counting1, cls.counting2 = (
+            Counting.objects.create(
+                reference=f'C-LJM-{order}', order=order, count_mode=CountMode.BY_ARTICLE, inventory=cls.inventory,
+            )
+            for order in (1, 2)
+        )
+        # 2 warehouses de 30 emplacements : (id emplacement, id warehouse) dans l'ordre de création
+        cls.locations = []
+        for w in range(2):
+            warehouse = Warehouse.objects.create(
+                reference=f'WH-LJM-{w}', warehouse_name=f'Entrepôt LJM {w}', warehouse_type='CENTRAL', status='ACTIVE',
+            )
+            zone = Zone.objects.create(
+                reference=f'Z-LJM-{w}', warehouse=warehouse, zone_name=f'Zone {w}', zone_type=zone_type,
+                zone_status='ACTIVE',
+            )
+            sous_zone = SousZone.objects.create(
+                reference=f'SZ-LJM-{w}', zone=zone, sous_zone_name=f'Sous-zone {w}', sous_zone_status='ACTIVE',
+            )
+            for index in range(30):
+                location = Location.objects.create(
+                    reference=f'L-LJM-{w}-{index}', location_reference=f'LJM-{w}-{index:04d}',
+                    sous_zone=sous_zone, location_type=location_type,
+                )
+                cls.locations.append((location.id, warehouse.id))
+
+    def _rows(self, locations_per_job=10):
+        return [
+            {
+                'warehouse_id': warehouse_id,
+                'emplacement_id': location_id,
+                'job': f'JOB-{index // locations_per_job + 1:04d}',
+            }
+            for index, (location_id, warehouse_id) in enumerate(self.locations)
+        ]
+
+    def _import_task(self):
+        task = ImportTask.objects.create(
+            user=self.user,
+            inventory=self.inventory,
+            file_path='ljm.xlsx',
+            file_name='ljm.xlsx',
+        )
+        self.addCleanup(lambda: task.errors_file_path and os.path.exists(task.errors_file_path)
+                        and os.remove(task.errors_file_path))
+        return task
+
+    def test_bulk_creation_with_chunk_progress(self):
+        task = self._import_task()
+        materializer = LocationJobImportMaterializer(
+            self.inventory, self.counting1, self.counting2, import_task=task, chunk_size=25
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            result = materializer.materialize(self._rows())
+
+        # 60 emplacements, 6 jobs, 2 comptages
+        self.assertEqual(result, {'jobs_created': 6, 'job_details_created': 120, 'assignments_created': 12})
+        self.assertLess(len(queries), 40)
+        jobs = Job.objects.filter(inventory=self.inventory)
+        self.assertEqual(sorted(jobs.values_list('reference', flat=True)), [f'JOB-{n:04d}' for n in range(1, 7)])
+        self.assertEqual(JobDetail.objects.filter(job__inventory=self.inventory).count(), 120)
+        self.assertEqual(
+            set(Assigment.objects.filter(job__inventory=self.inventory).values_list('status', flat=True)),
+            {'EN ATTENTE'},
+        )
+        # Jobs rattachés au chunk de leur première ligne (lignes 1-25, 26-50, 51-60)
+        progress = {chunk['chunk_number']: chunk for chunk in task.get_chunks_progress()}
+        self.assertEqual([progress[n]['jobs_created'] for n in (1, 2, 3)], [3, 2, 1])
+        self.assertEqual(sum(chunk['job_details_created'] for chunk in progress.values()), 120)
+
+        # Relance : job existant complété, affectations existantes conservées
+        rows = self._rows()
+        JobDetail.objects.filter(job__reference='JOB-0001', location_id=rows[0]['emplacement_id']).delete()
+        result = LocationJobImportMaterializer(self.inventory, self.counting1, self.counting2).materialize(rows)
+        self.assertEqual(result, {'jobs_created': 0, 'job_details_created': 2, 'assignments_created': 0})
+
+    def test_location_already_in_other_job_aborts(self):
+        rows = self._rows()
+        LocationJobImportMaterializer(self.inventory, self.counting1, self.counting2).materialize(rows[:10])
+        rows[0]['job'] = 'JOB-0009'
+
+        with self.assertRaises(InventoryLocationJobValidationError) as error:
+            LocationJobImportMaterializer(self.inventory, self.counting1, self.counting2).materialize(rows[:1])
+
+        self.assertIn('Job demandé: JOB-0009', str(error.exception))
+
+    def test_pda_and_dashboards_are_notified(self):
+        module = 'apps.inventory.services.inventory_location_job_import_materialization'
+        with mock.patch(f'{module}.publish_pda_changes') as publish, \
+                mock.patch(f'{module}.notify_dashboard_changes') as notify:
+            LocationJobImportMaterializer(self.inventory, self.counting1, self.counting2).materialize(self._rows())
+
+        job_ids = set(Job.objects.filter(inventory=self.inventory).values_list('id', flat=True))
+        publish.assert_called_once()
+        self.assertEqual(set(publish.call_args.kwargs['job_ids']), job_ids)
+        self.assertEqual(
+            set(publish.call_args.kwargs['assignment_ids']),
+            set(Assigment.objects.filter(job__inventory=self.inventory).values_list('id', flat=True)),
+        )
+        self.assertEqual(len(publish.call_args.kwargs['job_detail_ids']), 120)
+        notify.assert_called_once_with(job_ids=job_ids)
@@ -0,0 +1,104 @@
+"""
+Tests de la validation ensembliste de l'import InventoryLocationJob.
+"""
+import os
+import tempfile
+
+import pandas as pd
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.inventory.constants import InventoryStatus
+from apps.inventory.models import Inventory, Setting
+from apps.inventory.services.inventory_location_job_import_service import InventoryLocationJobImportService
+from apps.masterdata.models import Account, Location, LocationType, SousZone, Warehouse, Zone, ZoneType
+
+
+class LocationJobImportValidationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        account = Account.objects.create(reference='ACC-LJV', account_name='Compte LJV', account_statuts='ACTIVE')
+        zone_type = ZoneType.objects.create(reference='ZT-LJV', type_name='Stockage', status='ACTIVE')
+        location_type = LocationType.objects.create(reference='LT-LJV', name='Palette')
+        cls.inventory = Inventory.objects.create(label='Inventaire LJV', date=timezone.now(), status=InventoryStatus.EN_PREPARATION)
+        cls.warehouses = []
+        for w in range(2):
+            warehouse = Warehouse.objects.create(
+                reference=f'WH-LJV-{w}', warehouse_name=f'Entrepôt LJV {w}', warehouse_type='CENTRAL', status='ACTIVE',
+            )
+            zone = Zone.objects.create(
+                reference=f'Z-LJV-{w}', warehouse=warehouse, zone_name=f'Zone {w}', zone_type=zone_type,
+                zone_status='ACTIVE',
+            )
+            sous_zone = SousZone.objects.create(
+                reference=f'SZ-LJV-{w}', zone=zone, sous_zone_name=f'Sous-zone {w}', sous_zone_status='ACTIVE',
+            )
+            for index in range(10):
+                Location.objects.create(
+                    reference=f'L-LJV-{w}-{index}', location_reference=f'LJV-{w}-{index:04d}',
+                    sous_zone=sous_zone, location_type=location_type,
+                )
+            Setting.objects.create(reference=f'ST-LJV-{w}', account=account, warehouse=warehouse, inventory=cls.inventory)
+            cls.warehouses.append(warehouse)
+
+    def setUp(self):
+        self.service = InventoryLocationJobImportService()
+
+    def _write_excel(self, rows):
+        handle, path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        pd.DataFrame(rows, columns=['warehouse', 'emplacement', 'active', 'job', 'session_1', 'session_2']).to_excel(
+            path, index=False
+        )
+        return path
+
+    def _rows_for(self, warehouse):
+        return [
+            {'warehouse': warehouse.warehouse_name, 'emplacement': reference, 'active': False}
+            for reference in Location.objects.filter(
+                sous_zone__zone__warehouse=warehouse
+            ).order_by('id').values_list('location_reference', flat=True)
+        ]
+
+    def test_error_report_without_per_row_queries(self):
+        first, second = self.warehouses
+        rows = self._rows_for(first) + self._rows_for(second)
+        # Emplacement d'un autre warehouse, emplacement inconnu, warehouse inconnu
+        rows[3]['emplacement'] = rows[-1]['emplacement']
+        rows[5]['emplacement'] = 'LJV-INCONNU'
+        rows[7]['warehouse'] = 'Entrepôt fantôme'
+        path = self._write_excel(rows)
+
+        with CaptureQueriesContext(connection) as queries:
+            result = self.service.import_from_excel(self.inventory.id, path)
+
+        self.assertFalse(result['success'])
+        self.assertLess(len(queries), 10)
+        errors = {error['row_number']: error['message'] for error in result['errors']}
+        self.assertEqual(set(errors), {5, 7, 9})
+        self.assertEqual(
+            errors[5],
+            f"L'emplacement '{rows[-1]['emplacement']}' existe mais n'est pas lié au warehouse '{first.warehouse_name}'",
+        )
+        self.assertEqual(errors[7], "L'emplacement 'LJV-INCONNU' n'existe pas")
+        self.assertEqual(
+            errors[9],
+            "Le warehouse 'Entrepôt fantôme' n'existe pas: Entrepôt avec le nom 'Entrepôt fantôme' non trouvé.",
+        )
+
+    def test_validate_row_without_preloaded_lookups(self):
+        first = self.warehouses[0]
+        row = self._rows_for(first)[0]
+
+        errors = self.service._validate_row(row, 2, self.inventory)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(row['warehouse_id'], first.id)
+        self.assertEqual(
+            row['emplacement_id'],
+            Location.objects.get(location_reference=row['emplacement'], sous_zone__zone__warehouse=first).id,
+        )
@@ -0,0 +1,102 @@
+"""
+Tests des numéros de série de comptage traités par lot
+(services.nserie_inventory_service).
+"""
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from django.utils import timezone
+
+from apps.inventory.constants import CountMode, InventoryStatus, JobStatus
+from apps.inventory.models import Counting, CountingDetail, Inventory, Job, NSerieInventory
+from apps.inventory.services.nserie_inventory_service import attach_serials, unknown_serials
+from apps.masterdata.models import (
+    Account,
+    Family,
+    Location,
+    LocationType,
+    NSerie,
+    Product,
+    SousZone,
+    Warehouse,
+    Zone,
+    ZoneType,
+)
+
+
+class NSerieInventoryServiceTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        account = Account.objects.create(reference='ACC-NSI', account_name='Compte NSI', account_statuts='ACTIVE')
+        family = Family.objects.create(
+            reference='FAM-NSI', family_name='Famille NSI', compte=account, family_status='ACTIVE',
+        )
+        product = Product.objects.create(
+            reference='P-NSI', Internal_Product_Code='NSI-ART-1', Short_Description='Article NSI',
+            Barcode='3000000000001', Stock_Unit='UN', Product_Family=family, n_serie=True,
+        )
+        zone_type = ZoneType.objects.create(reference='ZT-NSI', type_name='Stockage', status='ACTIVE')
+        location_type = LocationType.objects.create(reference='LT-NSI', name='Palette')
+        warehouse = Warehouse.objects.create(
+            reference='WH-NSI', warehouse_name='Entrepôt NSI', warehouse_type='CENTRAL', status='ACTIVE',
+        )
+        zone = Zone.objects.create(
+            reference='Z-NSI', warehouse=warehouse, zone_name='Zone', zone_type=zone_type, zone_status='ACTIVE',
+        )
+        sous_zone = SousZone.objects.create(
+            reference='SZ-NSI', zone=zone, sous_zone_name='Sous-zone', sous_zone_status='ACTIVE',
+        )
+        inventory = Inventory.objects.create(label='Inventaire NSI', date=now, status=InventoryStatus.EN_REALISATION)
+        counting = Counting.objects.create(
+            reference='C-NSI-1', order=1, count_mode=CountMode.BY_ARTICLE, inventory=inventory,
+        )
+        job = Job.objects.create(
+            reference='JOB-0001', status=JobStatus.ENTAME, entame_date=now, warehouse=warehouse, inventory=inventory,
+        )
+        # Deux emplacements comptés sur le même produit
+        cls.details = [
+            CountingDetail.objects.create(
+                reference=f'CD-NSI-{index}', quantity_inventoried=1, product=product,
+                location=Location.objects.create(
+                    reference=f'L-NSI-{index}', location_reference=f'NSI-{index:04d}',
+                    sous_zone=sous_zone, location_type=location_type,
+                ),
+                counting=counting, job=job, inventory=inventory,
+            )
+            for index in range(2)
+        ]
+
+    def test_serials_are_inserted_once_per_detail_with_final_references(self):
+        first, second = self.details
+        with CaptureQueriesContext(connection) as queries:
+            created = attach_serials([
+                (first, ['A-1', 'A-2', 'A-1', ' A-2 ']),
+                (second, [f'B-{i}' for i in range(50)]),
+            ])
+        self.assertEqual([ns.n_serie for ns in created[first.id]], ['A-1', 'A-2'])
+        self.assertEqual(len(created[second.id]), 50)
+        inserts = [q for q in queries.captured_queries if q['sql'].startswith('INSERT INTO "inventory_nserieinventory"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertFalse([q for q in queries.captured_queries if q['sql'].startswith('UPDATE "inventory_nserieinventory"')])
+        for nserie in NSerieInventory.objects.filter(counting_detail=first):
+            self.assertTrue(nserie.reference.startswith(f'NS-{nserie.id}-'))
+
+        # Numéros déjà rattachés conservés, sauf remplacement
+        self.assertEqual(attach_serials([(first, ['A-1', 'A-3'])])[first.id][0].n_serie, 'A-3')
+        self.assertEqual(NSerieInventory.objects.filter(counting_detail=first).count(), 3)
+        attach_serials([(first, ['A-9'])], replace=True)
+        self.assertEqual(
+            list(NSerieInventory.objects.filter(counting_detail=first).values_list('n_serie', flat=True)), ['A-9'],
+        )
+
+    def test_unknown_serials_are_checked_in_one_query(self):
+        product = self.details[0].product
+        NSerie.objects.bulk_create([
+            NSerie(reference=f'NS-NSI-{i}', n_serie=f'KNOWN-{i}', product=product) for i in range(3)
+        ])
+        with self.assertNumQueries(1):
+            unknown = unknown_serials(product.id, ['KNOWN-0', 'MISSING', 'KNOWN-2'])
+        self.assertEqual(unknown, ['MISSING'])
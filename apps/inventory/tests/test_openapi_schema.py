@@ -0,0 +1,56 @@
+"""
+Tests du schéma OpenAPI pré-généré (build_openapi_schema, /swagger.json).
+"""
+import gzip
+import json
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from project.openapi import schema_artifact_cache
+
+
+class OpenAPISchemaArtifactTests(SimpleTestCase):
+
+    def setUp(self):
+        schema_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, schema_dir, ignore_errors=True)
+        settings_override = override_settings(OPENAPI_SCHEMA_DIR=schema_dir, OPENAPI_SCHEMA_RUNTIME=False)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        schema_artifact_cache.clear()
+        self.addCleanup(schema_artifact_cache.clear)
+
+    def test_missing_artifact_without_runtime_fallback(self):
+        response = self.client.get('/swagger.json')
+
+        self.assertEqual(response.status_code, 503)
+
+    def test_built_artifact_served_with_etag_and_gzip(self):
+        out = StringIO()
+        call_command('build_openapi_schema', stdout=out)
+        self.assertIn('Schéma OpenAPI généré', out.getvalue())
+
+        response = self.client.get('/swagger.json')
+        self.assertEqual(response.status_code, 200)
+        schema = json.loads(response.content)
+        self.assertIn('/web/api/inventory/', ''.join(schema['paths']))
+        etag = response['ETag']
+
+        compressed = self.client.get('/swagger.json', HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(compressed.content), response.content)
+        self.assertEqual(compressed['ETag'], etag)
+        for refused in ('gzip;q=0, br', 'x-gzip', 'identity, *;q=0'):
+            plain = self.client.get('/swagger.json', HTTP_ACCEPT_ENCODING=refused)
+            self.assertFalse(plain.has_header('Content-Encoding'), refused)
+        wildcard = self.client.get('/swagger.json', HTTP_ACCEPT_ENCODING='br;q=1.0, *;q=0.5')
+        self.assertEqual(wildcard['Content-Encoding'], 'gzip')
+
+        not_modified = self.client.get('/swagger.json', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, 304)
+
+        call_command('build_openapi_schema', check=True, stdout=StringIO())
@@ -0,0 +1,149 @@
+"""
+Tests du routage des lectures de reporting vers l'alias ``reporting`` (apps.core.db_routing).
+
+En test, ``reporting`` est un miroir de ``default`` (TEST.MIRROR) : même base,
+connexion distincte. Les requêtes capturées par connexion prouvent le routage.
+"""
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.core.db_routing import (
+    REPORTING_PIN_COOKIE,
+    ReportingRouter,
+    primary_pinning,
+    pin_to_primary,
+    reporting_reads,
+)
+from apps.inventory.constants import AssignmentStatus, CountMode, InventoryStatus, JobStatus
+from apps.inventory.models import Assigment, Counting, Inventory, Job, Setting
+from apps.inventory.services.inventory_result_service import InventoryResultService
+from apps.inventory.services.kpis_service import KpisService
+from apps.masterdata.models import Account, Warehouse
+from project.middleware import ReportingStickinessMiddleware
+
+
+@override_settings(REPORTING_READS_ENABLED=True)
+class ReportingRouterTests(SimpleTestCase):
+
+    def test_only_tagged_unpinned_reads_use_reporting(self):
+        self.assertEqual(Job.objects.all().db, 'default')
+        with reporting_reads():
+            self.assertEqual(Job.objects.all().db, 'reporting')
+            with primary_pinning():
+                pin_to_primary()
+                self.assertEqual(Job.objects.all().db, 'default')
+            self.assertEqual(Job.objects.all().db, 'reporting')
+
+    def test_writes_pin_only_inside_a_scope(self):
+        router = ReportingRouter()
+        # Hors portée (runner, commande sans portée) : aucun épinglage durable
+        router.db_for_write(Job)
+        pin_to_primary()
+        with reporting_reads():
+            self.assertEqual(Job.objects.all().db, 'reporting')
+
+        with primary_pinning() as wrote, reporting_reads():
+            router.db_for_write(Job)
+            self.assertTrue(wrote())
+            self.assertEqual(Job.objects.all().db, 'default')
+        with reporting_reads():
+            self.assertEqual(Job.objects.all().db, 'reporting')
+
+    @override_settings(REPORTING_READS_ENABLED=False)
+    def test_disabled_routing_reads_default(self):
+        with primary_pinning(), reporting_reads():
+            self.assertEqual(Job.objects.all().db, 'default')
+
+
+@override_settings(REPORTING_READS_ENABLED=True, REPORTING_STICKY_SECONDS=5)
+class ReportingRoutingIntegrationTests(TransactionTestCase):
+    databases = {'default', 'reporting'}
+
+    def setUp(self):
+        # Inventaire d'un entrepôt à 2 jobs, le premier affecté au 1er comptage
+        now = timezone.now()
+        account = Account.objects.create(reference='ACC-RPT', account_name='Compte RPT', account_statuts='ACTIVE')
+        self.warehouse = Warehouse.objects.create(
+            reference='WH-RPT', warehouse_name='Entrepôt RPT', warehouse_type='CENTRAL', status='ACTIVE',
+        )
+        self.inventory = Inventory.objects.create(
+            label='Inventaire RPT', date=now, status=InventoryStatus.EN_REALISATION, en_realisation_status_date=now,
+        )
+        Setting.objects.create(reference='ST-RPT', account=account, warehouse=self.warehouse, inventory=self.inventory)
+        counting = Counting.objects.create(
+            reference='C-RPT-1', order=1, count_mode=CountMode.BY_ARTICLE, inventory=self.inventory,
+        )
+        jobs = [
+            Job.objects.create(
+                reference=f'JOB-{index:04d}', status=JobStatus.ENTAME, entame_date=now,
+                warehouse=self.warehouse, inventory=self.inventory,
+            )
+            for index in (1, 2)
+        ]
+        self.assignment = Assigment.objects.create(
+            reference='A-RPT-1', status=AssignmentStatus.ENTAME, entame_date=now, job=jobs[0], counting=counting,
+        )
+
+    def _kpi_view(self, write=False):
+        def view(request):
+            if write:
+                assignment = Assigment.objects.get(pk=self.assignment.pk)
+                assignment.save(update_fields=['status'])
+            payload = KpisService().compute_nombre_jobs_total(self.inventory.id, self.warehouse.id)
+            return HttpResponse(str(payload['data']['nombre_jobs_total']))
+        return ReportingStickinessMiddleware(view)
+
+    def _run(self, middleware, request):
+        with CaptureQueriesContext(connections['reporting']) as reporting, \
+                CaptureQueriesContext(connections['default']) as default:
+            response = middleware(request)
+        return response, len(reporting), len(default)
+
+    def test_tagged_service_reads_replica(self):
+        response, on_reporting, on_default = self._run(self._kpi_view(), RequestFactory().get('/kpis/'))
+
+        self.assertEqual(response.content.decode(), '2')
+        self.assertGreater(on_reporting, 0)
+        self.assertEqual(on_default, 0)
+        self.assertNotIn(REPORTING_PIN_COOKIE, response.cookies)
+
+    def test_read_your_writes_within_and_after_request(self):
+        # Écriture puis lecture dans la même requête : lecture sur default, cookie posé
+        response, on_reporting, _ = self._run(self._kpi_view(write=True), RequestFactory().get('/kpis/'))
+        self.assertEqual(on_reporting, 0)
+        self.assertIn(REPORTING_PIN_COOKIE, response.cookies)
+        self.assertEqual(response.cookies[REPORTING_PIN_COOKIE]['max-age'], 5)
+
+        # Requête suivante du même client (cookie) : toujours sur default
+        request = RequestFactory().get('/kpis/')
+        request.COOKIES[REPORTING_PIN_COOKIE] = '1'
+        _, on_reporting, on_default = self._run(self._kpi_view(), request)
+        self.assertEqual(on_reporting, 0)
+        self.assertGreater(on_default, 0)
+
+        # Requête non sûre : épinglée même sans écriture
+        _, on_reporting, _ = self._run(self._kpi_view(), RequestFactory().post('/kpis/'))
+        self.assertEqual(on_reporting, 0)
+
+    def _results(self):
+        with primary_pinning(), \
+                CaptureQueriesContext(connections['reporting']) as reporting, \
+                CaptureQueriesContext(connections['default']) as default:
+            InventoryResultService().get_inventory_results_for_warehouse(self.inventory.id, self.warehouse.id)
+        return [q['sql'] for q in reporting.captured_queries], [q['sql'] for q in default.captured_queries]
+
+    def test_result_build_marker_read_on_default(self):
+        # Première lecture : marqueur lu sur default, construction puis relecture sur default
+        on_reporting, on_default = self._results()
+        self.assertFalse(any('inventoryresultbuild' in sql for sql in on_reporting))
+        self.assertTrue(any('inventoryresultbuild' in sql for sql in on_default))
+        self.assertFalse(any('inventory_inventoryresult"' in sql for sql in on_reporting))
+
+        # Lectures suivantes : seul le marqueur reste sur default, les lignes viennent de la réplique
+        on_reporting, on_default = self._results()
+        self.assertFalse(any('inventoryresultbuild' in sql for sql in on_reporting))
+        self.assertTrue(any('inventoryresultbuild' in sql for sql in on_default))
+        self.assertTrue(any('inventory_inventoryresult"' in sql for sql in on_reporting))
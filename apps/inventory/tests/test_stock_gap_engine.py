@@ -0,0 +1,102 @@
+"""
+Tests des moteurs de consolidation des écarts stock théorique (python / columnar).
+"""
+import random
+
+from django.test import SimpleTestCase, override_settings
+
+from apps.inventory.constants import StockGapGrouping
+from apps.inventory.utils.stock_gap_engine import (
+    ColumnarStockGapEngine,
+    ProductColumns,
+    PythonStockGapEngine,
+    get_engine_name,
+)
+
+
+def _compute_both(inventoried, theoretical, excluded, rows):
+    """Calcule les écarts avec les deux moteurs sur les mêmes métadonnées produit"""
+    products_info = {
+        product_id: {"product_id": product_id, "barcode": key or "", "designation": designation or ""}
+        for product_id, key, designation in rows
+    }
+    python_frame = PythonStockGapEngine().compute(
+        inventoried, theoretical, excluded, products_info, False, StockGapGrouping.BY_BARCODE
+    )
+    columnar_frame = ColumnarStockGapEngine().compute(
+        inventoried, theoretical, excluded, ProductColumns.from_rows(rows), StockGapGrouping.BY_BARCODE
+    )
+    return python_frame, columnar_frame
+
+
+class StockGapEngineTests(SimpleTestCase):
+
+    def test_groups_by_key_with_legacy_rules(self):
+        rows = [
+            (3, "B", "Beta"),
+            (1, "A", ""),
+            (2, "A", "Alpha"),
+            (4, "", "Sans clé"),
+            (6, "C", "Exclu"),
+        ]
+        inventoried = {1: 4, 2: 1, 3: 7, 4: 9, 5: 2, 6: 1}
+        theoretical = {1: 5, 3: 7, 6: 3}
+
+        python_frame, columnar_frame = _compute_both(inventoried, theoretical, {6}, rows)
+
+        expected = [
+            {
+                "cle": "A", "mode_groupement": StockGapGrouping.BY_BARCODE, "designation": "Alpha",
+                "product_id": 1, "qte_theorique": 5, "qte_inventoriee": 5, "ecart": 0,
+            },
+            {
+                "cle": "B", "mode_groupement": StockGapGrouping.BY_BARCODE, "designation": "Beta",
+                "product_id": 3, "qte_theorique": 7, "qte_inventoriee": 7, "ecart": 0,
+            },
+        ]
+        self.assertEqual(list(python_frame.iter_lines()), expected)
+        self.assertEqual(list(columnar_frame.iter_lines()), expected)
+
+    def test_random_inputs_match_python_engine(self):
+        rng = random.Random(7)
+        for _ in range(20):
+            ids = list(range(1, rng.randint(1, 300)))
+            rows = [
+                (product_id, rng.choice(["", f"K{rng.randint(0, 40):03d}"]), rng.choice(["", f"P{product_id}"]))
+                for product_id in ids
+                if rng.random() > 0.05
+            ]
+            inventoried = {product_id: rng.randint(0, 50) for product_id in ids if rng.random() < 0.7}
+            theoretical = {product_id: rng.randint(0, 50) for product_id in ids if rng.random() < 0.7}
+            excluded = set(rng.sample(ids, min(3, len(ids))))
+
+            python_frame, columnar_frame = _compute_both(inventoried, theoretical, excluded, rows)
+
+            self.assertEqual(list(columnar_frame.iter_lines()), list(python_frame.iter_lines()))
+            self.assertEqual(columnar_frame.totals(), python_frame.totals())
+
+    def test_nonzero_and_totals(self):
+        rows = [(1, "A", "Alpha"), (2, "B", "Beta"), (3, "C", "Gamma")]
+        _, frame = _compute_both({1: 2, 2: 5}, {1: 2, 2: 3, 3: 4}, set(), rows)
+
+        self.assertEqual(
+            frame.totals(),
+            {"qte_theorique": 9, "qte_inventoriee": 7, "ecart": 2, "nombre_lignes": 3},
+        )
+        self.assertEqual(
+            [(line["cle"], line["ecart"]) for line in frame.nonzero().iter_lines()],
+            [("B", -2), ("C", 4)],
+        )
+
+    def test_empty_inputs(self):
+        python_frame, columnar_frame = _compute_both({}, {}, set(), [])
+
+        self.assertEqual(len(columnar_frame), 0)
+        self.assertEqual(list(columnar_frame.iter_lines()), list(python_frame.iter_lines()))
+
+    @override_settings(STOCK_GAP_ENGINE="python")
+    def test_engine_name_from_settings(self):
+        self.assertEqual(get_engine_name(), "python")
+        self.assertEqual(get_engine_name("columnar"), "columnar")
+        with self.assertRaises(ValueError):
+            get_engine_name("pandas")
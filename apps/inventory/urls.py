@@ -85,8 +85,18 @@ from .views.pdf_views import (
     PdfTaskStatusView,
     AssignmentGeneratedPdfListView,
 )
-from .views.excel_export_views import ConsolidatedArticleExcelExportView
+from .views.excel_export_views import (
+    ConsolidatedArticleExcelExportAsyncStartView,
+    ConsolidatedArticleExcelExportView,
+    ExportTaskStatusView,
+)
 from .views.job_export_view import JobExportView
+from .views.inventory_archive_views import (
+    ArchivedConsolidatedArticleExcelExportView,
+    ArchivedInventoryResultByWarehouseView,
+    ArchivedInventoryResultExportExcelView,
+    InventoryArchiveDetailView,
+)
 from .views.kpis_views import (
     KpiEquipesMultiEcartsView,
     KpiJobsAvecEcartParEquipeView,
@@ -611,6 +621,36 @@ urlpatterns = [
         ConsolidatedArticleExcelExportView.as_view(),
         name='inventory-articles-consolides-export',
     ),
+    # Même export en tâche de fond (gros magasins)
+    path(
+        'inventory/<int:inventory_id>/warehouse/<int:warehouse_id>/'
+        'articles-consolides/export/async/',
+        ConsolidatedArticleExcelExportAsyncStartView.as_view(),
+        name='inventory-articles-consolides-export-async',
+    ),
+    # API pour consulter le statut d'une tâche d'export
+    path('export-tasks/<uuid:task_id>/', ExportTaskStatusView.as_view(), name='export-task-status'),
+
+    # ========================================
+    # URLs DES INVENTAIRES ARCHIVÉS (lecture seule, fichiers Parquet)
+    # ========================================
+    path('inventory/<int:inventory_id>/archive/', InventoryArchiveDetailView.as_view(), name='inventory-archive-detail'),
+    path(
+        'inventory/<int:inventory_id>/warehouses/<int:warehouse_id>/archive/results/',
+        ArchivedInventoryResultByWarehouseView.as_view(),
+        name='inventory-archive-warehouse-results',
+    ),
+    path(
+        'inventory/<int:inventory_id>/warehouses/<int:warehouse_id>/archive/results/export/',
+        ArchivedInventoryResultExportExcelView.as_view(),
+        name='inventory-archive-warehouse-results-export',
+    ),
+    path(
+        'inventory/<int:inventory_id>/warehouse/<int:warehouse_id>/'
+        'archive/articles-consolides/export/',
+        ArchivedConsolidatedArticleExcelExportView.as_view(),
+        name='inventory-archive-articles-consolides-export',
+    ),
     
     # ========================================
     # URLs POUR L'AFFECTATION DES RESSOURCES AUX JOBS
@@ -16,6 +16,7 @@ from ..exceptions import (
     CountingModeValidationError
 )
 from apps.masterdata.models import Product, Location
+from ..services.nserie_inventory_service import attach_serials, unknown_serials
 
 logger = logging.getLogger(__name__)
 
@@ -183,18 +184,23 @@ class CountingDetailCreationUseCase:
                     # Ce cas est déjà géré plus haut si counting.n_serie et product.n_serie sont tous deux True
                     pass
                 else:
+                    serials_to_check = []
                     for i, ns in enumerate(numeros_serie):
                         if not isinstance(ns, dict) or 'n_serie' not in ns:
                             errors.append(f"Numéro de série {i+1}: format invalide")
                         elif not ns['n_serie'] or ns['n_serie'] == '':
                             errors.append(f"Numéro de série {i+1}: valeur requise")
                         else:
-                            # Vérifier que le numéro de série existe dans masterdata.NSerie pour ce produit
-                            if counting.n_serie and product.n_serie and not self._is_nserie_exists_in_masterdata(ns['n_serie'], product.id):
-                                errors.append(f"Numéro de série {ns['n_serie']} n'existe pas dans masterdata pour ce produit")
+                            serials_to_check.append(ns['n_serie'])
                             # Note: On ne vérifie plus si le numéro de série est déjà utilisé
                             # car il peut être légitime de réutiliser un numéro de série
                             # dans différents CountingDetail (emplacements différents, comptages différents)
+                    
+                    # Vérifier que les numéros de série existent dans masterdata.NSerie pour ce produit
+                    # (une requête pour toute la saisie)
+                    if counting.n_serie and product.n_serie and serials_to_check:
+                        for n_serie in unknown_serials(product.id, serials_to_check):
+                            errors.append(f"Numéro de série {n_serie} n'existe pas dans masterdata pour ce produit")
             
         except Product.DoesNotExist:
             errors.append(f"Produit avec l'ID {data['product_id']} non trouvé")
@@ -386,21 +392,10 @@ class CountingDetailCreationUseCase:
         
         # Créer les numéros de série si fournis dans la requête, peu importe la configuration du comptage
         if data.get('numeros_serie'):
-            for ns_data in data['numeros_serie']:
-                nserie = NSerieInventory(
-                    n_serie=ns_data['n_serie'],
-                    counting_detail=counting_detail
-                )
-                
-                # Générer la référence
-                nserie.reference = nserie.generate_reference(nserie.REFERENCE_PREFIX)
-                
-                # Sauvegarder
-                nserie.save()
-                
-                numeros_serie.append(nserie)
-                
-                logger.info(f"NumeroSerie {nserie.id} créé pour le CountingDetail {counting_detail.id}")
+            serials = [ns_data['n_serie'] for ns_data in data['numeros_serie']]
+            numeros_serie = attach_serials([(counting_detail, serials)])[counting_detail.id]
+            
+            logger.info(f"{len(numeros_serie)} NumeroSerie créé(s) pour le CountingDetail {counting_detail.id}")
         
         return numeros_serie
     
@@ -4,7 +4,6 @@ Use case pour la generation du PDF des jobs d'inventaire
 from typing import Dict, Any, Optional, List
 from io import BytesIO
 from ..interfaces.pdf_interface import PDFUseCaseInterface
-from ..services.pdf_service import PDFService
 from ..exceptions.pdf_exceptions import (
     PDFGenerationError,
     PDFValidationError,
@@ -22,6 +21,9 @@ class InventoryJobsPdfUseCase(PDFUseCaseInterface):
     """Use case pour la generation du PDF des jobs d'inventaire"""
     
     def __init__(self):
+        # Import local : reportlab n'est chargé qu'à la première génération de PDF
+        from ..services.pdf_service import PDFService
+
         self.pdf_service = PDFService()
     
     def execute(
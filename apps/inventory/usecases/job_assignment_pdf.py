@@ -3,7 +3,6 @@ Use case pour la generation du PDF d'un job/assignment/equipe
 """
 from typing import Dict, Any, Optional
 from io import BytesIO
-from ..services.pdf_service import PDFService
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,6 +12,9 @@ class JobAssignmentPdfUseCase:
     """Use case pour la generation du PDF d'un job/assignment/equipe"""
     
     def __init__(self):
+        # Import local : reportlab n'est chargé qu'à la première génération de PDF
+        from ..services.pdf_service import PDFService
+
         self.pdf_service = PDFService()
     
     def execute(
@@ -7,6 +7,8 @@ from django.db import transaction
 from django.utils import timezone
 from ..models import Job, Assigment
 from ..exceptions import JobCreationError
+from apps.mobile.realtime import publish_pda_changes
+from apps.inventory.realtime import notify_dashboard_changes
 import logging
 
 logger = logging.getLogger(__name__)
@@ -157,6 +159,9 @@ class JobSetReadyUseCase:
                     status='PRET',
                     pret_date=current_time
                 )
+                # Notification des PDA au commit (QuerySet.update n'émet pas de signal)
+                publish_pda_changes(assignment_ids=assignment_ids, job_ids=jobs_to_update_ids)
+                notify_dashboard_changes(job_ids=jobs_to_update_ids)
 
                 # Vérification de sécurité : s'assurer que toutes les mises à jour ont été appliquées
                 if assignments_updated != len(assignment_ids):
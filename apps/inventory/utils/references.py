@@ -0,0 +1,26 @@
+"""
+Génération de références en masse pour les modèles à ReferenceMixin.
+
+Utilisée par les chemins bulk_create (import des jobs, lancement de comptage
+par lot) à la place d'un ``generate_reference`` + test d'existence par objet.
+"""
+from typing import List
+
+
+def generate_unique_references(model, count: int) -> List[str]:
+    """
+    Génère ``count`` références uniques pour un modèle à ReferenceMixin.
+
+    Les doublons (dans le lot ou déjà en base) sont régénérés ; une requête
+    ``__in`` par tour au lieu d'un test d'existence par objet.
+    """
+    references = set()
+    while len(references) < count:
+        references.update(
+            model().generate_reference(model.REFERENCE_PREFIX)
+            for _ in range(count - len(references))
+        )
+        references -= set(
+            model._base_manager.filter(reference__in=references).values_list('reference', flat=True)
+        )
+    return list(references)
@@ -0,0 +1,259 @@
+"""
+Moteurs de consolidation des écarts stock théorique vs inventorié.
+
+Entrées communes : quantités inventoriées et théoriques par produit, produits
+exclus, clé de groupement (barcode ou Internal_Product_Code) et désignation
+de chaque produit. Sortie : une ligne par clé, triée par clé.
+
+- ``PythonStockGapEngine`` : implémentation historique (dictionnaires par
+  produit puis par clé) ;
+- ``ColumnarStockGapEngine`` : colonnes NumPy et group-by par tri ; les lignes
+  sont produites à la demande par ``StockGapFrame.iter_lines``.
+
+Règles identiques : produits sans métadonnées ou sans clé ignorés, écart =
+théorique - inventorié, produit représentatif = plus petit product_id de la
+clé, désignation = première désignation non vide dans l'ordre des product_id.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from apps.core.lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+
+
+@dataclass
+class ProductColumns:
+    """
+    Métadonnées produits en colonnes (même longueur, alignées sur ids).
+
+    Les clés sont des chaînes à largeur fixe (tri et comparaisons en C), les
+    désignations restent des objets (longueurs très variables).
+    """
+    ids: np.ndarray
+    keys: np.ndarray
+    designations: np.ndarray
+
+    @classmethod
+    def from_rows(cls, rows) -> 'ProductColumns':
+        """Construit les colonnes depuis des tuples (id, clé, désignation)"""
+        rows = list(rows)
+        ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        keys = np.array([row[1] or '' for row in rows], dtype=str)
+        designations = np.array([row[2] or '' for row in rows], dtype=object)
+        return cls(ids=ids, keys=keys, designations=designations)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+@dataclass
+class StockGapFrame:
+    """
+    Lignes consolidées en colonnes, triées par clé.
+
+    Les dictionnaires de ligne ne sont construits qu'à l'itération.
+    """
+    grouping_mode: str
+    keys: List[str] = field(default_factory=list)
+    product_ids: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    designations: List[str] = field(default_factory=list)
+    qte_theorique: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    qte_inventoriee: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def ecart(self) -> np.ndarray:
+        return self.qte_theorique - self.qte_inventoriee
+
+    def totals(self) -> Dict[str, int]:
+        return {
+            "qte_theorique": int(self.qte_theorique.sum()),
+            "qte_inventoriee": int(self.qte_inventoriee.sum()),
+            "ecart": int(self.ecart.sum()),
+            "nombre_lignes": len(self),
+        }
+
+    def iter_lines(self) -> Iterator[Dict[str, Any]]:
+        """Lignes au format de StockGapService.compute_stock_gaps, une à une"""
+        columns = zip(
+            self.keys,
+            self.designations,
+            self.product_ids.tolist(),
+            self.qte_theorique.tolist(),
+            self.qte_inventoriee.tolist(),
+            self.ecart.tolist(),
+        )
+        for key, designation, product_id, qte_theorique, qte_inventoriee, ecart in columns:
+            yield {
+                "cle": key,
+                "mode_groupement": self.grouping_mode,
+                "designation": designation,
+                "product_id": product_id,
+                "qte_theorique": qte_theorique,
+                "qte_inventoriee": qte_inventoriee,
+                "ecart": ecart,
+            }
+
+    def nonzero(self) -> 'StockGapFrame':
+        """Lignes dont l'écart est non nul"""
+        mask = self.ecart != 0
+        return StockGapFrame(
+            grouping_mode=self.grouping_mode,
+            keys=[key for key, keep in zip(self.keys, mask.tolist()) if keep],
+            product_ids=self.product_ids[mask],
+            designations=[name for name, keep in zip(self.designations, mask.tolist()) if keep],
+            qte_theorique=self.qte_theorique[mask],
+            qte_inventoriee=self.qte_inventoriee[mask],
+        )
+
+
+def _dict_to_arrays(quantities: Dict[int, int]):
+    count = len(quantities)
+    ids = np.fromiter(quantities.keys(), dtype=np.int64, count=count)
+    values = np.fromiter(quantities.values(), dtype=np.int64, count=count)
+    return ids, values
+
+
+class ColumnarStockGapEngine:
+    """Consolidation vectorisée : alignement NumPy par product_id puis group-by par clé."""
+
+    def compute(
+        self,
+        inventoried: Dict[int, int],
+        theoretical: Dict[int, int],
+        excluded: Set[int],
+        products: ProductColumns,
+        grouping_mode: str,
+    ) -> StockGapFrame:
+        inventoried_ids, inventoried_qty = _dict_to_arrays(inventoried)
+        theoretical_ids, theoretical_qty = _dict_to_arrays(theoretical)
+
+        # Produits retenus : union inventorié / théorique, hors exclus, avec une clé
+        product_ids = np.union1d(inventoried_ids, theoretical_ids)
+        if excluded:
+            product_ids = product_ids[~np.isin(product_ids, np.fromiter(excluded, dtype=np.int64))]
+
+        order = np.argsort(products.ids, kind='stable')
+        meta_ids = products.ids[order]
+        position = np.searchsorted(meta_ids, product_ids)
+        position = np.minimum(position, max(len(meta_ids) - 1, 0))
+        known = (meta_ids[position] == product_ids) if len(meta_ids) else np.zeros(len(product_ids), dtype=bool)
+        product_ids = product_ids[known]
+        meta_index = order[position[known]]
+        keys = products.keys[meta_index]
+        has_key = keys != ''
+        product_ids = product_ids[has_key]
+        meta_index = meta_index[has_key]
+        if not len(product_ids):
+            return StockGapFrame(grouping_mode=grouping_mode)
+
+        qte_theorique = self._align(product_ids, theoretical_ids, theoretical_qty)
+        qte_inventoriee = self._align(product_ids, inventoried_ids, inventoried_qty)
+
+        # Group-by par tri : np.unique sur des chaînes à largeur fixe (ordre des
+        # points de code, comme sorted()) ; tri stable -> product_id croissant
+        # dans chaque clé
+        unique_keys, codes = np.unique(keys[has_key], return_inverse=True)
+        order = np.argsort(codes, kind='stable')
+        starts = np.flatnonzero(np.r_[True, np.diff(codes[order]) != 0])
+
+        # Première désignation non vide de chaque clé (sentinelle '' en fin de colonne)
+        designations = np.append(products.designations[meta_index][order], '')
+        named_positions = np.where(designations[:-1] != '', np.arange(len(order)), len(order))
+        first_named = np.minimum.reduceat(named_positions, starts)
+        return StockGapFrame(
+            grouping_mode=grouping_mode,
+            keys=unique_keys.tolist(),
+            product_ids=product_ids[order][starts],
+            designations=designations[first_named].tolist(),
+            qte_theorique=np.add.reduceat(qte_theorique[order], starts),
+            qte_inventoriee=np.add.reduceat(qte_inventoriee[order], starts),
+        )
+
+    @staticmethod
+    def _align(product_ids: np.ndarray, source_ids: np.ndarray, source_qty: np.ndarray) -> np.ndarray:
+        """Quantités de source réindexées sur product_ids (0 si absent)"""
+        aligned = np.zeros(len(product_ids), dtype=np.int64)
+        if not len(source_ids):
+            return aligned
+        order = np.argsort(source_ids, kind='stable')
+        sorted_ids = source_ids[order]
+        position = np.minimum(np.searchsorted(sorted_ids, product_ids), len(sorted_ids) - 1)
+        found = sorted_ids[position] == product_ids
+        aligned[found] = source_qty[order[position[found]]]
+        return aligned
+
+
+class PythonStockGapEngine:
+    """Consolidation historique par dictionnaires (référence du benchmark)."""
+
+    def compute(
+        self,
+        inventoried: Dict[int, int],
+        theoretical: Dict[int, int],
+        excluded: Set[int],
+        products_info: Dict[int, Dict[str, Any]],
+        is_variant: bool,
+        grouping_mode: str,
+    ) -> StockGapFrame:
+        product_ids = set(inventoried.keys()) | set(theoretical.keys())
+        product_ids -= excluded
+
+        buckets: Dict[str, Dict[str, Any]] = {}
+        for product_id in sorted(product_ids):
+            info = products_info.get(product_id)
+            if info is None:
+                continue
+            key = grouping_key(info, is_variant)
+            if not key:
+                continue
+            if key not in buckets:
+                buckets[key] = {
+                    "designation": info["designation"],
+                    "product_id": product_id,
+                    "qte_theorique": 0,
+                    "qte_inventoriee": 0,
+                }
+            if info["designation"] and not buckets[key]["designation"]:
+                buckets[key]["designation"] = info["designation"]
+
+            buckets[key]["qte_theorique"] += int(theoretical.get(product_id, 0))
+            buckets[key]["qte_inventoriee"] += int(inventoried.get(product_id, 0))
+
+        keys = sorted(buckets)
+        return StockGapFrame(
+            grouping_mode=grouping_mode,
+            keys=keys,
+            product_ids=np.array([buckets[key]["product_id"] for key in keys], dtype=np.int64),
+            designations=[buckets[key]["designation"] for key in keys],
+            qte_theorique=np.array([buckets[key]["qte_theorique"] for key in keys], dtype=np.int64),
+            qte_inventoriee=np.array([buckets[key]["qte_inventoriee"] for key in keys], dtype=np.int64),
+        )
+
+
+def grouping_key(info: Dict[str, Any], is_variant: bool) -> str:
+    """Clé : Internal_Product_Code (variante) ou barcode."""
+    if is_variant:
+        return info.get("internal_code") or ""
+    return info.get("barcode") or ""
+
+
+ENGINES = {
+    "columnar": ColumnarStockGapEngine,
+    "python": PythonStockGapEngine,
+}
+
+
+def get_engine_name(name: Optional[str] = None) -> str:
+    """Moteur demandé, sinon ``settings.STOCK_GAP_ENGINE`` (``columnar`` par défaut)"""
+    from django.conf import settings
+
+    name = name or getattr(settings, "STOCK_GAP_ENGINE", "columnar")
+    if name not in ENGINES:
+        raise ValueError(f"Moteur d'écart stock inconnu : {name} ({', '.join(ENGINES)})")
+    return name
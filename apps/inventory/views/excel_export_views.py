@@ -4,8 +4,10 @@ Vue pour l'export Excel consolidé par article
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from django.http import HttpResponse
+from django.http import FileResponse
+from ..models import ExportTask
 from ..services.excel_export_service import ExcelExportService
+from ..services.export_task_service import ExportTaskService
 from ..utils.response_utils import error_response
 import logging
 
@@ -19,6 +21,9 @@ class ConsolidatedArticleExcelExportView(APIView):
     Pour chaque article, le fichier contient :
     - Les informations de l'article (référence, code, description, etc.)
     - La quantité consolidée (somme des final_result de tous les EcartComptage résolus)
+
+    Le fichier est écrit ligne par ligne dans un fichier temporaire ; pour les
+    plus gros magasins, préférer l'export asynchrone (``.../export/async/``).
     """
     
     def __init__(self, *args, **kwargs):
@@ -44,34 +49,21 @@ class ConsolidatedArticleExcelExportView(APIView):
             Fichier Excel avec les données consolidées par article
         """
         try:
-            # Générer le fichier Excel
-            excel_buffer = self.service.generate_consolidated_excel(
+            # Générer le fichier Excel (fichier temporaire, fermé et supprimé par FileResponse)
+            excel_file = self.service.generate_consolidated_excel(
                 inventory_id,
                 warehouse_id,
             )
-            
-            # Récupérer les informations de l'inventaire pour le nom du fichier
-            try:
-                from ..models import Inventory
-                inventory = Inventory.objects.get(id=inventory_id)
-                inventory_ref = inventory.reference.replace(' ', '_')
-            except Inventory.DoesNotExist:
-                inventory_ref = f"inventaire_{inventory_id}"
-            
-            # Définir le nom du fichier
-            filename = (
-                f"articles_consolides_{inventory_ref}_magasin_{warehouse_id}.xlsx"
-            )
-            
-            # Créer la réponse HTTP avec le fichier Excel
-            response = HttpResponse(
-                excel_buffer.getvalue(),
-                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+            filename = self.service.get_consolidated_filename(inventory_id, warehouse_id)
+
+            return FileResponse(
+                excel_file,
+                as_attachment=True,
+                filename=filename,
+                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
             )
-            response['Content-Disposition'] = f'attachment; filename="{filename}"'
-            
-            return response
-            
+
         except ValueError as error:
             logger.warning(
                 "Erreur de validation lors de l'export Excel (id=%s): %s",
@@ -104,3 +96,63 @@ class ConsolidatedArticleExcelExportView(APIView):
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+
+
+class ConsolidatedArticleExcelExportAsyncStartView(APIView):
+    """
+    Lance l'export Excel consolidé en arrière-plan (gros magasins).
+
+    Retourne 202 avec l'ID de la tâche, à suivre via ``export-tasks/<task_id>/``.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.export_task_service = ExportTaskService()
+
+    def post(self, request, inventory_id: int, warehouse_id: int):
+        try:
+            task = self.export_task_service.enqueue_consolidated_excel_task(
+                inventory_id,
+                warehouse_id,
+            )
+        except ValueError as error:
+            return error_response(
+                message=str(error),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(
+            {"success": True, "task_id": str(task.id), "status": task.status},
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+class ExportTaskStatusView(APIView):
+    """
+    Retourne le statut d'une tâche d'export et l'URL de téléchargement si prête.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.export_task_service = ExportTaskService()
+
+    def get(self, request, task_id):
+        task = self.export_task_service.get_export_task_by_id(task_id)
+        if not task:
+            return Response(
+                {"success": False, "message": "Tâche d'export introuvable"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        data = {
+            "success": True,
+            "task_id": str(task.id),
+            "task_type": task.task_type,
+            "status": task.status,
+            "error_message": task.error_message,
+        }
+
+        if task.status == ExportTask.STATUS_SUCCESS and task.result_file:
+            data["download_url"] = request.build_absolute_uri(task.result_file.url)
+
+        return Response(data, status=status.HTTP_200_OK)
@@ -0,0 +1,118 @@
+"""
+Vues en lecture seule des inventaires archivés (fichiers Parquet, voir
+``InventoryArchiveService``).
+
+Mêmes réponses que les vues « à chaud » (résultats, export des résultats,
+Excel consolidé) : seules les données viennent de l'archive.
+"""
+import logging
+
+from rest_framework import status
+from rest_framework.views import APIView
+
+from ..exceptions import InventoryNotFoundError
+from ..models import InventoryArchive, Job
+from ..services.inventory_archive_service import InventoryArchiveService
+from ..utils.response_utils import error_response, success_response
+from .excel_export_views import ConsolidatedArticleExcelExportView
+from .inventory_views import InventoryResultByWarehouseView, InventoryResultExportExcelView
+
+logger = logging.getLogger(__name__)
+
+
+def _archive_not_found(inventory_id: int):
+    return error_response(
+        message=f"Aucune archive pour l'inventaire {inventory_id}.",
+        status_code=status.HTTP_404_NOT_FOUND,
+    )
+
+
+class InventoryArchiveDetailView(APIView):
+    """
+    Manifeste de l'archive d'un inventaire : lignes et taille par dataset.
+    """
+
+    def get(self, request, inventory_id: int, *args, **kwargs):
+        try:
+            archive = InventoryArchiveService().get_archive(inventory_id)
+        except InventoryNotFoundError:
+            return _archive_not_found(inventory_id)
+
+        return success_response(
+            data={
+                'inventory_id': archive.inventory_id,
+                'archived_at': archive.created_at,
+                'format_version': archive.format_version,
+                'total_rows': archive.total_rows,
+                'size_bytes': archive.size_bytes,
+                'datasets': {
+                    dataset: {'rows': entry['rows'], 'bytes': entry['bytes']}
+                    for dataset, entry in archive.manifest.items()
+                },
+            },
+            message="Archive de l'inventaire",
+        )
+
+
+class ArchivedInventoryResultByWarehouseView(InventoryResultByWarehouseView):
+    """
+    Résultats d'un inventaire archivé pour un entrepôt (QueryModel, comme
+    ``InventoryResultByWarehouseView``).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.service = InventoryArchiveService()
+
+    def process_request(self, request, *args, **kwargs):
+        if not InventoryArchive.objects.filter(inventory_id=self.kwargs.get('inventory_id')).exists():
+            return _archive_not_found(self.kwargs.get('inventory_id'))
+        return super().process_request(request, *args, **kwargs)
+
+
+class ArchivedInventoryResultExportExcelView(InventoryResultExportExcelView):
+    """
+    Export Excel des résultats d'un inventaire archivé. Les statuts
+    d'affectation viennent de l'archive, le statut du job de la base (Job
+    n'est pas archivé).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.service = InventoryArchiveService()
+
+    def _enrich_results_with_statuses(self, results: list, inventory_id: int, warehouse_id: int) -> list:
+        job_ids = {result['job_id'] for result in results if result.get('job_id')}
+        if not job_ids:
+            return results
+
+        job_statuses = dict(
+            Job.objects.filter(id__in=job_ids, inventory_id=inventory_id).values_list('id', 'status')
+        )
+        assignment_statuses = self.service.get_assignment_statuses(inventory_id, job_ids)
+
+        enriched_results = []
+        for result in results:
+            enriched_result = dict(result)
+            job_id = result.get('job_id')
+            if job_id in job_statuses:
+                enriched_result['job_status'] = job_statuses[job_id]
+                for counting_order, assignment_status in assignment_statuses.get(job_id, {}).items():
+                    enriched_result[f'assignment_status_counting_{counting_order}'] = assignment_status
+            enriched_results.append(enriched_result)
+        return enriched_results
+
+
+class ArchivedConsolidatedArticleExcelExportView(ConsolidatedArticleExcelExportView):
+    """
+    Excel consolidé par article d'un inventaire archivé.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.service = InventoryArchiveService()
+
+    def get(self, request, inventory_id: int, warehouse_id: int, *args, **kwargs):
+        if not InventoryArchive.objects.filter(inventory_id=inventory_id).exists():
+            return _archive_not_found(inventory_id)
+        return super().get(request, inventory_id, warehouse_id, *args, **kwargs)
@@ -1,13 +1,15 @@
 """
 Vues pour l'import des InventoryLocationJob
 """
+from __future__ import annotations
+
 import logging
 import tempfile
 import os
-import pandas as pd
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
+from apps.core.lazy_imports import lazy_import
 from apps.inventory.services.inventory_location_job_import_service import InventoryLocationJobImportService
 from apps.inventory.serializers.inventory_location_job_import_serializer import InventoryLocationJobImportSerializer
 from apps.inventory.utils.response_utils import success_response, error_response, validation_error_response
@@ -19,6 +21,8 @@ from apps.inventory.usecases.location_job_import_session_dispatcher import (
     LocationJobImportSessionDispatcher,
 )
 
+pd = lazy_import('pandas')
+
 logger = logging.getLogger(__name__)
 
 
@@ -24,6 +24,12 @@ from .models import (
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import Group
 from apps.users.models import UserApp
+from django.core.exceptions import ValidationError
+from .services.nserie_bulk_service import (
+    UPDATABLE_FIELDS as NSERIE_UPDATABLE_FIELDS,
+    NSerieBulkService,
+    normalize_serial,
+)
 # ---------------- Resources ---------------- #
 
 class AccountResource(resources.ModelResource):
@@ -673,6 +679,37 @@ class RegroupementEmplacementResource(resources.ModelResource):
         fields = ('nom', 'account')
 
 
+class PrefetchedForeignKeyWidget(ForeignKeyWidget):
+    """
+    ForeignKeyWidget dont les valeurs sont chargées en une requête avant
+    l'import (``prefetch``) au lieu d'un get() par ligne. Les valeurs non
+    préchargées ou ambiguës passent par le widget standard.
+    """
+
+    def prefetch(self, values):
+        values = {str(value).strip() for value in values if value not in (None, '')}
+        self._cache = {}
+        ambiguous = set()
+        for obj in self.get_queryset(None, None).filter(**{f'{self.field}__in': values}):
+            key = str(getattr(obj, self.field))
+            if key in self._cache:
+                ambiguous.add(key)
+            self._cache[key] = obj
+        for key in ambiguous:
+            del self._cache[key]
+
+    def cached(self, value):
+        if value in (None, ''):
+            return None
+        return getattr(self, '_cache', {}).get(str(value).strip())
+
+    def clean(self, value, row=None, **kwargs):
+        obj = self.cached(value)
+        if obj is not None:
+            return obj
+        return super().clean(value, row, **kwargs)
+
+
 class NSerieResource(resources.ModelResource):
     """
     Resource pour l'import/export des numéros de série
@@ -680,7 +717,7 @@ class NSerieResource(resources.ModelResource):
     product = fields.Field(
         column_name='produit',
         attribute='product',
-        widget=ForeignKeyWidget(Product, 'Internal_Product_Code')
+        widget=PrefetchedForeignKeyWidget(Product, 'Internal_Product_Code')
     )
     n_serie = fields.Field(column_name='numéro de série', attribute='n_serie')
     status = fields.Field(column_name='statut', attribute='status')
@@ -689,10 +726,75 @@ class NSerieResource(resources.ModelResource):
     date_expiration = fields.Field(column_name='date expiration', attribute='date_expiration')
     warranty_end_date = fields.Field(column_name='date fin garantie', attribute='warranty_end_date')
 
+    # Renseignés par before_import
+    _existing = {}
+    _row_errors = {}
+
     class Meta:
         model = NSerie
         fields = ('n_serie', 'product', 'status', 'description', 'date_fabrication', 'date_expiration', 'warranty_end_date')
         import_id_fields = ('n_serie', 'product')
+        # Écriture par lots via NSerieBulkService (upsert), pas de save() par ligne
+        use_bulk = True
+        batch_size = 1000
+
+    def before_import(self, dataset, **kwargs):
+        """
+        Précharge en une requête chacun les produits et les numéros existants,
+        puis valide tout le fichier (NSerieBulkService) : aucune requête par ligne.
+        """
+        product_widget = self.fields['product'].widget
+        product_widget.prefetch(dataset[self.fields['product'].column_name])
+
+        serials = [normalize_serial(value) for value in dataset[self.fields['n_serie'].column_name]]
+        self._existing = {
+            (nserie.n_serie, nserie.product_id): nserie
+            for nserie in NSerie._base_manager.filter(n_serie__in=set(serials))
+        }
+        rows = [
+            {'n_serie': serial, 'product': product_widget.cached(code)}
+            for serial, code in zip(serials, dataset[self.fields['product'].column_name])
+        ]
+        # Erreurs par numéro de ligne (1 = première ligne de données)
+        self._row_errors = {
+            index + 1: error for index, error in NSerieBulkService().validate(rows).items()
+        }
+
+    def get_instance(self, instance_loader, row):
+        product = self.fields['product'].clean(row)
+        if product is None:
+            return None
+        return self._existing.get((normalize_serial(row.get(self.fields['n_serie'].column_name)), product.id))
+
+    def import_instance(self, instance, row, **kwargs):
+        super().import_instance(instance, row, **kwargs)
+        error = self._row_errors.get(kwargs.get('row_number'))
+        if error:
+            raise ValidationError({'n_serie': error})
+
+    def bulk_create(self, using_transactions, dry_run, raise_errors, batch_size=None, result=None):
+        self._bulk_save(self.create_instances, using_transactions, dry_run, raise_errors, result)
+
+    def bulk_update(self, using_transactions, dry_run, raise_errors, batch_size=None, result=None):
+        self._bulk_save(self.update_instances, using_transactions, dry_run, raise_errors, result)
+
+    def _bulk_save(self, instances, using_transactions, dry_run, raise_errors, result):
+        try:
+            if instances and (using_transactions or not dry_run):
+                batch = NSerieBulkService(batch_size=self._meta.batch_size).save([
+                    {
+                        'n_serie': instance.n_serie,
+                        'product_id': instance.product_id,
+                        **{name: getattr(instance, name) for name in NSERIE_UPDATABLE_FIELDS},
+                    }
+                    for instance in instances
+                ])
+                if batch.errors:
+                    raise ValidationError(sorted(set(batch.errors.values())))
+        except Exception as e:
+            self.handle_import_error(result, e, raise_errors)
+        finally:
+            instances.clear()
 
 
 class OptionalAccountWidget(widgets.ForeignKeyWidget):
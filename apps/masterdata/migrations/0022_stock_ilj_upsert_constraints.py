@@ -0,0 +1,55 @@
+# Generated by Django 5.2 on 2026-10-19 07:34
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def soft_delete_active_duplicates(apps, schema_editor):
+    """
+    Prérequis des index uniques partiels : parmi les lignes non supprimées d'une
+    même clé, seule la plus récente (id max) est conservée, les autres sont
+    supprimées logiquement.
+    """
+    now = timezone.now()
+    for model_name, key_columns in (
+        ('InventoryLocationJob', ('inventaire_id', 'emplacement_id')),
+        ('Stock', ('inventory_id', 'location_id', 'product_id')),
+    ):
+        model = apps.get_model('masterdata', model_name)
+        table = schema_editor.quote_name(model._meta.db_table)
+        keys = ', '.join(key_columns)
+        not_null = ' AND '.join(f'{column} IS NOT NULL' for column in key_columns)
+        schema_editor.execute(
+            f"""
+            UPDATE {table} SET is_deleted = true, deleted_at = %s
+            WHERE id IN (
+                SELECT id FROM (
+                    SELECT id, ROW_NUMBER() OVER (PARTITION BY {keys} ORDER BY id DESC) AS rank
+                    FROM {table}
+                    WHERE is_deleted = false AND {not_null}
+                ) ranked
+                WHERE rank > 1
+            )
+            """,
+            [now],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0029_setting_status_terminee_analyser'),
+        ('masterdata', '0021_stock_quantity_available_nullable'),
+    ]
+
+    operations = [
+        migrations.RunPython(soft_delete_active_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='inventorylocationjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_deleted', False)), fields=('inventaire', 'emplacement'), name='uniq_ilj_inv_emplacement_actif'),
+        ),
+        migrations.AddConstraint(
+            model_name='stock',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_deleted', False)), fields=('inventory', 'location', 'product'), name='uniq_stock_inv_loc_product_actif'),
+        ),
+    ]
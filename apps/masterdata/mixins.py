@@ -85,6 +85,29 @@ class CodeGeneratorMixin(models.Model):
             code = code[:max_length]
         return code
 
+    @classmethod
+    def generate_unique_codes(cls, prefix, count, max_length=20):
+        """
+        Génère ``count`` codes uniques en une requête de vérification par tour
+        (imports en masse), au lieu d'une requête par code.
+        Format: PREFIX-XXXXXXXXXXXX (partie aléatoire hexadécimale).
+        """
+        random_length = min(12, max_length - len(prefix) - 1)
+        codes = set()
+        while len(codes) < count:
+            candidates = {
+                f"{prefix}-{uuid.uuid4().hex[:random_length].upper()}"
+                for _ in range(count - len(codes))
+            }
+            candidates -= codes
+            code_field = cls.get_code_field_name()
+            taken = set(
+                cls._base_manager.filter(**{f'{code_field}__in': candidates})
+                .values_list(code_field, flat=True)
+            )
+            codes |= candidates - taken
+        return list(codes)
+
     @classmethod
     def get_code_field_name(cls):
         """
@@ -1,6 +1,6 @@
 from django.db import models
 from django.core.validators import MinValueValidator
-from simple_history.models import HistoricalRecords
+from apps.core.history import BufferedHistoricalRecords
 import hashlib
 from django.utils import timezone
 from apps.masterdata.mixins import CodeGeneratorMixin
@@ -64,7 +64,7 @@ class Account(CodeGeneratorMixin, TimeStampedModel):
         ('OBSOLETE', _('Obsolète')),
     ))
     description = models.TextField(_('Description'), null=True, blank=True)
-    history = HistoricalRecords()
+    history = BufferedHistoricalRecords()
 
     class Meta:
         verbose_name = _('Compte')
@@ -88,7 +88,7 @@ class Family(CodeGeneratorMixin, TimeStampedModel):
         ('INACTIVE', _('Inactif')),
         ('OBSOLETE', _('Obsolète')),
     ))
-    history = HistoricalRecords()
+    history = BufferedHistoricalRecords()
 
     class Meta:
         verbose_name = _('Famille')
@@ -121,7 +121,7 @@ class Warehouse(CodeGeneratorMixin, TimeStampedModel):
     description = models.TextField(_('Description'), blank=True, null=True)
     status = models.CharField(_('Statut'), choices=STATUS_CHOICES)
     address = models.CharField(_('Adresse'), max_length=255, blank=True, null=True)
-    history = HistoricalRecords()
+    history = BufferedHistoricalRecords()
 
     class Meta:
         verbose_name = _('Entrepôt')
@@ -145,7 +145,7 @@ class ZoneType(CodeGeneratorMixin, TimeStampedModel):
     type_name = models.CharField(_('Nom du type'), max_length=100)
     description = models.TextField(_('Description'), max_length=100, null=True, blank=True)
     status = models.CharField(_('Statut'), choices=STATUS_CHOICES)
-    history = HistoricalRecords()
+    history = BufferedHistoricalRecords()
     
     class Meta:
         verbose_name = _('Type de zone')
@@ -172,7 +172,7 @@ class Zone(CodeGeneratorMixin, TimeStampedModel):
     zone_type = models.ForeignKey(ZoneType, models.CASCADE, verbose_name=_('Type de zone'))
     description = models.TextField(_('Description'), max_length=100, null=True, blank=True)
     zone_status = models.CharField(_('Statut'), choices=STATUS_CHOICES)
-    history = HistoricalRecords()
+    history = BufferedHistoricalRecords()
     
     class Meta:
         verbose_name = _('Zone')
@@ -198,7 +198,7 @@ class SousZone(CodeGeneratorMixin, TimeStampedModel):
     zone = models.ForeignKey(Zone, models.CASCADE, verbose_name=_('Zone'))
     description = models.TextField(_('Description'), max_length=100, null=True, blank=True)
     sous_zone_status = models.CharField(_('Statut'), choices=STATUS_CHOICES)
-    history = HistoricalRecords()
+    history = BufferedHistoricalRecords()
     
     class Meta:
         verbose_name = _('Sous-zone')
@@ -217,7 +217,7 @@ class LocationType(CodeGeneratorMixin, TimeStampedModel):
     name = models.CharField(_('Nom'), max_length=100)
     description = models.TextField(_('Description'), max_length=100, blank=True, null=True)
     is_active = models.BooleanField(_('Actif'), default=True)
-    history = HistoricalRecords()
+    history = BufferedHistoricalRecords()
     
     class Meta:
         verbose_name = _('Type d\'emplacement')
@@ -240,7 +240,7 @@ class Location(CodeGeneratorMixin, TimeStampedModel):
     is_active = models.BooleanField(_('Actif'), default=True)
     description = models.TextField(_('Description'), max_length=255, null=True, blank=True)
     regroupement = models.ForeignKey('RegroupementEmplacement', on_delete=models.SET_NULL, null=True, blank=True, related_name='locations')
-    history = HistoricalRecords()
+    history = BufferedHistoricalRecords()
     
     class Meta:
         verbose_name = _('Emplacement')
@@ -275,7 +275,7 @@ class Product(CodeGeneratorMixin, TimeStampedModel):
     dlc = models.BooleanField(_('DLC'),default=False)
     parent_product = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, verbose_name=_('Produit parent'))
     
-    history = HistoricalRecords()
+    history = BufferedHistoricalRecords()
     
     class Meta:
         verbose_name = _('Produit')
@@ -307,7 +307,7 @@ class NSerie(CodeGeneratorMixin, TimeStampedModel):
     date_expiration = models.DateField(_('Date d\'expiration'), null=True, blank=True)
     warranty_end_date = models.DateField(_('Date de fin de garantie'), null=True, blank=True)
     
-    history = HistoricalRecords()
+    history = BufferedHistoricalRecords()
     
     class Meta:
         verbose_name = _('Numéro de série')
@@ -368,7 +368,7 @@ class UnitOfMeasure(CodeGeneratorMixin, TimeStampedModel):
     reference = models.CharField(_('Code'), max_length=20, unique=True)
     name = models.CharField(_('Nom'), max_length=50)
     description = models.TextField(_('Description'), max_length=100, null=True, blank=True)
-    history = HistoricalRecords()
+    history = BufferedHistoricalRecords()
     
     class Meta:
         verbose_name = _('Unité de mesure')
@@ -403,7 +403,18 @@ class Stock(TimeStampedModel):
     unit_of_measure = models.ForeignKey(UnitOfMeasure, on_delete=models.CASCADE,blank=True,null=True)
     inventory = models.ForeignKey('inventory.Inventory', on_delete=models.CASCADE)
     warehouse = models.ForeignKey('Warehouse', on_delete=models.CASCADE)
-    history = HistoricalRecords()
+    history = BufferedHistoricalRecords()
+
+    class Meta:
+        constraints = [
+            # Cible ON CONFLICT de StockRepository.bulk_upsert (lignes sans emplacement
+            # ou sans article : NULL jamais en conflit)
+            models.UniqueConstraint(
+                fields=['inventory', 'location', 'product'],
+                condition=models.Q(is_deleted=False),
+                name='uniq_stock_inv_loc_product_actif',
+            ),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.reference:
@@ -428,7 +439,7 @@ class TypeRessource(CodeGeneratorMixin, TimeStampedModel):
     reference = models.CharField(unique=True, max_length=20)
     libelle = models.CharField(max_length=100)
     description = models.TextField(max_length=100, null=True, blank=True)
-    history = HistoricalRecords()
+    history = BufferedHistoricalRecords()
 
     def __str__(self):
         return self.libelle
@@ -444,7 +455,7 @@ class Ressource(CodeGeneratorMixin, TimeStampedModel):
     description = models.TextField(max_length=100, null=True, blank=True)
     type_ressource = models.ForeignKey(TypeRessource, on_delete=models.CASCADE, verbose_name=_('Type de ressource'))
     status = models.CharField(choices=STATUS_CHOICES)
-    history = HistoricalRecords()
+    history = BufferedHistoricalRecords()
 
     def __str__(self):
         return self.libelle
@@ -615,7 +626,7 @@ class InventoryLocationJob(TimeStampedModel):
     job = models.CharField(_('Job'), max_length=255, blank=True, null=True)
     session_1 = models.CharField(_('Session 1'), max_length=255, blank=True, null=True)
     session_2 = models.CharField(_('Session 2'), max_length=255, blank=True, null=True)
-    history = HistoricalRecords()
+    history = BufferedHistoricalRecords()
     
     class Meta:
         verbose_name = _('Job d\'inventaire par emplacement')
@@ -624,6 +635,14 @@ class InventoryLocationJob(TimeStampedModel):
             models.Index(fields=['inventaire', 'emplacement']),
             models.Index(fields=['job']),
         ]
+        constraints = [
+            # Cible ON CONFLICT de InventoryLocationJobRepository.bulk_upsert
+            models.UniqueConstraint(
+                fields=['inventaire', 'emplacement'],
+                condition=models.Q(is_deleted=False),
+                name='uniq_ilj_inv_emplacement_actif',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.inventaire} - {self.emplacement} - {self.job}"
\ No newline at end of file
@@ -1,12 +1,16 @@
+from __future__ import annotations
+
 import os
-import pandas as pd
 from django.db import transaction
+from apps.core.lazy_imports import lazy_import
 from import_export import resources, exceptions
 from ..models import ImportTask, ImportError, Product, Family
 import logging
 from datetime import datetime
 import tempfile
 
+pd = lazy_import('pandas')
+
 logger = logging.getLogger(__name__)
 
 
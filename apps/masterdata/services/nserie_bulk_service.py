@@ -0,0 +1,192 @@
+"""
+Ingestion ensembliste des numéros de série (masterdata.NSerie).
+
+``NSerie.save`` valide chaque numéro par une requête (``clean``) et génère sa
+référence par une ou plusieurs autres (``generate_unique_code``) : un import de
+dizaines de milliers de numéros fait autant d'allers-retours. Ici, pour un lot :
+
+- les produits et les numéros déjà en base sont chargés en une requête chacun ;
+- la validation (produit géré en série, numéro attribué à un autre produit,
+  doublons du lot) se fait en mémoire ;
+- les références sont générées en masse (``generate_unique_codes``) ;
+- l'écriture est un ``INSERT ... ON CONFLICT (n_serie, product_id) DO UPDATE``
+  par lot (apps.core.upsert.bulk_upsert, historique compris). Un numéro
+  supprimé logiquement est réactivé.
+
+Utilisé par l'import admin (NSerieResource) et par les numéros de série des
+comptages (apps.inventory.services.nserie_inventory_service).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Optional, Sequence, Set, Tuple
+
+from django.db import transaction
+from django.utils.translation import gettext as _
+
+from apps.core.upsert import DEFAULT_BATCH_SIZE, bulk_upsert
+
+from ..models import NSerie, Product
+
+# Champs recopiés sur un numéro existant (import = mise à jour)
+UPDATABLE_FIELDS = ('status', 'description', 'date_fabrication', 'date_expiration', 'warranty_end_date')
+
+
+@dataclass
+class NSerieBatchResult:
+    """Résultat d'un lot : compteurs, erreurs par index de ligne et id par numéro."""
+
+    created: int = 0
+    updated: int = 0
+    errors: Dict[int, str] = field(default_factory=dict)
+    ids_by_serial: Dict[str, int] = field(default_factory=dict)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'created': self.created,
+            'updated': self.updated,
+            'errors': [{'index': index, 'error': error} for index, error in sorted(self.errors.items())],
+        }
+
+
+def normalize_serial(value: Any) -> str:
+    """Numéro de série tel qu'enregistré (chaîne sans espaces de bord)."""
+    return '' if value is None else str(value).strip()
+
+
+class NSerieBulkService:
+    """
+    Service d'ingestion en masse des numéros de série.
+
+    Les lignes sont des dictionnaires ``{'n_serie', 'product' | 'product_id', ...}``
+    (champs optionnels : ``UPDATABLE_FIELDS``).
+    """
+
+    def __init__(self, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.batch_size = batch_size
+
+    def existing_serials(self, product_id: int, serials: Optional[Iterable[str]] = None) -> Set[str]:
+        """
+        Numéros de série actifs d'un produit, en une requête.
+
+        Args:
+            product_id: ID du produit
+            serials: Restreint la lecture à ces numéros (sinon tous les numéros du produit)
+        """
+        queryset = NSerie.objects.filter(product_id=product_id)
+        if serials is not None:
+            queryset = queryset.filter(n_serie__in={normalize_serial(s) for s in serials})
+        return set(queryset.values_list('n_serie', flat=True))
+
+    def serial_owners(self, serials: Iterable[str]) -> Dict[str, Tuple[int, bool]]:
+        """
+        Produit propriétaire et état de suppression des numéros déjà en base
+        (unicité globale de ``n_serie``, lignes supprimées logiquement comprises).
+
+        Returns:
+            {n_serie: (product_id, is_deleted)}
+        """
+        return {
+            n_serie: (product_id, is_deleted)
+            for n_serie, product_id, is_deleted in NSerie._base_manager.filter(
+                n_serie__in={normalize_serial(s) for s in serials}
+            ).values_list('n_serie', 'product_id', 'is_deleted')
+        }
+
+    def validate(self, rows: Sequence[Dict[str, Any]], update_existing: bool = True) -> Dict[int, str]:
+        """
+        Valide un lot sans écrire (deux requêtes : produits, numéros existants).
+
+        Args:
+            rows: Lignes à valider
+            update_existing: Un numéro déjà présent pour le même produit est mis
+                à jour ; sinon il est refusé comme par ``NSerie.clean``
+
+        Returns:
+            {index de ligne: message d'erreur}
+        """
+        return self._check(rows, update_existing)[0]
+
+    @transaction.atomic
+    def save(self, rows: Sequence[Dict[str, Any]], update_existing: bool = True) -> NSerieBatchResult:
+        """
+        Valide puis écrit un lot ; les lignes invalides sont ignorées et
+        reportées dans ``errors``.
+        """
+        errors, owners = self._check(rows, update_existing)
+        result = NSerieBatchResult(errors=errors)
+
+        valid_rows = [row for index, row in enumerate(rows) if index not in errors]
+        if not valid_rows:
+            return result
+
+        # Champs optionnels fournis par toutes les lignes : les autres ne sont pas écrasés
+        update_fields = [name for name in UPDATABLE_FIELDS if all(name in row for row in valid_rows)]
+        serials = [normalize_serial(row['n_serie']) for row in valid_rows]
+        new_serials = {serial for serial in serials if serial not in owners}
+        references = iter(NSerie.generate_unique_codes(NSerie.CODE_PREFIX, len(new_serials)))
+        reference_by_serial = {serial: next(references) for serial in sorted(new_serials)}
+
+        upsert_rows = []
+        for row, serial in zip(valid_rows, serials):
+            data = {name: row[name] for name in update_fields}
+            data.update(
+                n_serie=serial,
+                product_id=self._product_id(row),
+                # Numéro existant : référence conservée (hors update_fields)
+                reference=reference_by_serial.get(serial, ''),
+            )
+            upsert_rows.append(data)
+
+        upsert = bulk_upsert(
+            NSerie,
+            upsert_rows,
+            unique_fields=['n_serie', 'product'],
+            update_fields=update_fields + ['is_deleted', 'deleted_at'],
+            batch_size=self.batch_size,
+        )
+        result.created = upsert.created
+        result.updated = upsert.updated
+        result.ids_by_serial = {key[0]: pk for key, pk in upsert.ids_by_key.items()}
+        return result
+
+    def _check(
+        self, rows: Sequence[Dict[str, Any]], update_existing: bool,
+    ) -> Tuple[Dict[int, str], Dict[str, Tuple[int, bool]]]:
+        product_ids = {self._product_id(row) for row in rows} - {None}
+        serial_products = dict(
+            Product.objects.filter(id__in=product_ids).values_list('id', 'n_serie')
+        )
+        owners = self.serial_owners(normalize_serial(row.get('n_serie')) for row in rows)
+
+        errors: Dict[int, str] = {}
+        seen: Dict[str, int] = {}
+        for index, row in enumerate(rows):
+            serial = normalize_serial(row.get('n_serie'))
+            product_id = self._product_id(row)
+            if not serial:
+                errors[index] = _('Le numéro de série est obligatoire')
+            elif product_id is None:
+                errors[index] = _('Le produit est obligatoire')
+            elif product_id not in serial_products:
+                errors[index] = _('Produit introuvable')
+            elif not serial_products[product_id]:
+                errors[index] = _('Ce produit ne supporte pas les numéros de série')
+            elif serial in owners and owners[serial][0] != product_id:
+                errors[index] = _('Ce numéro de série est attribué à un autre produit')
+            elif serial in seen and seen[serial] != product_id:
+                errors[index] = _('Ce numéro de série est attribué à un autre produit dans le lot')
+            elif not update_existing and (
+                (serial in owners and not owners[serial][1]) or serial in seen
+            ):
+                errors[index] = _('Ce numéro de série existe déjà pour ce produit')
+            else:
+                seen[serial] = product_id
+        return errors, owners
+
+    @staticmethod
+    def _product_id(row: Dict[str, Any]) -> Optional[int]:
+        if row.get('product_id') is not None:
+            return row['product_id']
+        product = row.get('product')
+        return product.id if product is not None else None
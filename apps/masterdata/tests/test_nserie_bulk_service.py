@@ -0,0 +1,90 @@
+"""
+Tests de l'ingestion ensembliste des numéros de série
+(NSerieBulkService, import admin NSerieResource).
+"""
+import tablib
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.masterdata.admin import NSerieResource
+from apps.masterdata.models import Account, Family, NSerie, Product
+from apps.masterdata.services.nserie_bulk_service import NSerieBulkService
+
+
+class NSerieBulkServiceTests(TestCase):
+
+    def setUp(self):
+        account = Account.objects.create(reference='ACC-NSB', account_name='Compte NS', account_statuts='ACTIVE')
+        family = Family.objects.create(
+            reference='FAM-NSB', family_name='Famille NS', compte=account, family_status='ACTIVE',
+        )
+        self.product = Product.objects.create(
+            reference='PRD-NSB-1', Internal_Product_Code='NSB-1', Short_Description='Série 1',
+            Product_Family=family, n_serie=True,
+        )
+        self.other = Product.objects.create(
+            reference='PRD-NSB-2', Internal_Product_Code='NSB-2', Short_Description='Série 2',
+            Product_Family=family, n_serie=True,
+        )
+        self.plain = Product.objects.create(
+            reference='PRD-NSB-3', Internal_Product_Code='NSB-3', Short_Description='Sans série',
+            Product_Family=family,
+        )
+        self.existing = NSerie.objects.create(n_serie='SN-EXIST', product=self.product, status='ACTIVE')
+        NSerie.objects.create(n_serie='SN-OTHER', product=self.other)
+
+    def _save(self, count):
+        rows = [{'n_serie': f'SN-{count}-{i}', 'product': self.product} for i in range(count)]
+        with CaptureQueriesContext(connection) as queries:
+            result = NSerieBulkService().save(rows)
+        self.assertEqual(result.created, count)
+        return len(queries.captured_queries)
+
+    def test_batch_is_validated_and_written_with_a_constant_number_of_queries(self):
+        self.assertEqual(self._save(5), self._save(300))
+        references = list(NSerie.objects.values_list('reference', flat=True))
+        self.assertEqual(len(references), len(set(references)))
+        self.assertTrue(all(reference.startswith('NS-') for reference in references))
+
+    def test_invalid_rows_are_reported_and_existing_serials_updated(self):
+        reference = self.existing.reference
+        result = NSerieBulkService().save([
+            {'n_serie': 'SN-EXIST', 'product': self.product, 'status': 'BLOCKED'},
+            {'n_serie': 'SN-OTHER', 'product': self.product, 'status': 'ACTIVE'},
+            {'n_serie': 'SN-PLAIN', 'product': self.plain, 'status': 'ACTIVE'},
+            {'n_serie': ' SN-NEW ', 'product_id': self.product.id, 'status': 'ACTIVE'},
+            {'n_serie': 'SN-NEW', 'product': self.other, 'status': 'ACTIVE'},
+            {'n_serie': '', 'product': self.product, 'status': 'ACTIVE'},
+        ])
+
+        self.assertEqual((result.created, result.updated), (1, 1))
+        self.assertEqual(sorted(result.errors), [1, 2, 4, 5])
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.status, 'BLOCKED')
+        self.assertEqual(self.existing.reference, reference)
+        self.assertTrue(NSerie.objects.filter(n_serie='SN-NEW', product=self.product).exists())
+
+        errors = NSerieBulkService().validate(
+            [{'n_serie': 'SN-EXIST', 'product': self.product}], update_existing=False,
+        )
+        self.assertEqual(list(errors), [0])
+
+    def test_admin_import_uses_the_bulk_service(self):
+        headers = ['produit', 'numéro de série', 'statut', 'description',
+                   'date fabrication', 'date expiration', 'date fin garantie']
+        dataset = tablib.Dataset(headers=headers)
+        dataset.append(['NSB-1', 'SN-EXIST', 'USED', 'mise à jour', None, None, None])
+        dataset.append(['NSB-1', 'SN-IMP-1', 'ACTIVE', '', None, None, None])
+        dataset.append(['NSB-3', 'SN-IMP-2', 'ACTIVE', '', None, None, None])
+
+        result = NSerieResource().import_data(dataset, dry_run=False)
+
+        self.assertFalse(result.has_errors())
+        self.assertEqual([row.number for row in result.invalid_rows], [3])
+        self.existing.refresh_from_db()
+        self.assertEqual((self.existing.status, self.existing.description), ('USED', 'mise à jour'))
+        imported = NSerie.objects.get(n_serie='SN-IMP-1')
+        self.assertEqual(imported.product, self.product)
+        self.assertTrue(imported.reference)
+        self.assertFalse(NSerie.objects.filter(n_serie='SN-IMP-2').exists())
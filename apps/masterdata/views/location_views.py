@@ -169,8 +169,9 @@ class UnassignedLocationsView(ServerSideDataTableView):
         Garantit que seuls les emplacements du warehouse spécifié sont retournés.
         """
         from rest_framework.exceptions import ValidationError, NotFound
-        from apps.inventory.models import JobDetail
-        from ..models import Warehouse
+        from django.db.models import Exists, Prefetch
+        from apps.inventory.repositories.assigned_location_repository import AssignedLocationRepository
+        from ..models import Stock, Warehouse
 
         warehouse_id = self.kwargs.get('warehouse_id')
         account_id = self.kwargs.get('account_id')
@@ -196,16 +197,12 @@ class UnassignedLocationsView(ServerSideDataTableView):
             regroupement__account_id=account_id,
         )
 
-        # Exclure les locations déjà assignées à cet inventaire
-        assigned_location_ids = JobDetail.objects.filter(
-            job__inventory_id=inventory_id,
-            job__warehouse_id=warehouse_id,  # S'assurer que les jobs sont aussi du bon warehouse
-            location_id__isnull=False,
-        ).values_list('location_id', flat=True)
+        # Exclure les locations déjà assignées à cet inventaire (jobs du même warehouse) :
+        # anti-join NOT EXISTS sur l'index InventoryAssignedLocation
+        assigned = AssignedLocationRepository().assigned_for_outer_location(inventory_id, warehouse_id)
+        queryset = queryset.filter(~Exists(assigned))
 
-        queryset = queryset.exclude(id__in=assigned_location_ids)
-
-        # Optimisations de requête
+        # Optimisations de requête ; seuls les stocks de l'inventaire alimentent les familles
         queryset = queryset.select_related(
             'sous_zone',
             'sous_zone__zone',
@@ -214,7 +211,10 @@ class UnassignedLocationsView(ServerSideDataTableView):
             'regroupement',
             'regroupement__account',
         ).prefetch_related(
-            'stock_set__product__Product_Family'
+            Prefetch(
+                'stock_set',
+                queryset=Stock.objects.filter(inventory_id=inventory_id).select_related('product__Product_Family'),
+            )
         )
 
         return queryset
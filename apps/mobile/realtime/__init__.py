@@ -0,0 +1,16 @@
+"""
+Push temps réel vers les PDA (WebSocket, django-channels).
+
+Chaque PDA ouvre ``ws/mobile/events/`` (jeton JWT) et reçoit, au commit des
+transactions, des événements compacts sur ses affectations, les jobs et les
+nouveaux JobDetail de son inventaire. La synchronisation complète
+(``sync_data``) ne sert plus que de resynchronisation de sécurité.
+"""
+from .groups import inventory_group, user_group
+from .publisher import publish_pda_changes
+
+__all__ = [
+    'inventory_group',
+    'publish_pda_changes',
+    'user_group',
+]
@@ -0,0 +1,45 @@
+"""
+Authentification JWT des connexions WebSocket.
+
+Le jeton d'accès (le même que pour l'API REST) est lu dans l'en-tête
+``Authorization: Bearer <token>`` ou, à défaut, dans le paramètre de requête
+``token`` (les clients WebSocket ne peuvent pas toujours poser d'en-tête).
+"""
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+
+def _raw_token(scope):
+    for name, value in scope.get('headers', []):
+        if name == b'authorization':
+            scheme, _, token = value.decode('latin-1').partition(' ')
+            if scheme.lower() == 'bearer' and token.strip():
+                return token.strip()
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    return (query.get('token') or [None])[0]
+
+
+@database_sync_to_async
+def _get_user(raw_token):
+    authentication = JWTAuthentication()
+    try:
+        validated = authentication.get_validated_token(raw_token)
+        user = authentication.get_user(validated)
+    except (InvalidToken, AuthenticationFailed):
+        return AnonymousUser()
+    return user if user.is_active else AnonymousUser()
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """Renseigne ``scope['user']`` depuis le jeton JWT (AnonymousUser sinon)"""
+
+    async def __call__(self, scope, receive, send):
+        scope = dict(scope)
+        raw_token = _raw_token(scope)
+        scope['user'] = await _get_user(raw_token) if raw_token else AnonymousUser()
+        return await super().__call__(scope, receive, send)
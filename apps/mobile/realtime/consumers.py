@@ -0,0 +1,76 @@
+"""
+Consumer WebSocket des PDA : ``ws/mobile/events/?inventory_id=<id>``.
+
+À la connexion, le PDA rejoint le groupe de son utilisateur et, si
+``inventory_id`` est fourni, celui de l'inventaire. Il reçoit ensuite les
+événements publiés par ``apps.mobile.realtime.publisher``. Messages clients :
+``{"type": "ping"}`` et ``{"type": "subscribe", "inventory_id": <id>}``.
+"""
+from urllib.parse import parse_qs
+
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.conf import settings
+
+from .groups import inventory_group, user_group
+
+# Fermeture sans utilisateur authentifié (plage 4000-4999 réservée aux applications)
+CLOSE_UNAUTHENTICATED = 4401
+
+
+def _parse_id(value):
+    try:
+        parsed = int(value)
+    except (TypeError, ValueError):
+        return None
+    return parsed if parsed > 0 else None
+
+
+class PdaEventsConsumer(AsyncJsonWebsocketConsumer):
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close(code=CLOSE_UNAUTHENTICATED)
+            return
+
+        self.groups_joined = set()
+        await self._join(user_group(user.id))
+
+        query = parse_qs(self.scope.get('query_string', b'').decode('latin-1'))
+        inventory_id = _parse_id((query.get('inventory_id') or [None])[0])
+        if inventory_id is not None:
+            await self._join(inventory_group(inventory_id))
+
+        await self.accept()
+        await self.send_json({
+            "type": "connected",
+            "user_id": user.id,
+            "inventory_id": inventory_id,
+            "resync_interval": settings.PDA_PUSH_RESYNC_SECONDS,
+        })
+
+    async def disconnect(self, code):
+        for group in getattr(self, 'groups_joined', ()):
+            await self.channel_layer.group_discard(group, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        message_type = content.get('type') if isinstance(content, dict) else None
+        if message_type == 'ping':
+            await self.send_json({"type": "pong"})
+        elif message_type == 'subscribe':
+            inventory_id = _parse_id(content.get('inventory_id'))
+            if inventory_id is None:
+                await self.send_json({"type": "error", "message": "inventory_id invalide"})
+                return
+            for group in [g for g in self.groups_joined if g.startswith('pda.inventory.')]:
+                await self.channel_layer.group_discard(group, self.channel_name)
+                self.groups_joined.discard(group)
+            await self._join(inventory_group(inventory_id))
+            await self.send_json({"type": "subscribed", "inventory_id": inventory_id})
+
+    async def pda_event(self, message):
+        await self.send_json(message["event"])
+
+    async def _join(self, group):
+        await self.channel_layer.group_add(group, self.channel_name)
+        self.groups_joined.add(group)
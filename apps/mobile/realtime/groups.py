@@ -0,0 +1,16 @@
+"""
+Groupes du channel layer et type des messages relayés aux PDA.
+"""
+
+# Handler du consumer appelé pour chaque événement (``pda.event`` -> ``pda_event``)
+PDA_EVENT_MESSAGE_TYPE = 'pda.event'
+
+
+def user_group(user_id: int) -> str:
+    """Groupe d'un utilisateur mobile (ses affectations)"""
+    return f'pda.user.{user_id}'
+
+
+def inventory_group(inventory_id: int) -> str:
+    """Groupe d'un inventaire (jobs et JobDetail)"""
+    return f'pda.inventory.{inventory_id}'
@@ -0,0 +1,183 @@
+"""
+Publication des changements d'affectations, de jobs et de JobDetail vers les PDA.
+
+Les identifiants modifiés sont accumulés pendant la transaction puis, au
+commit, relus en trois requêtes au plus et envoyés sur le channel layer :
+
+- ``assignment`` : groupe de l'utilisateur affecté (``session``) et, sur un
+  transfert ou une désaffectation, groupe de l'utilisateur précédent
+  (``user_id`` de l'événement : nouvel utilisateur, ``null`` si désaffectée) ;
+- ``job`` et ``job_details`` : groupe de l'inventaire.
+
+Un événement porte l'état courant (et non la transition) : plusieurs
+modifications d'une même ligne dans une transaction donnent un seul
+événement, et un événement rejoué ou perdu est corrigé par le suivant ou par
+la resynchronisation de sécurité.
+
+Les ``save()`` sont signalés par ``apps.mobile.signals`` ; les chemins bulk
+(QuerySet.update, bulk_update, bulk_create) appellent ``publish_pda_changes``.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from apps.core.commit_buffer import OnCommitBatchBuffer, PendingBatch
+from apps.inventory.models import Assigment, Job, JobDetail
+
+from .groups import PDA_EVENT_MESSAGE_TYPE, inventory_group, user_group
+
+
+class PdaEventPublisher(OnCommitBatchBuffer):
+    """
+    Événements PDA accumulés par transaction, publiés au commit
+    (apps.core.commit_buffer) ; hors transaction, publiés immédiatement.
+    """
+
+    fields = ("assignment_ids", "previous_sessions", "job_ids", "job_detail_ids")
+    # Les données sont commitées : le PDA se recalera à la resynchronisation
+    error_message = "Publication des événements PDA impossible"
+
+    def enabled(self) -> bool:
+        return getattr(settings, 'PDA_PUSH_ENABLED', True)
+
+    def mark(
+        self,
+        assignment_ids: Iterable[int] = (),
+        job_ids: Iterable[int] = (),
+        job_detail_ids: Iterable[int] = (),
+        previous_sessions: Iterable[Tuple[int, int]] = (),
+        using: Optional[str] = None,
+    ) -> None:
+        previous_sessions = list(previous_sessions)
+        self.add(
+            using=using,
+            assignment_ids=[assignment_id for assignment_id, _ in previous_sessions] + list(assignment_ids),
+            previous_sessions=previous_sessions,
+            job_ids=job_ids,
+            job_detail_ids=job_detail_ids,
+        )
+
+    def process(self, batch: PendingBatch) -> None:
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+        messages = build_messages(
+            batch.assignment_ids, batch.job_ids, batch.job_detail_ids, batch.using,
+            previous_sessions=batch.previous_sessions,
+        )
+        for group, event in messages:
+            async_to_sync(channel_layer.group_send)(group, {"type": PDA_EVENT_MESSAGE_TYPE, "event": event})
+
+
+def build_messages(
+    assignment_ids: Set[int],
+    job_ids: Set[int],
+    job_detail_ids: Set[int],
+    using: str = DEFAULT_DB_ALIAS,
+    previous_sessions: Iterable[Tuple[int, int]] = (),
+) -> List[Tuple[str, Dict]]:
+    """
+    (groupe, événement) à envoyer pour l'état courant des lignes données.
+
+    ``previous_sessions`` : couples (affectation, utilisateur précédent) des
+    affectations transférées ou désaffectées pendant la transaction.
+    """
+    messages: List[Tuple[str, Dict]] = []
+
+    if assignment_ids:
+        recipients: Dict[int, Set[int]] = defaultdict(set)
+        for assignment_id, session_id in previous_sessions:
+            recipients[assignment_id].add(session_id)
+        rows = (
+            Assigment._base_manager.using(using)
+            .filter(id__in=assignment_ids)
+            .values_list('id', 'job_id', 'job__inventory_id', 'counting__order', 'status', 'session_id')
+            .order_by('id')
+        )
+        for assignment_id, job_id, inventory_id, counting_order, status, session_id in rows:
+            event = {
+                "type": "assignment",
+                "id": assignment_id,
+                "job_id": job_id,
+                "inventory_id": inventory_id,
+                "counting_order": counting_order,
+                "status": status,
+                "user_id": session_id,
+            }
+            users = recipients[assignment_id] | {session_id}
+            for user_id in sorted(user_id for user_id in users if user_id is not None):
+                messages.append((user_group(user_id), event))
+
+    if job_ids:
+        rows = (
+            Job._base_manager.using(using)
+            .filter(id__in=job_ids)
+            .values_list('id', 'reference', 'inventory_id', 'status')
+            .order_by('id')
+        )
+        for job_id, reference, inventory_id, status in rows:
+            messages.append((inventory_group(inventory_id), {
+                "type": "job",
+                "id": job_id,
+                "reference": reference,
+                "inventory_id": inventory_id,
+                "status": status,
+            }))
+
+    if job_detail_ids:
+        created: Dict[Tuple[int, int, Optional[int]], List[int]] = defaultdict(list)
+        rows = (
+            JobDetail.objects.using(using)
+            .filter(id__in=job_detail_ids)
+            .values_list('id', 'job_id', 'job__inventory_id', 'counting__order')
+            .order_by('id')
+        )
+        for job_detail_id, job_id, inventory_id, counting_order in rows:
+            created[(inventory_id, job_id, counting_order)].append(job_detail_id)
+        for (inventory_id, job_id, counting_order), ids in created.items():
+            messages.append((inventory_group(inventory_id), {
+                "type": "job_details",
+                "job_id": job_id,
+                "inventory_id": inventory_id,
+                "counting_order": counting_order,
+                "ids": ids,
+            }))
+
+    return messages
+
+
+pda_event_publisher = PdaEventPublisher()
+
+
+def publish_pda_changes(
+    assignment_ids: Iterable[int] = (),
+    job_ids: Iterable[int] = (),
+    job_detail_ids: Iterable[int] = (),
+    previous_sessions: Iterable[Tuple[int, int]] = (),
+    using: Optional[str] = None,
+) -> None:
+    """
+    Signale des affectations / jobs modifiés et des JobDetail créés ; les
+    événements sont envoyés aux PDA au commit de la transaction.
+
+    Args:
+        assignment_ids: Affectations dont le statut ou l'utilisateur a changé
+        job_ids: Jobs dont le statut a changé
+        job_detail_ids: JobDetail créés
+        previous_sessions: Couples (affectation, utilisateur précédent) des
+            affectations transférées ou désaffectées
+        using: Alias de base
+    """
+    pda_event_publisher.mark(
+        assignment_ids=assignment_ids,
+        job_ids=job_ids,
+        job_detail_ids=job_detail_ids,
+        previous_sessions=previous_sessions,
+        using=using,
+    )
@@ -0,0 +1,10 @@
+"""
+Routes WebSocket de l'application mobile (montées par project/asgi.py).
+"""
+from django.urls import path
+
+from .consumers import PdaEventsConsumer
+
+websocket_urlpatterns = [
+    path('ws/mobile/events/', PdaEventsConsumer.as_asgi()),
+]
@@ -0,0 +1,160 @@
+from django.db.models import Count, Max
+
+from apps.inventory.models import Inventory
+from apps.masterdata.models import Location, NSerie, Product, Stock, Warehouse
+from apps.users.models import UserApp
+from apps.mobile.exceptions.auth_exceptions import UserNotFoundException
+from apps.mobile.exceptions.inventory_exceptions import (
+    AccountNotFoundException,
+    DataValidationException,
+    InventoryNotFoundException,
+)
+
+
+# Colonnes exportées par jeu de données : (nom de colonne, chemin ORM).
+# Les noms reprennent les clés des réponses JSON de UserRepository.format_*_data.
+DATASET_COLUMNS = {
+    'products': (
+        ('web_id', 'id'),
+        ('reference', 'reference'),
+        ('product_name', 'Short_Description'),
+        ('product_code', 'Barcode'),
+        ('internal_product_code', 'Internal_Product_Code'),
+        ('category', 'Product_Group'),
+        ('family_id', 'Product_Family_id'),
+        ('family_name', 'Product_Family__family_name'),
+        ('unit_of_measure', 'Stock_Unit'),
+        ('is_variant', 'Is_Variant'),
+        ('n_lot', 'n_lot'),
+        ('n_serie', 'n_serie'),
+        ('dlc', 'dlc'),
+        ('updated_at', 'updated_at'),
+    ),
+    'numeros_serie': (
+        ('id', 'id'),
+        ('product_id', 'product_id'),
+        ('n_serie', 'n_serie'),
+        ('reference', 'reference'),
+        ('status', 'status'),
+        ('date_fabrication', 'date_fabrication'),
+        ('date_expiration', 'date_expiration'),
+        ('warranty_end_date', 'warranty_end_date'),
+        ('updated_at', 'updated_at'),
+    ),
+    'locations': (
+        ('web_id', 'id'),
+        ('location_reference', 'location_reference'),
+        ('location_type_id', 'location_type_id'),
+        ('location_type', 'location_type__name'),
+        ('warehouse_id', 'sous_zone__zone__warehouse_id'),
+        ('warehouse_name', 'sous_zone__zone__warehouse__warehouse_name'),
+        ('zone_id', 'sous_zone__zone_id'),
+        ('zone_name', 'sous_zone__zone__zone_name'),
+        ('sous_zone_id', 'sous_zone_id'),
+        ('sous_zone_name', 'sous_zone__sous_zone_name'),
+        ('updated_at', 'updated_at'),
+    ),
+    'stocks': (
+        ('web_id', 'id'),
+        ('reference', 'reference'),
+        ('location_id', 'location_id'),
+        ('location_reference', 'location__location_reference'),
+        ('product_id', 'product_id'),
+        ('quantity_available', 'quantity_available'),
+        ('quantity_reserved', 'quantity_reserved'),
+        ('quantity_in_transit', 'quantity_in_transit'),
+        ('quantity_in_receiving', 'quantity_in_receiving'),
+        ('unit_id', 'unit_of_measure_id'),
+        ('inventory_id', 'inventory_id'),
+        ('updated_at', 'updated_at'),
+    ),
+}
+
+# Horodatages agrégés pour la version d'un jeu : la ligne elle-même et les
+# tables jointes dont un libellé est exporté.
+DATASET_VERSION_FIELDS = {
+    'products': ('updated_at', 'Product_Family__updated_at'),
+    'numeros_serie': ('updated_at',),
+    'locations': ('updated_at', 'sous_zone__updated_at', 'sous_zone__zone__updated_at'),
+    'stocks': ('updated_at', 'location__updated_at'),
+}
+
+
+class MasterDataBundleRepository:
+    """Repository des données de référence exportées en bundles mobiles"""
+
+    def get_active_account_by_user(self, user_id):
+        """Récupère le compte actif d'un utilisateur"""
+        if not user_id or not isinstance(user_id, int):
+            raise DataValidationException(f"ID utilisateur invalide: {user_id}")
+
+        try:
+            user = UserApp.objects.select_related('compte').get(id=user_id)
+        except UserApp.DoesNotExist:
+            raise UserNotFoundException(f"Utilisateur avec l'ID {user_id} non trouvé")
+
+        account = user.compte
+        if not account:
+            raise AccountNotFoundException(f"Aucun compte associé à l'utilisateur {user_id}")
+        if account.account_statuts != 'ACTIVE':
+            raise AccountNotFoundException(f"Le compte {account.account_name} n'est pas actif")
+        return account
+
+    def check_inventory_for_account(self, inventory_id, account):
+        """Vérifie que l'inventaire est rattaché au compte"""
+        if not Inventory.objects.filter(id=inventory_id, awi_links__account=account).exists():
+            raise InventoryNotFoundException(
+                f"Inventaire {inventory_id} non trouvé pour le compte {account.account_name}"
+            )
+
+    def get_queryset(self, dataset, account, inventory_id=None):
+        """
+        Queryset d'un jeu de données pour un compte.
+
+        Mêmes filtres que UserRepository : produits actifs des familles du
+        compte, emplacements actifs et stocks des entrepôts du compte. Le
+        filtre inventaire ne s'applique qu'aux stocks.
+        """
+        if dataset == 'products':
+            return Product.objects.filter(
+                Product_Family__compte=account,
+                Product_Status__iexact='ACTIVE',
+            )
+        if dataset == 'numeros_serie':
+            return NSerie.objects.filter(
+                product__Product_Family__compte=account,
+                product__Product_Status__iexact='ACTIVE',
+                product__n_serie=True,
+                status='ACTIVE',
+            )
+
+        warehouses = Warehouse.objects.filter(awi_links__account=account).values('id')
+        if dataset == 'locations':
+            return Location.objects.filter(sous_zone__zone__warehouse__in=warehouses, is_active=True)
+        if dataset == 'stocks':
+            queryset = Stock.objects.filter(location__sous_zone__zone__warehouse__in=warehouses)
+            if inventory_id is not None:
+                queryset = queryset.filter(inventory_id=inventory_id)
+            return queryset
+        raise DataValidationException(f"Jeu de données inconnu: {dataset}")
+
+    def get_version_stamp(self, queryset, dataset):
+        """
+        Empreinte de version d'un jeu : nombre de lignes, id max et horodatages max.
+
+        Une seule requête d'agrégation, bien moins coûteuse que la
+        reconstruction du jeu.
+        """
+        aggregates = {'rows': Count('id'), 'max_id': Max('id')}
+        for index, field in enumerate(DATASET_VERSION_FIELDS[dataset]):
+            aggregates[f'ts{index}'] = Max(field)
+        stamp = queryset.order_by().aggregate(**aggregates)
+        return [stamp['rows'], stamp['max_id']] + [
+            stamp[f'ts{index}'].isoformat() if stamp[f'ts{index}'] else None
+            for index in range(len(DATASET_VERSION_FIELDS[dataset]))
+        ]
+
+    def iter_rows(self, queryset, dataset, chunk_size=2000):
+        """Itère les lignes du jeu sous forme de tuples, dans l'ordre des colonnes"""
+        paths = [path for _, path in DATASET_COLUMNS[dataset]]
+        return queryset.order_by('id').values_list(*paths).iterator(chunk_size=chunk_size)
@@ -29,7 +29,8 @@ class SyncRepository:
             'jobdetail_set__location',
             'jobdetail_set__location__sous_zone',
             'jobdetail_set__location__sous_zone__zone',
-            'jobdetail_set__counting'
+            'jobdetail_set__counting',
+            'assigment_set'
         )
     
     def get_jobs_by_inventories_and_user(self, inventories, user_id, inventory_id=None):
@@ -72,7 +73,8 @@ class SyncRepository:
             'jobdetail_set__location',
             'jobdetail_set__location__sous_zone',
             'jobdetail_set__location__sous_zone__zone',
-            'jobdetail_set__counting'
+            'jobdetail_set__counting',
+            'assigment_set'
         )
     
     def get_inventories_by_user_assignments(self, user_id):
@@ -288,34 +290,31 @@ class SyncRepository:
         Returns:
             Liste de dictionnaires, chaque dictionnaire représente un job fusionné avec un job_detail
         """
-        # Récupérer les job_details
-        job_detail_queryset = job.jobdetail_set.all()
+        # job_details et assignments préchargés (get_jobs_by_inventories*) : filtrage en mémoire,
+        # un .filter() sur le related manager relancerait une requête par job
+        job_details = [
+            job_detail for job_detail in job.jobdetail_set.all()
+            if job_detail.status == 'EN ATTENTE'  # ⭐ Seulement les job_details non terminés
+        ]
         
         # Filtrer les job_details par assignments actifs de l'utilisateur si user_id est fourni
         if user_id:
-            # Récupérer les counting_id des assignments ACTIFS (TRANSFERT ou ENTAME) de l'utilisateur pour ce job
-            user_counting_ids = Assigment.objects.filter(
-                job=job,
-                session_id=user_id,
-                status__in=['TRANSFERT', 'ENTAME']  # ⭐ Seulement les assignments actifs
-            ).values_list('counting_id', flat=True).distinct()
-            
-            # Filtrer les job_details par counting ET status EN ATTENTE
-            if user_counting_ids:
-                job_detail_queryset = job_detail_queryset.filter(
-                    counting_id__in=user_counting_ids,
-                    status='EN ATTENTE'  # ⭐ Seulement les job_details non terminés
-                )
-            else:
-                # Si aucun assignment actif pour cet utilisateur, retourner une liste vide
-                job_detail_queryset = job_detail_queryset.none()
-        else:
-            # Si pas de user_id, filtrer quand même par status EN ATTENTE
-            job_detail_queryset = job_detail_queryset.filter(status='EN ATTENTE')
+            # counting_id des assignments ACTIFS (TRANSFERT ou ENTAME) de l'utilisateur pour ce job
+            user_counting_ids = {
+                assignment.counting_id
+                for assignment in job.assigment_set.all()
+                if assignment.session_id == int(user_id)
+                and assignment.status in ('TRANSFERT', 'ENTAME')  # ⭐ Seulement les assignments actifs
+            }
+            # Si aucun assignment actif pour cet utilisateur, la liste est vide
+            job_details = [
+                job_detail for job_detail in job_details
+                if job_detail.counting_id in user_counting_ids
+            ]
         
         # Créer un job fusionné pour chaque job_detail
         jobs_fused = []
-        for job_detail in job_detail_queryset:
+        for job_detail in job_details:
             # Préparer la liste des warehouses avec id, name et reference
             warehouses = []
             if job.warehouse:
@@ -331,7 +330,7 @@ class SyncRepository:
                 'web_id': job.id,
                 'reference': job.reference,
                 'status': job.status,
-                'inventory_web_id': job.inventory.id,
+                'inventory_web_id': job.inventory_id,
                 'warehouses': warehouses,  # ⭐ Liste des warehouses avec id, name et reference
                 'en_attente_date': job.en_attente_date.isoformat() if job.en_attente_date else None,
                 'affecte_date': job.affecte_date.isoformat() if job.affecte_date else None,
@@ -346,9 +345,9 @@ class SyncRepository:
                 'job_detail_web_id': job_detail.id,
                 'job_detail_reference': job_detail.reference,
                 'job_detail_status': job_detail.status,
-                'location_web_id': job_detail.location.id if job_detail.location else None,
-                'location_reference': job_detail.location.location_reference if job_detail.location else None,
-                'counting_web_id': job_detail.counting.id if job_detail.counting else None
+                'location_web_id': job_detail.location_id,
+                'location_reference': job_detail.location.location_reference if job_detail.location_id else None,
+                'counting_web_id': job_detail.counting_id
             }
             jobs_fused.append(job_fused)
         
@@ -360,11 +359,11 @@ class SyncRepository:
             'web_id': assignment.id,
             'reference': assignment.reference,
             'status': assignment.status,
-            'job_web_id': assignment.job.id,
-            'personne_web_id': assignment.personne.id if assignment.personne else None,
-            'personne_two_web_id': assignment.personne_two.id if assignment.personne_two else None,
-            'counting_web_id': assignment.counting.id,
-            'session_web_id': assignment.session.id if assignment.session else None,
+            'job_web_id': assignment.job_id,
+            'personne_web_id': assignment.personne_id,
+            'personne_two_web_id': assignment.personne_two_id,
+            'counting_web_id': assignment.counting_id,
+            'session_web_id': assignment.session_id,
             'transfert_date': assignment.transfert_date.isoformat() if assignment.transfert_date else None,
             'entame_date': assignment.entame_date.isoformat() if assignment.entame_date else None,
             'affecte_date': assignment.affecte_date.isoformat() if assignment.affecte_date else None,
@@ -390,7 +389,7 @@ class SyncRepository:
             'show_product': counting.show_product,
             'stock_situation': counting.stock_situation,
             'quantity_show': counting.quantity_show,
-            'inventory_web_id': counting.inventory.id,
+            'inventory_web_id': counting.inventory_id,
             'created_at': counting.created_at.isoformat(),
             'updated_at': counting.updated_at.isoformat()
         } 
\ No newline at end of file
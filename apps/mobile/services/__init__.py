@@ -6,6 +6,7 @@ from .inventory_service import InventoryService
 from .user_service import UserService
 from .counting_detail_service import CountingDetailService
 from .person_service import PersonService
+from .master_data_bundle_service import MasterDataBundleService
 
 __all__ = [
     'AuthService',
@@ -14,4 +15,5 @@ __all__ = [
     'UserService',
     'CountingDetailService',
     'PersonService',
+    'MasterDataBundleService',
 ] 
\ No newline at end of file
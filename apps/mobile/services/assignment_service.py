@@ -3,6 +3,7 @@ from django.utils import timezone
 from django.db import transaction
 from apps.inventory.models import Assigment, Job, JobDetail, Personne, EcartComptage, CountingDetail, Counting, ComptageSequence, Inventory
 from apps.inventory.utils.ecart_consensus import calculate_ecart_consensus_result
+from apps.inventory.services.inventory_result_materializer import mark_inventory_results_dirty
 from apps.users.models import UserApp
 import logging
 from apps.mobile.exceptions import (
@@ -670,6 +671,7 @@ class AssignmentService:
             
             # Bulk update des références
             CountingDetail.objects.bulk_update(counting_details_to_create, fields=['reference'])
+            mark_inventory_results_dirty(counting_details=counting_details_to_create)
         
         # NOUVELLE ÉTAPE : Créer les ComptageSequence et mettre à jour les EcartComptage
         sequences_created = 0
@@ -774,6 +776,10 @@ class AssignmentService:
                 )
                 sequences_updated += len(sequences_to_update)
             
+            mark_inventory_results_dirty(
+                counting_detail_ids=[seq.counting_detail_id for seq in sequences_to_create + sequences_to_update]
+            )
+            
             # Recalculer final_result et mettre à jour l'écart
             # Rafraîchir la requête pour inclure les nouvelles séquences créées
             ecart.refresh_from_db()
@@ -7,6 +7,10 @@ from django.db import transaction
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from apps.inventory.models import CountingDetail, Assigment, Job, EcartComptage, ComptageSequence, Inventory, Counting, JobDetail, NSerieInventory
+from apps.core.history import HISTORY_CHANGED, HISTORY_CREATED, record_bulk_history
+from apps.inventory.realtime import notify_dashboard_changes
+from apps.inventory.services.inventory_result_materializer import mark_inventory_results_dirty
+from apps.inventory.services.nserie_inventory_service import attach_serials
 from apps.inventory.usecases.counting_detail_creation import CountingDetailCreationUseCase
 from apps.mobile.exceptions import CountingAssignmentValidationError, EcartComptageResoluError
 from apps.masterdata.models import Product, Location
@@ -163,7 +167,9 @@ class CountingDetailService:
             # Utiliser une transaction pour s'assurer que tout réussit ou rien
             with transaction.atomic():
                 # OPTIMISATION 1: Précharger tous les CountingDetail existants en une seule requête (pour UPSERT)
-                existing_details_map = self._prefetch_existing_counting_details(data_list, job_id=job_id)
+                existing_details_map = self._prefetch_existing_counting_details(
+                    data_list, job_id=job_id, inventory_id=inventory_context.get("inventory_id")
+                )
                 
                 # OPTIMISATION 2 NOUVELLE: Précharger tous les objets liés en une seule fois
                 related_objects_cache = self._prefetch_all_related_objects(data_list)
@@ -419,6 +425,9 @@ class CountingDetailService:
                             ecarts,
                             fields=list(fields_key)
                         )
+                        record_bulk_history(ecarts, EcartComptage, HISTORY_CHANGED)
+                        mark_inventory_results_dirty(ecart_ids=[ecart.id for ecart in ecarts])
+                        notify_dashboard_changes(inventory_ids={ecart.inventory_id for ecart in ecarts})
                         logger.info(f"Mis à jour {len(ecarts)} écart(s) avec les champs: {list(fields_key)}")
             
             # Si on arrive ici, tout a réussi
@@ -462,13 +471,19 @@ class CountingDetailService:
             data.get('product_id')
         )
     
-    def _prefetch_existing_counting_details(self, data_list: List[Dict[str, Any]], job_id: Optional[int] = None) -> Dict[tuple, CountingDetail]:
+    def _prefetch_existing_counting_details(
+        self,
+        data_list: List[Dict[str, Any]],
+        job_id: Optional[int] = None,
+        inventory_id: Optional[int] = None,
+    ) -> Dict[tuple, CountingDetail]:
         """
         Précharge tous les CountingDetail existants en une seule requête (pour UPSERT).
         
         Args:
             data_list: Liste des données à traiter
             job_id: ID du job (optionnel, pour filtrer par job)
+            inventory_id: ID de l'inventaire du job (clé de partition : seule sa partition est lue)
         
         Returns:
             Dict avec clé (counting_id, location_id, product_id) et valeur CountingDetail
@@ -511,7 +526,10 @@ class CountingDetailService:
             q_objects |= Q(**f)
         
         # Récupérer tous les détails en une seule requête
-        existing_details = CountingDetail.objects.filter(q_objects).select_related(
+        existing_details = CountingDetail.objects.filter(q_objects)
+        if inventory_id:
+            existing_details = existing_details.filter(inventory_id=inventory_id)
+        existing_details = existing_details.select_related(
             'product', 'location', 'counting__inventory', 'job'
         )
         
@@ -555,6 +573,7 @@ class CountingDetailService:
         
         # Récupérer les séquences correspondantes en une seule requête optimisée
         sequences_query = ComptageSequence.objects.filter(
+            inventory_id__in=inventory_ids,
             counting_detail__product_id__in=product_ids,
             counting_detail__location_id__in=location_ids,
             counting_detail__counting__inventory_id__in=inventory_ids
@@ -1070,6 +1089,9 @@ class CountingDetailService:
         
         # Bulk update des références
         CountingDetail.objects.bulk_update(counting_details_to_create, fields=['reference'])
+        # Historique (mode batched) : après la mise à jour des références définitives
+        record_bulk_history(counting_details_to_create, CountingDetail, HISTORY_CREATED)
+        mark_inventory_results_dirty(counting_details=counting_details_to_create)
         
         # Recharger les objets avec les relations pour accès ultérieur à counting.inventory
         # Nécessaire car bulk_create ne charge pas automatiquement les relations
@@ -1077,8 +1099,10 @@ class CountingDetailService:
         if counting_detail_ids:
             # Recharger avec select_related pour avoir counting.inventory accessible
             reloaded_details = {
-                cd.id: cd for cd in CountingDetail.objects.filter(id__in=counting_detail_ids)
-                .select_related('product', 'location', 'counting__inventory', 'counting', 'job')
+                cd.id: cd for cd in CountingDetail.objects.filter(
+                    id__in=counting_detail_ids,
+                    inventory_id__in={cd.inventory_id for cd in counting_details_to_create},
+                ).select_related('product', 'location', 'counting__inventory', 'counting', 'job')
             }
             # Remplacer les objets dans la liste
             for i, cd in enumerate(counting_details_to_create):
@@ -1101,6 +1125,7 @@ class CountingDetailService:
         
         if job_details_to_update:
             JobDetail.objects.bulk_update(job_details_to_update, fields=['status', 'termine_date'])
+            record_bulk_history(job_details_to_update, JobDetail, HISTORY_CHANGED)
         
         return counting_details_to_create
     
@@ -1119,41 +1144,14 @@ class CountingDetailService:
         Returns:
             Dict[int, List[NSerieInventory]]: Mapping counting_detail_id -> liste de NumeroSerie
         """
-        all_numeros_serie_to_create = []
-        detail_id_to_nserie = {}
-        
-        # Grouper tous les NumeroSerie à créer
+        items = []
         for i, counting_detail in enumerate(bulk_created_details):
-            item = items_to_create[i]
-            numeros_serie_data = item['data'].get('numeros_serie', [])
-            
+            numeros_serie_data = items_to_create[i]['data'].get('numeros_serie', [])
             if numeros_serie_data:
-                numeros_serie_list = []
-                for ns_data in numeros_serie_data:
-                    nserie = NSerieInventory(
-                        n_serie=ns_data['n_serie'],
-                        counting_detail=counting_detail
-                    )
-                    # Générer référence temporaire
-                    nserie.reference = nserie.generate_reference(NSerieInventory.REFERENCE_PREFIX)
-                    all_numeros_serie_to_create.append(nserie)
-                    numeros_serie_list.append(nserie)
-                
-                detail_id_to_nserie[counting_detail.id] = numeros_serie_list
+                items.append((counting_detail, [ns_data['n_serie'] for ns_data in numeros_serie_data]))
         
-        if all_numeros_serie_to_create:
-            # Bulk create de tous les NumeroSerie en une seule fois
-            NSerieInventory.objects.bulk_create(all_numeros_serie_to_create)
-            
-            # Régénérer les références avec les IDs réels
-            for ns in all_numeros_serie_to_create:
-                if ns.id:
-                    ns.reference = ns.generate_reference(NSerieInventory.REFERENCE_PREFIX)
-            
-            # Bulk update des références
-            NSerieInventory.objects.bulk_update(all_numeros_serie_to_create, fields=['reference'])
-        
-        return detail_id_to_nserie
+        # Références définitives calculées avant l'insertion : un seul bulk_create
+        return attach_serials(items)
     
     def validate_counting_details_batch(self, data_list: List[Dict[str, Any]], job_id: Optional[int] = None) -> Dict[str, Any]:
         """
@@ -1346,27 +1344,13 @@ class CountingDetailService:
             # Mettre à jour les NumeroSerie si fournis (optimisé en bulk)
             numeros_serie = []
             if 'numeros_serie' in data and data['numeros_serie']:
-                # Supprimer les anciens NumeroSerie
-                NSerieInventory.objects.filter(counting_detail=counting_detail).delete()
-                
-                # Créer les nouveaux NumeroSerie en bulk
-                numeros_serie_to_create = []
-                for n_serie_data in data['numeros_serie']:
-                    n_serie = NSerieInventory(
-                        n_serie=n_serie_data['n_serie'],
-                        counting_detail=counting_detail
-                    )
-                    n_serie.reference = n_serie.generate_reference(NSerieInventory.REFERENCE_PREFIX)
-                    numeros_serie_to_create.append(n_serie)
+                # Remplacer les anciens NumeroSerie (créations en bulk)
+                numeros_serie_to_create = attach_serials(
+                    [(counting_detail, [n_serie_data['n_serie'] for n_serie_data in data['numeros_serie']])],
+                    replace=True,
+                )[counting_detail.id]
                 
                 if numeros_serie_to_create:
-                    NSerieInventory.objects.bulk_create(numeros_serie_to_create)
-                    # Régénérer les références
-                    for ns in numeros_serie_to_create:
-                        if ns.id:
-                            ns.reference = ns.generate_reference(NSerieInventory.REFERENCE_PREFIX)
-                    NSerieInventory.objects.bulk_update(numeros_serie_to_create, fields=['reference'])
-                    
                     numeros_serie = [
                         {
                             'id': ns.id,
@@ -0,0 +1,246 @@
+"""
+Bundles de données de référence pour les PDA (produits, numéros de série,
+emplacements, stocks).
+
+Un artefact compressé est construit une seule fois par (compte, inventaire,
+jeu, format) et par version des données, puis servi depuis le disque local à
+tous les PDA du compte. La version est une empreinte (nombre de lignes, id
+max, horodatages max) calculée par une requête d'agrégation : tant qu'elle ne
+change pas, aucune requête de lecture des lignes n'est faite.
+
+Formats :
+- jsonl  : gzip, une ligne d'en-tête JSON (colonnes, version) puis une liste
+           JSON par ligne de données
+- sqlite : gzip d'une base SQLite contenant une table du nom du jeu et une
+           table _meta ; le PDA l'ouvre directement après décompression
+"""
+import datetime
+import decimal
+import gzip
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import BinaryIO
+
+from django.conf import settings
+
+from apps.mobile.exceptions.inventory_exceptions import DataValidationException
+from apps.mobile.repositories.master_data_bundle_repository import (
+    DATASET_COLUMNS,
+    MasterDataBundleRepository,
+)
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_FORMAT_VERSION = 1
+
+BUNDLE_FORMATS = {
+    'jsonl': {'extension': 'jsonl.gz', 'content_type': 'application/gzip'},
+    'sqlite': {'extension': 'sqlite.gz', 'content_type': 'application/gzip'},
+}
+
+BUNDLE_DATASETS = tuple(DATASET_COLUMNS)
+
+# Nouvelles tentatives si la version lue est purgée avant son ouverture
+BUNDLE_OPEN_ATTEMPTS = 3
+
+_build_locks = {}
+_build_locks_guard = threading.Lock()
+
+
+def _get_build_lock(key):
+    with _build_locks_guard:
+        return _build_locks.setdefault(key, threading.Lock())
+
+
+def _cell(value):
+    """Convertit une valeur ORM en valeur JSON / SQLite"""
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    return value
+
+
+@dataclass(frozen=True)
+class MasterDataBundle:
+    """
+    Artefact prêt à servir.
+
+    ``file`` est déjà ouvert : il reste lisible même si la version est purgée
+    par un build concurrent. L'appelant le ferme (FileResponse le fait).
+    """
+
+    path: str
+    file: BinaryIO
+    etag: str
+    version: str
+    dataset: str
+    bundle_format: str
+    size: int
+
+    @property
+    def content_type(self):
+        return BUNDLE_FORMATS[self.bundle_format]['content_type']
+
+    @property
+    def filename(self):
+        return f"{self.dataset}-{self.version}.{BUNDLE_FORMATS[self.bundle_format]['extension']}"
+
+
+class MasterDataBundleService:
+    """Service de construction et de cache disque des bundles de données de référence"""
+
+    def __init__(self, bundle_dir=None):
+        self.repository = MasterDataBundleRepository()
+        self.bundle_dir = bundle_dir or settings.MOBILE_BUNDLE_DIR
+
+    def get_bundle(self, user_id, dataset, inventory_id=None, bundle_format='jsonl'):
+        """
+        Retourne le bundle à jour d'un jeu pour le compte de l'utilisateur.
+
+        Le bundle est construit si aucun artefact n'existe pour la version
+        courante des données ; les versions précédentes sont alors supprimées.
+        Le verrou de construction est propre au processus : un autre worker
+        peut purger la version lue avant son ouverture ; l'empreinte est alors
+        recalculée (données modifiées entre-temps).
+
+        Raises:
+            DataValidationException: Jeu ou format inconnu.
+            UserNotFoundException / AccountNotFoundException: Utilisateur ou compte invalide.
+            InventoryNotFoundException: Inventaire non rattaché au compte.
+        """
+        if dataset not in BUNDLE_DATASETS:
+            raise DataValidationException(
+                f"Jeu de données inconnu: {dataset} (attendu: {', '.join(BUNDLE_DATASETS)})"
+            )
+        if bundle_format not in BUNDLE_FORMATS:
+            raise DataValidationException(
+                f"Format inconnu: {bundle_format} (attendu: {', '.join(BUNDLE_FORMATS)})"
+            )
+
+        account = self.repository.get_active_account_by_user(user_id)
+        if dataset == 'stocks' and inventory_id is not None:
+            self.repository.check_inventory_for_account(inventory_id, account)
+        else:
+            # Seuls les stocks dépendent de l'inventaire : un seul bundle par compte
+            inventory_id = None
+
+        for attempt in range(BUNDLE_OPEN_ATTEMPTS):
+            queryset = self.repository.get_queryset(dataset, account, inventory_id)
+            stamp = self.repository.get_version_stamp(queryset, dataset)
+            version = hashlib.sha1(
+                json.dumps([BUNDLE_FORMAT_VERSION, account.id, inventory_id, dataset, stamp]).encode()
+            ).hexdigest()[:16]
+
+            directory = os.path.join(self.bundle_dir, str(account.id), str(inventory_id or 'all'))
+            path = os.path.join(directory, f"{dataset}-{version}.{BUNDLE_FORMATS[bundle_format]['extension']}")
+
+            if not os.path.exists(path):
+                with _get_build_lock(path):
+                    if not os.path.exists(path):
+                        self._build(queryset, dataset, bundle_format, version, directory, path)
+                        self._purge_previous(directory, dataset, bundle_format, path)
+
+            try:
+                handle = open(path, 'rb')
+            except FileNotFoundError:
+                if attempt == BUNDLE_OPEN_ATTEMPTS - 1:
+                    raise
+                logger.info("Bundle %s purgé avant lecture, nouvelle empreinte", path)
+                continue
+
+            return MasterDataBundle(
+                path=path,
+                file=handle,
+                etag=f'"{version}-{bundle_format}"',
+                version=version,
+                dataset=dataset,
+                bundle_format=bundle_format,
+                size=os.fstat(handle.fileno()).st_size,
+            )
+
+    def _build(self, queryset, dataset, bundle_format, version, directory, path):
+        os.makedirs(directory, exist_ok=True)
+        columns = [name for name, _ in DATASET_COLUMNS[dataset]]
+        rows = self.repository.iter_rows(queryset, dataset)
+        # Écriture dans un fichier temporaire du même répertoire puis rename
+        # atomique : un PDA ne lit jamais un artefact partiel
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.part')
+        os.close(fd)
+        try:
+            if bundle_format == 'sqlite':
+                count = self._write_sqlite(tmp_path, dataset, columns, rows, version)
+            else:
+                count = self._write_jsonl(tmp_path, dataset, columns, rows, version)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        logger.info("Bundle %s construit (%s lignes, %s octets)", path, count, os.path.getsize(path))
+
+    def _write_jsonl(self, path, dataset, columns, rows, version):
+        count = 0
+        with gzip.open(path, 'wt', encoding='utf-8', compresslevel=6) as handle:
+            header = {'dataset': dataset, 'version': version, 'format_version': BUNDLE_FORMAT_VERSION, 'columns': columns}
+            handle.write(json.dumps(header, ensure_ascii=False) + '\n')
+            for row in rows:
+                handle.write(json.dumps([_cell(value) for value in row], ensure_ascii=False, separators=(',', ':')) + '\n')
+                count += 1
+        return count
+
+    def _write_sqlite(self, path, dataset, columns, rows, version):
+        db_path = f'{path}.db'
+        count = 0
+        try:
+            db = sqlite3.connect(db_path)
+            try:
+                db.execute(f"CREATE TABLE {dataset} ({', '.join(columns)})")
+                db.execute("CREATE TABLE _meta (key TEXT PRIMARY KEY, value TEXT)")
+                placeholders = ', '.join('?' for _ in columns)
+                insert = f"INSERT INTO {dataset} VALUES ({placeholders})"
+                batch = []
+                for row in rows:
+                    batch.append([_cell(value) for value in row])
+                    if len(batch) >= 5000:
+                        db.executemany(insert, batch)
+                        count += len(batch)
+                        batch = []
+                if batch:
+                    db.executemany(insert, batch)
+                    count += len(batch)
+                db.execute(f"CREATE INDEX {dataset}_{columns[0]} ON {dataset} ({columns[0]})")
+                db.executemany("INSERT INTO _meta VALUES (?, ?)", [
+                    ('dataset', dataset),
+                    ('version', version),
+                    ('format_version', str(BUNDLE_FORMAT_VERSION)),
+                    ('rows', str(count)),
+                ])
+                db.commit()
+            finally:
+                db.close()
+
+            with open(db_path, 'rb') as source, gzip.open(path, 'wb', compresslevel=6) as target:
+                shutil.copyfileobj(source, target)
+        finally:
+            if os.path.exists(db_path):
+                os.remove(db_path)
+        return count
+
+    def _purge_previous(self, directory, dataset, bundle_format, current_path):
+        suffix = f".{BUNDLE_FORMATS[bundle_format]['extension']}"
+        for name in os.listdir(directory):
+            candidate = os.path.join(directory, name)
+            if name.startswith(f'{dataset}-') and name.endswith(suffix) and candidate != current_path:
+                try:
+                    os.remove(candidate)
+                except OSError:
+                    # Artefact éventuellement en cours d'envoi (Windows) : purgé au prochain build
+                    pass
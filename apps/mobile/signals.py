@@ -0,0 +1,58 @@
+"""
+Signaux de l'application mobile.
+
+Publication vers les PDA (apps.mobile.realtime) des affectations et jobs
+sauvegardés et des JobDetail créés. Les chemins bulk appellent
+``publish_pda_changes`` explicitement.
+
+L'utilisateur d'une affectation transférée ou désaffectée est lu avant la
+sauvegarde : il est notifié en plus du nouvel utilisateur.
+"""
+from django.conf import settings
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+
+from apps.inventory.models import Assigment, Job, JobDetail
+
+from .realtime import publish_pda_changes
+
+ASSIGNMENT_PUSH_FIELDS = {'status', 'session', 'session_id'}
+JOB_PUSH_FIELDS = {'status'}
+
+
+def _touches(update_fields, fields):
+    return update_fields is None or bool(fields & set(update_fields))
+
+
+@receiver(pre_save, sender=Assigment, dispatch_uid='pda_push_assignment_previous_session')
+def remember_assignment_session(sender, instance, update_fields, using, raw=False, **kwargs):
+    instance._pda_previous_session_id = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    if not getattr(settings, 'PDA_PUSH_ENABLED', True) or not _touches(update_fields, {'session', 'session_id'}):
+        return
+    instance._pda_previous_session_id = (
+        Assigment._base_manager.using(using).filter(pk=instance.pk).values_list('session_id', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Assigment, dispatch_uid='pda_push_assignment')
+def push_assignment(sender, instance, created, update_fields, using, raw=False, **kwargs):
+    if not raw and _touches(update_fields, ASSIGNMENT_PUSH_FIELDS):
+        previous_session_id = getattr(instance, '_pda_previous_session_id', None)
+        previous_sessions = []
+        if previous_session_id is not None and previous_session_id != instance.session_id:
+            previous_sessions.append((instance.pk, previous_session_id))
+        publish_pda_changes(assignment_ids=[instance.pk], previous_sessions=previous_sessions, using=using)
+
+
+@receiver(post_save, sender=Job, dispatch_uid='pda_push_job')
+def push_job(sender, instance, created, update_fields, using, raw=False, **kwargs):
+    if not raw and _touches(update_fields, JOB_PUSH_FIELDS):
+        publish_pda_changes(job_ids=[instance.pk], using=using)
+
+
+@receiver(post_save, sender=JobDetail, dispatch_uid='pda_push_job_detail')
+def push_job_detail(sender, instance, created, using, raw=False, **kwargs):
+    if created and not raw:
+        publish_pda_changes(job_detail_ids=[instance.pk], using=using)
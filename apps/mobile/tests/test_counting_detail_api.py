@@ -6,12 +6,19 @@ from rest_framework.test import APIClient
 from rest_framework import status
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from apps.core.querybudget import QueryBudgetMixin
 from apps.inventory.models import Counting, CountingDetail, Job, Assigment, Inventory, JobDetail
-from apps.masterdata.models import Product, Location, Warehouse, Account
+from apps.masterdata.models import (
+    Product, Location, Warehouse, Account, Family, LocationType, SousZone, Zone, ZoneType,
+)
 import json
 
 User = get_user_model()
 
+# Lot PDA de 8 lignes : validations et upsert groupés ; seule la création des écarts
+# reste par nouvel emplacement (même tolérance que la suite de benchmark)
+COUNTING_DETAIL_BATCH_QUERY_BUDGET = 40
+
 
 class CountingDetailAPITestCase(TestCase):
     """
@@ -415,3 +422,122 @@ class CountingDetailAPITestCase(TestCase):
         self.assertEqual(sequences[1].quantity, 22)
         self.assertEqual(sequences[1].ecart_with_previous, 2)
 
+
+
+class CountingDetailBatchQueryBudgetTestCase(QueryBudgetMixin, TestCase):
+    """
+    Budget de requêtes d'un lot PDA : une requête par CountingDetail (ou par
+    emplacement) ferait exploser le total avec la taille du lot.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='budget_user',
+            password='testpass123',
+            type='Mobile',
+        )
+        self.client.force_authenticate(user=self.user)
+
+        account = Account.objects.create(
+            reference='ACC-CDB',
+            account_name='Compte CDB',
+            account_statuts='ACTIVE',
+        )
+        family = Family.objects.create(
+            reference='FAM-CDB',
+            family_name='Famille CDB',
+            compte=account,
+            family_status='ACTIVE',
+        )
+        self.product = Product.objects.create(
+            reference='P-CDB',
+            Internal_Product_Code='CDB-ART-1',
+            Short_Description='Produit CDB',
+            Barcode='3000000000001',
+            Stock_Unit='UN',
+            Product_Family=family,
+        )
+        warehouse = Warehouse.objects.create(
+            reference='WH-CDB',
+            warehouse_name='Entrepôt CDB',
+            warehouse_type='CENTRAL',
+            status='ACTIVE',
+        )
+        zone_type = ZoneType.objects.create(reference='ZT-CDB', type_name='Stockage', status='ACTIVE')
+        zone = Zone.objects.create(
+            reference='Z-CDB',
+            warehouse=warehouse,
+            zone_name='Zone CDB',
+            zone_type=zone_type,
+            zone_status='ACTIVE',
+        )
+        sous_zone = SousZone.objects.create(
+            reference='SZ-CDB',
+            zone=zone,
+            sous_zone_name='Sous-zone CDB',
+            sous_zone_status='ACTIVE',
+        )
+        location_type = LocationType.objects.create(reference='LT-CDB', name='Palette')
+        inventory = Inventory.objects.create(
+            reference='INV-CDB',
+            label='Inventaire CDB',
+            status='EN REALISATION',
+            date=timezone.now(),
+        )
+        self.counting = Counting.objects.create(
+            reference='CNT-CDB-1',
+            inventory=inventory,
+            order=1,
+            count_mode='par article',
+        )
+        self.job = Job.objects.create(
+            reference='JOB-CDB',
+            inventory=inventory,
+            warehouse=warehouse,
+            status='ENTAME',
+        )
+        self.assignment = Assigment.objects.create(
+            reference='ASS-CDB-1',
+            job=self.job,
+            counting=self.counting,
+            status='ENTAME',
+            session=self.user,
+        )
+        self.locations = []
+        for index in range(10):
+            location = Location.objects.create(
+                reference=f'LOC-CDB-{index}',
+                location_reference=f'CDB-{index:04d}',
+                sous_zone=sous_zone,
+                location_type=location_type,
+            )
+            JobDetail.objects.create(
+                reference=f'JBD-CDB-{index}',
+                location=location,
+                job=self.job,
+                counting=self.counting,
+                status='EN ATTENTE',
+            )
+            self.locations.append(location)
+
+    def _post(self, locations):
+        data = [
+            {
+                'counting_id': self.counting.id,
+                'location_id': location.id,
+                'quantity_inventoried': 10,
+                'assignment_id': self.assignment.id,
+                'product_id': self.product.id,
+            }
+            for location in locations
+        ]
+        with self.assertQueryBudget(COUNTING_DETAIL_BATCH_QUERY_BUDGET, name='counting_detail_batch'):
+            response = self.client.post(f'/mobile/api/job/{self.job.id}/counting-detail/', data=data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_batch_within_query_budget(self):
+        self._post(self.locations[:2])
+        self._post(self.locations[2:])
+
+        self.assertEqual(CountingDetail.objects.filter(job=self.job).count(), 10)
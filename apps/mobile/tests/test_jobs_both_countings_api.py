@@ -5,15 +5,22 @@ from django.test import TestCase
 from rest_framework.test import APIClient
 from rest_framework import status
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
 from django.utils import timezone
 
+from apps.core.querybudget import QueryBudgetMixin
 from apps.inventory.models import Inventory, Job, Assigment, Counting
 from apps.masterdata.models import Warehouse
+from apps.mobile.permissions import GROUP_ADMIN
 
 User = get_user_model()
 
+# Groupes de l'utilisateur, validation (inventaire, entrepôt) et jobs filtrés,
+# indépendamment du nombre de jobs
+JOBS_QUERY_BUDGET = 6
 
-class JobsBothCountingsAPITestCase(TestCase):
+
+class JobsBothCountingsAPITestCase(QueryBudgetMixin, TestCase):
     """Tests pour GET /mobile/api/inventory/<id>/warehouse/<id>/jobs/both-countings-terminated/"""
 
     def setUp(self):
@@ -23,6 +30,8 @@ class JobsBothCountingsAPITestCase(TestCase):
             password='testpass123',
             type='Mobile',
         )
+        # Endpoint réservé au groupe admin
+        self.user.groups.add(Group.objects.get_or_create(name=GROUP_ADMIN)[0])
         self.client.force_authenticate(user=self.user)
 
         self.warehouse = Warehouse.objects.create(
@@ -32,6 +41,7 @@ class JobsBothCountingsAPITestCase(TestCase):
             status='ACTIVE',
         )
         self.inventory = Inventory.objects.create(
+            reference='INV-TEST-JOB',
             label='Inventaire Test Jobs',
             status='EN REALISATION',
             date=timezone.now(),
@@ -55,11 +65,13 @@ class JobsBothCountingsAPITestCase(TestCase):
             status='TERMINE',
         )
         Assigment.objects.create(
+            reference='ASS-TEST-JOB-1',
             job=self.job,
             counting=self.counting_1,
             status='TERMINE',
         )
         Assigment.objects.create(
+            reference='ASS-TEST-JOB-2',
             job=self.job,
             counting=self.counting_2,
             status='TERMINE',
@@ -85,6 +97,31 @@ class JobsBothCountingsAPITestCase(TestCase):
         self.assertNotIn('inventory', job_data)
         self.assertNotIn('warehouse', job_data)
 
+    def test_jobs_both_countings_terminated_within_query_budget(self):
+        for _ in range(5):
+            job = Job.objects.create(
+                inventory=self.inventory,
+                warehouse=self.warehouse,
+                status='TERMINE',
+            )
+            for counting in (self.counting_1, self.counting_2):
+                Assigment.objects.create(
+                    reference=f'ASS-TEST-JOB-{job.id}-{counting.order}',
+                    job=job,
+                    counting=counting,
+                    status='TERMINE',
+                )
+        url = (
+            f"/mobile/api/inventory/{self.inventory.id}/warehouse/"
+            f"{self.warehouse.id}/jobs/both-countings-terminated/"
+        )
+
+        with self.assertQueryBudget(JOBS_QUERY_BUDGET, max_repeats=2, name='jobs_both_countings'):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['data']['count'], 6)
+
     def test_jobs_both_countings_terminated_inventory_not_found_returns_404(self):
         url = (
             f"/mobile/api/inventory/99999/warehouse/"
@@ -114,6 +151,7 @@ class JobsBothCountingsAPITestCase(TestCase):
             status='ACTIVE',
         )
         other_inventory = Inventory.objects.create(
+            reference='INV-OTHER',
             label='Autre Inventaire',
             status='EN REALISATION',
             date=timezone.now(),
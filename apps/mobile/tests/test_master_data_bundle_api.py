@@ -0,0 +1,173 @@
+"""
+Tests des bundles de données de référence mobiles.
+
+Endpoint : GET /mobile/api/bundles/<dataset>/
+"""
+import gzip
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.inventory.constants import InventoryStatus, SessionType
+from apps.inventory.models import Inventory, Setting
+from apps.masterdata.models import (
+    Account,
+    Family,
+    Location,
+    LocationType,
+    Product,
+    SousZone,
+    Stock,
+    Warehouse,
+    Zone,
+    ZoneType,
+)
+from apps.mobile.services.master_data_bundle_service import MasterDataBundleService
+from apps.users.models import UserApp
+
+
+class MasterDataBundleAPITestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        account = Account.objects.create(reference='ACC-MB', account_name='Compte MB', account_statuts='ACTIVE')
+        family = Family.objects.create(
+            reference='FAM-MB', family_name='Famille MB', compte=account, family_status='ACTIVE',
+        )
+        products = [
+            Product.objects.create(
+                reference=f'MB-P{p}', Internal_Product_Code=f'MB-ART-{p}', Short_Description=f'Article {p}',
+                Barcode=f'300000000000{p}', Stock_Unit='UN', Product_Family=family,
+            )
+            for p in range(6)
+        ]
+        zone_type = ZoneType.objects.create(reference='ZT-MB', type_name='Stockage', status='ACTIVE')
+        location_type = LocationType.objects.create(reference='LT-MB', name='Palette')
+        warehouse = Warehouse.objects.create(
+            reference='WH-MB', warehouse_name='Entrepôt MB', warehouse_type='CENTRAL', status='ACTIVE',
+        )
+        zone = Zone.objects.create(
+            reference='Z-MB', warehouse=warehouse, zone_name='Zone', zone_type=zone_type, zone_status='ACTIVE',
+        )
+        sous_zone = SousZone.objects.create(
+            reference='SZ-MB', zone=zone, sous_zone_name='Sous-zone', sous_zone_status='ACTIVE',
+        )
+        cls.inventory = Inventory.objects.create(
+            label='Inventaire MB', date=timezone.now(), status=InventoryStatus.EN_REALISATION,
+        )
+        Setting.objects.create(reference='ST-MB', account=account, warehouse=warehouse, inventory=cls.inventory)
+        # 4 emplacements de 2 stocks de l'inventaire
+        for index in range(4):
+            location = Location.objects.create(
+                reference=f'L-MB-{index}', location_reference=f'MB-{index:04d}',
+                sous_zone=sous_zone, location_type=location_type,
+            )
+            for k in range(2):
+                Stock.objects.create(
+                    reference=f'K-MB-{index}-{k}', location=location, product=products[(index * 2 + k) % 6],
+                    quantity_available=5, inventory=cls.inventory, warehouse=warehouse,
+                )
+        cls.mobile_user = UserApp.objects.create(
+            username='mb_pda', type=SessionType.MOBILE, compte=account, password='!',
+        )
+
+    def setUp(self):
+        self.bundle_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.bundle_dir, ignore_errors=True)
+        settings_override = override_settings(MOBILE_BUNDLE_DIR=self.bundle_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.mobile_user)
+
+    def _url(self, dataset):
+        return reverse('mobile:mobile_master_data_bundle', args=[dataset])
+
+    def _content(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_jsonl_bundle_is_built_once_and_revalidated_with_etag(self):
+        response = self.client.get(self._url('products'))
+        self.assertEqual(response.status_code, 200)
+        lines = gzip.decompress(self._content(response)).decode().splitlines()
+        header = json.loads(lines[0])
+        self.assertEqual(header['dataset'], 'products')
+        self.assertEqual(len(lines) - 1, 6)
+        self.assertEqual(dict(zip(header['columns'], json.loads(lines[1])))['reference'], 'MB-P0')
+
+        etag = response['ETag']
+        with self.assertNumQueries(2):  # compte + empreinte de version
+            not_modified = self.client.get(self._url('products'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, 304)
+
+        product = Product.objects.get(reference='MB-P0')
+        product.Short_Description = 'modifié'
+        product.save()
+        changed = self.client.get(self._url('products'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], etag)
+        # L'ancienne version est purgée
+        bundles = [name for _, _, names in os.walk(self.bundle_dir) for name in names if name.startswith('products-')]
+        self.assertEqual(len(bundles), 1)
+
+    def test_range_request_returns_partial_content(self):
+        full = self._content(self.client.get(self._url('locations')))
+
+        response = self.client.get(self._url('locations'), HTTP_RANGE='bytes=10-')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(self._content(response), full[10:])
+        self.assertEqual(response['Content-Range'], f'bytes 10-{len(full) - 1}/{len(full)}')
+
+        unsatisfiable = self.client.get(self._url('locations'), HTTP_RANGE=f'bytes={len(full)}-')
+        self.assertEqual(unsatisfiable.status_code, 416)
+
+    def test_bundle_purged_by_another_worker_is_still_served(self):
+        service = MasterDataBundleService()
+        build = service._build
+        built = []
+
+        def build_then_purge(*args):
+            build(*args)
+            built.append(args[-1])
+            if len(built) == 1:
+                # Purge par un autre processus avant l'ouverture : nouvelle tentative
+                os.remove(args[-1])
+
+        with mock.patch.object(service, '_build', build_then_purge):
+            bundle = service.get_bundle(self.mobile_user.id, 'products')
+        self.addCleanup(bundle.file.close)
+        self.assertEqual(len(built), 2)
+
+        # Purge pendant l'envoi : le fichier ouvert reste lisible
+        os.remove(bundle.path)
+        header = json.loads(gzip.decompress(bundle.file.read()).decode().splitlines()[0])
+        self.assertEqual(header['dataset'], 'products')
+
+    def test_sqlite_bundle_filtered_by_inventory(self):
+        response = self.client.get(
+            self._url('stocks'), {'format': 'sqlite', 'inventory_id': self.inventory.id}
+        )
+        self.assertEqual(response.status_code, 200)
+
+        db_path = os.path.join(self.bundle_dir, 'check.sqlite')
+        with open(db_path, 'wb') as handle:
+            handle.write(gzip.decompress(self._content(response)))
+        db = sqlite3.connect(db_path)
+        try:
+            self.assertEqual(db.execute('SELECT COUNT(*) FROM stocks').fetchone()[0], 8)
+            self.assertEqual(dict(db.execute('SELECT key, value FROM _meta'))['rows'], '8')
+        finally:
+            db.close()
+
+    def test_unknown_dataset_is_rejected(self):
+        response = self.client.get(self._url('inconnu'))
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,180 @@
+"""
+Tests du push WebSocket vers les PDA (ws/mobile/events/).
+"""
+from unittest import mock
+
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.inventory.constants import (
+    AssignmentStatus,
+    CountMode,
+    InventoryStatus,
+    JobDetailStatus,
+    JobStatus,
+    SessionType,
+)
+from apps.inventory.models import Assigment, Counting, Inventory, Job, JobDetail
+from apps.masterdata.models import Location, LocationType, SousZone, Warehouse, Zone, ZoneType
+from apps.users.models import UserApp
+from apps.mobile.realtime import publisher
+from apps.mobile.realtime.publisher import build_messages
+from apps.mobile.realtime.groups import inventory_group, user_group
+from apps.mobile.services.assignment_service import AssignmentService
+from project.asgi import application
+
+
+class PdaPushTestMixin:
+    """
+    Un job de 4 emplacements au 1er comptage, affecté au premier de 2 PDA.
+    Le push est coupé pendant sa création : seuls les événements des tests
+    sont mis en attente.
+    """
+
+    def setUp(self):
+        with override_settings(PDA_PUSH_ENABLED=False):
+            self._create_fixture()
+
+    def _create_fixture(self):
+        now = timezone.now()
+        zone_type = ZoneType.objects.create(reference='ZT-PSH', type_name='Stockage', status='ACTIVE')
+        location_type = LocationType.objects.create(reference='LT-PSH', name='Palette')
+        warehouse = Warehouse.objects.create(
+            reference='WH-PSH', warehouse_name='Entrepôt PSH', warehouse_type='CENTRAL', status='ACTIVE',
+        )
+        zone = Zone.objects.create(
+            reference='Z-PSH', warehouse=warehouse, zone_name='Zone', zone_type=zone_type, zone_status='ACTIVE',
+        )
+        sous_zone = SousZone.objects.create(
+            reference='SZ-PSH', zone=zone, sous_zone_name='Sous-zone', sous_zone_status='ACTIVE',
+        )
+        self.inventory = Inventory.objects.create(
+            label='Inventaire PSH', date=now, status=InventoryStatus.EN_REALISATION, en_realisation_status_date=now,
+        )
+        counting = Counting.objects.create(
+            reference='C-PSH-1', order=1, count_mode=CountMode.BY_ARTICLE, inventory=self.inventory,
+        )
+        self.user, self.other_user = (
+            UserApp.objects.create(username=f'psh_pda_{index}', type=SessionType.MOBILE, password='!')
+            for index in (1, 2)
+        )
+        job = Job.objects.create(
+            reference='JOB-0001', status=JobStatus.ENTAME, entame_date=now, warehouse=warehouse,
+            inventory=self.inventory,
+        )
+        for index in range(4):
+            location = Location.objects.create(
+                reference=f'L-PSH-{index}', location_reference=f'PSH-{index:04d}',
+                sous_zone=sous_zone, location_type=location_type,
+            )
+            JobDetail.objects.create(
+                reference=f'JD-PSH-{index}', location=location, job=job, counting=counting,
+                status=JobDetailStatus.EN_ATTENTE, en_attente_date=now,
+            )
+        self.assignment = Assigment.objects.create(
+            reference='A-PSH-1', status=AssignmentStatus.ENTAME, entame_date=now,
+            job=job, counting=counting, session=self.user,
+        )
+
+
+class PdaPushMessagesTests(PdaPushTestMixin, TestCase):
+
+    def test_messages_grouped_per_user_and_inventory(self):
+        job_detail_ids = list(
+            self.assignment.job.jobdetail_set.filter(counting=self.assignment.counting).values_list('id', flat=True)
+        )
+
+        messages = build_messages({self.assignment.id}, {self.assignment.job_id}, set(job_detail_ids))
+
+        self.assertEqual(
+            [(group, event['type']) for group, event in messages],
+            [
+                (user_group(self.user.id), 'assignment'),
+                (inventory_group(self.inventory.id), 'job'),
+                (inventory_group(self.inventory.id), 'job_details'),
+            ],
+        )
+        self.assertEqual(messages[2][1]['ids'], sorted(job_detail_ids))
+
+    @override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+    def test_transfer_and_unassignment_notify_the_previous_user(self):
+        other = self.other_user
+        sent = []
+        original = publisher.build_messages
+
+        def capture(*args, **kwargs):
+            messages = original(*args, **kwargs)
+            sent.extend((group, event['user_id']) for group, event in messages)
+            return messages
+
+        patcher = mock.patch.object(publisher, 'build_messages', capture)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assignment.session = other
+            self.assignment.save()
+        self.assertEqual(sorted(sent), sorted([(user_group(self.user.id), other.id), (user_group(other.id), other.id)]))
+
+        sent.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assignment.session = None
+            self.assignment.save(update_fields=['session'])
+        self.assertEqual(sent, [(user_group(other.id), None)])
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class PdaPushWebsocketTests(PdaPushTestMixin, TransactionTestCase):
+    """
+    TransactionTestCase : les consumers accèdent à la base depuis d'autres
+    threads (database_sync_to_async) et les événements partent au vrai commit.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.token = str(AccessToken.for_user(self.user))
+        self.path = f'/ws/mobile/events/?inventory_id={self.inventory.id}'
+
+    def _set_job_status(self, status):
+        job = Job.objects.get(id=self.assignment.job_id)
+        job.status = status
+        job.save(update_fields=['status'])
+
+    async def _connect(self, path):
+        communicator = WebsocketCommunicator(application, path)
+        connected, _ = await communicator.connect()
+        return communicator, connected
+
+    async def test_unauthenticated_connection_is_rejected(self):
+        communicator, connected = await self._connect(self.path + '&token=invalid')
+
+        self.assertFalse(connected)
+
+    async def test_assignment_and_job_changes_pushed_on_commit(self):
+        communicator, connected = await self._connect(f'{self.path}&token={self.token}')
+        self.assertTrue(connected)
+        hello = await communicator.receive_json_from()
+        self.assertEqual((hello['type'], hello['user_id']), ('connected', self.user.id))
+
+        await database_sync_to_async(AssignmentService().block_assignment)(self.assignment.id, self.user.id)
+        event = await communicator.receive_json_from(timeout=2)
+        self.assertEqual(event, {
+            'type': 'assignment',
+            'id': self.assignment.id,
+            'job_id': self.assignment.job_id,
+            'inventory_id': self.inventory.id,
+            'counting_order': 1,
+            'status': 'BLOQUE',
+            'user_id': self.user.id,
+        })
+
+        await database_sync_to_async(self._set_job_status)('TERMINE')
+        event = await communicator.receive_json_from(timeout=2)
+        self.assertEqual((event['type'], event['id'], event['status']), ('job', self.assignment.job_id, 'TERMINE'))
+
+        await communicator.send_json_to({'type': 'ping'})
+        self.assertEqual(await communicator.receive_json_from(), {'type': 'pong'})
+        await communicator.disconnect()
@@ -0,0 +1,118 @@
+"""
+Tests de la synchronisation PDA.
+
+Endpoint : GET /mobile/api/sync/data/
+"""
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.core.querybudget import QueryBudgetMixin
+from apps.inventory.constants import (
+    AssignmentStatus,
+    CountMode,
+    InventoryStatus,
+    JobDetailStatus,
+    JobStatus,
+    SessionType,
+)
+from apps.inventory.models import Assigment, Counting, Inventory, Job, JobDetail, Setting
+from apps.masterdata.models import Account, Location, LocationType, SousZone, Warehouse, Zone, ZoneType
+from apps.users.models import UserApp
+
+
+# Indépendant du nombre de jobs, job_details et assignments synchronisés
+SYNC_QUERY_BUDGET = 14
+
+
+def _ref(model_cls) -> str:
+    return model_cls().generate_reference(model_cls.REFERENCE_PREFIX)
+
+
+class SyncDataAPITestCase(QueryBudgetMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        account = Account.objects.create(reference='ACC-SYN', account_name='Compte SYN', account_statuts='ACTIVE')
+        zone_type = ZoneType.objects.create(reference='ZT-SYN', type_name='Stockage', status='ACTIVE')
+        location_type = LocationType.objects.create(reference='LT-SYN', name='Palette')
+        warehouse = Warehouse.objects.create(
+            reference='WH-SYN', warehouse_name='Entrepôt SYN', warehouse_type='CENTRAL', status='ACTIVE',
+        )
+        zone = Zone.objects.create(
+            reference='Z-SYN', warehouse=warehouse, zone_name='Zone', zone_type=zone_type, zone_status='ACTIVE',
+        )
+        sous_zone = SousZone.objects.create(
+            reference='SZ-SYN', zone=zone, sous_zone_name='Sous-zone', sous_zone_status='ACTIVE',
+        )
+        cls.inventory = Inventory.objects.create(
+            label='Inventaire SYN', date=now, status=InventoryStatus.EN_REALISATION, en_realisation_status_date=now,
+        )
+        Setting.objects.create(reference='ST-SYN', account=account, warehouse=warehouse, inventory=cls.inventory)
+        countings = [
+            Counting.objects.create(
+                reference=_ref(Counting), order=order, count_mode=CountMode.BY_ARTICLE, inventory=cls.inventory,
+            )
+            for order in (1, 2)
+        ]
+        cls.mobile_user, other_user = (
+            UserApp.objects.create(username=f'syn_mobile_{index}', type=SessionType.MOBILE, compte=account,
+                                   password='!')
+            for index in (1, 2)
+        )
+        # 4 jobs de 3 emplacements : l'utilisateur a le 1er comptage des jobs pairs, le 2e des jobs impairs
+        cls.expected_details = []
+        cls.expected_assignments = set()
+        for j in range(4):
+            job = Job.objects.create(
+                reference=f'JOB-{j + 1:04d}', status=JobStatus.ENTAME, entame_date=now,
+                warehouse=warehouse, inventory=cls.inventory,
+            )
+            locations = [
+                Location.objects.create(
+                    reference=f'L-SYN-{j}-{k}', location_reference=f'SYN-{j}-{k:04d}',
+                    sous_zone=sous_zone, location_type=location_type,
+                )
+                for k in range(3)
+            ]
+            for c, counting in enumerate(countings):
+                user = cls.mobile_user if (j + c) % 2 == 0 else other_user
+                assignment = Assigment.objects.create(
+                    reference=_ref(Assigment), status=AssignmentStatus.ENTAME, entame_date=now,
+                    job=job, counting=counting, session=user,
+                )
+                details = [
+                    JobDetail.objects.create(
+                        reference=_ref(JobDetail), location=location, job=job, counting=counting,
+                        status=JobDetailStatus.EN_ATTENTE, en_attente_date=now,
+                    )
+                    for location in locations
+                ]
+                # Emplacement déjà compté : non synchronisé
+                details[0].status = JobDetailStatus.TERMINE
+                details[0].save(update_fields=['status'])
+                if user == cls.mobile_user:
+                    cls.expected_assignments.add(assignment.id)
+                    cls.expected_details += [detail.id for detail in details[1:]]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.mobile_user)
+        self.url = f'/mobile/api/sync/data/?inventory_id={self.inventory.id}'
+
+    def test_sync_returns_user_job_details_within_query_budget(self):
+        with self.assertQueryBudget(SYNC_QUERY_BUDGET, max_repeats=2, name='sync_data'):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['data']
+        self.assertEqual(len(self.expected_details), 8)
+        self.assertEqual(
+            sorted(job['job_detail_web_id'] for job in data['jobs']),
+            sorted(self.expected_details),
+        )
+        self.assertEqual(
+            {assignment['web_id'] for assignment in data['assignments']},
+            self.expected_assignments,
+        )
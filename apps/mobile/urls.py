@@ -43,6 +43,12 @@ urlpatterns = [
         views.UserStocksView.as_view(),
         name="mobile_user_stocks",
     ),
+    # Bundles compressés des données de référence du compte (ETag / Range)
+    path(
+        "bundles/<str:dataset>/",
+        views.MasterDataBundleView.as_view(),
+        name="mobile_master_data_bundle",
+    ),
     # Gestion des personnes
     path(
         "persons/",
@@ -25,7 +25,8 @@ from .user import (
     AllProductsView,
     UserProductsExportView,
     UserLocationsView,
-    UserStocksView
+    UserStocksView,
+    MasterDataBundleView,
 )
 
 # Vues d'assignment
@@ -72,6 +73,7 @@ __all__ = [
     'UserProductsExportView',
     'UserLocationsView',
     'UserStocksView',
+    'MasterDataBundleView',
 
     # Assignment views
     'AssignmentStatusView',
@@ -3,6 +3,7 @@ from .user_products_view import UserProductsView, AllProductsView
 from .user_products_export_view import UserProductsExportView
 from .user_locations_view import UserLocationsView
 from .user_stocks_view import UserStocksView
+from .master_data_bundle_view import MasterDataBundleView
 
 __all__ = [
     'UserProductsView',
@@ -10,4 +11,5 @@ __all__ = [
     'UserProductsExportView',
     'UserLocationsView',
     'UserStocksView',
+    'MasterDataBundleView',
 ]
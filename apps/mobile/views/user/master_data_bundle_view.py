@@ -0,0 +1,216 @@
+import logging
+import re
+
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from rest_framework import status
+from rest_framework.negotiation import BaseContentNegotiation
+from rest_framework.views import APIView
+from rest_framework.permissions import IsAuthenticated
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+
+from apps.mobile.services.master_data_bundle_service import (
+    BUNDLE_DATASETS,
+    BUNDLE_FORMATS,
+    MasterDataBundleService,
+)
+from apps.mobile.utils import error_response
+from apps.mobile.exceptions import (
+    UserNotFoundException,
+    AccountNotFoundException,
+    InventoryNotFoundException,
+    DataValidationException,
+    DatabaseConnectionException
+)
+
+logger = logging.getLogger(__name__)
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def _etag_matches(header, etag):
+    """Comparaison faible If-None-Match / If-Range (RFC 9110)"""
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    candidates = [value.strip() for value in header.split(',')]
+    return any(candidate.removeprefix('W/') == etag for candidate in candidates)
+
+
+def parse_range(header, size):
+    """
+    Analyse un en-tête Range à plage unique.
+
+    Returns:
+        tuple | None: (début, fin incluse), None si l'en-tête est absent ou
+        non supporté (plages multiples : la réponse complète est servie).
+
+    Raises:
+        ValueError: Plage non satisfaisable (416).
+    """
+    if not header:
+        return None
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if first == '' and last == '':
+        return None
+    if first == '':
+        # Suffixe : les N derniers octets
+        length = int(last)
+        if length == 0:
+            raise ValueError(header)
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError(header)
+    return start, min(end, size - 1)
+
+
+class _FileRange:
+    """Lecture bornée d'un fichier ouvert (réponse 206 servie par FileResponse)"""
+
+    def __init__(self, handle, start, length):
+        handle.seek(start)
+        self.handle = handle
+        self.remaining = length
+
+    def read(self, size=CHUNK_SIZE):
+        chunk = self.handle.read(min(size, self.remaining)) if self.remaining > 0 else b''
+        self.remaining -= len(chunk)
+        return chunk
+
+    def close(self):
+        self.handle.close()
+
+
+class _IgnoreAcceptNegotiation(BaseContentNegotiation):
+    """Le bundle est binaire : l'en-tête Accept du PDA ne doit pas provoquer de 406"""
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+class MasterDataBundleView(APIView):
+    """
+    API de téléchargement des bundles de données de référence du compte.
+
+    Un artefact compressé par (compte, inventaire, jeu, format) est construit
+    quand les données changent et partagé par tous les PDA du compte, au lieu
+    de reconstruire les listes à chaque appel comme products/ et stocks/.
+
+    URL: /mobile/api/bundles/<dataset>/
+
+    Paramètres:
+    - dataset : products, numeros_serie, locations ou stocks
+    - format : jsonl (défaut) ou sqlite
+    - inventory_id : filtre des stocks par inventaire (ignoré pour les autres jeux)
+
+    Cache HTTP:
+    - ETag / If-None-Match : 304 si le PDA possède déjà la version courante
+    - Range / If-Range : reprise d'un téléchargement interrompu (206)
+
+    Réponses:
+    - 200: Bundle complet (application/gzip)
+    - 206: Plage du bundle
+    - 304: Bundle inchangé
+    - 400: Jeu ou format invalide
+    - 404: Utilisateur, compte ou inventaire non trouvé
+    - 416: Plage non satisfaisable
+    """
+    permission_classes = [IsAuthenticated]
+    content_negotiation_class = _IgnoreAcceptNegotiation
+
+    @swagger_auto_schema(
+        operation_summary="Téléchargement d'un bundle de données de référence",
+        operation_description=(
+            "Retourne le bundle compressé (gzip) du jeu demandé pour le compte de l'utilisateur connecté. "
+            "Supporte ETag/If-None-Match et les requêtes Range."
+        ),
+        manual_parameters=[
+            openapi.Parameter('dataset', openapi.IN_PATH, type=openapi.TYPE_STRING, enum=list(BUNDLE_DATASETS), required=True),
+            openapi.Parameter('format', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=list(BUNDLE_FORMATS), required=False),
+            openapi.Parameter('inventory_id', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, required=False),
+        ],
+        responses={
+            200: openapi.Response(description="Bundle complet"),
+            206: openapi.Response(description="Plage du bundle"),
+            304: openapi.Response(description="Bundle inchangé"),
+            400: openapi.Response(description="Paramètres invalides"),
+            404: openapi.Response(description="Utilisateur, compte ou inventaire non trouvé"),
+            416: openapi.Response(description="Plage non satisfaisable"),
+        },
+        tags=['Utilisateur Mobile']
+    )
+    def get(self, request, dataset):
+        try:
+            inventory_id = request.query_params.get('inventory_id')
+            bundle = MasterDataBundleService().get_bundle(
+                request.user.id,
+                dataset,
+                inventory_id=int(inventory_id) if inventory_id else None,
+                bundle_format=request.query_params.get('format', 'jsonl'),
+            )
+        except (UserNotFoundException, AccountNotFoundException, InventoryNotFoundException) as e:
+            return error_response(message=str(e), status_code=status.HTTP_404_NOT_FOUND, error_type='NOT_FOUND')
+        except (DataValidationException, ValueError) as e:
+            return error_response(message=str(e), status_code=status.HTTP_400_BAD_REQUEST, error_type='VALIDATION_ERROR')
+        except DatabaseConnectionException as e:
+            return error_response(message=str(e), status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, error_type='DATABASE_ERROR')
+        except Exception:
+            logger.exception("Erreur inattendue dans MasterDataBundleView")
+            return error_response(
+                message="Erreur interne du serveur",
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                error_type='INTERNAL_ERROR'
+            )
+
+        if _etag_matches(request.headers.get('If-None-Match'), bundle.etag):
+            bundle.file.close()
+            response = HttpResponseNotModified()
+            self._set_cache_headers(response, bundle)
+            return response
+
+        byte_range = None
+        if_range = request.headers.get('If-Range')
+        if not if_range or _etag_matches(if_range, bundle.etag):
+            try:
+                byte_range = parse_range(request.headers.get('Range'), bundle.size)
+            except ValueError:
+                bundle.file.close()
+                response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+                response['Content-Range'] = f'bytes */{bundle.size}'
+                self._set_cache_headers(response, bundle)
+                return response
+
+        # Fichier ouvert par le service : une purge concurrente ne l'affecte pas
+        if byte_range is None:
+            response = FileResponse(bundle.file, content_type=bundle.content_type)
+            response['Content-Length'] = bundle.size
+        else:
+            start, end = byte_range
+            response = FileResponse(
+                _FileRange(bundle.file, start, end - start + 1),
+                status=status.HTTP_206_PARTIAL_CONTENT,
+                content_type=bundle.content_type,
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{bundle.size}'
+            response['Content-Length'] = end - start + 1
+
+        response['Content-Disposition'] = f'attachment; filename="{bundle.filename}"'
+        self._set_cache_headers(response, bundle)
+        return response
+
+    @staticmethod
+    def _set_cache_headers(response, bundle):
+        response['ETag'] = bundle.etag
+        response['Accept-Ranges'] = 'bytes'
+        response['Cache-Control'] = 'private, no-cache'
+        response['X-Bundle-Version'] = bundle.version
@@ -2,7 +2,7 @@ from django.db import models
 from django.utils import timezone
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.contrib.auth.models import Group, Permission
-from simple_history.models import HistoricalRecords
+from apps.core.history import BufferedHistoricalRecords
 from datetime import datetime
 from django.utils.translation import gettext_lazy as _
 # Create your models here.
@@ -49,7 +49,7 @@ class UserApp(AbstractBaseUser, PermissionsMixin, models.Model):
     is_staff = models.BooleanField(_('Administrateur'), default=False)
     
     objects = UserAppManager()
-    history = HistoricalRecords()
+    history = BufferedHistoricalRecords()
 
     USERNAME_FIELD = 'username'
     REQUIRED_FIELDS = ['type']
@@ -0,0 +1,104 @@
+"""
+Tests du middleware de journalisation des actions (project.middleware.action_logging).
+"""
+import json
+import logging
+
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from project.middleware.action_logging import (
+    ActionLoggingMiddleware,
+    ActionLogPipeline,
+    action_log_stats,
+    logger as action_logger,
+)
+from apps.users.models import UserApp
+
+
+class _CollectingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__(level=logging.INFO)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@override_settings(ACTION_LOG_ASYNC=False, ACTION_LOG_SAMPLING=[], ACTION_LOG_SAMPLE_RATE=1.0)
+class ActionLoggingMiddlewareTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.user = UserApp.objects.create_user(username='web_user', type='Web', password='x')
+        self.handler = _CollectingHandler()
+        self.previous_level = action_logger.level
+        action_logger.setLevel(logging.INFO)
+        action_logger.addHandler(self.handler)
+
+    def tearDown(self):
+        action_logger.removeHandler(self.handler)
+        action_logger.setLevel(self.previous_level)
+
+    def _call(self, path='/api/inventory/', data=None, status=200, **settings_overrides):
+        request = self.factory.post(path, data=json.dumps(data or {}), content_type='application/json')
+        request.user = self.user
+        with self.settings(**settings_overrides):
+            middleware = ActionLoggingMiddleware(lambda req: HttpResponse(status=status))
+        return middleware(request)
+
+    def test_structured_fields_and_redaction(self):
+        self._call(data={'password': 'p', 'label': 'x' * 500}, ACTION_LOG_MAX_VALUE_CHARS=10)
+
+        record = self.handler.records[0]
+        self.assertEqual(record.status_code, 200)
+        self.assertEqual(record.query_count, 0)
+        self.assertGreater(record.payload_bytes, 500)
+        details = json.loads(str(record.details))
+        self.assertEqual(details['data']['password'], '***REDACTED***')
+        self.assertEqual(details['data']['label'], 'x' * 10 + '…')
+
+    def test_large_body_is_not_parsed(self):
+        self._call(data={'rows': list(range(1000))}, ACTION_LOG_MAX_BODY_BYTES=100)
+
+        details = json.loads(str(self.handler.records[0].details))
+        self.assertTrue(details['data_truncated'])
+        self.assertNotIn('data', details)
+
+    def test_excluded_and_sampled_out_paths(self):
+        before = action_log_stats()['sampled_out']
+        self._call(path='/api/auth/login/')
+        self._call(path='/mobile/api/sync/', ACTION_LOG_SAMPLING=['/mobile/api/=0'])
+
+        self.assertEqual(self.handler.records, [])
+        self.assertEqual(action_log_stats()['sampled_out'], before + 1)
+
+    def test_errors_are_logged_even_when_sampled_out(self):
+        self._call(path='/mobile/api/sync/', status=500, ACTION_LOG_SAMPLING=['/mobile/api/=0'])
+
+        self.assertEqual(len(self.handler.records), 1)
+        self.assertIsNone(self.handler.records[0].query_count)
+
+
+class ActionLogPipelineTests(TestCase):
+    def test_background_writer_forwards_and_drops_when_full(self):
+        target = logging.getLogger('actions.tests')
+        target.propagate = False
+        handler = _CollectingHandler()
+        target.addHandler(handler)
+        record = target.makeRecord(target.name, logging.INFO, __file__, 0, 'Action effectuée', None, None)
+
+        full = ActionLogPipeline(queue_size=1, target=target)
+        full.submit(record)
+        full.submit(record)
+        self.assertEqual(full.dropped, 1)
+
+        pipeline = ActionLogPipeline(queue_size=10, target=target)
+        pipeline.start()
+        try:
+            pipeline.submit(record)
+            pipeline.flush()
+        finally:
+            pipeline.stop()
+            target.removeHandler(handler)
+
+        self.assertEqual(len(handler.records), 1)
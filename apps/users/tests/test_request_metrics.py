@@ -0,0 +1,80 @@
+"""
+Tests de l'instrumentation des requêtes (RequestMetricsMiddleware, /api/_metrics).
+"""
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.users.models import UserApp
+from project.middleware.request_metrics import RequestMetricsMiddleware
+from project.utils.metrics import RollingHistogram, get_metrics_registry
+
+
+class RollingHistogramTests(TestCase):
+    def test_observations_expire_with_window(self):
+        now = [0.0]
+        histogram = RollingHistogram((1, 10), window_seconds=60, slots=6, clock=lambda: now[0])
+        histogram.observe(0.5)
+        histogram.observe(5)
+        histogram.observe(50)
+
+        self.assertEqual(histogram.snapshot(), ([1, 2, 3], 55.5, 3))
+
+        now[0] = 30.0
+        histogram.observe(2)
+        now[0] = 65.0
+        self.assertEqual(histogram.snapshot(), ([0, 1, 1], 2.0, 1))
+
+
+@override_settings(REQUEST_METRICS_ENABLED=True, REQUEST_METRICS_TOKEN='scrape-token')
+class RequestMetricsMiddlewareTests(TestCase):
+    databases = {'default', 'reporting'}
+
+    def setUp(self):
+        get_metrics_registry().reset()
+        self.client = APIClient()
+        self.user = UserApp.objects.create_user(username='web_user', type='Web', password='x')
+        self.client.force_authenticate(self.user)
+
+    def test_server_timing_and_prometheus_export(self):
+        response = self.client.get('/api/auth/mobile-users/')
+
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('render;dur=', response['Server-Timing'])
+
+        metrics = self.client.get('/api/_metrics', HTTP_AUTHORIZATION='Bearer scrape-token')
+        body = metrics.content.decode()
+
+        self.assertEqual(metrics.status_code, 200)
+        self.assertIn(
+            f'wms_requests_total{{view="users:mobile-users-list",method="GET",status="{response.status_code}"}} 1',
+            body,
+        )
+        self.assertIn('wms_request_db_queries_count{view="users:mobile-users-list",method="GET"} 1', body)
+        self.assertIn('wms_request_render_seconds_bucket{view="users:mobile-users-list",method="GET",le="+Inf"} 1', body)
+
+    def test_queries_of_every_connection_are_counted(self):
+        def view(request):
+            for alias in ('default', 'reporting'):
+                with connections[alias].cursor() as cursor:
+                    cursor.execute('SELECT 1')
+            return HttpResponse('ok')
+
+        response = RequestMetricsMiddleware(view)(RequestFactory().get('/'))
+
+        self.assertIn('desc="2 queries"', response['Server-Timing'])
+
+    def test_metrics_endpoint_is_protected(self):
+        self.assertEqual(self.client.get('/api/_metrics').status_code, 403)
+        self.assertEqual(
+            self.client.get('/api/_metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code,
+            403,
+        )
+
+    @override_settings(REQUEST_METRICS_ENABLED=False)
+    def test_disabled_adds_nothing(self):
+        response = self.client.get('/api/auth/mobile-users/')
+
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(self.client.get('/api/_metrics').status_code, 404)
@@ -3,6 +3,10 @@ ASGI config for project project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+- HTTP : flux SSE des tableaux de bord (apps.inventory.realtime), puis
+  application Django ;
+- WebSocket : push vers les PDA (apps.mobile.realtime), authentifié par JWT.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -13,4 +17,19 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
 
-application = get_asgi_application()
+# Initialise Django avant d'importer les consumers (modèles)
+django_asgi_app = get_asgi_application()
+
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+from django.urls import re_path  # noqa: E402
+
+from apps.inventory.realtime.routing import http_urlpatterns  # noqa: E402
+from apps.mobile.realtime.auth import JWTAuthMiddleware  # noqa: E402
+from apps.mobile.realtime.routing import websocket_urlpatterns  # noqa: E402
+
+application = ProtocolTypeRouter({
+    'http': URLRouter([*http_urlpatterns, re_path(r'', django_asgi_app)]),
+    # Pas de validation d'Origin : les PDA (clients natifs) n'en envoient pas et
+    # l'authentification repose sur le jeton JWT, pas sur un cookie de session
+    'websocket': JWTAuthMiddleware(URLRouter(websocket_urlpatterns)),
+})
@@ -6,6 +6,9 @@ Expose les middlewares utilisables dans le fichier de configuration Django.
 
 from .security_headers import SecurityHeadersMiddleware
 from .action_logging import ActionLoggingMiddleware
+from .request_metrics import RequestMetricsMiddleware
+from .reporting_db import ReportingStickinessMiddleware
 
-__all__ = ['SecurityHeadersMiddleware', 'ActionLoggingMiddleware']
+__all__ = ['SecurityHeadersMiddleware', 'ActionLoggingMiddleware', 'RequestMetricsMiddleware',
+           'ReportingStickinessMiddleware']
 
@@ -1,81 +1,334 @@
-import logging
+"""
+Middleware de journalisation des actions des utilisateurs authentifiés.
+
+Le thread de requête ne fait que construire un LogRecord structuré et le
+déposer dans une file bornée (``QueueHandler`` non bloquant). Un thread
+d'écriture (``QueueListener``) le transmet ensuite au logger ``actions``,
+donc aux handlers configurés dans LOGGING : fichiers, console, etc.
+
+Coût borné sur le thread de requête :
+- corps lu uniquement s'il est sous ACTION_LOG_MAX_BODY_BYTES (sinon seule la taille est loggée)
+- valeurs texte tronquées à ACTION_LOG_MAX_VALUE_CHARS
+- échantillonnage par préfixe de chemin (ACTION_LOG_SAMPLING), exclusions (ACTION_LOG_EXCLUDED_PATHS)
+- sérialisation JSON de ``details`` différée au formatage, dans le thread d'écriture
+- file pleine : le record est abandonné et compté, jamais d'attente
+
+Le surcoût mesuré par requête est exposé par ``action_log_stats()``.
+"""
+import atexit
 import json
-from django.utils import timezone
+import logging
+import queue
+import random
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+from django.conf import settings
 from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.http.request import RawPostDataException
+from django.utils import timezone
 
 
 logger = logging.getLogger('actions')
 
+SENSITIVE_FIELDS = ('password', 'token', 'secret', 'key', 'api_key', 'refresh')
+REDACTED = '***REDACTED***'
+LOGGED_METHODS = ('POST', 'PUT', 'PATCH')
+MAX_DATA_DEPTH = 3
+
+
+class LazyJSON:
+    """Valeur sérialisée en JSON seulement quand un formatter la lit (thread d'écriture)."""
+
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self):
+        return json.dumps(self.value, cls=DjangoJSONEncoder)
+
+
+class BoundedQueueHandler(QueueHandler):
+    """QueueHandler non bloquant : si la file est pleine, le record est abandonné et compté."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _ForwardHandler(logging.Handler):
+    """Handler du thread d'écriture : rejoue le record sur le logger cible (et ses handlers LOGGING)."""
+
+    def __init__(self, target):
+        super().__init__()
+        self.target = target
+
+    def emit(self, record):
+        self.target.handle(record)
+
+
+class ActionLogPipeline:
+    """
+    File bornée + thread d'écriture pour le logger ``actions``.
+
+    Args:
+        queue_size: Nombre max de records en attente avant abandon.
+        target: Logger qui reçoit les records côté thread d'écriture.
+    """
+
+    def __init__(self, queue_size=10000, target=None):
+        self.target = target or logger
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.handler = BoundedQueueHandler(self.queue)
+        self._listener = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._listener is not None:
+                return
+            self._listener = QueueListener(self.queue, _ForwardHandler(self.target))
+            self._listener.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Arrête le thread d'écriture après avoir vidé la file."""
+        with self._lock:
+            listener, self._listener = self._listener, None
+        if listener is not None:
+            listener.stop()
+
+    def submit(self, record):
+        self.handler.handle(record)
+
+    def flush(self):
+        """Attend que tous les records en file aient été écrits."""
+        if self._listener is not None:
+            self.queue.join()
+
+    @property
+    def dropped(self):
+        return self.handler.dropped
+
+
+class ActionLogStats:
+    """Compteurs du pipeline : volumétrie et surcoût de journalisation sur le thread de requête."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.logged = 0
+            self.sampled_out = 0
+            self.overhead_seconds = 0.0
+            self.overhead_max_seconds = 0.0
+
+    def record(self, overhead):
+        with self._lock:
+            self.logged += 1
+            self.overhead_seconds += overhead
+            self.overhead_max_seconds = max(self.overhead_max_seconds, overhead)
+
+    def skip(self):
+        with self._lock:
+            self.sampled_out += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'logged': self.logged,
+                'sampled_out': self.sampled_out,
+                'dropped': _pipeline.dropped if _pipeline else 0,
+                'queued': _pipeline.queue.qsize() if _pipeline else 0,
+                'overhead_avg_ms': round(self.overhead_seconds / self.logged * 1000, 3) if self.logged else 0.0,
+                'overhead_max_ms': round(self.overhead_max_seconds * 1000, 3),
+            }
+
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+_stats = ActionLogStats()
+
+
+def get_action_log_pipeline():
+    """Pipeline asynchrone du processus (créé et démarré au premier appel)."""
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = ActionLogPipeline(queue_size=getattr(settings, 'ACTION_LOG_QUEUE_SIZE', 10000))
+            _pipeline.start()
+        return _pipeline
+
+
+def action_log_stats():
+    """Compteurs du pipeline (logged, sampled_out, dropped, queued, surcoût moyen/max en ms)."""
+    return _stats.snapshot()
+
+
+class _QueryCounter:
+    """Wrapper d'exécution SQL qui compte les requêtes (indépendant de DEBUG)."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _parse_sampling_rules(rules):
+    """
+    Normalise les règles d'échantillonnage.
+
+    Accepte un dict {préfixe: taux} ou une liste de chaînes "préfixe=taux".
+    Les préfixes les plus longs sont testés en premier.
+    """
+    if isinstance(rules, dict):
+        items = rules.items()
+    else:
+        items = (rule.rsplit('=', 1) for rule in rules if '=' in rule)
+    parsed = [(prefix.strip(), float(rate)) for prefix, rate in items]
+    return sorted(parsed, key=lambda item: len(item[0]), reverse=True)
+
 
 class ActionLoggingMiddleware:
     """
     Middleware qui journalise les actions des utilisateurs authentifiés.
 
-    - Logge l'utilisateur, le path, la méthode HTTP, le code de statut
+    - Logge l'utilisateur, le path, la méthode HTTP, le code de statut,
+      la durée, le nombre de requêtes SQL et la taille du payload
     - Filtre les champs sensibles (password, token, etc.) dans le body
+    - Échantillonne par préfixe de chemin ; les réponses en erreur (>= 400) sont toujours loggées
     """
 
     def __init__(self, get_response):
         self.get_response = get_response
+        self.excluded_paths = tuple(getattr(settings, 'ACTION_LOG_EXCLUDED_PATHS', ('/api/auth/',)))
+        self.sample_rate = float(getattr(settings, 'ACTION_LOG_SAMPLE_RATE', 1.0))
+        self.sampling_rules = _parse_sampling_rules(getattr(settings, 'ACTION_LOG_SAMPLING', ()))
+        self.max_body_bytes = getattr(settings, 'ACTION_LOG_MAX_BODY_BYTES', 16 * 1024)
+        self.max_value_chars = getattr(settings, 'ACTION_LOG_MAX_VALUE_CHARS', 200)
+        self.async_enabled = getattr(settings, 'ACTION_LOG_ASYNC', True)
 
     def __call__(self, request):
-        # Code exécuté avant la vue
-        response = self.get_response(request)
+        # Exclure les endpoints d'authentification (et autres chemins configurés)
+        # ainsi que le cas où le logger n'écoute pas INFO : aucun surcoût
+        if request.path.startswith(self.excluded_paths) or not logger.isEnabledFor(logging.INFO):
+            return self.get_response(request)
+
+        sampled = random.random() < self._sample_rate_for(request.path)
+        start = time.perf_counter()
+        if sampled:
+            counter = _QueryCounter()
+            with connection.execute_wrapper(counter):
+                response = self.get_response(request)
+            query_count = counter.count
+        else:
+            response = self.get_response(request)
+            query_count = None
+        duration = time.perf_counter() - start
 
-        # Exclure les endpoints d'authentification pour éviter toute latence supplémentaire
-        if request.path.startswith('/api/auth/'):
+        if not getattr(request, 'user', None) or not request.user.is_authenticated:
+            return response
+        if not sampled and response.status_code < 400:
+            _stats.skip()
             return response
 
-        # Code exécuté après la vue
-        if request.user.is_authenticated:
-            try:
-                # Récupérer les informations de la requête
-                action_info = {
-                    'user': request.user.username,
-                    'path': request.path,
-                    'method': request.method,
-                    'status_code': response.status_code,
-                    'timestamp': timezone.now().isoformat(),
-                }
-
-                # Ajouter les données de la requête si c'est une méthode POST/PUT/PATCH
-                # ⚠️ Ne pas logger les données sensibles (mots de passe, tokens, etc.)
-                if request.method in ['POST', 'PUT', 'PATCH']:
-                    try:
-                        data = json.loads(request.body.decode('utf-8') or '{}')
-                        # Filtrer les champs sensibles
-                        sensitive_fields = ['password', 'token', 'secret', 'key', 'api_key', 'refresh']
-                        cleaned_data = {}
-                        for key, value in data.items():
-                            if any(sensitive in key.lower() for sensitive in sensitive_fields):
-                                cleaned_data[key] = '***REDACTED***'
-                            else:
-                                cleaned_data[key] = value
-                        action_info['data'] = cleaned_data
-                    except Exception:
-                        # Pour les données de formulaire, filtrer aussi
-                        form_data = dict(request.POST)
-                        sensitive_fields = ['password', 'token', 'secret', 'key', 'api_key', 'refresh']
-                        cleaned_data = {}
-                        for key, value in form_data.items():
-                            if any(sensitive in key.lower() for sensitive in sensitive_fields):
-                                cleaned_data[key] = '***REDACTED***'
-                            else:
-                                cleaned_data[key] = value
-                        action_info['data'] = cleaned_data
-
-                # Logger l'action
-                logger.info(
-                    'Action effectuée',
-                    extra={
-                        'user': request.user.username,
-                        'action': f'{request.method} {request.path}',
-                        'details': json.dumps(action_info, cls=DjangoJSONEncoder)
-                    }
-                )
-            except Exception as e:
-                logger.error(f'Erreur lors du logging: {str(e)}')
+        log_start = time.perf_counter()
+        try:
+            self._emit(request, response, duration, query_count)
+        except Exception as e:
+            logger.error(f'Erreur lors du logging: {str(e)}')
+        _stats.record(time.perf_counter() - log_start)
 
         return response
 
+    def _sample_rate_for(self, path):
+        for prefix, rate in self.sampling_rules:
+            if path.startswith(prefix):
+                return rate
+        return self.sample_rate
+
+    def _emit(self, request, response, duration, query_count):
+        payload_bytes = self._payload_size(request)
+        action_info = {
+            'user': request.user.username,
+            'path': request.path,
+            'method': request.method,
+            'status_code': response.status_code,
+            'timestamp': timezone.now().isoformat(),
+            'duration_ms': round(duration * 1000, 2),
+            'query_count': query_count,
+            'payload_bytes': payload_bytes,
+        }
+
+        # Ajouter les données de la requête si c'est une méthode POST/PUT/PATCH
+        # ⚠️ Ne pas logger les données sensibles (mots de passe, tokens, etc.)
+        if request.method in LOGGED_METHODS:
+            if payload_bytes > self.max_body_bytes:
+                action_info['data_truncated'] = True
+            else:
+                action_info['data'] = self._extract_data(request)
+
+        record = logger.makeRecord(
+            logger.name, logging.INFO, __file__, 0, 'Action effectuée', None, None,
+            extra={
+                'user': action_info['user'],
+                'action': f'{request.method} {request.path}',
+                'status_code': action_info['status_code'],
+                'duration_ms': action_info['duration_ms'],
+                'query_count': query_count,
+                'payload_bytes': payload_bytes,
+                'details': LazyJSON(action_info),
+            },
+        )
+        if self.async_enabled:
+            get_action_log_pipeline().submit(record)
+        else:
+            logger.handle(record)
+
+    @staticmethod
+    def _payload_size(request):
+        try:
+            return int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return 0
+
+    def _extract_data(self, request):
+        if request.content_type == 'application/json':
+            try:
+                data = json.loads(request.body.decode('utf-8') or '{}')
+            except (ValueError, RawPostDataException):
+                return None
+        else:
+            # Pour les données de formulaire, filtrer aussi
+            data = dict(request.POST)
+        return self._clean(data)
 
+    def _clean(self, value, depth=0):
+        """Masque les champs sensibles et tronque les valeurs (profondeur bornée)."""
+        if isinstance(value, dict):
+            if depth >= MAX_DATA_DEPTH:
+                return f'<{len(value)} clés>'
+            return {
+                key: REDACTED if any(s in str(key).lower() for s in SENSITIVE_FIELDS) else self._clean(item, depth + 1)
+                for key, item in value.items()
+            }
+        if isinstance(value, list):
+            if depth >= MAX_DATA_DEPTH:
+                return f'<{len(value)} éléments>'
+            return [self._clean(item, depth + 1) for item in value]
+        if isinstance(value, str) and len(value) > self.max_value_chars:
+            return value[:self.max_value_chars] + '…'
+        return value
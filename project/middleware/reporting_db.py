@@ -0,0 +1,41 @@
+"""
+Lecture de ses propres écritures avec la réplique ``reporting`` (apps.core.db_routing).
+
+- requête non sûre (POST, PUT, PATCH, DELETE) : toutes ses lectures sur default ;
+- requête qui a écrit : cookie ``reporting_pin`` posé pour REPORTING_STICKY_SECONDS ;
+- requête portant ce cookie : toutes ses lectures sur default.
+
+Routage désactivé (REPORTING_READS_ENABLED=False) : MiddlewareNotUsed.
+"""
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from apps.core.db_routing import REPORTING_PIN_COOKIE, primary_pinning, reporting_enabled
+
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReportingStickinessMiddleware:
+    """Portée d'épinglage par requête pour le router ``ReportingRouter``."""
+
+    def __init__(self, get_response):
+        if not reporting_enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sticky_seconds = getattr(settings, 'REPORTING_STICKY_SECONDS', 5)
+
+    def __call__(self, request):
+        pinned = request.method not in SAFE_METHODS or REPORTING_PIN_COOKIE in request.COOKIES
+        with primary_pinning(pinned) as wrote:
+            response = self.get_response(request)
+            if wrote() and self.sticky_seconds > 0:
+                response.set_cookie(
+                    REPORTING_PIN_COOKIE,
+                    '1',
+                    max_age=self.sticky_seconds,
+                    httponly=True,
+                    samesite='Lax',
+                    secure=getattr(settings, 'SESSION_COOKIE_SECURE', False),
+                )
+        return response
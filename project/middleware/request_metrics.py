@@ -0,0 +1,112 @@
+"""
+Middleware d'instrumentation des requêtes (opt-in).
+
+Pour chaque requête : nombre de requêtes SQL, temps passé en base, temps de
+rendu de la réponse (sérialisation DRF / templates), durée totale et taille
+de la réponse. Les mesures alimentent le registre de ``project.utils.metrics``
+(exposé sur /api/_metrics) et, si activé, l'en-tête ``Server-Timing``.
+
+Désactivé (REQUEST_METRICS_ENABLED=False, défaut) : le middleware lève
+MiddlewareNotUsed et Django le retire de la chaîne, donc aucun surcoût.
+"""
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from project.utils.metrics import get_metrics_registry
+
+
+UNRESOLVED_VIEW = '<unresolved>'
+
+
+class _DbTimer:
+    """Wrapper d'exécution SQL : compte les requêtes et cumule leur durée."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+
+
+class RequestMetricsMiddleware:
+    """
+    Mesure le coût de chaque requête et l'enregistre par vue.
+
+    La vue est identifiée par son nom de route (ou le motif d'URL), ce qui
+    borne la cardinalité des labels exportés.
+    Les requêtes de toutes les connexions (``default``, réplique ``reporting``...)
+    sont mesurées.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.registry = get_metrics_registry()
+        self.server_timing = getattr(settings, 'REQUEST_METRICS_SERVER_TIMING', True)
+        self.excluded_paths = tuple(getattr(settings, 'REQUEST_METRICS_EXCLUDED_PATHS', ('/api/_metrics',)))
+
+    def __call__(self, request):
+        if request.path.startswith(self.excluded_paths):
+            return self.get_response(request)
+
+        timer = _DbTimer()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        render_seconds = getattr(request, '_metrics_render_seconds', None)
+        response_bytes = None if response.streaming else len(response.content)
+
+        self.registry.observe(
+            view=self._view_name(request),
+            method=request.method,
+            status_code=response.status_code,
+            duration=duration,
+            query_count=timer.count,
+            db_seconds=timer.seconds,
+            render_seconds=render_seconds,
+            response_bytes=response_bytes,
+        )
+
+        if self.server_timing:
+            response['Server-Timing'] = self._server_timing(timer, render_seconds, duration)
+        return response
+
+    def process_template_response(self, request, response):
+        """Chronomètre le rendu (DRF Response / TemplateResponse), exécuté après ce hook."""
+        start = time.perf_counter()
+
+        def _rendered(rendered_response):
+            request._metrics_render_seconds = time.perf_counter() - start
+
+        response.add_post_render_callback(_rendered)
+        return response
+
+    @staticmethod
+    def _view_name(request):
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return UNRESOLVED_VIEW
+        return match.view_name or match.route or UNRESOLVED_VIEW
+
+    @staticmethod
+    def _server_timing(timer, render_seconds, duration):
+        metrics = [f'db;dur={timer.seconds * 1000:.2f};desc="{timer.count} queries"']
+        if render_seconds is not None:
+            metrics.append(f'render;dur={render_seconds * 1000:.2f}')
+        metrics.append(f'total;dur={duration * 1000:.2f}')
+        return ', '.join(metrics)
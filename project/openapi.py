@@ -0,0 +1,212 @@
+"""
+Schéma OpenAPI (drf_yasg) de l'API.
+
+La génération introspecte toutes les vues et tous les serializers : elle est
+faite une fois par déploiement par ``python manage.py build_openapi_schema``,
+qui écrit un artefact JSON et sa version gzip dans ``OPENAPI_SCHEMA_DIR``.
+``openapi_schema_view`` sert cet artefact avec ETag / If-None-Match. Sans
+artefact, le schéma n'est généré à la volée que si ``OPENAPI_SCHEMA_RUNTIME``
+est actif (défaut : DEBUG).
+"""
+import gzip
+import hashlib
+import os
+import tempfile
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.urls import include, path
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.http import require_safe
+from drf_yasg import openapi
+from drf_yasg.codecs import OpenAPICodecJson
+from drf_yasg.generators import OpenAPISchemaGenerator
+from drf_yasg.views import get_schema_view
+from rest_framework import permissions
+
+from .api_info import api_info
+
+SCHEMA_FILENAME = 'swagger.json'
+SCHEMA_CONTENT_TYPE = 'application/json; charset=utf-8'
+
+API_INFO = openapi.Info(
+    title=api_info['title'],
+    default_version=api_info['version'],
+    description=api_info['description'],
+    contact=openapi.Contact(
+        name=api_info['contact']['name'],
+        email=api_info['contact']['email']
+    ),
+    license=openapi.License(
+        name=api_info['license']['name'],
+        url=api_info['license']['url']
+    ),
+    terms_of_service=api_info['termsOfService'],
+)
+
+SCHEMA_PATTERNS = [
+    path('web/api/', include('apps.inventory.urls')),
+    path('mobile/api/', include('apps.mobile.urls')),
+    path('api/auth/', include('apps.users.urls')),
+    path('masterdata/api/', include('apps.masterdata.urls')),
+]
+
+# Interfaces swagger / redoc : le schéma qu'elles chargent est servi par
+# openapi_schema_view (SPEC_URL), la vue ne génère qu'un schéma vide
+schema_view = get_schema_view(
+    API_INFO,
+    public=True,
+    permission_classes=(permissions.AllowAny,),
+    patterns=SCHEMA_PATTERNS,
+)
+
+
+def generate_schema() -> bytes:
+    """Génère le schéma complet (JSON compact) ; introspecte toutes les vues et serializers."""
+    generator = OpenAPISchemaGenerator(API_INFO, patterns=SCHEMA_PATTERNS)
+    schema = generator.get_schema(request=None, public=True)
+    return OpenAPICodecJson(validators=[]).encode(schema)
+
+
+@dataclass(frozen=True)
+class SchemaArtifact:
+    """Schéma pré-généré chargé en mémoire"""
+    content: bytes
+    gzipped: bytes
+    etag: str
+    mtime_ns: int
+
+
+def schema_path() -> Path:
+    return Path(settings.OPENAPI_SCHEMA_DIR) / SCHEMA_FILENAME
+
+
+def _etag(content: bytes) -> str:
+    return f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+
+
+def _atomic_write(target: Path, data: bytes) -> None:
+    """Écrit dans un fichier temporaire puis renomme : un lecteur ne voit jamais d'artefact partiel"""
+    fd, tmp_path = tempfile.mkstemp(dir=target.parent, prefix=f'.{target.name}.')
+    try:
+        with os.fdopen(fd, 'wb') as handle:
+            handle.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, target)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def write_schema_artifact(content: bytes) -> Path:
+    """
+    Écrit l'artefact (JSON + .gz). Le gzip est écrit en premier : le JSON,
+    dont la date de modification invalide le cache des workers, est toujours
+    accompagné d'une version compressée à jour.
+    """
+    target = schema_path()
+    target.parent.mkdir(parents=True, exist_ok=True)
+    _atomic_write(target.with_name(target.name + '.gz'), gzip.compress(content, compresslevel=9, mtime=0))
+    _atomic_write(target, content)
+    return target
+
+
+class _ArtifactCache:
+    """Artefact chargé une fois par worker, rechargé si le fichier change (nouveau déploiement)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._artifact: Optional[SchemaArtifact] = None
+
+    def get(self) -> Optional[SchemaArtifact]:
+        target = schema_path()
+        try:
+            mtime_ns = target.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+        artifact = self._artifact
+        if artifact is not None and artifact.mtime_ns == mtime_ns:
+            return artifact
+        with self._lock:
+            content = target.read_bytes()
+            gz_path = target.with_name(target.name + '.gz')
+            gzipped = gz_path.read_bytes() if gz_path.exists() else gzip.compress(content, mtime=0)
+            self._artifact = SchemaArtifact(content, gzipped, _etag(content), mtime_ns)
+            return self._artifact
+
+    def clear(self) -> None:
+        self._artifact = None
+
+
+schema_artifact_cache = _ArtifactCache()
+
+
+def _etag_matches(header, etag):
+    """Comparaison faible If-None-Match (RFC 9110)"""
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    candidates = [value.strip() for value in header.split(',')]
+    return any(candidate.removeprefix('W/') == etag for candidate in candidates)
+
+
+def _accepts_gzip(header):
+    """
+    Accept-Encoding (RFC 9110) : ``gzip`` accepté sauf ``q=0`` ; à défaut de
+    mention explicite, ``*`` s'applique. ``x-gzip`` n'est pas ``gzip``.
+    """
+    weights = {}
+    for item in (header or '').split(','):
+        coding, *params = [part.strip() for part in item.split(';')]
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding:
+            weights[coding.lower()] = q
+    if 'gzip' in weights:
+        return weights['gzip'] > 0
+    return weights.get('*', 0) > 0
+
+
+@require_safe
+def openapi_schema_view(request):
+    """
+    Schéma OpenAPI pré-généré (build_openapi_schema).
+
+    - ETag / If-None-Match : 304 si le client possède déjà ce schéma ;
+    - version gzip servie telle quelle si le client l'accepte ;
+    - sans artefact : génération à la volée si OPENAPI_SCHEMA_RUNTIME, 503 sinon.
+    """
+    artifact = schema_artifact_cache.get()
+    if artifact is None:
+        if not getattr(settings, 'OPENAPI_SCHEMA_RUNTIME', False):
+            return HttpResponse(
+                "Schéma OpenAPI non généré : lancer « python manage.py build_openapi_schema ».",
+                status=503,
+                content_type='text/plain; charset=utf-8',
+            )
+        content = generate_schema()
+        artifact = SchemaArtifact(content, gzip.compress(content, mtime=0), _etag(content), 0)
+
+    if _etag_matches(request.headers.get('If-None-Match'), artifact.etag):
+        response = HttpResponseNotModified()
+    elif _accepts_gzip(request.headers.get('Accept-Encoding')):
+        response = HttpResponse(artifact.gzipped, content_type=SCHEMA_CONTENT_TYPE)
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(artifact.content, content_type=SCHEMA_CONTENT_TYPE)
+    response['ETag'] = artifact.etag
+    response['Cache-Control'] = 'public, no-cache'
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
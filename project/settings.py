@@ -33,6 +33,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework',
+    'channels',
     'drf_yasg',
     'rest_framework_simplejwt',
     'rest_framework_simplejwt.token_blacklist',
@@ -53,6 +54,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware', 
+    'project.middleware.RequestMetricsMiddleware',  # Instrumentation opt-in (REQUEST_METRICS_ENABLED)
+    'project.middleware.ReportingStickinessMiddleware',  # Réplique reporting (REPORTING_READS_ENABLED)
     'django.middleware.common.CommonMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -108,10 +111,36 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'project.wsgi.application'
+ASGI_APPLICATION = 'project.asgi.application'
+
+# Push WebSocket vers les PDA (apps.mobile.realtime, ws/mobile/events/)
+# Sans CHANNEL_REDIS_URL : channel layer en mémoire, limité à un seul processus
+# (développement, tests) ; en production les workers WSGI et daphne partagent Redis.
+CHANNEL_REDIS_URL = config('CHANNEL_REDIS_URL', default='')
+if CHANNEL_REDIS_URL:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {'hosts': [CHANNEL_REDIS_URL]},
+        },
+    }
+else:
+    CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+PDA_PUSH_ENABLED = config('PDA_PUSH_ENABLED', default=True, cast=bool)
+# Intervalle conseillé aux PDA pour la resynchronisation de sécurité (sync_data)
+PDA_PUSH_RESYNC_SECONDS = config('PDA_PUSH_RESYNC_SECONDS', default=900, cast=int)
+
+# Flux SSE des tableaux de bord (apps.inventory.realtime, .../warehouses/<id>/live/)
+DASHBOARD_STREAM_ENABLED = config('DASHBOARD_STREAM_ENABLED', default=True, cast=bool)
+# Fenêtre de regroupement des changements : une rafale d'envois mobiles = un delta
+DASHBOARD_STREAM_COALESCE_SECONDS = config('DASHBOARD_STREAM_COALESCE_SECONDS', default=2.0, cast=float)
+DASHBOARD_STREAM_HEARTBEAT_SECONDS = config('DASHBOARD_STREAM_HEARTBEAT_SECONDS', default=15, cast=int)
 
 # Monitoring connectivité PDA (heartbeat HTTP + PostgreSQL)
 PDA_OFFLINE_THRESHOLD_SECONDS = config('PDA_OFFLINE_THRESHOLD_SECONDS', default=120, cast=int)
 PDA_HEARTBEAT_MIN_INTERVAL_SECONDS = config('PDA_HEARTBEAT_MIN_INTERVAL_SECONDS', default=25, cast=int)
+# Présence PDA write-behind : délai max avant écriture groupée dans Device (0 = immédiat)
+PDA_PRESENCE_FLUSH_INTERVAL_SECONDS = config('PDA_PRESENCE_FLUSH_INTERVAL_SECONDS', default=10, cast=int)
 
 
 # Database
@@ -133,6 +162,26 @@ DATABASES = {
         'CONN_HEALTH_CHECKS': True,
     }
 }
+
+# Réplique en lecture pour KPI, monitoring, résultats et exports (apps.core.db_routing)
+# Sans REPORTING_DB_HOST : l'alias 'reporting' pointe sur la base principale et
+# le routage est désactivé (aucune connexion supplémentaire n'est ouverte).
+REPORTING_DB_HOST = config('REPORTING_DB_HOST', default='')
+DATABASES['reporting'] = {
+    **DATABASES['default'],
+    'NAME': config('REPORTING_DB_NAME', default=DATABASES['default']['NAME']),
+    'USER': config('REPORTING_DB_USER', default=DATABASES['default']['USER']),
+    'PASSWORD': config('REPORTING_DB_PASSWORD', default=DATABASES['default']['PASSWORD']),
+    'HOST': REPORTING_DB_HOST or DATABASES['default']['HOST'],
+    'PORT': config('REPORTING_DB_PORT', default=DATABASES['default']['PORT']),
+    # Tests : même base de test que default (ni création ni migration)
+    'TEST': {'MIRROR': 'default'},
+}
+DATABASE_ROUTERS = ['apps.core.db_routing.ReportingRouter']
+REPORTING_READS_ENABLED = config('REPORTING_READS_ENABLED', default=bool(REPORTING_DB_HOST), cast=bool)
+# Lectures sur default après une écriture du même client (doit couvrir le retard de réplication)
+REPORTING_STICKY_SECONDS = config('REPORTING_STICKY_SECONDS', default=5, cast=int)
+
 DEFAULT_CHARSET = 'utf-8'
 AUTH_USER_MODEL = 'users.UserApp'
 
@@ -148,6 +197,24 @@ CACHES = {
     }
 }
 
+# Historique simple_history : mode d'écriture par modèle (apps.core.history)
+# - sync    : une insertion historique par save() (comportement d'origine)
+# - batched : lignes historiques bufferisées par transaction, un bulk insert au commit
+#             (couvre aussi les chemins bulk_create/bulk_update instrumentés)
+# - off     : pas d'historique
+HISTORY_DEFAULT_MODE = config('HISTORY_DEFAULT_MODE', default='sync')
+HISTORY_HOT_MODELS_MODE = config('HISTORY_HOT_MODELS_MODE', default='batched')
+HISTORY_MODES = {
+    'inventory.Job': HISTORY_HOT_MODELS_MODE,
+    'inventory.JobDetail': HISTORY_HOT_MODELS_MODE,
+    'inventory.Assigment': HISTORY_HOT_MODELS_MODE,
+    'inventory.CountingDetail': HISTORY_HOT_MODELS_MODE,
+    'inventory.NSerieInventory': HISTORY_HOT_MODELS_MODE,
+    'inventory.EcartComptage': HISTORY_HOT_MODELS_MODE,
+    'inventory.ComptageSequence': HISTORY_HOT_MODELS_MODE,
+    'masterdata.Stock': HISTORY_HOT_MODELS_MODE,
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -215,6 +282,16 @@ if STATICFILES_DIRS_PATH != STATIC_ROOT_PATH and STATICFILES_DIRS_PATH.exists():
 MEDIA_URL = config('DJANGO_MEDIA_URL', default='/media/')
 MEDIA_ROOT = config('DJANGO_MEDIA_ROOT', default=os.path.join(BASE_DIR, 'media'))
 
+# Bundles mobiles des données de référence (apps.mobile.services.master_data_bundle_service)
+# Disque local hors MEDIA_ROOT : servis uniquement par l'API authentifiée
+MOBILE_BUNDLE_DIR = config('MOBILE_BUNDLE_DIR', default=os.path.join(BASE_DIR, 'data', 'mobile_bundles'))
+
+# Archives Parquet des inventaires clôturés (apps.inventory.services.inventory_archive_service)
+INVENTORY_ARCHIVE_DIR = config('INVENTORY_ARCHIVE_DIR', default=os.path.join(BASE_DIR, 'data', 'archives'))
+INVENTORY_ARCHIVE_COMPRESSION = config('INVENTORY_ARCHIVE_COMPRESSION', default='zstd')
+# Lignes lues par curseur serveur et écrites par row group
+INVENTORY_ARCHIVE_BATCH_SIZE = config('INVENTORY_ARCHIVE_BATCH_SIZE', default=50000, cast=int)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -513,6 +590,34 @@ else:
 #     },
 # }
 
+# Journalisation des actions (project.middleware.ActionLoggingMiddleware)
+# Écriture asynchrone via une file bornée ; les records sont rejoués sur le logger 'actions'.
+ACTION_LOG_ASYNC = config('ACTION_LOG_ASYNC', default=True, cast=bool)
+ACTION_LOG_QUEUE_SIZE = config('ACTION_LOG_QUEUE_SIZE', default=10000, cast=int)
+# Corps au-delà de cette taille : non lus, seule la taille est loggée
+ACTION_LOG_MAX_BODY_BYTES = config('ACTION_LOG_MAX_BODY_BYTES', default=16384, cast=int)
+ACTION_LOG_MAX_VALUE_CHARS = config('ACTION_LOG_MAX_VALUE_CHARS', default=200, cast=int)
+ACTION_LOG_EXCLUDED_PATHS = config('ACTION_LOG_EXCLUDED_PATHS', default='/api/auth/', cast=Csv())
+# Taux d'échantillonnage par défaut et par préfixe, ex: "/mobile/api/=0.1,/api/inventory/=0.5"
+ACTION_LOG_SAMPLE_RATE = config('ACTION_LOG_SAMPLE_RATE', default=1.0, cast=float)
+ACTION_LOG_SAMPLING = config('ACTION_LOG_SAMPLING', default='', cast=Csv())
+
+# Instrumentation des requêtes (project.middleware.RequestMetricsMiddleware)
+# Désactivée par défaut ; export Prometheus sur /api/_metrics (jeton ou session staff)
+REQUEST_METRICS_ENABLED = config('REQUEST_METRICS_ENABLED', default=False, cast=bool)
+REQUEST_METRICS_TOKEN = config('REQUEST_METRICS_TOKEN', default='')
+REQUEST_METRICS_SERVER_TIMING = config('REQUEST_METRICS_SERVER_TIMING', default=True, cast=bool)
+REQUEST_METRICS_WINDOW_SECONDS = config('REQUEST_METRICS_WINDOW_SECONDS', default=600, cast=int)
+REQUEST_METRICS_EXCLUDED_PATHS = config('REQUEST_METRICS_EXCLUDED_PATHS', default='/api/_metrics,/static/,/media/', cast=Csv())
+
+# DataTables : requête SQL pendant la sérialisation d'un serializer déclarant
+# ses data_requirements -> LazyQueryError (apps.core.datatables.requirements)
+DATATABLES_STRICT_DATA_REQUIREMENTS = config('DATATABLES_STRICT_DATA_REQUIREMENTS', default=DEBUG, cast=bool)
+
+# Écart stock théorique : consolidation NumPy ("columnar") ou par
+# dictionnaires ("python", implémentation historique)
+STOCK_GAP_ENGINE = config('STOCK_GAP_ENGINE', default='columnar')
+
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
@@ -579,12 +684,20 @@ SWAGGER_SETTINGS = {
     'DEFAULT_MODEL_RENDERING': 'example',
     'DEEP_LINKING': True,
     'DISPLAY_OPERATION_ID': False,
-    'DEFAULT_INFO': 'project.urls.api_info',
+    'DEFAULT_INFO': 'project.openapi.API_INFO',
+    # Schéma pré-généré (build_openapi_schema) servi par project.openapi.openapi_schema_view
+    'SPEC_URL': 'schema-json',
     'SCHEME': 'http',
 }
 
+# Schéma OpenAPI pré-généré par déploiement (python manage.py build_openapi_schema)
+OPENAPI_SCHEMA_DIR = config('OPENAPI_SCHEMA_DIR', default=os.path.join(BASE_DIR, 'data', 'openapi'))
+# Sans artefact : génération à la volée (développement) ou 503
+OPENAPI_SCHEMA_RUNTIME = config('OPENAPI_SCHEMA_RUNTIME', default=DEBUG, cast=bool)
+
 # Redoc settings (alternative à Swagger)
 REDOC_SETTINGS = {
+    'SPEC_URL': 'schema-json',
     'LAZY_RENDERING': False,
     'HIDE_HOSTNAME': False,
     'EXPAND_RESPONSES': '200,201',
@@ -7,38 +7,11 @@ The `urlpatterns` list routes URLs to views. For more information please see:
 from django.contrib import admin
 from django.urls import include, path
 from django.contrib.auth import views as auth_views
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
 from django.views.i18n import set_language
 from django.conf import settings
 from django.conf.urls.static import static
-from .api_info import api_info
-
-schema_view = get_schema_view(
-    openapi.Info(
-        title=api_info['title'],
-        default_version=api_info['version'],
-        description=api_info['description'],
-        contact=openapi.Contact(
-            name=api_info['contact']['name'],
-            email=api_info['contact']['email']
-        ),
-        license=openapi.License(
-            name=api_info['license']['name'],
-            url=api_info['license']['url']
-        ),
-        terms_of_service=api_info['termsOfService'],
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-    patterns=[
-        path('web/api/', include('apps.inventory.urls')),
-        path('mobile/api/', include('apps.mobile.urls')),
-        path('api/auth/', include('apps.users.urls')),
-        path('masterdata/api/', include('apps.masterdata.urls')),
-    ],
-)
+from .openapi import openapi_schema_view, schema_view
+from .views import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -47,11 +20,13 @@ urlpatterns = [
     path('api/auth/', include('apps.users.urls')),
     path('masterdata/api/', include('apps.masterdata.urls')),
     path('set_language/', set_language, name='set_language'),
+    path('api/_metrics', metrics_view, name='request-metrics'),
     
     # Documentation API
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
-    path('swagger.json', schema_view.without_ui(cache_timeout=0), name='schema-json'),
+    # Schéma pré-généré (build_openapi_schema), servi avec ETag
+    path('swagger.json', openapi_schema_view, name='schema-json'),
 ]
 
 # Ajout des URLs pour les fichiers statiques et médias en mode développement
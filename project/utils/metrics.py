@@ -0,0 +1,182 @@
+"""
+Métriques de requêtes en mémoire (par processus) et export au format texte Prometheus.
+
+Chaque observation est rangée dans un histogramme glissant : la fenêtre
+(REQUEST_METRICS_WINDOW_SECONDS) est découpée en tranches ; les tranches
+expirées sont recyclées, de sorte que l'export reflète uniquement
+l'activité récente, sans croissance mémoire.
+"""
+import threading
+import time
+from bisect import bisect_left
+
+
+# Bornes supérieures des buckets (le bucket +Inf est implicite)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+METRIC_PREFIX = 'wms'
+
+HISTOGRAMS = {
+    'request_duration_seconds': ('Durée totale de la requête', DURATION_BUCKETS),
+    'request_db_queries': ('Nombre de requêtes SQL par requête HTTP', QUERY_COUNT_BUCKETS),
+    'request_db_seconds': ('Temps passé en base par requête HTTP', DURATION_BUCKETS),
+    'request_render_seconds': ('Temps de sérialisation / rendu de la réponse', DURATION_BUCKETS),
+    'response_size_bytes': ('Taille du corps de la réponse', SIZE_BUCKETS),
+}
+
+
+class RollingHistogram:
+    """
+    Histogramme sur fenêtre glissante.
+
+    Args:
+        buckets: Bornes supérieures croissantes des buckets.
+        window_seconds: Durée couverte par l'histogramme.
+        slots: Nombre de tranches de la fenêtre (précision du glissement).
+    """
+
+    def __init__(self, buckets, window_seconds=600, slots=10, clock=time.monotonic):
+        self.buckets = tuple(buckets)
+        self.slot_seconds = window_seconds / slots
+        self.clock = clock
+        # Chaque tranche : [index de tranche, compteurs par bucket (+Inf inclus), somme, total]
+        self._slots = [[-1, [0] * (len(self.buckets) + 1), 0.0, 0] for _ in range(slots)]
+
+    def observe(self, value):
+        slot = self._current_slot()
+        slot[1][bisect_left(self.buckets, value)] += 1
+        slot[2] += value
+        slot[3] += 1
+
+    def snapshot(self):
+        """
+        Agrège les tranches encore dans la fenêtre.
+
+        Returns:
+            tuple: (compteurs cumulés par bucket, +Inf inclus ; somme ; total)
+        """
+        oldest = self._slot_index() - len(self._slots) + 1
+        counts = [0] * (len(self.buckets) + 1)
+        total_sum = 0.0
+        total = 0
+        for index, slot_counts, slot_sum, slot_total in self._slots:
+            if index < oldest:
+                continue
+            for position, value in enumerate(slot_counts):
+                counts[position] += value
+            total_sum += slot_sum
+            total += slot_total
+
+        cumulative = []
+        running = 0
+        for value in counts:
+            running += value
+            cumulative.append(running)
+        return cumulative, total_sum, total
+
+    def _slot_index(self):
+        return int(self.clock() // self.slot_seconds)
+
+    def _current_slot(self):
+        index = self._slot_index()
+        slot = self._slots[index % len(self._slots)]
+        if slot[0] != index:
+            slot[0] = index
+            slot[1] = [0] * (len(self.buckets) + 1)
+            slot[2] = 0.0
+            slot[3] = 0
+        return slot
+
+
+class RequestMetricsRegistry:
+    """Registre des métriques par vue (nom de route) et méthode HTTP."""
+
+    def __init__(self, window_seconds=600, slots=10):
+        self.window_seconds = window_seconds
+        self.slots = slots
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._requests_total = {}
+
+    def observe(self, view, method, status_code, duration, query_count, db_seconds, render_seconds, response_bytes):
+        values = {
+            'request_duration_seconds': duration,
+            'request_db_queries': query_count,
+            'request_db_seconds': db_seconds,
+            'request_render_seconds': render_seconds,
+            'response_size_bytes': response_bytes,
+        }
+        with self._lock:
+            for name, value in values.items():
+                if value is None:
+                    continue
+                key = (name, view, method)
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = RollingHistogram(
+                        HISTOGRAMS[name][1], self.window_seconds, self.slots
+                    )
+                histogram.observe(value)
+            counter_key = (view, method, str(status_code))
+            self._requests_total[counter_key] = self._requests_total.get(counter_key, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+            self._requests_total = {}
+
+    def render_prometheus(self):
+        """Export au format d'exposition texte Prometheus (version 0.0.4)."""
+        lines = []
+        with self._lock:
+            name = f'{METRIC_PREFIX}_requests_total'
+            lines.append(f'# HELP {name} Nombre de requêtes HTTP traitées depuis le démarrage du processus')
+            lines.append(f'# TYPE {name} counter')
+            for (view, method, status_code), value in sorted(self._requests_total.items()):
+                lines.append(f'{name}{{{_labels(view=view, method=method, status=status_code)}}} {value}')
+
+            for metric, (description, buckets) in HISTOGRAMS.items():
+                name = f'{METRIC_PREFIX}_{metric}'
+                lines.append(f'# HELP {name} {description} (fenêtre glissante de {self.window_seconds:g}s)')
+                lines.append(f'# TYPE {name} histogram')
+                for (key_name, view, method), histogram in sorted(self._histograms.items()):
+                    if key_name != metric:
+                        continue
+                    cumulative, total_sum, total = histogram.snapshot()
+                    for bound, value in zip(buckets + ('+Inf',), cumulative):
+                        labels = _labels(view=view, method=method, le=_format_number(bound))
+                        lines.append(f'{name}_bucket{{{labels}}} {value}')
+                    labels = _labels(view=view, method=method)
+                    lines.append(f'{name}_sum{{{labels}}} {round(total_sum, 6)}')
+                    lines.append(f'{name}_count{{{labels}}} {total}')
+        return '\n'.join(lines) + '\n'
+
+
+def _format_number(value):
+    if isinstance(value, str):
+        return value
+    return f'{value:g}' if isinstance(value, float) else str(value)
+
+
+def _labels(**labels):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return ','.join(f'{key}="{escape(value)}"' for key, value in labels.items())
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_metrics_registry():
+    """Registre du processus (créé au premier appel avec REQUEST_METRICS_WINDOW_SECONDS)."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            from django.conf import settings
+            _registry = RequestMetricsRegistry(
+                window_seconds=getattr(settings, 'REQUEST_METRICS_WINDOW_SECONDS', 600),
+            )
+        return _registry
@@ -0,0 +1,43 @@
+"""
+Vues transverses du projet.
+"""
+import hmac
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_GET
+
+from project.utils.metrics import get_metrics_registry
+
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _metrics_token(request):
+    authorization = request.META.get('HTTP_AUTHORIZATION', '')
+    if authorization.startswith('Bearer '):
+        return authorization[len('Bearer '):].strip()
+    return request.META.get('HTTP_X_METRICS_TOKEN', '')
+
+
+def _can_read_metrics(request):
+    """Accès : jeton REQUEST_METRICS_TOKEN (scraper Prometheus) ou utilisateur staff (session)."""
+    expected = getattr(settings, 'REQUEST_METRICS_TOKEN', '')
+    if expected and hmac.compare_digest(_metrics_token(request), expected):
+        return True
+    user = getattr(request, 'user', None)
+    return bool(user and user.is_authenticated and user.is_staff)
+
+
+@require_GET
+def metrics_view(request):
+    """
+    Export des métriques de requêtes au format texte Prometheus.
+
+    404 si l'instrumentation est désactivée, 403 sans jeton valide ni session staff.
+    """
+    if not getattr(settings, 'REQUEST_METRICS_ENABLED', False):
+        raise Http404
+    if not _can_read_metrics(request):
+        return HttpResponseForbidden()
+    return HttpResponse(get_metrics_registry().render_prometheus(), content_type=PROMETHEUS_CONTENT_TYPE)